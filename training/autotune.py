@@ -0,0 +1,236 @@
+"""
+Benchmark-basiertes Auto-Tuning für n_envs, n_workers, n_steps und batch_size.
+
+Vorgehen (kurze, zeitlich begrenzte Trials statt kompletter Trainingsläufe):
+1. Rollout: Für jede (Spiele, Worker)-Kombination LeanVecEnv + Policy-Inference
+   laufen lassen und Env-Steps/Sekunde messen.
+2. Update: Für jede batch_size die Zeit eines PPO-Minibatch-Schritts messen.
+3. Für jede gültige (Spiele, Worker, n_steps, batch_size)-Kombination die Zeit
+   pro PPO-Iteration schätzen und die schnellste wählen.
+
+Das Ergebnis landet in einem Cache pro Host (autotune_cache/<host>.json),
+den train.py bei späteren Läufen automatisch verwendet.
+"""
+
+import json
+import platform
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+from config import AUTOTUNE_CONFIG, PPO_CONFIG
+from hardware import detect_cores, plan_cpu_layout, apply_worker_thread_env, apply_cpu_layout
+
+BASE_DIR = Path(__file__).resolve().parent
+DEFAULT_CACHE_DIR = BASE_DIR / "autotune_cache"
+
+
+def cache_path(cache_dir: str | Path = DEFAULT_CACHE_DIR) -> Path:
+    """Cache-Datei für diesen Host."""
+    host = platform.node() or "unknown"
+    return Path(cache_dir) / f"{host}.json"
+
+
+def load_autotune_cache(cache_dir: str | Path = DEFAULT_CACHE_DIR) -> Optional[dict]:
+    """
+    Lädt das beste Tuning-Ergebnis dieses Hosts.
+
+    Returns:
+        Dictionary mit n_envs, n_workers, n_steps, batch_size oder None,
+        wenn kein (zur aktuellen Kernzahl passender) Cache existiert
+    """
+    path = cache_path(cache_dir)
+    if not path.exists():
+        return None
+
+    try:
+        with path.open("r") as f:
+            data = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+
+    # Cache ist an die Hardware gebunden (z.B. andere VM-Größe → neu tunen)
+    if data.get("n_cores") != len(detect_cores()):
+        return None
+    return data.get("best")
+
+
+def is_valid_config(n_envs: int, n_workers: int, n_steps: int, batch_size: int, n_agents: int = 4) -> bool:
+    """Prüft die PPO-Randbedingungen einer Kandidaten-Konfiguration."""
+    rollout_size = n_steps * n_envs * n_agents
+    return (
+        n_workers <= n_envs
+        and batch_size <= rollout_size
+        and rollout_size % batch_size == 0
+    )
+
+
+def _make_policy():
+    """Frische Policy mit der Architektur aus config.py (ohne Env)."""
+    from stable_baselines3.common.policies import ActorCriticPolicy
+    from environment import CaptureTheFlagEnv
+    from train import build_policy_kwargs
+
+    env = CaptureTheFlagEnv()
+    agent = env.possible_agents[0]
+    return ActorCriticPolicy(
+        env.observation_space(agent),
+        env.action_space(agent),
+        lr_schedule=lambda _: PPO_CONFIG["learning_rate"],
+        **build_policy_kwargs(),
+    )
+
+
+def measure_rollout(policy, n_envs: int, n_workers: int, seconds: float, reward_profile: str = "balanced") -> float:
+    """
+    Misst Env-Steps/Sekunde (Agent-Steps wie SB3 total_timesteps) inkl. Policy-Inference.
+    """
+    import torch
+    from lean_vec_env import LeanVecEnv
+    from train import make_env_kwargs
+
+    layout = plan_cpu_layout(n_workers=n_workers)
+    apply_worker_thread_env(layout["worker_threads"])
+    vec_env = LeanVecEnv(n_games=n_envs, n_workers=n_workers, env_kwargs=make_env_kwargs(reward_profile))
+
+    try:
+        apply_cpu_layout(layout, vec_env.worker_pids)
+        torch.set_num_threads(layout["torch_threads"])
+
+        obs = vec_env.reset()
+
+        def run_steps(n):
+            nonlocal obs
+            for _ in range(n):
+                with torch.no_grad():
+                    actions, _, _ = policy(torch.as_tensor(obs))
+                obs, _, _, _ = vec_env.step(actions.numpy())
+
+        run_steps(5)  # Warmup
+
+        steps = 0
+        t0 = time.perf_counter()
+        while time.perf_counter() - t0 < seconds:
+            run_steps(10)
+            steps += 10
+        elapsed = time.perf_counter() - t0
+        return steps * vec_env.num_envs / elapsed
+    finally:
+        vec_env.close()
+
+
+def measure_minibatch(policy, batch_size: int, repeats: int = 20) -> float:
+    """Misst die Zeit eines PPO-Gradientenschritts (Forward, Backward, Optimizer) in Sekunden."""
+    import torch
+
+    obs = torch.rand(batch_size, policy.observation_space.shape[0])
+    actions = torch.randint(0, policy.action_space.n, (batch_size,))
+
+    def gradient_step():
+        values, log_prob, entropy = policy.evaluate_actions(obs, actions)
+        loss = -log_prob.mean() + values.pow(2).mean() - PPO_CONFIG["ent_coef"] * entropy.mean()
+        policy.optimizer.zero_grad()
+        loss.backward()
+        torch.nn.utils.clip_grad_norm_(policy.parameters(), PPO_CONFIG["max_grad_norm"])
+        policy.optimizer.step()
+
+    gradient_step()  # Warmup
+    t0 = time.perf_counter()
+    for _ in range(repeats):
+        gradient_step()
+    return (time.perf_counter() - t0) / repeats
+
+
+def estimate_iteration(env_sps: float, minibatch_s: float, n_envs: int, n_steps: int,
+                       batch_size: int, n_epochs: int, n_agents: int = 4) -> dict:
+    """Schätzt Rollout- und Update-Zeit einer PPO-Iteration."""
+    rollout_size = n_steps * n_envs * n_agents
+    rollout_s = rollout_size / env_sps
+    update_s = n_epochs * (rollout_size // batch_size) * minibatch_s
+    return {
+        "rollout_s": rollout_s,
+        "update_s": update_s,
+        "steps_per_s": rollout_size / (rollout_s + update_s),
+    }
+
+
+def run_autotune(grid: Optional[dict] = None, reward_profile: str = "balanced",
+                 cache_dir: str | Path = DEFAULT_CACHE_DIR) -> dict:
+    """
+    Führt alle Trials aus, wählt die schnellste Konfiguration und schreibt den Host-Cache.
+
+    Args:
+        grid: Overrides für AUTOTUNE_CONFIG (games, workers, n_steps, batch_size, trial_seconds)
+    """
+    import torch
+
+    grid = {**AUTOTUNE_CONFIG, **(grid or {})}
+    n_epochs = PPO_CONFIG["n_epochs"]
+    policy = _make_policy()
+
+    print("=" * 60)
+    print("⚡ AUTOTUNE: Rollout- und Update-Trials")
+    print("=" * 60)
+
+    # 1. Rollout-Durchsatz pro (Spiele, Worker)
+    rollout = {}
+    for n_envs in grid["games"]:
+        for n_workers in grid["workers"]:
+            if n_workers > n_envs:
+                continue
+            sps = measure_rollout(policy, n_envs, n_workers, grid["trial_seconds"], reward_profile)
+            rollout[(n_envs, n_workers)] = sps
+            print(f"  Rollout  games={n_envs:3d} workers={n_workers:3d}: {sps:9,.0f} steps/s")
+
+    # 2. Update-Kosten pro batch_size (Learner-Threads wie im Training)
+    torch.set_num_threads(plan_cpu_layout(n_workers=max(grid["workers"]))["torch_threads"])
+    minibatch = {}
+    for batch_size in grid["batch_size"]:
+        minibatch[batch_size] = measure_minibatch(policy, batch_size)
+        print(f"  Update   batch_size={batch_size:5d}: {minibatch[batch_size] * 1000:7.2f} ms/Minibatch")
+
+    # 3. Alle gültigen Kombinationen bewerten
+    trials = []
+    for (n_envs, n_workers), sps in rollout.items():
+        for n_steps in grid["n_steps"]:
+            for batch_size in grid["batch_size"]:
+                if not is_valid_config(n_envs, n_workers, n_steps, batch_size):
+                    continue
+                estimate = estimate_iteration(sps, minibatch[batch_size], n_envs, n_steps, batch_size, n_epochs)
+                trials.append({
+                    "n_envs": n_envs,
+                    "n_workers": n_workers,
+                    "n_steps": n_steps,
+                    "batch_size": batch_size,
+                    "env_steps_per_s": sps,
+                    "minibatch_s": minibatch[batch_size],
+                    **estimate,
+                })
+
+    if not trials:
+        raise ValueError("Autotune grid contains no valid configuration (check n_steps × n_envs % batch_size)")
+
+    trials.sort(key=lambda t: t["steps_per_s"], reverse=True)
+    best = trials[0]
+
+    result = {
+        "host": platform.node(),
+        "n_cores": len(detect_cores()),
+        "created": datetime.now().isoformat(),
+        "best": {key: best[key] for key in ("n_envs", "n_workers", "n_steps", "batch_size")},
+        "trials": trials,
+    }
+
+    path = cache_path(cache_dir)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("w") as f:
+        json.dump(result, f, indent=2)
+
+    print("\n🏁 Beste Konfiguration:")
+    print(f"   n_envs={best['n_envs']} | n_workers={best['n_workers']} | "
+          f"n_steps={best['n_steps']} | batch_size={best['batch_size']}")
+    print(f"   ~{best['steps_per_s']:,.0f} steps/s (Rollout {best['rollout_s']:.1f}s + Update {best['update_s']:.1f}s pro Iteration)")
+    print(f"   Cache: {path}")
+
+    return result
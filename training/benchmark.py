@@ -0,0 +1,350 @@
+"""
+Benchmark-Suite für Simulation und Training-Infrastruktur.
+
+Nutzung:
+    python benchmark.py startup --workers 16
+    python benchmark.py startup --workers 16 --compare-supersuit
+    python benchmark.py rollout models/X/Night_200M.zip --episodes 8
+    python benchmark.py selfplay models/X/Night_200M.zip --games 16 --versions 4
+    python benchmark.py policy models/X/Night_200M.zip
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+from hardware import process_rss_mb
+
+
+def bench_worker_startup(n_workers: int, games_per_worker: int = 1, reward_profile: str = "balanced") -> dict:
+    """
+    Misst Startzeit und RSS der schlanken Env-Worker (LeanVecEnv).
+
+    Returns:
+        Dictionary mit Gesamt-Startzeit, Startzeit & RSS pro Worker
+    """
+    from lean_vec_env import LeanVecEnv
+
+    t0 = time.perf_counter()
+    vec_env = LeanVecEnv(
+        n_games=n_workers * games_per_worker,
+        n_workers=n_workers,
+        env_kwargs={"reward_profile": reward_profile},
+    )
+    total = time.perf_counter() - t0
+
+    try:
+        rss = [process_rss_mb(pid) or 0.0 for pid in vec_env.worker_pids]
+        return {
+            "backend": "lean",
+            "n_workers": n_workers,
+            "startup_s": total,
+            "worker_startup_s": [s["startup_s"] for s in vec_env.worker_stats],
+            "worker_rss_mb": rss,
+        }
+    finally:
+        vec_env.close()
+
+
+def bench_supersuit_startup(n_workers: int, reward_profile: str = "balanced") -> dict:
+    """Vergleichsmessung: bisheriger supersuit concat_vec_envs_v1 Pfad."""
+    from supersuit import pettingzoo_env_to_vec_env_v1, concat_vec_envs_v1
+    from train import make_env
+
+    t0 = time.perf_counter()
+    vec_env = pettingzoo_env_to_vec_env_v1(make_env(reward_profile=reward_profile))
+    vec_env = concat_vec_envs_v1(vec_env, n_workers, num_cpus=n_workers, base_class="stable_baselines3")
+    vec_env.reset()  # Erst nach dem ersten Roundtrip sind alle Worker sicher bereit
+    total = time.perf_counter() - t0
+
+    try:
+        procs = getattr(vec_env.venv, "procs", [])
+        return {
+            "backend": "supersuit",
+            "n_workers": n_workers,
+            "startup_s": total,
+            "worker_startup_s": [],
+            "worker_rss_mb": [process_rss_mb(p.pid) or 0.0 for p in procs],
+        }
+    finally:
+        vec_env.close()
+
+
+def _rollout_per_agent(model, seed: int, env_kwargs: dict) -> dict:
+    """Referenz: bisheriger Pfad mit einem predict()-Aufruf pro Agent und Schritt."""
+    from environment import CaptureTheFlagEnv
+
+    env = CaptureTheFlagEnv(**env_kwargs)
+    obs, _ = env.reset(seed=seed)
+    done = False
+    while not done:
+        actions = {}
+        for agent in env.agents:
+            action, _ = model.predict(obs[agent], deterministic=True)
+            actions[agent] = int(action)
+        obs, _, terms, truncs, _ = env.step(actions)
+        done = all(terms[a] or truncs[a] for a in env.agents)
+    return env.get_replay_data()
+
+
+def bench_rollout(model_path: str, n_episodes: int = 8, seed: int = 42, reward_profile: str = "balanced") -> dict:
+    """
+    Vergleicht Replay-Rollouts: pro Agent vs. gebatcht (1 Episode und n_episodes parallel).
+
+    Returns:
+        Dictionary mit Sekunden pro Episode je Variante und ob die Replays identisch sind
+    """
+    from stable_baselines3 import PPO
+    from rollout import rollout_episodes
+
+    model = PPO.load(model_path, device="cpu")
+    env_kwargs = {"reward_profile": reward_profile}
+    seeds = [seed + i for i in range(n_episodes)]
+
+    t0 = time.perf_counter()
+    reference = [_rollout_per_agent(model, s, env_kwargs) for s in seeds]
+    per_agent_s = (time.perf_counter() - t0) / n_episodes
+
+    t0 = time.perf_counter()
+    single = [rollout_episodes(model, seeds=[s], env_kwargs=env_kwargs)[0] for s in seeds]
+    batched_single_s = (time.perf_counter() - t0) / n_episodes
+
+    t0 = time.perf_counter()
+    concurrent = rollout_episodes(model, n_episodes, seeds=seeds, env_kwargs=env_kwargs)
+    batched_concurrent_s = (time.perf_counter() - t0) / n_episodes
+
+    return {
+        "model": model_path,
+        "n_episodes": n_episodes,
+        "per_agent_s": per_agent_s,
+        "batched_single_s": batched_single_s,
+        "batched_concurrent_s": batched_concurrent_s,
+        "identical": all(
+            ref["frames"] == a["frames"] == b["frames"] for ref, a, b in zip(reference, single, concurrent)
+        ),
+    }
+
+
+def bench_self_play(model_path: str, n_games: int = 16, n_versions: int = 4, n_steps: int = 500,
+                    reward_profile: str = "balanced") -> dict:
+    """
+    Durchsatz beim Sammeln: Learner steuert beide Teams vs. Rot aus dem Gegner-Pool.
+
+    Beide Varianten: LeanVecEnv mit n_games Spielen, ein Learner-predict() pro Schritt;
+    im Pool-Modus zusätzlich ein predict() pro Gegner-Version.
+
+    Returns:
+        Dictionary mit Spiel-Schritten/s und Learner-Transitions/s je Variante
+    """
+    from stable_baselines3 import PPO
+    from lean_vec_env import LeanVecEnv
+    from self_play import OpponentPool, SelfPlayVecEnv
+
+    model = PPO.load(model_path, device="cpu")
+    pool = OpponentPool(max_size=n_versions)
+    for version in range(n_versions):
+        pool.add_snapshot(model.policy, f"v{version}")
+
+    def collect(vec_env) -> float:
+        obs = vec_env.reset()
+        t0 = time.perf_counter()
+        for _ in range(n_steps):
+            actions, _ = model.predict(obs, deterministic=False)
+            obs, _, _, _ = vec_env.step(actions)
+        return time.perf_counter() - t0
+
+    env_kwargs = {"reward_profile": reward_profile}
+    plain_env = LeanVecEnv(n_games=n_games, env_kwargs=env_kwargs)
+    try:
+        plain_s = collect(plain_env)
+        plain_slots = plain_env.num_envs
+    finally:
+        plain_env.close()
+
+    pool_env = SelfPlayVecEnv(LeanVecEnv(n_games=n_games, env_kwargs=env_kwargs), pool, seed=0)
+    try:
+        pool_s = collect(pool_env)
+        pool_slots = pool_env.num_envs
+    finally:
+        pool_env.close()
+
+    game_steps = n_games * n_steps
+    return {
+        "model": model_path,
+        "n_games": n_games,
+        "n_versions": n_versions,
+        "plain_game_steps_s": game_steps / plain_s,
+        "pool_game_steps_s": game_steps / pool_s,
+        "plain_transitions_s": plain_slots * n_steps / plain_s,
+        "pool_transitions_s": pool_slots * n_steps / pool_s,
+    }
+
+
+def print_self_play_result(result: dict) -> None:
+    plain, pool = result["plain_game_steps_s"], result["pool_game_steps_s"]
+    print(f"\n[SELF-PLAY] {result['model']} ({result['n_games']} Spiele, {result['n_versions']} Gegner-Versionen)")
+    print(f"  Learner beide Teams:   {plain:8.0f} Spiel-Schritte/s | {result['plain_transitions_s']:8.0f} Transitions/s")
+    print(f"  Gegner-Pool (Rot):     {pool:8.0f} Spiel-Schritte/s | {result['pool_transitions_s']:8.0f} Transitions/s")
+    print(f"  Kosten Simulation:     {(1 - pool / plain) * 100:+.1f}% Spiel-Schritte/s")
+    print(f"  Kosten Lerndaten:      {(1 - result['pool_transitions_s'] / result['plain_transitions_s']) * 100:+.1f}% "
+          f"Transitions/s (Rot wird nicht gelernt)")
+
+
+# Kaltstart in frischem Prozess: Import + Laden + ein predict(), RSS danach (Linux /proc)
+_COLD_START_SCRIPT = """
+import json, sys, time
+t0 = time.perf_counter()
+import numpy as np
+if sys.argv[1] == "numpy":
+    from numpy_policy import NumpyPolicy
+    model = NumpyPolicy.load(sys.argv[2])
+else:
+    from stable_baselines3 import PPO
+    model = PPO.load(sys.argv[2], device="cpu")
+t_import = time.perf_counter() - t0
+model.predict(np.zeros((4, 31), dtype=np.float32), deterministic=True)
+t_first = time.perf_counter() - t0
+rss_kb = next(int(line.split()[1]) for line in open("/proc/self/status") if line.startswith("VmRSS:"))
+print(json.dumps({"import_load_s": t_import, "first_predict_s": t_first, "rss_mb": rss_kb / 1024}))
+"""
+
+
+def _cold_start(backend: str, path: str) -> dict:
+    output = subprocess.run([sys.executable, "-c", _COLD_START_SCRIPT, backend, path],
+                            capture_output=True, text=True, check=True, cwd=str(Path(__file__).resolve().parent))
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+
+def bench_policy(model_path: str, batch_sizes=(1, 4, 16, 64, 256, 1024), repeats: int = 200) -> dict:
+    """
+    NumPy-Policy und int8-Policy vs. SB3/torch: Kaltstart (Import + Laden) und Latenz pro predict()-Batch.
+
+    Returns:
+        Dictionary mit Kaltstart-Messungen und Millisekunden pro Batch je Batchgröße
+    """
+    import torch
+    from stable_baselines3 import PPO
+    from numpy_policy import NumpyPolicy, find_numpy_policy, verify_against_torch
+    from quantization import load_policy
+
+    npz_path = find_numpy_policy(model_path)
+    if npz_path is None:
+        raise FileNotFoundError(f"No converted policy for {model_path} (run numpy_policy.py first)")
+
+    torch.set_num_threads(1)
+    model = PPO.load(model_path, device="cpu")
+    numpy_policy = NumpyPolicy.load(npz_path)
+    int8_policy = load_policy(model_path, mode="int8", min_agreement=0.0)
+    rng = np.random.default_rng(0)
+
+    latency = []
+    for batch_size in batch_sizes:
+        obs = rng.uniform(-1, 2, size=(batch_size, 31)).astype(np.float32)
+        row = {"batch_size": batch_size}
+        for name, predictor in (("torch_ms", model), ("numpy_ms", numpy_policy), ("int8_ms", int8_policy)):
+            predictor.predict(obs, deterministic=True)  # Warmup
+            t0 = time.perf_counter()
+            for _ in range(repeats):
+                predictor.predict(obs, deterministic=True)
+            row[name] = (time.perf_counter() - t0) / repeats * 1000
+        latency.append(row)
+
+    return {
+        "model": model_path,
+        "npz": str(npz_path),
+        "cold_torch": _cold_start("torch", model_path),
+        "cold_numpy": _cold_start("numpy", str(npz_path)),
+        "latency": latency,
+        "verify": verify_against_torch(model_path, npz_path),
+        "int8_agreement": int8_policy.agreement,
+    }
+
+
+def print_policy_result(result: dict) -> None:
+    cold_torch, cold_numpy = result["cold_torch"], result["cold_numpy"]
+    print(f"\n[POLICY] {result['model']} vs. {result['npz']}")
+    print(f"  Kaltstart torch/SB3:  {cold_torch['import_load_s']:.2f}s Import+Laden | "
+          f"{cold_torch['first_predict_s']:.2f}s bis 1. Aktion | RSS {cold_torch['rss_mb']:.0f} MB")
+    print(f"  Kaltstart NumPy:      {cold_numpy['import_load_s']:.2f}s Import+Laden | "
+          f"{cold_numpy['first_predict_s']:.2f}s bis 1. Aktion | RSS {cold_numpy['rss_mb']:.0f} MB")
+    print(f"  {'Batch':>6} {'torch ms':>10} {'NumPy ms':>10} {'Speedup':>8} {'int8 ms':>10} {'Speedup':>8}")
+    for row in result["latency"]:
+        print(f"  {row['batch_size']:>6} {row['torch_ms']:>10.3f} {row['numpy_ms']:>10.3f} "
+              f"{row['torch_ms'] / row['numpy_ms']:>7.1f}x {row['int8_ms']:>10.3f} "
+              f"{row['torch_ms'] / row['int8_ms']:>7.1f}x")
+    verify = result["verify"]
+    print(f"  Abweichung: max |Δlogit| = {verify['max_abs_diff']:.2e}, "
+          f"argmax-Übereinstimmung {verify['action_agreement']:.2%}")
+    print(f"  int8: argmax-Übereinstimmung mit float auf Episoden-Zuständen {result['int8_agreement']:.2%}")
+
+
+def print_rollout_result(result: dict) -> None:
+    base = result["per_agent_s"]
+    print(f"\n[ROLLOUT] {result['model']} ({result['n_episodes']} Episoden)")
+    print(f"  Pro Agent (alt):          {base:.3f}s/Episode")
+    print(f"  Gebatcht, 1 Episode:      {result['batched_single_s']:.3f}s/Episode "
+          f"({base / result['batched_single_s']:.1f}x)")
+    print(f"  Gebatcht, {result['n_episodes']:2d} parallel:     {result['batched_concurrent_s']:.3f}s/Episode "
+          f"({base / result['batched_concurrent_s']:.1f}x)")
+    print(f"  Replays identisch:        {'ja' if result['identical'] else 'NEIN'}")
+
+
+def print_startup_result(result: dict) -> None:
+    """Gibt ein Startup-Ergebnis aus."""
+    rss = result["worker_rss_mb"]
+    print(f"\n[{result['backend'].upper()}] {result['n_workers']} Worker")
+    print(f"  Startzeit gesamt:   {result['startup_s']:.3f}s")
+    if result["worker_startup_s"]:
+        print(f"  Startzeit/Worker:   {np.mean(result['worker_startup_s']):.3f}s "
+              f"(max {np.max(result['worker_startup_s']):.3f}s)")
+    if rss:
+        print(f"  RSS/Worker:         {np.mean(rss):.1f} MB (Summe {np.sum(rss):.0f} MB)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="CTF Benchmark Suite")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    p_startup = subparsers.add_parser("startup", help="Startzeit und RSS der Env-Worker")
+    p_startup.add_argument("--workers", type=int, default=16)
+    p_startup.add_argument("--games-per-worker", type=int, default=1)
+    p_startup.add_argument("--compare-supersuit", action="store_true",
+                           help="Zusätzlich den alten supersuit-Pfad messen (importiert torch)")
+
+    p_rollout = subparsers.add_parser("rollout", help="Replay-Rollouts: pro Agent vs. gebatcht")
+    p_rollout.add_argument("models", nargs="+", help="Modell-Zips (z.B. models/X/Night_200M.zip)")
+    p_rollout.add_argument("--episodes", type=int, default=8)
+    p_rollout.add_argument("--seed", type=int, default=42)
+
+    p_self_play = subparsers.add_parser("selfplay", help="Sammel-Durchsatz: Self-Play vs. Gegner-Pool")
+    p_self_play.add_argument("model", help="Modell-Zip für Learner und Gegner-Versionen")
+    p_self_play.add_argument("--games", type=int, default=16)
+    p_self_play.add_argument("--versions", type=int, default=4)
+    p_self_play.add_argument("--steps", type=int, default=500)
+
+    p_policy = subparsers.add_parser("policy", help="NumPy-/int8-Policy vs. torch: Kaltstart und Latenz pro Batch")
+    p_policy.add_argument("models", nargs="+", help="Modell-Zips mit konvertierter .npz daneben")
+
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("CTF BENCHMARK")
+    print("=" * 60)
+
+    if args.command == "startup":
+        print_startup_result(bench_worker_startup(args.workers, args.games_per_worker))
+        if args.compare_supersuit:
+            print_startup_result(bench_supersuit_startup(args.workers))
+    elif args.command == "rollout":
+        for model_path in args.models:
+            print_rollout_result(bench_rollout(model_path, args.episodes, args.seed))
+    elif args.command == "selfplay":
+        print_self_play_result(bench_self_play(args.model, args.games, args.versions, args.steps))
+    elif args.command == "policy":
+        for model_path in args.models:
+            print_policy_result(bench_policy(model_path))
@@ -0,0 +1,397 @@
+"""
+Asynchrones Checkpointing mit Retention-Policy und optionaler Delta-Speicherung.
+
+Ablauf pro Checkpoint:
+1. Hauptthread: Snapshot im Speicher (Modell-Attribute als JSON, Parameter und
+   Optimizer-State als Kopie) - das ist der einzige Teil, der das Training anhält
+2. Hintergrund-Thread: Datei schreiben, Manifest aktualisieren, Retention anwenden
+
+Dateien im Modell-Ordner:
+    <run>_<steps>_steps.zip         # Voll-Checkpoint (normales SB3-Format)
+    <run>_<steps>_steps.delta.npz   # Delta gegen den letzten Meilenstein (optional)
+    <run>_checkpoints.json          # Manifest (Steps, Datei, Typ, Reward, Meilenstein)
+
+Deltas sind verlustfrei: Die float32-Bits werden mit dem Meilenstein XOR-verknüpft,
+byteweise umsortiert und komprimiert. Kleine Parameteränderungen ergeben dabei fast
+nur Null-Bytes. load_checkpoint() lädt beide Formate.
+"""
+
+import copy
+import io
+import json
+import os
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+import torch
+import stable_baselines3 as sb3
+from stable_baselines3 import PPO
+from stable_baselines3.common.callbacks import BaseCallback
+from stable_baselines3.common.save_util import data_to_json
+from stable_baselines3.common.utils import get_system_info
+
+from config import CHECKPOINT_CONFIG
+from metrics_stream import write_json_atomic
+
+DELTA_SUFFIX = ".delta.npz"
+
+
+# ========== SNAPSHOT & ZIP ==========
+
+def snapshot_model(model) -> dict:
+    """
+    Erfasst alles, was model.save() schreiben würde, als unabhängige Kopie im Speicher.
+
+    Die JSON-Serialisierung passiert hier (ep_info_buffer etc. ändern sich im Training),
+    Kompression und Schreiben übernimmt danach der Hintergrund-Thread.
+    """
+    data = model.__dict__.copy()
+    exclude = set(model._excluded_save_params())
+    state_dict_names, torch_variable_names = model._get_torch_save_params()
+    for name in state_dict_names + torch_variable_names:
+        exclude.add(name.split(".")[0])
+    for name in exclude:
+        data.pop(name, None)
+
+    pytorch_variables = {}
+    for name in torch_variable_names:
+        obj = model
+        for attr in name.split("."):
+            obj = getattr(obj, attr)
+        pytorch_variables[name] = obj
+
+    return {
+        "data": data_to_json(data),
+        "params": copy.deepcopy(model.get_parameters()),
+        "pytorch_variables": copy.deepcopy(pytorch_variables),
+    }
+
+
+def write_zip(target, snapshot: dict) -> None:
+    """Schreibt einen Snapshot im SB3-Zip-Format (wie save_util.save_to_zip_file)."""
+    with zipfile.ZipFile(target, mode="w") as archive:
+        archive.writestr("data", snapshot["data"])
+        with archive.open("pytorch_variables.pth", mode="w", force_zip64=True) as f:
+            torch.save(snapshot["pytorch_variables"], f)
+        for name, state_dict in snapshot["params"].items():
+            with archive.open(name + ".pth", mode="w", force_zip64=True) as f:
+                torch.save(state_dict, f)
+        archive.writestr("_stable_baselines3_version", sb3.__version__)
+        archive.writestr("system_info.txt", get_system_info(print_info=False)[1])
+
+
+def read_zip_snapshot(path: str | Path) -> dict:
+    """Liest einen Voll-Checkpoint als Snapshot (Gegenstück zu write_zip)."""
+    snapshot = {"params": {}, "pytorch_variables": {}}
+    with zipfile.ZipFile(path) as archive:
+        snapshot["data"] = archive.read("data").decode()
+        for name in archive.namelist():
+            if not name.endswith(".pth"):
+                continue
+            with archive.open(name) as f:
+                value = torch.load(io.BytesIO(f.read()), map_location="cpu")
+            if name == "pytorch_variables.pth":
+                snapshot["pytorch_variables"] = value
+            else:
+                snapshot["params"][name[:-len(".pth")]] = value
+    return snapshot
+
+
+# ========== DELTA-KODIERUNG ==========
+
+def flatten_tensors(obj, prefix: str = "", out: Optional[Dict[str, np.ndarray]] = None):
+    """
+    Trennt verschachtelte State-Dicts in (Skelett, {Pfad: Array}).
+    Im Skelett stehen Tensoren als {"__tensor__": Pfad}.
+    """
+    if out is None:
+        out = {}
+    if torch.is_tensor(obj):
+        out[prefix] = obj.detach().cpu().numpy()
+        return {"__tensor__": prefix}, out
+    if isinstance(obj, dict):
+        return {key: flatten_tensors(value, f"{prefix}/{key}", out)[0] for key, value in obj.items()}, out
+    if isinstance(obj, (list, tuple)):
+        items = [flatten_tensors(value, f"{prefix}/{i}", out)[0] for i, value in enumerate(obj)]
+        return (items if isinstance(obj, list) else tuple(items)), out
+    return obj, out
+
+
+def unflatten_tensors(skeleton, arrays: Dict[str, np.ndarray]):
+    """Gegenstück zu flatten_tensors."""
+    if isinstance(skeleton, dict) and "__tensor__" in skeleton:
+        return torch.from_numpy(np.array(arrays[skeleton["__tensor__"]]))
+    if isinstance(skeleton, dict):
+        return {key: unflatten_tensors(value, arrays) for key, value in skeleton.items()}
+    if isinstance(skeleton, list):
+        return [unflatten_tensors(value, arrays) for value in skeleton]
+    if isinstance(skeleton, tuple):
+        return tuple(unflatten_tensors(value, arrays) for value in skeleton)
+    return skeleton
+
+
+def _xor_shuffle(current: np.ndarray, base: np.ndarray) -> np.ndarray:
+    """XOR der Bitmuster, danach Byte-Ebenen hintereinander (komprimiert deutlich besser)."""
+    itemsize = current.dtype.itemsize
+    xor = current.reshape(-1).view(f"u{itemsize}") ^ base.reshape(-1).view(f"u{itemsize}")
+    return np.ascontiguousarray(xor.view(np.uint8).reshape(-1, itemsize).T).ravel()
+
+
+def _xor_unshuffle(planes: np.ndarray, base: np.ndarray) -> np.ndarray:
+    itemsize = base.dtype.itemsize
+    xor = np.ascontiguousarray(planes.reshape(itemsize, -1).T).view(f"u{itemsize}").reshape(-1)
+    return (xor ^ base.reshape(-1).view(f"u{itemsize}")).view(base.dtype).reshape(base.shape)
+
+
+def encode_delta(arrays: Dict[str, np.ndarray], base: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """Kodiert Arrays gegen eine Basis; nicht passende Arrays werden roh gespeichert."""
+    encoded = {}
+    for key, value in arrays.items():
+        ref = base.get(key)
+        if ref is not None and ref.shape == value.shape and ref.dtype == value.dtype and value.dtype.kind == "f":
+            encoded["x:" + key] = _xor_shuffle(value, ref)
+        else:
+            encoded["r:" + key] = value
+    return encoded
+
+
+def decode_delta(encoded: Dict[str, np.ndarray], base: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    arrays = {}
+    for key, value in encoded.items():
+        kind, name = key[:2], key[2:]
+        arrays[name] = _xor_unshuffle(value, base[name]) if kind == "x:" else value
+    return arrays
+
+
+def write_delta(path: str | Path, snapshot: dict, base_path: str | Path, base_arrays: Dict[str, np.ndarray]) -> None:
+    """Schreibt einen Snapshot als komprimiertes Delta gegen einen Voll-Checkpoint."""
+    skeleton, arrays = flatten_tensors({"params": snapshot["params"],
+                                        "pytorch_variables": snapshot["pytorch_variables"]})
+    meta_buffer = io.BytesIO()
+    torch.save(skeleton, meta_buffer)
+
+    encoded = encode_delta(arrays, base_arrays)
+    with open(path, "wb") as f:
+        np.savez_compressed(
+            f,
+            __data__=np.frombuffer(snapshot["data"].encode(), dtype=np.uint8),
+            __skeleton__=np.frombuffer(meta_buffer.getvalue(), dtype=np.uint8),
+            __base__=np.array(Path(base_path).name),
+            **encoded,
+        )
+
+
+def snapshot_arrays(snapshot: dict) -> Dict[str, np.ndarray]:
+    """Flache Array-Sicht eines Snapshots (Basis für Deltas)."""
+    return flatten_tensors({"params": snapshot["params"],
+                            "pytorch_variables": snapshot["pytorch_variables"]})[1]
+
+
+def read_delta_snapshot(path: str | Path) -> dict:
+    """Rekonstruiert einen Snapshot aus Delta + Basis (Basis liegt im selben Ordner)."""
+    path = Path(path)
+    with np.load(path) as npz:
+        files = {key: npz[key] for key in npz.files}
+
+    base = snapshot_arrays(read_zip_snapshot(path.parent / str(files.pop("__base__"))))
+    data = files.pop("__data__").tobytes().decode()
+    skeleton = torch.load(io.BytesIO(files.pop("__skeleton__").tobytes()))
+    restored = unflatten_tensors(skeleton, decode_delta(files, base))
+    return {"data": data, **restored}
+
+
+def checkpoint_file(path: str | Path) -> io.BytesIO | Path:
+    """Datei oder (bei Deltas) rekonstruiertes Zip im Speicher - direkt für PPO.load()."""
+    path = Path(path)
+    if not path.name.endswith(DELTA_SUFFIX):
+        return path
+    buffer = io.BytesIO()
+    write_zip(buffer, read_delta_snapshot(path))
+    buffer.seek(0)
+    return buffer
+
+
+def load_checkpoint(path: str | Path, **kwargs) -> PPO:
+    """PPO.load() für Voll- und Delta-Checkpoints."""
+    return PPO.load(checkpoint_file(path), **kwargs)
+
+
+def find_checkpoint(model_dir: str | Path, run_name: str, timesteps: int) -> Optional[Path]:
+    """Sucht den Checkpoint eines Laufs zu einer Step-Zahl (Voll-Zip bevorzugt)."""
+    for suffix in (".zip", DELTA_SUFFIX):
+        path = Path(model_dir) / f"{run_name}_{timesteps}_steps{suffix}"
+        if path.exists():
+            return path
+    return None
+
+
+# ========== RETENTION ==========
+
+def select_retained(entries: List[dict], keep_last: int, keep_best: bool) -> set:
+    """
+    Wählt die zu behaltenden Checkpoints (nach Steps).
+
+    Behalten werden: Meilensteine, die letzten keep_last, der beste nach Reward
+    und jede Basis eines behaltenen Deltas.
+    """
+    ordered = sorted(entries, key=lambda e: e["timesteps"])
+    keep = {e["timesteps"] for e in ordered if e.get("milestone")}
+    if keep_last > 0:
+        keep.update(e["timesteps"] for e in ordered[-keep_last:])
+
+    if keep_best:
+        rated = [e for e in ordered if e.get("mean_reward") is not None]
+        if rated:
+            keep.add(max(rated, key=lambda e: (e["mean_reward"], e["timesteps"]))["timesteps"])
+
+    by_file = {e["file"]: e["timesteps"] for e in ordered}
+    for entry in ordered:
+        if entry["timesteps"] in keep and entry.get("base"):
+            keep.add(by_file.get(entry["base"], entry["timesteps"]))
+    return keep
+
+
+class AsyncCheckpointCallback(BaseCallback):
+    """
+    Ersatz für SB3 CheckpointCallback: Snapshot im Hauptthread, Schreiben im Hintergrund.
+
+    Args:
+        save_freq: Checkpoint alle save_freq Timesteps
+        save_path: Modell-Ordner
+        name_prefix: Run-Name
+        checkpoint_config: Overrides für CHECKPOINT_CONFIG
+        events: EventPublisher (live_events.py) für das Live-Dashboard
+    """
+
+    def __init__(self, save_freq: int, save_path: str | Path, name_prefix: str,
+                 checkpoint_config: Optional[dict] = None, verbose: int = 1, events=None):
+        super().__init__(verbose)
+        self.events = events
+        self.save_freq = save_freq
+        self.save_path = Path(save_path)
+        self.name_prefix = name_prefix
+        self.config = {**CHECKPOINT_CONFIG, **(checkpoint_config or {})}
+        self.manifest_path = self.save_path / f"{name_prefix}_checkpoints.json"
+
+        self.entries = []
+        self.base_arrays = None     # Arrays des letzten Meilensteins (Delta-Basis)
+        self.base_file = None
+        self.stall_times = []       # Blockierzeit pro Checkpoint (Sekunden)
+        self._last_save_index = None
+        self._last_milestone_index = None
+        self._writer = None
+        self._futures = []
+
+    def _on_training_start(self) -> None:
+        self.save_path.mkdir(parents=True, exist_ok=True)
+        if self.manifest_path.exists():
+            with self.manifest_path.open() as f:
+                self.entries = json.load(f).get("checkpoints", [])
+        self._last_save_index = self.num_timesteps // self.save_freq
+        self._last_milestone_index = self.num_timesteps // self.config["milestone_every"]
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="checkpoint-writer")
+
+    def _on_step(self) -> bool:
+        save_index = self.num_timesteps // self.save_freq
+        if save_index > self._last_save_index:
+            self._last_save_index = save_index
+            self.save_checkpoint()
+        return True
+
+    def _mean_reward(self) -> Optional[float]:
+        buffer = self.model.ep_info_buffer
+        if not buffer:
+            return None
+        return float(np.mean([ep["r"] for ep in buffer]))
+
+    def save_checkpoint(self) -> None:
+        """Snapshot erstellen und Schreiben an den Hintergrund-Thread übergeben."""
+        t0 = time.perf_counter()
+        snapshot = snapshot_model(self.model)
+        self.stall_times.append(time.perf_counter() - t0)
+
+        milestone_index = self.num_timesteps // self.config["milestone_every"]
+        milestone = milestone_index > self._last_milestone_index
+        self._last_milestone_index = milestone_index
+
+        entry = {
+            "timesteps": self.num_timesteps,
+            "milestone": milestone,
+            "mean_reward": self._mean_reward(),
+        }
+        self._futures = [f for f in self._futures if not f.done()]
+        self._futures.append(self._writer.submit(self._write, snapshot, entry))
+
+    def _write(self, snapshot: dict, entry: dict) -> None:
+        """Schreibt einen Checkpoint und wendet die Retention an (Hintergrund-Thread)."""
+        try:
+            stem = f"{self.name_prefix}_{entry['timesteps']}_steps"
+            use_delta = self.config["deltas"] and not entry["milestone"] and self.base_arrays is not None
+
+            if use_delta:
+                path = self.save_path / (stem + DELTA_SUFFIX)
+                write_delta(path, snapshot, self.base_file, self.base_arrays)
+                entry["base"] = self.base_file
+            else:
+                path = self.save_path / (stem + ".zip")
+                with path.open("wb") as f:
+                    write_zip(f, snapshot)
+                if self.config["deltas"]:
+                    # Solange Deltas darauf verweisen, hält die Retention die Basis fest
+                    self.base_arrays = snapshot_arrays(snapshot)
+                    self.base_file = path.name
+
+            entry["file"] = path.name
+            entry["bytes"] = path.stat().st_size
+            self.entries.append(entry)
+            self._apply_retention()
+            if self.events is not None:
+                self.events.publish("checkpoint", {"run": self.name_prefix, **entry})
+
+            if self.verbose > 0:
+                kind = "Delta" if use_delta else "Voll"
+                print(f"\n💾 Checkpoint ({kind}, {entry['bytes'] / 1e6:.1f} MB): {path.name}")
+        except Exception as e:
+            print(f"\n⚠️ Checkpoint konnte nicht geschrieben werden: {e}")
+
+    def _apply_retention(self) -> None:
+        keep = select_retained(self.entries, self.config["keep_last"], self.config["keep_best"])
+        retained = []
+        for entry in self.entries:
+            if entry["timesteps"] in keep:
+                retained.append(entry)
+                continue
+            try:
+                (self.save_path / entry["file"]).unlink()
+            except OSError:
+                pass
+        self.entries = retained
+        write_json_atomic(self.manifest_path, {"run_name": self.name_prefix, "checkpoints": retained}, indent=2)
+
+    def flush(self) -> None:
+        """Wartet auf alle ausstehenden Schreibvorgänge."""
+        if self._writer is not None:
+            self._writer.shutdown(wait=True)
+            self._writer = None
+
+    def _on_training_end(self) -> None:
+        self.flush()
+        if self.verbose > 0 and self.stall_times:
+            print(f"💾 Checkpoint-Snapshots: {len(self.stall_times)} × "
+                  f"{np.mean(self.stall_times) * 1000:.1f} ms Blockierzeit (Schreiben im Hintergrund)")
+
+
+def remove_run_checkpoints(model_dir: str | Path, run_name: str) -> None:
+    """Löscht alle Zwischen-Checkpoints eines Laufs inkl. Manifest."""
+    model_dir = Path(model_dir)
+    patterns = (f"{run_name}_*_steps.zip", f"{run_name}_*_steps{DELTA_SUFFIX}", f"{run_name}_checkpoints.json")
+    for pattern in patterns:
+        for path in model_dir.glob(pattern):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
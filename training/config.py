@@ -127,12 +127,102 @@ POLICY_KWARGS = {
 TRAINING_CONFIG = {
     "total_timesteps": 100_000_000,
     "n_envs": 16,                 # Anzahl paralleler Umgebungen
+    "n_workers": None,            # Env-Worker-Prozesse (None = ein Prozess pro Umgebung)
     "log_interval": 10,
     "save_freq": 1_000_000,       # Checkpoint alle 1M Steps
+    "resume_freq": 1_000_000,     # Resume-Snapshot (runs/<name>/) alle 1M Steps
     "eval_freq": 500_000,
     "eval_episodes": 10,
 }
 
+# ========== CHECKPOINTS ==========
+
+CHECKPOINT_CONFIG = {
+    "keep_last": 3,                   # Die letzten N Checkpoints behalten
+    "milestone_every": 10_000_000,    # Meilensteine (10M, 20M, ...) werden nie gelöscht
+    "keep_best": True,                # Checkpoint mit bestem mittleren Reward behalten
+    "deltas": False,                  # Zwischenstände als komprimiertes Delta zum letzten Meilenstein
+}
+
+# Self-Play gegen eingefrorene Checkpoints (self_play.py): Rot spielt ein Gegner-Pool,
+# der Learner sieht nur Blau-Transitions
+SELF_PLAY_CONFIG = {
+    "enabled": False,                 # False = Learner steuert beide Teams (bisheriges Verhalten)
+    "opponents": [],                  # Checkpoint-Dateien, die von Anfang an im Pool sind
+    "pool_size": 8,                   # Maximale Anzahl Learner-Snapshots (plus alle Datei-Gegner)
+    "snapshot_freq": 2_000_000,       # Learner-Snapshot in den Pool alle N Steps
+    "deterministic": False,           # Gegner-Aktionen samplen (mehr Vielfalt) statt argmax
+}
+
+# Int8-Inference für Evaluation/Replays (quantization.py): Gewichte int8 mit Skala pro Ausgabekanal
+QUANTIZATION_CONFIG = {
+    "min_agreement": 0.97,            # Mindestanteil gleicher argmax-Aktionen wie float, sonst Abbruch
+    "check_episodes": 2,              # Episoden (Float-Policy, gesampelt), aus denen Prüf-Zustände stammen
+    "check_seed": 10_000,             # Seeds der Prüf-Episoden (getrennt von Evaluations-Seeds)
+}
+
+# ========== HARDWARE / CPU LAYOUT ==========
+
+RESOURCE_CONFIG = {
+    "pin_affinity": True,         # Learner & Env-Worker auf disjunkte Kerne pinnen (nur Linux)
+    "learner_cores": None,        # None = automatisch, int = Anzahl, Liste = explizite Kern-IDs
+    "torch_threads": None,        # None = Anzahl Learner-Kerne
+    "worker_threads": 1,          # BLAS/OMP Threads pro Env-Worker
+}
+
+# ========== AUTOTUNE (train.py --autotune) ==========
+
+AUTOTUNE_CONFIG = {
+    "use_cache": True,            # Ergebnis aus autotune_cache/<host>.json automatisch verwenden
+    "games": [4, 8, 16],          # Kandidaten für n_envs
+    "workers": [2, 4, 8, 16],     # Kandidaten für n_workers (nur <= n_envs)
+    "n_steps": [1024, 2048],
+    "batch_size": [256, 512, 1024],
+    "trial_seconds": 5.0,         # Messdauer pro Rollout-Trial
+}
+
+# ========== REPLAY-/METRIK-SERVER (replay_server.py) ==========
+
+SERVER_CONFIG = {
+    "host": "127.0.0.1",
+    "port": 5000,
+    "chunk_frames": 100,          # Frames pro Abschnitt, wenn ?to= fehlt (Viewer lädt in diesen Schritten)
+    "max_range_frames": 1000,     # Größter erlaubter Bereich pro Anfrage
+    "gzip_min_bytes": 1024,       # Kleinere Antworten unkomprimiert
+    "poll_interval": 1.0,         # Sekunden zwischen zwei Blicken in den Metrik-Stream
+}
+
+# ========== LIVE-DASHBOARD (train.py --live, live_events.py) ==========
+
+LIVE_CONFIG = {
+    "host": "127.0.0.1",
+    "port": 5001,
+    "replay_events": 2000,        # Letzte Events, die neue/wiederverbundene Clients nachgeliefert bekommen
+    "client_queue": 512,          # Puffer pro Client; läuft er voll, wird der Client getrennt (nie das Training)
+    "heartbeat": 15.0,            # Sekunden ohne Event bis zum Keepalive-Kommentar
+}
+
+# ========== LIVE-PLAY (live_play.py) ==========
+
+LIVE_PLAY_CONFIG = {
+    "host": "127.0.0.1",
+    "port": 8765,
+    "fps": 20,                    # Spiel-Schritte pro Sekunde (Stun/Cooldown oben sind auf 20 FPS ausgelegt)
+    "max_matches": 16,            # Gleichzeitige Matches pro Prozess (alle in einem Inference-Batch)
+    "position_decimals": 2,       # Rundung der Positionen in den gestreamten Frames
+    "stats_interval": 5.0,        # Sekunden zwischen Latenz-Berichten (Konsole + Clients)
+}
+
+# ========== EVALUATIONS-DAEMON (eval_daemon.py / eval_client.py) ==========
+
+EVAL_DAEMON_CONFIG = {
+    "socket": "eval_daemon.sock",  # Unix-Socket relativ zu training/
+    "tcp_port": 5002,              # Ersatz auf Plattformen ohne AF_UNIX (localhost)
+    "workers": None,               # None = ein Worker pro Kern
+    "policy_cache": 4,             # Geladene Policies pro Worker und Modus (LRU)
+    "chunk_episodes": 8,           # Episoden pro Teil-Job (Verteilung auf Worker + Fortschritt)
+}
+
 # ========== TRAINED MODELS METADATA ==========
 
 MODELS_METADATA = {
@@ -248,6 +338,22 @@ def print_config_summary():
     for key, value in PPO_CONFIG.items():
         print(f"  {key:25s}: {value}")
 
+    print("\n[CHECKPOINTS]")
+    for key, value in CHECKPOINT_CONFIG.items():
+        print(f"  {key:25s}: {value}")
+
+    print("\n[SELF-PLAY]")
+    for key, value in SELF_PLAY_CONFIG.items():
+        print(f"  {key:25s}: {value}")
+
+    print("\n[QUANTIZATION]")
+    for key, value in QUANTIZATION_CONFIG.items():
+        print(f"  {key:25s}: {value}")
+
+    print("\n[HARDWARE]")
+    for key, value in RESOURCE_CONFIG.items():
+        print(f"  {key:25s}: {value}")
+
     print("\n[REWARD PROFILES]")
     for profile_name, profile_data in REWARD_PROFILES.items():
         meta = REWARD_PROFILE_META[profile_name]
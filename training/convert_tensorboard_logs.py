@@ -1,153 +1,125 @@
 """
 Konvertiert TensorBoard Event-Dateien zu JSON für das Dashboard.
+
+Die Event-Dateien werden inkrementell in spaltenbasierte Run-Stores eingelesen
+(tb_ingest.py, nur neue Records); das Dashboard-JSON wird danach allein aus dem
+Store erzeugt. Zusätzlich werden die Multi-Resolution-Serien aller Runs für
+kennzahlen.html aktualisiert (series_pyramid.py).
+
+std_reward: SB3 loggt nur den Mittelwert (rollout/ep_rew_mean). Die Streuung steht
+erst seit MetricsCallback auch rollout/ep_rew_std schreibt in den Logs - für ältere
+Runs bleibt sie null statt geschätzt.
+
+Nutzung:
+    python convert_tensorboard_logs.py                    # neuester Run
+    python convert_tensorboard_logs.py --run Gordon --output ../dashboard/data/gordon.json
 """
 
-import os
-import json
+import argparse
+import time
+from datetime import datetime
 from pathlib import Path
-import numpy as np
 
 try:
-    from tensorboard.backend.event_processing import event_accumulator
+    import tensorboard  # noqa: F401 (Protobuf-Definitionen für tb_ingest)
 except ImportError:
     print("Fehler: TensorBoard nicht installiert!")
     print("Installiere mit: pip install tensorboard")
     exit(1)
 
-
-def extract_from_tensorboard(log_dir: str):
-    """Extrahiert alle Metriken aus TensorBoard Logs."""
-
-    all_data = {
-        "timesteps": [],
-        "mean_reward": [],
-        "std_reward": [],
-        "episodes": []
+from metrics_stream import write_json_atomic
+from series_pyramid import export_pyramids
+from tb_ingest import event_files, ingest_logs, list_runs, load_store, scalar_series, store_path_for
+
+REWARD_TAG = "rollout/ep_rew_mean"
+REWARD_STD_TAG = "rollout/ep_rew_std"
+LENGTH_TAG = "rollout/ep_len_mean"
+
+
+def _aligned(columns: dict, tag: str, steps) -> list:
+    """Werte von tag an den Schritten steps (None, wo der Tag fehlt)."""
+    tag_steps, tag_values = scalar_series(columns, tag)
+    lookup = dict(zip(tag_steps.tolist(), tag_values.tolist()))
+    return [lookup.get(step) for step in steps]
+
+
+def export_run(store_path: str | Path, run: str) -> dict:
+    """Dashboard-Daten (training_logs.json Schema) aus einem Run-Store."""
+    columns, _ = load_store(store_path)
+    steps, rewards = scalar_series(columns, REWARD_TAG)
+    steps, rewards = steps.tolist(), rewards.tolist()
+
+    return {
+        "model_name": run,
+        "total_timesteps": steps[-1] if steps else 0,
+        "current_timesteps": steps[-1] if steps else 0,
+        "progress_percent": 100.0 if steps else 0.0,
+        "last_update": datetime.now().isoformat(),
+        "max_reward": max(rewards) if rewards else 0.0,
+        "current_mean_reward": rewards[-1] if rewards else 0.0,
+        "performance": {},
+        "source": "tensorboard",
+        "timesteps": steps,
+        "episodes": [None] * len(steps),  # Größe des Episoden-Fensters loggt SB3 nicht
+        "mean_reward": rewards,
+        "std_reward": _aligned(columns, REWARD_STD_TAG, steps),
+        "mean_length": _aligned(columns, LENGTH_TAG, steps),
+        "performance_history": [],
     }
 
-    # Finde alle PPO_* Verzeichnisse
-    log_path = Path(log_dir)
-    event_dirs = sorted(log_path.glob("PPO_*"), key=lambda x: x.stat().st_mtime)
-
-    print(f"[*] Gefundene TensorBoard Logs: {len(event_dirs)}")
-
-    for event_dir in event_dirs:
-        print(f"[*] Lese: {event_dir.name}")
-
-        # Lade Event-Datei
-        ea = event_accumulator.EventAccumulator(str(event_dir))
-        ea.Reload()
-
-        # Verfügbare Scalars
-        available = ea.Tags().get('scalars', [])
-        print(f"    Verfügbare Metriken: {available}")
-
-        # Extrahiere Rollout Reward
-        if 'rollout/ep_rew_mean' in available:
-            events = ea.Scalars('rollout/ep_rew_mean')
-            for event in events:
-                all_data["timesteps"].append(int(event.step))
-                all_data["mean_reward"].append(float(event.value))
-
-        # Extrahiere Episode Length (als Proxy für Episodes)
-        if 'rollout/ep_len_mean' in available:
-            events = ea.Scalars('rollout/ep_len_mean')
-            # Schätze Anzahl Episodes basierend auf Steps
-            if all_data["timesteps"]:
-                last_step = all_data["timesteps"][-1]
-                estimated_episodes = int(last_step / 500)  # max_steps=500
-                all_data["episodes"].append(estimated_episodes)
-
-    # Sortiere nach Timesteps
-    if all_data["timesteps"]:
-        sorted_indices = np.argsort(all_data["timesteps"])
-        all_data["timesteps"] = [all_data["timesteps"][i] for i in sorted_indices]
-        all_data["mean_reward"] = [all_data["mean_reward"][i] for i in sorted_indices]
-
-    # Fülle std_reward und episodes auf
-    if not all_data["std_reward"]:
-        # Schätze Standardabweichung (10% vom Reward)
-        all_data["std_reward"] = [abs(r * 0.1) for r in all_data["mean_reward"]]
-
-    if not all_data["episodes"]:
-        all_data["episodes"] = [100] * len(all_data["timesteps"])
-
-    return all_data
-
 
-def merge_with_existing(new_data: dict, existing_file: str):
-    """Merged neue Daten mit existierenden Daten."""
-
-    if os.path.exists(existing_file):
-        print(f"[*] Lade existierende Daten: {existing_file}")
-        with open(existing_file, 'r') as f:
-            existing = json.load(f)
-
-        # Merge: Nehme alle einzigartigen Timesteps
-        combined = {
-            "timesteps": existing["timesteps"] + new_data["timesteps"],
-            "mean_reward": existing["mean_reward"] + new_data["mean_reward"],
-            "std_reward": existing.get("std_reward", []) + new_data.get("std_reward", []),
-            "episodes": existing.get("episodes", []) + new_data.get("episodes", [])
-        }
-
-        # Entferne Duplikate und sortiere
-        seen = set()
-        merged = {"timesteps": [], "mean_reward": [], "std_reward": [], "episodes": []}
-
-        for i, ts in enumerate(combined["timesteps"]):
-            if ts not in seen:
-                seen.add(ts)
-                merged["timesteps"].append(ts)
-                merged["mean_reward"].append(combined["mean_reward"][i])
-                if i < len(combined["std_reward"]):
-                    merged["std_reward"].append(combined["std_reward"][i])
-                if i < len(combined["episodes"]):
-                    merged["episodes"].append(combined["episodes"][i])
-
-        # Sortiere nach Timesteps
-        sorted_indices = np.argsort(merged["timesteps"])
-        for key in merged:
-            merged[key] = [merged[key][i] for i in sorted_indices]
-
-        return merged
-
-    return new_data
+def newest_run(logs_dir: str | Path) -> str:
+    """Run mit der zuletzt geschriebenen Event-Datei."""
+    runs = list_runs(logs_dir)
+    return max(runs, key=lambda run: max(p.stat().st_mtime for p in event_files(Path(logs_dir) / run)))
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="TensorBoard-Logs → Dashboard-JSON")
+    parser.add_argument("--logs-dir", default="./logs")
+    parser.add_argument("--store", default="./logs_store", help="Verzeichnis der Run-Stores (.npz)")
+    parser.add_argument("--run", default=None, help="Run (Unterordner von --logs-dir, Default: neuester)")
+    parser.add_argument("--output", default="../dashboard/data/training_logs.json")
+    parser.add_argument("--series", default="../dashboard/data/series",
+                        help="Ausgabe der Multi-Resolution-Serien (Metrik-Streams daneben in metrics_stream/)")
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
     print("=" * 50)
     print("TensorBoard → JSON Converter")
     print("=" * 50)
 
-    # Pfade
-    logs_dir = "./logs"
-    output_file = "../dashboard/data/training_logs.json"
+    if not list_runs(args.logs_dir):
+        print(f"\n[!] Keine TensorBoard Logs gefunden in: {args.logs_dir}")
+        print("    Stelle sicher, dass das Training läuft/lief mit TensorBoard Logging.")
+        exit(1)
 
-    # Extrahiere Daten
-    print(f"\n[*] Extrahiere Daten aus: {logs_dir}")
-    data = extract_from_tensorboard(logs_dir)
+    # 1. Neue Records aller Runs einlesen (parallel, nur geänderte Runs)
+    print(f"\n[*] Aktualisiere Stores: {args.logs_dir} → {args.store}")
+    t_start = time.perf_counter()
+    ingest_logs(args.logs_dir, args.store, n_workers=args.workers)
+    print(f"[+] Einlesen: {time.perf_counter() - t_start:.2f}s")
+
+    # 2. Dashboard-Datei aus dem Store
+    run = args.run or newest_run(args.logs_dir)
+    t_start = time.perf_counter()
+    data = export_run(store_path_for(args.store, run), run)
+    export_ms = (time.perf_counter() - t_start) * 1000
 
     if not data["timesteps"]:
-        print("\n[!] Keine Daten gefunden in TensorBoard Logs!")
-        print("    Stelle sicher, dass das Training läuft/lief mit TensorBoard Logging.")
+        print(f"\n[!] Run {run} enthält keine Reward-Daten ({REWARD_TAG})!")
         exit(1)
 
-    print(f"\n[+] Extrahierte Datenpunkte: {len(data['timesteps'])}")
-    print(f"[+] Timestep Range: {data['timesteps'][0]} - {data['timesteps'][-1]}")
-    print(f"[+] Reward Range: {min(data['mean_reward']):.2f} - {max(data['mean_reward']):.2f}")
-
-    # Merge mit existierenden Daten
-    merged_data = merge_with_existing(data, output_file)
+    write_json_atomic(args.output, data, indent=2)
 
-    # Speichern
-    os.makedirs(os.path.dirname(output_file), exist_ok=True)
-    with open(output_file, 'w') as f:
-        json.dump(merged_data, f, indent=2)
+    print(f"\n[+] Run: {run} ({export_ms:.1f} ms aus dem Store)")
+    print(f"[+] Datenpunkte: {len(data['timesteps'])}")
+    print(f"[+] Timestep Range: {data['timesteps'][0]:,} - {data['timesteps'][-1]:,}")
+    print(f"[+] Reward Range: {min(data['mean_reward']):.2f} - {max(data['mean_reward']):.2f}")
+    print(f"\n[+] Gespeichert: {args.output}")
 
-    print(f"\n[+] Gespeichert: {output_file}")
-    print(f"[+] Gesamt Datenpunkte: {len(merged_data['timesteps'])}")
-    print(f"[+] Neuester Timestep: {merged_data['timesteps'][-1]:,}")
-    print(f"[+] Neuester Reward: {merged_data['mean_reward'][-1]:.2f}")
+    # 3. Multi-Resolution-Serien (nur Runs mit neuen Daten)
+    print(f"\n[*] Aktualisiere Serien: {args.series}")
+    export_pyramids(args.series, args.store, Path(args.series).parent / "metrics_stream")
     print("\n✅ Dashboard Daten aktualisiert!")
     print("   Öffne das Dashboard um die aktuellen Daten zu sehen.")
@@ -6,20 +6,46 @@ Struktur:
   Sparse:       10M, 50M, 100M (final)
   Balanced:     10M, 50M, 100M (final)
 
-Total: 9 Replays (oder mehr, wenn du alle 10M Checkpoints willst)
+Total: 9 Replays pro Seed (oder mehr, wenn du alle 10M Checkpoints willst)
+
+Ablauf als Job-Graph: ein Job pro (Experiment, Checkpoint, Seed), ausgeführt auf
+einem Prozess-Pool. Jeder Worker hält ein LRU geladener Policies (Schlüssel:
+Datei-Hash). Ein Manifest (.store/replay_manifest.json) merkt sich pro Replay
+Modell-Hash, Seed und Profil - unveränderte Replays werden übersprungen.
+
+Die Replays landen über den Replay-Speicher (replay_store.py) in training/replays;
+identische Replays belegen dort nur einmal Platz. Die kuratierten Replays des Viewers
+(visualization/replays) werden nur mit --publish überschrieben.
+
+Nutzung:
+    python create_checkpoint_replays.py
+    python create_checkpoint_replays.py --seeds 42 43 44 --workers 4
+    python create_checkpoint_replays.py --force
+    python create_checkpoint_replays.py --mode int8
+    python create_checkpoint_replays.py --publish         # direkt ins Viewer-Verzeichnis
 """
 
 import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
 from datetime import datetime
-import numpy as np
-from stable_baselines3 import PPO
+from functools import partial
 
-from environment import CaptureTheFlagEnv
+from rollout import rollout_episodes
+from checkpointing import find_checkpoint
+from model_cache import FileHashIndex, PolicyCache
+from metrics_stream import write_json_atomic
+from replay_catalog import ReplayCatalog
+from replay_store import DEFAULT_REPLAY_DIR, ReplayStore
 
 BASE_DIR = Path(__file__).resolve().parent
 MODEL_DIR = BASE_DIR / "models"
 REPLAY_DIR = BASE_DIR / "replays"
+VIEWER_REPLAY_DIR = DEFAULT_REPLAY_DIR   # kuratierte Replays, nur mit --publish
+MANIFEST_NAME = "replay_manifest.json"   # liegt in .store/: kein Replay für Katalog/Viewer
+DEFAULT_SEED = 42  # Fixer Seed für Vergleichbarkeit (behält die alten Dateinamen)
 
 # Experiment-Konfiguration
 EXPERIMENTS = {
@@ -38,111 +64,220 @@ EXPERIMENTS = {
 }
 
 
-def create_replay_for_checkpoint(model_name: str, checkpoint: str | int, profile: str, seed: int = 42):
-    """Erstellt ein Replay für einen spezifischen Checkpoint."""
-
-    # Model Path bestimmen
+def resolve_model_path(model_name: str, checkpoint: str | int) -> Path:
+    """Modell-Datei eines Checkpoints (Voll-Checkpoint oder Delta, siehe checkpointing.py)."""
     if checkpoint == "final":
-        model_path = MODEL_DIR / f"{model_name}_final.zip"
-    else:
-        model_path = MODEL_DIR / f"{model_name}_{checkpoint}_steps.zip"
-
-    if not model_path.exists():
-        print(f"   ⚠️  Modell nicht gefunden: {model_path}")
-        return None
+        return MODEL_DIR / f"{model_name}_final.zip"
+    return find_checkpoint(MODEL_DIR, model_name, checkpoint) or MODEL_DIR / f"{model_name}_{checkpoint}_steps.zip"
 
-    print(f"   🎮 Lade Modell: {model_path.name}")
 
-    # Environment mit richtigem Profile
-    env = CaptureTheFlagEnv(reward_profile=profile)
-    model = PPO.load(str(model_path))
+def replay_filename(model_name: str, checkpoint: str | int, seed: int) -> str:
+    label = "100M" if checkpoint == "final" else f"{checkpoint // 1_000_000}M"
+    suffix = "" if seed == DEFAULT_SEED else f"_seed{seed}"
+    return f"{model_name}_{label}{suffix}.json"
 
-    # Episode spielen
-    obs, info = env.reset(seed=seed)
-    done = False
 
-    while not done:
-        actions = {}
-        for agent in env.agents:
-            action, _ = model.predict(obs[agent], deterministic=True)
-            actions[agent] = int(action)
+def manifest_path(replay_dir: Path) -> Path:
+    return ReplayStore(replay_dir).store_dir / MANIFEST_NAME
 
-        obs, rewards, terms, truncs, infos = env.step(actions)
-        done = all(terms.values())
 
-    # Replay-Daten sammeln
-    replay_data = env.get_replay_data()
-    replay_data["metadata"]["timestamp"] = datetime.now().isoformat()
-    replay_data["metadata"]["model_name"] = model_name
-    replay_data["metadata"]["checkpoint"] = checkpoint
-    replay_data["metadata"]["reward_profile"] = profile
+def load_manifest(replay_dir: Path) -> dict:
+    path = manifest_path(replay_dir)
+    if path.exists():
+        try:
+            with path.open() as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            pass
+    return {"models": {}, "outputs": {}}
 
-    # Speichern
-    REPLAY_DIR.mkdir(parents=True, exist_ok=True)
 
-    if checkpoint == "final":
-        filename = f"{model_name}_100M.json"
-    else:
-        filename = f"{model_name}_{checkpoint // 1_000_000}M.json"
+def plan_jobs(experiments: dict, seeds: list, replay_dir: Path, manifest: dict, force: bool = False,
+              mode: str = "float"):
+    """
+    Baut den Job-Graph.
 
-    filepath = REPLAY_DIR / filename
+    Returns:
+        (jobs, skipped, missing) - skipped: aktuelle Replays, missing: fehlende Modelle
+    """
+    hashes = FileHashIndex(manifest["models"])
+    jobs, skipped, missing = [], [], []
 
-    with filepath.open("w") as f:
-        json.dump(replay_data, f, indent=2)
+    for exp_name, config in experiments.items():
+        for checkpoint in config["checkpoints"]:
+            model_path = resolve_model_path(exp_name, checkpoint)
+            if not model_path.exists():
+                missing.append(str(model_path))
+                continue
+            model_hash = hashes.hash(model_path)
+
+            for seed in seeds:
+                filename = replay_filename(exp_name, checkpoint, seed)
+                output = replay_dir / filename
+                recorded = manifest["outputs"].get(filename)
+                up_to_date = (
+                    recorded is not None
+                    and output.exists()
+                    and recorded["model_hash"] == model_hash
+                    and recorded["seed"] == seed
+                    and recorded["profile"] == config["profile"]
+                    and recorded.get("mode", "float") == mode
+                    and recorded["output_mtime_ns"] == os.stat(output).st_mtime_ns
+                )
+                if up_to_date and not force:
+                    skipped.append(filename)
+                    continue
+
+                jobs.append({
+                    "model_name": exp_name,
+                    "checkpoint": checkpoint,
+                    "seed": seed,
+                    "profile": config["profile"],
+                    "model_path": str(model_path),
+                    "model_hash": model_hash,
+                    "output": str(output),
+                    "mode": mode,
+                })
+
+    # Jobs desselben Modells hintereinander → bessere Trefferquote im Worker-LRU
+    jobs.sort(key=lambda job: (job["model_hash"], job["seed"]))
+    return jobs, skipped, missing
+
+
+# ========== WORKER ==========
+
+_POLICY_CACHE = None
+
+
+def _init_worker(cache_size: int, mode: str = "float") -> None:
+    global _POLICY_CACHE
+    import torch
+    from quantization import load_policy
+
+    torch.set_num_threads(1)  # Parallelität kommt aus dem Prozess-Pool
+    _POLICY_CACHE = PolicyCache(cache_size, loader=partial(load_policy, mode=mode))
+
+
+def run_replay_job(job: dict) -> dict:
+    """Spielt eine Episode für einen Job und schreibt das Replay (läuft im Worker-Prozess)."""
+    if _POLICY_CACHE is None:
+        _init_worker(cache_size=4, mode=job["mode"])
+
+    t0 = time.perf_counter()
+    model = _POLICY_CACHE.get(job["model_path"], job["model_hash"], reward_profile=job["profile"])
+
+    # Episode spielen (Environment mit richtigem Profile, alle Agenten in einem Batch)
+    replay_data = rollout_episodes(model, seeds=[job["seed"]], env_kwargs={"reward_profile": job["profile"]})[0]
+
+    # Replay-Daten ergänzen
+    replay_data["metadata"]["timestamp"] = datetime.now().isoformat()
+    replay_data["metadata"]["model_name"] = job["model_name"]
+    replay_data["metadata"]["checkpoint"] = job["checkpoint"]
+    replay_data["metadata"]["reward_profile"] = job["profile"]
+    replay_data["metadata"]["seed"] = job["seed"]
+    replay_data["metadata"]["policy_mode"] = job["mode"]
+
+    # Katalog aktualisiert der Hauptprozess gesammelt (parallele Worker)
+    output = ReplayStore(Path(job["output"]).parent).put(replay_data, Path(job["output"]).name, catalog=False)
+
+    return {
+        **job,
+        "seconds": time.perf_counter() - t0,
+        "output_mtime_ns": os.stat(output).st_mtime_ns,
+        "final_scores": replay_data["metadata"]["final_scores"],
+        "episode_stats": replay_data["metadata"]["episode_stats"],
+        "cache_hits": _POLICY_CACHE.hits,
+    }
+
+
+def _format_eta(seconds: float) -> str:
+    minutes, seconds = divmod(int(seconds), 60)
+    return f"{minutes:d}:{seconds:02d}"
+
+
+def run_jobs(jobs: list, manifest: dict, replay_dir: Path, n_workers: int, cache_size: int = 4,
+             mode: str = "float") -> tuple:
+    """Führt die Jobs auf dem Prozess-Pool aus; Manifest wird nach jedem Job aktualisiert."""
+    created, failed = 0, 0
+    t_start = time.perf_counter()
+
+    with ProcessPoolExecutor(max_workers=n_workers, initializer=_init_worker, initargs=(cache_size, mode)) as pool:
+        futures = {pool.submit(run_replay_job, job): job for job in jobs}
+
+        for done, future in enumerate(as_completed(futures), start=1):
+            job = futures[future]
+            label = replay_filename(job["model_name"], job["checkpoint"], job["seed"])
+            elapsed = time.perf_counter() - t_start
+            eta = elapsed / done * (len(jobs) - done)
+
+            try:
+                result = future.result()
+            except Exception as e:
+                failed += 1
+                print(f"   ❌ [{done}/{len(jobs)}] {label}: {e}")
+                continue
 
-    # Stats
-    stats = replay_data["metadata"]["episode_stats"]
-    scores = replay_data["metadata"]["final_scores"]
+            created += 1
+            manifest["outputs"][label] = {
+                "model_hash": result["model_hash"],
+                "seed": result["seed"],
+                "profile": result["profile"],
+                "mode": result["mode"],
+                "output_mtime_ns": result["output_mtime_ns"],
+            }
+            write_json_atomic(manifest_path(replay_dir), manifest, indent=2)
 
-    print(f"   ✅ Gespeichert: {filename}")
-    print(f"      Score: Blue {scores['blue']} - {scores['red']} Red")
-    print(f"      Captures: Blue {stats['blue_captures']}, Red {stats['red_captures']}")
-    print(f"      Stuns: Blue {stats['blue_stuns']}, Red {stats['red_stuns']}")
+            scores, stats = result["final_scores"], result["episode_stats"]
+            print(f"   ✅ [{done}/{len(jobs)}] {label} ({result['seconds']:.1f}s) | "
+                  f"Blue {scores['blue']} - {scores['red']} Red | "
+                  f"Captures {stats['blue_captures']}/{stats['red_captures']} | ETA {_format_eta(eta)}")
 
-    return str(filepath)
+    return created, failed
 
 
-def main():
+def main(seeds: list = None, n_workers: int = None, force: bool = False, cache_size: int = 4, mode: str = "float",
+         replay_dir: Path = REPLAY_DIR):
     """Alle Replays erstellen."""
+    seeds = seeds or [DEFAULT_SEED]
+    n_workers = n_workers or os.cpu_count() or 1
+
     print("\n" + "=" * 70)
     print("🎬 REPLAY GENERATION: Checkpoint Replays für Portfolio")
     print("=" * 70)
 
-    total_replays = sum(len(exp["checkpoints"]) for exp in EXPERIMENTS.values())
-    print(f"\n📊 {len(EXPERIMENTS)} Experimente × {len(EXPERIMENTS['Micromanager']['checkpoints'])} Checkpoints = {total_replays} Replays")
-    print(f"💾 Output: {REPLAY_DIR}\n")
+    total_replays = sum(len(exp["checkpoints"]) for exp in EXPERIMENTS.values()) * len(seeds)
+    print(f"\n📊 {len(EXPERIMENTS)} Experimente × {len(EXPERIMENTS['Micromanager']['checkpoints'])} Checkpoints "
+          f"× {len(seeds)} Seeds = {total_replays} Replays")
+    print(f"💾 Output: {replay_dir}")
 
-    created = 0
-    failed = 0
+    manifest_path(replay_dir).parent.mkdir(parents=True, exist_ok=True)
+    manifest = load_manifest(replay_dir)
+    jobs, skipped, missing = plan_jobs(EXPERIMENTS, seeds, replay_dir, manifest, force=force, mode=mode)
+    write_json_atomic(manifest_path(replay_dir), manifest, indent=2)  # Hash-Index sichern
 
-    for exp_name, config in EXPERIMENTS.items():
-        print(f"\n{'─' * 70}")
-        print(f"🚩 {exp_name} (Profile: {config['profile']})")
-        print(f"{'─' * 70}")
+    print(f"🧮 Jobs: {len(jobs)} | Aktuell (übersprungen): {len(skipped)} | "
+          f"Fehlende Modelle: {len(missing)} | Worker: {min(n_workers, max(len(jobs), 1))}\n")
+    for path in missing:
+        print(f"   ⚠️  Modell nicht gefunden: {path}")
 
-        for checkpoint in config["checkpoints"]:
-            checkpoint_str = "final" if checkpoint == "final" else f"{checkpoint:,} steps"
-            print(f"\n📍 Checkpoint: {checkpoint_str}")
-
-            result = create_replay_for_checkpoint(
-                model_name=exp_name,
-                checkpoint=checkpoint,
-                profile=config["profile"],
-                seed=42  # Fixer Seed für Vergleichbarkeit
-            )
-
-            if result:
-                created += 1
-            else:
-                failed += 1
+    created, failed = 0, 0
+    if jobs:
+        created, failed = run_jobs(jobs, manifest, replay_dir, min(n_workers, len(jobs)), cache_size, mode)
+    failed += len(missing) * len(seeds)
+
+    # Katalog für Viewer/Tools (parst nur neue bzw. geänderte Replays)
+    catalog = ReplayCatalog(replay_dir)
+    catalog.update()
+    catalog.save()
 
     # Zusammenfassung
     print("\n" + "=" * 70)
     print("✅ REPLAY GENERATION ABGESCHLOSSEN")
     print("=" * 70)
-    print(f"  Erfolgreich: {created}/{total_replays}")
+    print(f"  Erstellt: {created}/{total_replays}")
+    print(f"  Übersprungen (aktuell): {len(skipped)}/{total_replays}")
     print(f"  Fehlgeschlagen: {failed}/{total_replays}")
-    print(f"  Output-Verzeichnis: {REPLAY_DIR}")
+    print(f"  Output-Verzeichnis: {replay_dir}")
 
     if failed > 0:
         print(f"\n⚠️  {failed} Replays konnten nicht erstellt werden.")
@@ -152,14 +287,28 @@ def main():
         print("    - Checkpoint wurde durch cleanup gelöscht")
 
     print("\n📋 NÄCHSTE SCHRITTE:")
-    print("  1. Replays im Dashboard ansehen")
+    print("  1. Replays im Dashboard ansehen (vorher mit --publish ins Viewer-Verzeichnis schreiben)")
     print("  2. Performance vergleichen (Micromanager vs Sparse vs Balanced)")
     print("  3. Ergebnisse in Portfolio dokumentieren\n")
 
 
 if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Checkpoint-Replays parallel erstellen")
+    parser.add_argument("--seeds", type=int, nargs="+", default=[DEFAULT_SEED], help="Ein Replay pro Seed")
+    parser.add_argument("--workers", type=int, default=None, help="Prozesse (Default: Anzahl CPU-Kerne)")
+    parser.add_argument("--cache-size", type=int, default=4, help="Geladene Policies pro Worker (LRU)")
+    parser.add_argument("--force", action="store_true", help="Alle Replays neu erzeugen (Manifest ignorieren)")
+    parser.add_argument("--mode", choices=["float", "int8"], default="float",
+                        help="Inference-Modus (int8: quantisiert, mit Übereinstimmungs-Check)")
+    parser.add_argument("--publish", action="store_true",
+                        help=f"Ins Viewer-Verzeichnis schreiben ({VIEWER_REPLAY_DIR}, überschreibt kuratierte Replays)")
+    args = parser.parse_args()
+
     try:
-        main()
+        main(seeds=args.seeds, n_workers=args.workers, force=args.force, cache_size=args.cache_size, mode=args.mode,
+             replay_dir=VIEWER_REPLAY_DIR if args.publish else REPLAY_DIR)
     except Exception as e:
         print(f"\n❌ Fehler: {e}")
         import traceback
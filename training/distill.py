@@ -0,0 +1,256 @@
+"""
+Policy-Distillation: kleine, schnelle Student-Netze aus einem trainierten Checkpoint.
+
+1. Zustände sammeln: Der Lehrer spielt gebatchte Episoden in CaptureTheFlagEnv
+   (rollout.py, gesampelte Aktionen für breitere Abdeckung); alle Beobachtungen
+   aller Agenten werden mitgeschnitten.
+2. Ziele: Aktionsverteilung (Softmax der Logits) und Value des Lehrers.
+3. Students (z.B. [64, 64], [128, 128]) lernen Cross-Entropy auf die
+   Lehrer-Verteilung + MSE auf den Value.
+4. Bericht pro Größe: argmax-Übereinstimmung/KL auf ungesehenen Zuständen,
+   Siege/Remis/Niederlagen gegen den Lehrer (beide Farbverteilungen) und
+   Inference-Durchsatz (torch und NumPy).
+
+Students werden als normale SB3-Zips gespeichert (laufen in Turnier, Self-Play-Pool
+und Evaluation) und zusätzlich als NumPy-Policy (.npz) daneben.
+
+Nutzung:
+    python distill.py models/X/Night_200M.zip
+    python distill.py models/X/Night_200M.zip --sizes 32 64 128 --episodes 128 --epochs 30
+"""
+
+import argparse
+import json
+import time
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+import torch
+import torch.nn.functional as F
+from stable_baselines3.common.policies import ActorCriticPolicy
+from stable_baselines3.common.save_util import data_to_json
+
+from checkpointing import load_checkpoint, write_zip
+from model_cache import file_sha256
+from numpy_policy import npz_path_for, policy_from_sb3
+from rollout import collect_states, rollout_episodes
+
+BASE_DIR = Path(__file__).resolve().parent
+DEFAULT_OUTPUT_DIR = BASE_DIR / "models" / "distilled"
+
+
+@torch.no_grad()
+def policy_targets(policy, states: np.ndarray, batch_size: int = 8192) -> tuple:
+    """(Logits, Values) einer SB3-Policy für alle Zustände."""
+    logits, values = [], []
+    for start in range(0, len(states), batch_size):
+        features = policy.extract_features(torch.as_tensor(states[start:start + batch_size]))
+        latent_pi, latent_vf = policy.mlp_extractor(features)
+        logits.append(policy.action_net(latent_pi))
+        values.append(policy.value_net(latent_vf).squeeze(-1))
+    return torch.cat(logits), torch.cat(values)
+
+
+def make_student(teacher, hidden: int, n_layers: int = 2, learning_rate: float = 3e-3,
+                 seed: int = 0) -> ActorCriticPolicy:
+    """Untrainierte Policy mit [hidden] * n_layers, sonst wie der Lehrer (braucht keine Env)."""
+    torch.manual_seed(seed)
+    net_arch = [hidden] * n_layers
+    return ActorCriticPolicy(teacher.observation_space, teacher.action_space, lambda _: learning_rate,
+                             net_arch=dict(pi=net_arch, vf=net_arch), activation_fn=teacher.policy.activation_fn)
+
+
+def save_student(student: ActorCriticPolicy, path: str | Path) -> None:
+    """Speichert die Policy als SB3-Zip, das PPO.load()/load_checkpoint() wie einen Checkpoint lädt."""
+    data = {
+        "policy_class": ActorCriticPolicy,
+        "policy_kwargs": {"net_arch": student.net_arch, "activation_fn": student.activation_fn},
+        "observation_space": student.observation_space,
+        "action_space": student.action_space,
+        "n_envs": 1,
+    }
+    params = {"policy": student.state_dict(), "policy.optimizer": student.optimizer.state_dict()}
+    with open(path, "wb") as f:
+        write_zip(f, {"data": data_to_json(data), "params": params, "pytorch_variables": {}})
+
+
+def train_student(policy: ActorCriticPolicy, states: np.ndarray, teacher_logits: torch.Tensor,
+                  teacher_values: torch.Tensor, epochs: int = 20, batch_size: int = 1024,
+                  value_coef: float = 0.5, seed: int = 0) -> List[float]:
+    """Distilliert Lehrer-Verteilung und Value in die Student-Policy. Gibt den Loss pro Epoche zurück."""
+    policy.set_training_mode(True)
+    optimizer = policy.optimizer   # Adam mit der Lernrate aus make_student
+    states_t = torch.as_tensor(states)
+    teacher_probs = F.softmax(teacher_logits, dim=-1)
+    generator = torch.Generator().manual_seed(seed)
+
+    history = []
+    for _ in range(epochs):
+        order = torch.randperm(len(states_t), generator=generator)
+        total, batches = 0.0, 0
+        for start in range(0, len(order), batch_size):
+            idx = order[start:start + batch_size]
+            latent_pi, latent_vf = policy.mlp_extractor(policy.extract_features(states_t[idx]))
+            log_probs = F.log_softmax(policy.action_net(latent_pi), dim=-1)
+            policy_loss = -(teacher_probs[idx] * log_probs).sum(dim=-1).mean()
+            value_loss = F.mse_loss(policy.value_net(latent_vf).squeeze(-1), teacher_values[idx])
+            loss = policy_loss + value_coef * value_loss
+
+            optimizer.zero_grad()
+            loss.backward()
+            optimizer.step()
+            total += loss.item()
+            batches += 1
+        history.append(total / batches)
+
+    policy.set_training_mode(False)
+    return history
+
+
+def agreement(student: ActorCriticPolicy, states: np.ndarray, teacher_logits: torch.Tensor) -> dict:
+    """argmax-Übereinstimmung und KL(Lehrer || Student) auf Zuständen."""
+    student_logits, _ = policy_targets(student, states)
+    teacher_log_probs = F.log_softmax(teacher_logits, dim=-1)
+    student_log_probs = F.log_softmax(student_logits, dim=-1)
+    kl = (teacher_log_probs.exp() * (teacher_log_probs - student_log_probs)).sum(dim=-1).mean()
+    return {
+        "action_agreement": float((student_logits.argmax(-1) == teacher_logits.argmax(-1)).float().mean()),
+        "kl": float(kl),
+    }
+
+
+def play_against(student, teacher, n_games: int, base_seed: int, reward_profile: str) -> dict:
+    """Student vs. Lehrer in beiden Farbverteilungen (aus Sicht des Students)."""
+    seeds = [base_seed + i for i in range(n_games)]
+    env_kwargs = {"reward_profile": reward_profile}
+    wins = draws = losses = 0
+    for blue, red, student_team in ((student, teacher, "blue"), (teacher, student, "red")):
+        for replay in rollout_episodes(blue, n_games, seeds=seeds, env_kwargs=env_kwargs, red_model=red):
+            scores = replay["metadata"]["final_scores"]
+            other = "red" if student_team == "blue" else "blue"
+            if scores[student_team] > scores[other]:
+                wins += 1
+            elif scores[student_team] < scores[other]:
+                losses += 1
+            else:
+                draws += 1
+    games = wins + draws + losses
+    return {"games": games, "wins": wins, "draws": draws, "losses": losses,
+            "win_rate": wins / games, "score": (wins + 0.5 * draws) / games}
+
+
+def inference_throughput(predictor, obs_dim: int, batch_size: int = 64, seconds: float = 1.0) -> float:
+    """Beobachtungen pro Sekunde bei deterministischem predict() in Batches."""
+    obs = np.random.default_rng(0).uniform(-1, 2, size=(batch_size, obs_dim)).astype(np.float32)
+    predictor.predict(obs, deterministic=True)
+    calls, t0 = 0, time.perf_counter()
+    while time.perf_counter() - t0 < seconds:
+        predictor.predict(obs, deterministic=True)
+        calls += 1
+    return calls * batch_size / (time.perf_counter() - t0)
+
+
+def distill(teacher_path: str, sizes: List[int], n_episodes: int = 64, n_eval_episodes: int = 16,
+            n_games: int = 16, epochs: int = 20, learning_rate: float = 3e-3, base_seed: int = 0,
+            reward_profile: str = "balanced", output_dir: Optional[str | Path] = None) -> dict:
+    """Kompletter Ablauf für alle Student-Größen; gibt den Bericht zurück (und schreibt ihn als JSON)."""
+    torch.set_num_threads(1)  # Vergleichbarer Durchsatz, wie in den Evaluations-Workern
+    output_dir = Path(output_dir) if output_dir else DEFAULT_OUTPUT_DIR
+    output_dir.mkdir(parents=True, exist_ok=True)
+    teacher = load_checkpoint(teacher_path, device="cpu")
+    teacher_name = Path(teacher_path).name.split(".")[0]
+    obs_dim = teacher.observation_space.shape[0]
+
+    t0 = time.perf_counter()
+    states = collect_states(teacher, n_episodes, base_seed, reward_profile)
+    # Held-out: eigene Seeds, damit die Übereinstimmung nicht auf Trainingszuständen gemessen wird
+    eval_states = collect_states(teacher, n_eval_episodes, base_seed + n_episodes, reward_profile)
+    teacher_logits, teacher_values = policy_targets(teacher.policy, states)
+    eval_logits, _ = policy_targets(teacher.policy, eval_states)
+    print(f"[*] {len(states):,} Trainings- / {len(eval_states):,} Test-Zustände gesammelt "
+          f"({time.perf_counter() - t0:.1f}s)")
+
+    teacher_net = [layer.out_features for layer in teacher.policy.mlp_extractor.policy_net
+                   if isinstance(layer, torch.nn.Linear)]
+    report = {
+        "teacher": str(teacher_path),
+        "teacher_net": teacher_net,
+        "states": len(states),
+        "reward_profile": reward_profile,
+        "teacher_throughput": {
+            "torch": inference_throughput(teacher, obs_dim),
+            "numpy": inference_throughput(policy_from_sb3(teacher.policy), obs_dim),
+        },
+        "students": [],
+    }
+
+    for hidden in sizes:
+        t0 = time.perf_counter()
+        student = make_student(teacher, hidden, n_layers=len(teacher_net), learning_rate=learning_rate, seed=base_seed)
+        history = train_student(student, states, teacher_logits, teacher_values, epochs=epochs, seed=base_seed)
+
+        path = output_dir / f"{teacher_name}_student{hidden}.zip"
+        save_student(student, path)
+        policy_from_sb3(student).save(npz_path_for(path), source_sha256=file_sha256(path))
+
+        result = {
+            "net_arch": [hidden] * len(teacher_net),
+            "path": str(path),
+            "final_loss": history[-1],
+            "train_s": time.perf_counter() - t0,
+            **agreement(student, eval_states, eval_logits),
+            "vs_teacher": play_against(student, teacher, n_games, base_seed + 10_000, reward_profile),
+            "throughput": {
+                "torch": inference_throughput(student, obs_dim),
+                "numpy": inference_throughput(policy_from_sb3(student), obs_dim),
+            },
+        }
+        report["students"].append(result)
+        print(f"[+] Student {result['net_arch']}: Übereinstimmung {result['action_agreement']:.1%} | "
+              f"KL {result['kl']:.3f} | vs. Lehrer S/U/N {result['vs_teacher']['wins']}/"
+              f"{result['vs_teacher']['draws']}/{result['vs_teacher']['losses']} | {result['train_s']:.0f}s")
+
+    report_path = output_dir / f"{teacher_name}_distill.json"
+    with report_path.open("w") as f:
+        json.dump(report, f, indent=2)
+    print(f"[+] Bericht: {report_path}")
+    return report
+
+
+def print_report(report: dict) -> None:
+    teacher = report["teacher_throughput"]
+    print("\n" + "=" * 86)
+    print(f"{'Netz':14s} {'Argmax':>8} {'KL':>7} {'Score vs. L.':>13} {'S/U/N':>10} "
+          f"{'torch obs/s':>13} {'NumPy obs/s':>13}")
+    print("-" * 86)
+    print(f"{str(report['teacher_net']) + ' (L)':14s} {'-':>8} {'-':>7} {'-':>13} {'-':>10} "
+          f"{teacher['torch']:>13,.0f} {teacher['numpy']:>13,.0f}")
+    for s in report["students"]:
+        vs = s["vs_teacher"]
+        print(f"{str(s['net_arch']):14s} {s['action_agreement']:>8.1%} {s['kl']:>7.3f} {vs['score']:>13.1%} "
+              f"{vs['wins']:>3}/{vs['draws']}/{vs['losses']:<3} "
+              f"{s['throughput']['torch']:>13,.0f} {s['throughput']['numpy']:>13,.0f}")
+    print("=" * 86)
+    print("Score vs. L.: (Siege + 0.5 × Remis) / Spiele gegen den Lehrer, beide Farbverteilungen")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Distilliert einen Checkpoint in kleinere Student-Netze")
+    parser.add_argument("teacher", help="Lehrer-Checkpoint (Voll oder Delta)")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[64, 128], help="Breite der Student-Schichten")
+    parser.add_argument("--episodes", type=int, default=64, help="Lehrer-Episoden für Trainings-Zustände")
+    parser.add_argument("--eval-episodes", type=int, default=16, help="Episoden für Test-Zustände")
+    parser.add_argument("--games", type=int, default=16, help="Spiele gegen den Lehrer pro Farbverteilung")
+    parser.add_argument("--epochs", type=int, default=20)
+    parser.add_argument("--lr", type=float, default=3e-3, help="Lernrate der Students")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--profile", default="balanced")
+    parser.add_argument("--output", default=str(DEFAULT_OUTPUT_DIR))
+    args = parser.parse_args()
+
+    print_report(distill(
+        args.teacher, args.sizes, n_episodes=args.episodes, n_eval_episodes=args.eval_episodes,
+        n_games=args.games, epochs=args.epochs, learning_rate=args.lr, base_seed=args.seed, reward_profile=args.profile,
+        output_dir=args.output,
+    ))
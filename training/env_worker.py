@@ -0,0 +1,161 @@
+"""
+Schlanker Env-Worker für LeanVecEnv.
+
+Wird als eigener Python-Prozess gestartet (python env_worker.py <address>, authkey via stdin)
+und importiert NUR den Simulations-Stack (NumPy, gymnasium, environment.py).
+Kein torch, kein stable-baselines3 → schneller Start und geringer RSS pro Worker.
+
+Protokoll (pickled Tuples über multiprocessing.connection):
+    ("init", {"n_games": k, "env_kwargs": {...}})   → ("ready", {"pid", "startup_s", "rss_mb"})
+    ("reset", seeds)                                → ("ok", obs)
+    ("step", actions)                               → ("ok", (obs, rewards, dones, infos, step_s))
+    ("env_method", (game, name, args, kwargs))      → ("ok", result)
+    ("get_attr", (game, name))                      → ("ok", value)
+    ("set_attr", (game, name, value))               → ("ok", None)
+    ("get_state", None)                             → ("ok", bytes)  (Spiele + NumPy-RNG, für Resume)
+    ("set_state", bytes)                            → ("ok", None)
+    ("close", None)                                 → Prozess beendet sich
+Fehler werden als ("error", traceback) zurückgeschickt.
+"""
+
+import time
+
+_START = time.perf_counter()
+
+import os
+import pickle
+import sys
+import traceback
+from multiprocessing.connection import Client
+
+import numpy as np
+
+from environment import CaptureTheFlagEnv
+
+
+class GameSlots:
+    """
+    Mehrere CTF-Spiele in einem Worker, flach als Agent-Slots angeordnet.
+
+    Slot-Reihenfolge: Spiel-major, innerhalb eines Spiels possible_agents
+    (identisch zu supersuit pettingzoo_env_to_vec_env_v1 + concat_vec_envs_v1).
+    """
+
+    def __init__(self, n_games: int, env_kwargs: dict):
+        self.games = [CaptureTheFlagEnv(**env_kwargs) for _ in range(n_games)]
+        self.agents = self.games[0].possible_agents
+        self.n_agents = len(self.agents)
+
+    def reset(self, seeds) -> np.ndarray:
+        obs = []
+        for game, seed in zip(self.games, seeds):
+            game_obs, _ = game.reset(seed=seed)
+            obs.extend(game_obs[agent] for agent in self.agents)
+        return np.stack(obs)
+
+    def step(self, actions: np.ndarray):
+        obs, rewards, dones, infos = [], [], [], []
+
+        for g, game in enumerate(self.games):
+            offset = g * self.n_agents
+            act_dict = {agent: int(actions[offset + i]) for i, agent in enumerate(self.agents)}
+            game_obs, game_rew, terms, truncs, game_infos = game.step(act_dict)
+
+            game_done = all(terms[a] or truncs[a] for a in self.agents)
+            for agent in self.agents:
+                info = dict(game_infos.get(agent, {}))
+                if game_done:
+                    info["terminal_observation"] = game_obs[agent]
+                    info["TimeLimit.truncated"] = truncs[agent] and not terms[agent]
+                infos.append(info)
+                rewards.append(game_rew.get(agent, 0.0))
+                dones.append(game_done)
+
+            # Auto-Reset (wie supersuit MarkovVectorEnv)
+            if game_done:
+                game_obs, _ = game.reset()
+            obs.extend(game_obs[agent] for agent in self.agents)
+
+        return (np.stack(obs), np.array(rewards, dtype=np.float32),
+                np.array(dones, dtype=bool), infos)
+
+    def get_state(self) -> bytes:
+        """Kompletter Simulationszustand inkl. globalem NumPy-RNG (environment.py nutzt np.random)."""
+        return pickle.dumps({"games": self.games, "rng": np.random.get_state()})
+
+    def set_state(self, blob: bytes) -> None:
+        state = pickle.loads(blob)
+        if len(state["games"]) != len(self.games):
+            raise ValueError(f"State has {len(state['games'])} games, worker runs {len(self.games)}")
+        self.games = state["games"]
+        np.random.set_state(state["rng"])
+
+
+def _rss_mb() -> float:
+    """RSS dieses Prozesses (ohne hardware.py-Import, um den Worker minimal zu halten)."""
+    try:
+        with open(f"/proc/{os.getpid()}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024.0
+    except OSError:
+        pass
+    return 0.0
+
+
+def serve(conn) -> None:
+    """Befehlsschleife des Workers."""
+    slots = None
+
+    while True:
+        try:
+            cmd, data = conn.recv()
+        except EOFError:
+            return
+
+        try:
+            if cmd == "init":
+                slots = GameSlots(data["n_games"], data["env_kwargs"])
+                conn.send(("ready", {
+                    "pid": os.getpid(),
+                    "startup_s": time.perf_counter() - _START,
+                    "rss_mb": _rss_mb(),
+                }))
+            elif cmd == "step":
+                t0 = time.perf_counter()
+                result = slots.step(data)
+                conn.send(("ok", (*result, time.perf_counter() - t0)))
+            elif cmd == "reset":
+                conn.send(("ok", slots.reset(data)))
+            elif cmd == "env_method":
+                game, name, args, kwargs = data
+                conn.send(("ok", getattr(slots.games[game], name)(*args, **kwargs)))
+            elif cmd == "get_attr":
+                game, name = data
+                conn.send(("ok", getattr(slots.games[game], name)))
+            elif cmd == "set_attr":
+                game, name, value = data
+                setattr(slots.games[game], name, value)
+                conn.send(("ok", None))
+            elif cmd == "get_state":
+                conn.send(("ok", slots.get_state()))
+            elif cmd == "set_state":
+                slots.set_state(data)
+                conn.send(("ok", None))
+            elif cmd == "close":
+                conn.close()
+                return
+            else:
+                raise ValueError(f"Unknown worker command: {cmd}")
+        except Exception:
+            conn.send(("error", traceback.format_exc()))
+
+
+if __name__ == "__main__":
+    address = sys.argv[1]
+    authkey = bytes.fromhex(sys.stdin.readline().strip())
+    connection = Client(address, authkey=authkey)
+    try:
+        serve(connection)
+    except KeyboardInterrupt:
+        pass
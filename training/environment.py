@@ -15,6 +15,7 @@ import numpy as np
 from gymnasium import spaces
 from pettingzoo import ParallelEnv
 from typing import Dict, Optional, List
+from collections import deque
 import functools
 
 # Import configuration from central config file (Single Source of Truth!)
@@ -47,6 +48,7 @@ class CaptureTheFlagEnv(ParallelEnv):
         carrier_speed_penalty: float = 0.3,
         render_mode: Optional[str] = None,
         reward_profile: str = "balanced",  # NEW: "micromanager", "sparse", or "balanced"
+        replay_buffer_size: int = 2,       # Anzahl gemerkter abgeschlossener Episoden
     ):
         super().__init__()
 
@@ -89,6 +91,9 @@ class CaptureTheFlagEnv(ParallelEnv):
         self.episode_history = []
         self.episode_stats = {}
 
+        # Ringpuffer abgeschlossener Episoden (nur Referenzen, kein Kopieren beim Reset)
+        self.recent_episodes = deque(maxlen=max(1, replay_buffer_size))
+
     # ========== HILFSFUNKTIONEN ==========
 
     @staticmethod
@@ -228,9 +233,13 @@ class CaptureTheFlagEnv(ParallelEnv):
 
     def reset(self, seed: Optional[int] = None, options: Optional[dict] = None):
         """Environment zurücksetzen."""
-        # Letztes Spiel sichern für Replay
-        if hasattr(self, "episode_history") and len(self.episode_history) > 0:
-            self.last_replay = self.get_replay_data()
+        # Letztes Spiel im Ringpuffer merken (Replay wird erst bei Bedarf gebaut)
+        if len(self.episode_history) > 0:
+            self.recent_episodes.append({
+                "frames": self.episode_history,
+                "final_scores": self.scores.copy(),
+                "episode_stats": self.episode_stats.copy(),
+            })
 
         if seed is not None:
             np.random.seed(seed)
@@ -808,21 +817,50 @@ class CaptureTheFlagEnv(ParallelEnv):
 
         self.episode_history.append(frame)
 
-    def get_replay_data(self) -> dict:
-        """Replay-Daten für Export."""
+    def _build_replay(self, frames: list, final_scores: dict, episode_stats: dict) -> dict:
         return {
             "metadata": {
                 "grid_size": self.grid_size,
                 "max_steps": self.max_steps,
                 "win_score": self.win_score,
                 "tackle_cooldown": self.tackle_cooldown,
-                "final_scores": self.scores.copy(),
-                "episode_stats": self.episode_stats.copy(),
+                "final_scores": final_scores,
+                "episode_stats": episode_stats,
                 "walls": self.walls,
             },
-            "frames": self.episode_history,
+            "frames": frames,
         }
 
+    def get_replay_data(self) -> dict:
+        """Replay-Daten der laufenden Episode für Export."""
+        return self._build_replay(self.episode_history, self.scores.copy(), self.episode_stats.copy())
+
+    def get_episode_record(self, episodes_ago: int = 0) -> Optional[dict]:
+        """
+        Replay einer abgeschlossenen Episode aus dem Ringpuffer.
+
+        Für Aufrufe über VecEnv.env_method: Nach dem Auto-Reset ist die gerade
+        beendete Episode episodes_ago=0.
+
+        Returns:
+            Replay-Daten (Format wie get_replay_data) oder None, falls nicht (mehr) im Puffer
+        """
+        if episodes_ago >= len(self.recent_episodes):
+            return None
+        record = self.recent_episodes[-1 - episodes_ago]
+        return self._build_replay(record["frames"], record["final_scores"], record["episode_stats"])
+
+    def __getstate__(self) -> dict:
+        # Für Resume-Snapshots: Ringpuffer alter Episoden nicht mitschleppen
+        state = self.__dict__.copy()
+        state["recent_episodes"] = deque(maxlen=self.recent_episodes.maxlen)
+        return state
+
+    @property
+    def last_replay(self) -> Optional[dict]:
+        """Replay der zuletzt abgeschlossenen Episode (Kompatibilität)."""
+        return self.get_episode_record(0)
+
     def render(self):
         """Text-Visualisierung."""
         if self.render_mode != "human":
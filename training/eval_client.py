@@ -0,0 +1,138 @@
+"""
+Schlanker Client für den Evaluations-Daemon (eval_daemon.py).
+
+Lädt weder torch noch die Umgebung - ein Aufruf kostet nur den Interpreter-Start,
+die eigentliche Arbeit machen die warmen Worker des Daemons. Ergebnisse kommen
+zeilenweise (JSON) zurück, Fortschritt wird sofort angezeigt.
+
+Modelle werden als Pfad angegeben; "random" spielt mit Zufallsaktionen.
+
+Nutzung:
+    python eval_client.py status
+    python eval_client.py evaluate models/Gordon_final.zip --episodes 64
+    python eval_client.py match models/Gordon_final.zip models/Algernon_final.zip --games 8
+    python eval_client.py replay models/Gordon_final.zip --seed 42 [--red models/Algernon_final.zip]
+    python eval_client.py stop
+    ... --json                     # Rohe Antwortzeilen ausgeben
+"""
+
+import argparse
+import json
+import socket
+import sys
+import time
+from pathlib import Path
+from typing import Iterator, Optional
+
+from config import EVAL_DAEMON_CONFIG
+
+BASE_DIR = Path(__file__).resolve().parent
+
+
+def daemon_address(socket_path: Optional[str | Path] = None):
+    """Unix-Socket-Pfad bzw. (host, port), falls die Plattform kein AF_UNIX kennt."""
+    if not hasattr(socket, "AF_UNIX"):
+        return ("127.0.0.1", EVAL_DAEMON_CONFIG["tcp_port"])
+    return str(Path(socket_path) if socket_path else BASE_DIR / EVAL_DAEMON_CONFIG["socket"])
+
+
+def model_spec(model: Optional[str]) -> Optional[str]:
+    """Absoluter Pfad - der Daemon läuft in einem anderen Arbeitsverzeichnis ("random" bleibt)."""
+    if model is None or model == "random":
+        return model
+    return str(Path(model).resolve())
+
+
+def connect(address) -> socket.socket:
+    family = socket.AF_INET if isinstance(address, tuple) else socket.AF_UNIX
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.connect(address)
+    return sock
+
+
+def request(message: dict, address=None) -> Iterator[dict]:
+    """Schickt einen Auftrag und liefert die Antwortzeilen, sobald sie eintreffen."""
+    with connect(address or daemon_address()) as sock:
+        sock.sendall((json.dumps(message) + "\n").encode("utf-8"))
+        with sock.makefile("r", encoding="utf-8") as lines:
+            for line in lines:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def print_event(event: dict) -> None:
+    kind = event.get("event")
+    if kind == "error":
+        print(f"[!] {event['message']}")
+    elif kind == "progress":
+        print(f"[*] {event['done']}/{event['total']} {event.get('label', '')} "
+              f"(Worker {event['worker']}, {event['seconds'] * 1000:.0f} ms)")
+    elif kind == "result" and event.get("type") == "evaluate":
+        print(f"[+] {event['episodes']} Episoden | Reward {event['mean_reward']:.2f} ± {event['std_reward']:.2f} | "
+              f"Win {event['win_rate']:.0%} | Draw {event['draw_rate']:.0%} | "
+              f"Captures {event['mean_captures']:.2f} | Länge {event['mean_length']:.0f}")
+    elif kind == "result" and event.get("type") == "match":
+        print(f"[+] {event['a']} vs {event['b']}: {event['wins']} Siege, {event['draws']} Remis, "
+              f"{event['losses']} Niederlagen ({event['games']} Spiele, beide Farben)")
+    elif kind == "result" and event.get("type") == "replay":
+        scores = event["final_scores"]
+        print(f"[+] Replay: {event['file']} | Blue {scores['blue']} : {scores['red']} Red | {event['frames']} Frames")
+    elif kind == "result" and event.get("type") == "status":
+        print(f"[*] Daemon seit {event['uptime']:.0f}s | {event['jobs']} Aufträge")
+        for worker in event["workers"]:
+            print(f"    Worker {worker['index']} (PID {worker['pid']}): {worker['policies']} Policies geladen | "
+                  f"Cache {worker['hits']} Treffer / {worker['misses']} geladen | {worker['envs']} Envs")
+    elif kind == "result" and event.get("type") == "stop":
+        print("[+] Daemon wird beendet")
+    else:
+        print(json.dumps(event))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Aufträge an den Evaluations-Daemon schicken")
+    parser.add_argument("--socket", default=None, help="Socket-Pfad (Default: training/eval_daemon.sock)")
+    parser.add_argument("--json", action="store_true", help="Antwortzeilen roh ausgeben")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("status")
+    subparsers.add_parser("stop")
+
+    p_eval = subparsers.add_parser("evaluate", help="N geseedete Episoden (Modell steuert alle Agenten)")
+    p_eval.add_argument("model")
+    p_eval.add_argument("--episodes", type=int, default=16)
+
+    p_match = subparsers.add_parser("match", help="Zwei Modelle gegeneinander, beide Farbverteilungen")
+    p_match.add_argument("model")
+    p_match.add_argument("opponent")
+    p_match.add_argument("--games", type=int, default=4, help="Spiele pro Farbverteilung")
+
+    p_replay = subparsers.add_parser("replay", help="Eine Episode als Replay exportieren")
+    p_replay.add_argument("model")
+    p_replay.add_argument("--red", default=None, help="Eigenes Modell für Rot")
+    p_replay.add_argument("--name", default=None, help="Dateiname im Replay-Verzeichnis")
+
+    for sub in (p_eval, p_match, p_replay):
+        sub.add_argument("--seed", type=int, default=0)
+        sub.add_argument("--profile", default="balanced")
+        sub.add_argument("--mode", choices=["float", "int8"], default="float")
+    args = parser.parse_args()
+
+    message = {"type": args.command}
+    if args.command in ("evaluate", "match", "replay"):
+        message.update(model=model_spec(args.model), seed=args.seed, profile=args.profile, mode=args.mode)
+    if args.command == "evaluate":
+        message["episodes"] = args.episodes
+    elif args.command == "match":
+        message.update(opponent=model_spec(args.opponent), games=args.games)
+    elif args.command == "replay":
+        message.update(red=model_spec(args.red), name=args.name)
+
+    address = daemon_address(args.socket)
+    t0 = time.perf_counter()
+    try:
+        for event in request(message, address):
+            print(json.dumps(event)) if args.json else print_event(event)
+    except (FileNotFoundError, ConnectionRefusedError):
+        print(f"[!] Kein Daemon unter {address} - starte ihn mit: python eval_daemon.py")
+        sys.exit(1)
+    if not args.json:
+        print(f"[*] Antwort nach {(time.perf_counter() - t0) * 1000:.0f} ms")
@@ -0,0 +1,301 @@
+"""
+Evaluations-Daemon: warme Worker für Replay-Export, Evaluationen und Matchups.
+
+export_replay.py, create_checkpoint_replays.py und train.create_replay zahlen bei jedem
+Aufruf Interpreter-Start, torch/SB3-Import (~2.5 s) und das Laden des Modells - für
+wenige Sekunden Simulation. Der Daemon hält stattdessen Worker-Prozesse am Leben:
+
+- torch ist beim Start schon importiert, geladene Policies liegen pro Worker in einem
+  LRU (model_cache.PolicyCache, Schlüssel = Datei-Hash - eine neu trainierte Datei unter
+  gleichem Namen wird also neu geladen), Umgebungen werden wiederverwendet
+- Aufträge eines Modells gehen bevorzugt an denselben Worker (Hash → Worker), damit
+  der LRU trifft; große Evaluationen werden in Teil-Jobs über alle Worker verteilt
+- Aufträge kommen als JSON-Zeile über einen lokalen Unix-Socket (eval_client.py),
+  Fortschritt und Ergebnis gehen zeilenweise zurück, sobald sie vorliegen
+- Replays schreibt der Daemon selbst über replay_store.py (ein Schreiber für den Katalog)
+
+Aufträge:
+    {"type": "evaluate", "model": path, "episodes": 64, "seed": 0, "profile": "balanced", "mode": "float"}
+    {"type": "match", "model": path, "opponent": path, "games": 4, ...}   beide Farbverteilungen
+    {"type": "replay", "model": path, "red": path | null, "seed": 42, "name": null, ...}
+    {"type": "status"} / {"type": "stop"}
+Antworten: {"event": "progress", ...}, {"event": "result", "type": ..., ...}, {"event": "error", "message": ...}
+
+Nutzung:
+    python eval_daemon.py [--workers 4] [--socket pfad]
+"""
+
+import argparse
+import json
+import os
+import socketserver
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from functools import partial
+from pathlib import Path
+from typing import Callable, List, Optional
+
+from config import EVAL_DAEMON_CONFIG
+from environment import CaptureTheFlagEnv
+from eval_client import connect, daemon_address
+from evaluation import summarize_episodes
+from model_cache import FileHashIndex, PolicyCache
+from replay_store import DEFAULT_REPLAY_DIR, ReplayStore
+from rollout import rollout_episodes
+
+RANDOM_MODEL = "random"
+
+# ========== WORKER ==========
+
+_WORKER = None
+
+
+def _init_worker(cache_size: int, preload_torch: bool = True) -> None:
+    global _WORKER
+    if preload_torch:
+        import torch
+        torch.set_num_threads(1)  # Parallelität kommt aus den Worker-Prozessen
+    from quantization import POLICY_MODES, load_policy
+
+    _WORKER = {
+        "policies": {mode: PolicyCache(cache_size, loader=partial(load_policy, mode=mode)) for mode in POLICY_MODES},
+        "envs": {},   # Reward-Profil → wiederverwendete Umgebungen
+    }
+
+
+def _policy(path: Optional[str], model_hash: Optional[str], mode: str, profile: str):
+    return None if path is None else _WORKER["policies"][mode].get(path, model_hash, reward_profile=profile)
+
+
+def _envs(profile: str, n: int) -> List[CaptureTheFlagEnv]:
+    pool = _WORKER["envs"].setdefault(profile, [])
+    while len(pool) < n:
+        pool.append(CaptureTheFlagEnv(reward_profile=profile))
+    return pool[:n]
+
+
+def worker_status() -> dict:
+    caches = _WORKER["policies"].values()
+    return {
+        "pid": os.getpid(),
+        "policies": sum(len(cache.models) for cache in caches),
+        "hits": sum(cache.hits for cache in caches),
+        "misses": sum(cache.misses for cache in caches),
+        "envs": sum(len(envs) for envs in _WORKER["envs"].values()),
+    }
+
+
+def run_daemon_job(job: dict) -> dict:
+    """Spielt job["seeds"] gebatcht (läuft im Worker-Prozess)."""
+    t0 = time.perf_counter()
+    blue = _policy(job["blue_path"], job["blue_hash"], job["mode"], job["profile"])
+    red = _policy(job.get("red_path"), job.get("red_hash"), job["mode"], job["profile"])
+    replays = rollout_episodes(blue, len(job["seeds"]), seeds=job["seeds"],
+                               env_kwargs={"reward_profile": job["profile"]}, red_model=red,
+                               envs=_envs(job["profile"], len(job["seeds"])))
+    if not job.get("keep_replays"):
+        # Nur die Kennzahlen zurückschicken, nicht ~700 KB Frames pro Episode
+        replays = [{"metadata": {key: r["metadata"][key] for key in ("agent_returns", "final_scores", "episode_stats")}}
+                   for r in replays]
+    return {"replays": replays, "seconds": time.perf_counter() - t0}
+
+
+# ========== DAEMON ==========
+
+class EvalDaemon:
+    """
+    Verteilt Aufträge auf warme Worker (je ein Prozess mit eigenem Policy-LRU).
+
+    Args:
+        n_workers: Anzahl Worker-Prozesse
+        cache_size: Policies pro Worker und Modus
+        chunk_episodes: Episoden pro Teil-Job
+        replay_dir: Ziel für exportierte Replays
+        preload_torch: torch beim Start der Worker importieren
+    """
+
+    def __init__(self, n_workers: Optional[int] = None, cache_size: int = EVAL_DAEMON_CONFIG["policy_cache"],
+                 chunk_episodes: int = EVAL_DAEMON_CONFIG["chunk_episodes"],
+                 replay_dir: str | Path = DEFAULT_REPLAY_DIR, preload_torch: bool = True):
+        n_workers = n_workers or EVAL_DAEMON_CONFIG["workers"] or os.cpu_count() or 1
+        self.workers = [ProcessPoolExecutor(max_workers=1, initializer=_init_worker,
+                                            initargs=(cache_size, preload_torch)) for _ in range(n_workers)]
+        self.chunk_episodes = chunk_episodes
+        self.store = ReplayStore(replay_dir)
+        self.hashes = FileHashIndex()
+        self._lock = threading.Lock()   # Hash-Index und Replay-Katalog
+        self.started = time.time()
+        self.jobs = 0
+
+    def warm_up(self) -> None:
+        """Startet alle Worker (Prozess + Imports) vor dem ersten Auftrag."""
+        for future in [worker.submit(worker_status) for worker in self.workers]:
+            future.result()
+
+    def close(self) -> None:
+        for worker in self.workers:
+            worker.shutdown(wait=False, cancel_futures=True)
+
+    def model_ref(self, model: Optional[str]) -> tuple:
+        """(absoluter Pfad, Datei-Hash) oder (None, None) für Zufallsaktionen."""
+        if model in (None, RANDOM_MODEL):
+            return None, None
+        path = Path(model).resolve()
+        if not path.exists():
+            raise FileNotFoundError(f"Modell nicht gefunden: {model}")
+        with self._lock:
+            return str(path), self.hashes.hash(path)
+
+    def _worker_index(self, model_hash: Optional[str]) -> int:
+        return int(model_hash[:8], 16) % len(self.workers) if model_hash else 0
+
+    def _run(self, jobs: List[dict], send: Callable, labels: List[str]) -> List[dict]:
+        """Teil-Jobs verteilen (ab dem Worker des Modells reihum), Fortschritt sofort melden."""
+        start = self._worker_index(jobs[0].get("blue_hash")) if jobs else 0
+        futures = {}
+        for i, job in enumerate(jobs):
+            index = (start + i) % len(self.workers)
+            futures[self.workers[index].submit(run_daemon_job, job)] = (i, index)
+
+        results = [None] * len(jobs)
+        for done, future in enumerate(as_completed(futures), start=1):
+            i, index = futures[future]
+            results[i] = future.result()
+            send({"event": "progress", "done": done, "total": len(jobs), "label": labels[i],
+                  "worker": index, "seconds": results[i]["seconds"]})
+        return results
+
+    def handle(self, message: dict, send: Callable) -> None:
+        kind = message.get("type")
+        profile = message.get("profile", "balanced")
+        mode = message.get("mode", "float")
+        seed = int(message.get("seed", 0))
+        t0 = time.perf_counter()
+
+        if kind == "status":
+            statuses = [worker.submit(worker_status) for worker in self.workers]
+            send({"event": "result", "type": "status", "uptime": time.time() - self.started, "jobs": self.jobs,
+                  "workers": [{"index": i, **future.result()} for i, future in enumerate(statuses)]})
+            return
+
+        if kind == "evaluate":
+            path, model_hash = self.model_ref(message.get("model"))
+            episodes = int(message.get("episodes", 16))
+            seeds = list(range(seed, seed + episodes))
+            chunks = [seeds[i:i + self.chunk_episodes] for i in range(0, episodes, self.chunk_episodes)]
+            jobs = [{"blue_path": path, "blue_hash": model_hash, "seeds": chunk, "profile": profile, "mode": mode}
+                    for chunk in chunks]
+            results = self._run(jobs, send, [f"Seeds {c[0]}-{c[-1]}" for c in chunks])
+            summary = summarize_episodes([replay for result in results for replay in result["replays"]])
+            send({"event": "result", "type": "evaluate", "model": message.get("model"), **summary,
+                  "seconds": time.perf_counter() - t0})
+
+        elif kind == "match":
+            a_path, a_hash = self.model_ref(message.get("model"))
+            b_path, b_hash = self.model_ref(message.get("opponent"))
+            seeds = list(range(seed, seed + int(message.get("games", 4))))
+            jobs = [
+                {"blue_path": a_path, "blue_hash": a_hash, "red_path": b_path, "red_hash": b_hash,
+                 "seeds": seeds, "profile": profile, "mode": mode},
+                {"blue_path": b_path, "blue_hash": b_hash, "red_path": a_path, "red_hash": a_hash,
+                 "seeds": seeds, "profile": profile, "mode": mode},
+            ]
+            results = self._run(jobs, send, ["A als Blau", "A als Rot"])
+            # Aus Sicht von model (A): erst als Blau, dann als Rot
+            diffs = [r["metadata"]["final_scores"]["blue"] - r["metadata"]["final_scores"]["red"]
+                     for r in results[0]["replays"]]
+            diffs += [r["metadata"]["final_scores"]["red"] - r["metadata"]["final_scores"]["blue"]
+                      for r in results[1]["replays"]]
+            send({"event": "result", "type": "match", "a": message.get("model"), "b": message.get("opponent"),
+                  "games": len(diffs), "wins": sum(d > 0 for d in diffs), "draws": sum(d == 0 for d in diffs),
+                  "losses": sum(d < 0 for d in diffs), "seconds": time.perf_counter() - t0})
+
+        elif kind == "replay":
+            blue_path, blue_hash = self.model_ref(message.get("model"))
+            red_path, red_hash = self.model_ref(message.get("red")) if message.get("red") else (None, None)
+            job = {"blue_path": blue_path, "blue_hash": blue_hash, "red_path": red_path, "red_hash": red_hash,
+                   "seeds": [seed], "profile": profile, "mode": mode, "keep_replays": True}
+            replay = self._run([job], send, [f"Seed {seed}"])[0]["replays"][0]
+            replay["metadata"].update({"model_path": blue_path, "red_model_path": red_path, "seed": seed,
+                                       "reward_profile": profile, "policy_mode": mode,
+                                       "timestamp": datetime.now().isoformat()})
+            scores = replay["metadata"]["final_scores"]
+            name = message.get("name") or (f"{'demo' if blue_path is None else 'trained'}_Blue{scores['blue']}v"
+                                           f"{scores['red']}Red_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+            with self._lock:
+                alias = self.store.put(replay, Path(name).name)
+            send({"event": "result", "type": "replay", "file": alias.name, "path": str(alias),
+                  "final_scores": scores, "frames": len(replay["frames"]), "seconds": time.perf_counter() - t0})
+
+        else:
+            raise ValueError(f"Unbekannter Auftrag: {kind}")
+        self.jobs += 1
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    def handle(self) -> None:
+        def send(event: dict) -> None:
+            self.wfile.write((json.dumps(event) + "\n").encode("utf-8"))
+            self.wfile.flush()
+
+        try:
+            message = json.loads(self.rfile.readline())
+            if message.get("type") == "stop":
+                send({"event": "result", "type": "stop"})
+                threading.Thread(target=self.server.shutdown, daemon=True).start()
+                return
+            self.server.daemon.handle(message, send)
+        except BrokenPipeError:
+            pass   # Client hat aufgelegt
+        except Exception as e:
+            try:
+                send({"event": "error", "message": f"{type(e).__name__}: {e}"})
+            except BrokenPipeError:
+                pass
+
+
+def make_server(daemon: EvalDaemon, address) -> socketserver.BaseServer:
+    """Threading-Server auf Unix-Socket (bzw. localhost-TCP ohne AF_UNIX)."""
+    if isinstance(address, tuple):
+        server_class = socketserver.ThreadingTCPServer
+    else:
+        server_class = socketserver.ThreadingUnixStreamServer
+        if os.path.exists(address):
+            # Liegengebliebener Socket eines beendeten Daemons vs. laufender Daemon
+            try:
+                connect(address).close()
+                raise RuntimeError(f"Unter {address} läuft bereits ein Daemon")
+            except (ConnectionRefusedError, FileNotFoundError):
+                os.unlink(address)
+    server_class.daemon_threads = True
+    server = server_class(address, _RequestHandler)
+    server.daemon = daemon
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Evaluations-Daemon mit warmen Workern")
+    parser.add_argument("--workers", type=int, default=EVAL_DAEMON_CONFIG["workers"])
+    parser.add_argument("--socket", default=None, help="Socket-Pfad (Default: training/eval_daemon.sock)")
+    parser.add_argument("--replays", default=str(DEFAULT_REPLAY_DIR), help="Ziel für exportierte Replays")
+    args = parser.parse_args()
+
+    address = daemon_address(args.socket)
+    daemon = EvalDaemon(args.workers, replay_dir=args.replays)
+    t0 = time.perf_counter()
+    daemon.warm_up()
+    print(f"[+] {len(daemon.workers)} Worker warm ({time.perf_counter() - t0:.1f}s) | lausche auf {address}")
+
+    server = make_server(daemon, address)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if not isinstance(address, tuple) and os.path.exists(address):
+            os.unlink(address)
+        daemon.close()
+        print("\n[*] Daemon beendet")
@@ -0,0 +1,213 @@
+"""
+Echte Evaluation von Checkpoints (statt geschätzter Lernkurven).
+
+Pro Checkpoint werden N geseedete Episoden gebatcht gespielt (rollout.py, alle
+Episoden in einem predict()-Batch pro Schritt). Mehrere Checkpoints laufen parallel
+auf einem Prozess-Pool; Ergebnisse landen in einem Cache, dessen Schlüssel den
+Inhalts-Hash des Checkpoints enthält - bei erneutem Aufruf werden nur neue oder
+geänderte Checkpoints gespielt.
+
+Mit mode="int8" laufen die Policies quantisiert (quantization.py, inkl. Übereinstimmungs-Check).
+
+Kennzahlen (alle vier Agenten steuert derselbe Checkpoint):
+- mean_reward / std_reward: Episoden-Reward pro Agent (wie ep_rew_mean im Training)
+- mean_length: Episodenlänge in Schritten
+- mean_captures: Captures beider Teams pro Episode
+- win_rate / draw_rate: Anteil Blue-Siege bzw. Unentschieden (Seiten-Asymmetrie sichtbar)
+"""
+
+import json
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from functools import partial
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+
+from metrics_stream import write_json_atomic
+from model_cache import FileHashIndex, PolicyCache
+from rollout import rollout_episodes
+
+CHECKPOINT_PATTERN = re.compile(r"^(?P<run>.+)_(?P<steps>\d+)_steps(\.zip|\.delta\.npz)$")
+
+
+def find_run_checkpoints(models_dir: str | Path) -> dict:
+    """
+    Gruppiert alle *_steps Checkpoints (Voll und Delta) nach Run-Name.
+
+    Returns:
+        {run_name: [(timesteps, path), ...]} nach Timesteps sortiert
+    """
+    runs = {}
+    for path in Path(models_dir).glob("*_steps*"):
+        match = CHECKPOINT_PATTERN.match(path.name)
+        if match:
+            runs.setdefault(match.group("run"), {}).setdefault(int(match.group("steps")), path)
+    return {run: sorted(steps.items()) for run, steps in runs.items()}
+
+
+def summarize_episodes(replays: List[dict]) -> dict:
+    """Kennzahlen über eine Liste von Replays (mit metadata.agent_returns)."""
+    agent_returns = [r for replay in replays for r in replay["metadata"]["agent_returns"].values()]
+    scores = [replay["metadata"]["final_scores"] for replay in replays]
+    stats = [replay["metadata"]["episode_stats"] for replay in replays]
+
+    return {
+        "episodes": len(replays),
+        "mean_reward": float(np.mean(agent_returns)),
+        "std_reward": float(np.std(agent_returns)),
+        "mean_length": float(np.mean([s["total_steps"] for s in stats])),
+        "mean_captures": float(np.mean([s["blue_captures"] + s["red_captures"] for s in stats])),
+        "win_rate": float(np.mean([s["blue"] > s["red"] for s in scores])),
+        "draw_rate": float(np.mean([s["blue"] == s["red"] for s in scores])),
+    }
+
+
+def evaluate_model(model, n_episodes: int, base_seed: int = 0, reward_profile: str = "balanced") -> dict:
+    """Spielt n_episodes geseedete Episoden (base_seed, base_seed+1, ...) und fasst sie zusammen."""
+    seeds = [base_seed + i for i in range(n_episodes)]
+    replays = rollout_episodes(model, n_episodes, seeds=seeds, env_kwargs={"reward_profile": reward_profile})
+    return summarize_episodes(replays)
+
+
+class EvaluationCache:
+    """
+    Persistenter Ergebnis-Cache: Schlüssel = Checkpoint-Hash + Evaluationsparameter.
+    Enthält zusätzlich den (mtime, Größe)-Hash-Index der Modell-Dateien.
+    """
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        data = {}
+        if self.path.exists():
+            try:
+                with self.path.open() as f:
+                    data = json.load(f)
+            except (OSError, json.JSONDecodeError):
+                data = {}
+        self.results = data.get("results", {})
+        self.hashes = FileHashIndex(data.get("models", {}))
+
+    @staticmethod
+    def key(model_hash: str, n_episodes: int, base_seed: int, reward_profile: str, mode: str = "float") -> str:
+        return f"{model_hash}:{reward_profile}:{n_episodes}:{base_seed}:{mode}"
+
+    def save(self) -> None:
+        write_json_atomic(self.path, {"results": self.results, "models": self.hashes.entries}, indent=2)
+
+
+# ========== WORKER ==========
+
+_POLICY_CACHE = None
+
+
+def _init_worker(cache_size: int, mode: str = "float") -> None:
+    global _POLICY_CACHE
+    import torch
+    from quantization import load_policy
+
+    torch.set_num_threads(1)  # Parallelität kommt aus dem Prozess-Pool
+    _POLICY_CACHE = PolicyCache(cache_size, loader=partial(load_policy, mode=mode))
+
+
+def run_evaluation_job(job: dict) -> dict:
+    """Evaluiert einen Checkpoint (läuft im Worker-Prozess)."""
+    if _POLICY_CACHE is None:
+        _init_worker(cache_size=2, mode=job["mode"])
+
+    t0 = time.perf_counter()
+    model = _POLICY_CACHE.get(job["path"], job["model_hash"], reward_profile=job["reward_profile"])
+    result = evaluate_model(model, job["n_episodes"], job["base_seed"], job["reward_profile"])
+    if getattr(model, "agreement", None) is not None:
+        result["int8_agreement"] = model.agreement
+    return {**result, "seconds": time.perf_counter() - t0}
+
+
+def evaluate_checkpoints(checkpoints: List[tuple], n_episodes: int = 16, base_seed: int = 0,
+                         reward_profile: str = "balanced", n_workers: Optional[int] = None,
+                         cache: Optional[EvaluationCache] = None, mode: str = "float") -> List[dict]:
+    """
+    Evaluiert [(timesteps, path), ...]; bereits gecachte Checkpoints werden nicht neu gespielt.
+
+    mode: Inference-Modus der Policies ("float" oder "int8", eigener Cache-Eintrag)
+
+    Returns:
+        Ergebnisse pro Checkpoint (inkl. timesteps, path, model_hash), nach Timesteps sortiert
+    """
+    n_workers = n_workers or os.cpu_count() or 1
+    results, jobs = [], []
+
+    for timesteps, path in checkpoints:
+        model_hash = cache.hashes.hash(path) if cache else None
+        key = EvaluationCache.key(model_hash, n_episodes, base_seed, reward_profile, mode) if cache else None
+        entry = {"timesteps": timesteps, "path": str(path), "model_hash": model_hash}
+
+        if cache and key in cache.results:
+            results.append({**entry, **cache.results[key], "cached": True})
+        else:
+            jobs.append({**entry, "key": key, "n_episodes": n_episodes, "base_seed": base_seed,
+                         "reward_profile": reward_profile, "mode": mode})
+
+    print(f"[*] {len(checkpoints)} Checkpoints | gecacht: {len(results)} | zu evaluieren: {len(jobs)} "
+          f"({n_episodes} Episoden, Profil {reward_profile}, Modus {mode})")
+
+    if jobs:
+        t_start = time.perf_counter()
+        workers = min(n_workers, len(jobs))
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(2, mode)) as pool:
+            futures = {pool.submit(run_evaluation_job, job): job for job in jobs}
+
+            for done, future in enumerate(as_completed(futures), start=1):
+                job = futures[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    print(f"[!] {Path(job['path']).name}: {e}")
+                    continue
+
+                metrics = {k: v for k, v in result.items() if k != "seconds"}
+                if cache:
+                    cache.results[job["key"]] = metrics
+                    cache.save()
+                results.append({"timesteps": job["timesteps"], "path": job["path"],
+                                "model_hash": job["model_hash"], **metrics, "cached": False})
+
+                elapsed = time.perf_counter() - t_start
+                eta = elapsed / done * (len(jobs) - done)
+                print(f"[+] [{done}/{len(jobs)}] {job['timesteps']:>12,} Steps: "
+                      f"Reward {metrics['mean_reward']:7.2f} | Win {metrics['win_rate']:.0%} | "
+                      f"Captures {metrics['mean_captures']:.2f} | {result['seconds']:.1f}s | ETA {eta:.0f}s")
+
+    return sorted(results, key=lambda r: r["timesteps"])
+
+
+def to_training_logs(results: List[dict], model_name: str, total_timesteps: Optional[int] = None) -> dict:
+    """Ergebnisse im Schema von training_logs.json (wie MetricsCallback/StreamSummary)."""
+    rewards = [r["mean_reward"] for r in results]
+    last = results[-1] if results else {}
+    total = total_timesteps or last.get("timesteps", 0)
+
+    return {
+        "model_name": model_name,
+        "total_timesteps": total,
+        "current_timesteps": last.get("timesteps", 0),
+        "progress_percent": (last.get("timesteps", 0) / total * 100) if total else 0.0,
+        "last_update": datetime.now().isoformat(),
+        "max_reward": max(rewards) if rewards else 0.0,
+        "current_mean_reward": last.get("mean_reward", 0.0),
+        "performance": {},
+        "source": "evaluation",
+        "timesteps": [r["timesteps"] for r in results],
+        "episodes": [r["episodes"] for r in results],
+        "mean_reward": rewards,
+        "std_reward": [r["std_reward"] for r in results],
+        "mean_length": [r["mean_length"] for r in results],
+        "mean_captures": [r["mean_captures"] for r in results],
+        "win_rate": [r["win_rate"] for r in results],
+        "draw_rate": [r["draw_rate"] for r in results],
+        "performance_history": [],
+    }
@@ -7,19 +7,44 @@ Vereinfachte Nutzung:
 - python export_replay.py --demo
 - python export_replay.py --model latest
 - python export_replay.py --model models/mein_spezifisches_modell.zip
+
+Liegt neben dem Zip eine konvertierte NumPy-Policy (numpy_policy.py, gleicher Name
+mit .npz), wird diese verwendet - dann werden torch und stable-baselines3 gar nicht
+geladen. --torch erzwingt das SB3-Modell, --mode int8 die quantisierte Policy
+(quantization.py, bricht bei zu geringer Übereinstimmung mit float ab).
+
+Mehrere Episoden (--episodes N --workers K): Geseedete Episoden (--seed, --seed+1, ...)
+laufen in Worker-Prozessen, je --batch Episoden mit gebatchter Inference. Jeder Worker
+lädt das Modell einmal. Kompakte Zusammenfassungen aller Episoden werden zeilenweise nach
+replays/exports/<name>.jsonl geschrieben, sobald ein Batch fertig ist; als volles Replay
+bleiben nur die --keep-top besten Episoden (nach Reward) und die per --keep-seeds
+gewählten. Am Ende stehen Win/Draw/Loss-Raten (Sicht Blau) und Mittelwerte für Captures
+und Stuns mit 95%-Konfidenzintervallen.
+
+- python export_replay.py --model latest --episodes 200 --workers 4 --keep-top 3
+- python export_replay.py --demo --episodes 32 --keep-seeds 5,17
 """
 
 import argparse
-import os
 import json
+import math
+import os
+import sys
 import datetime
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import List, Optional
+
 import numpy as np
-from stable_baselines3 import PPO
 
-from environment import CaptureTheFlagEnv
+from metrics_stream import write_json_atomic
+from numpy_policy import NumpyPolicy, find_numpy_policy
+from replay_store import DEFAULT_REPLAY_DIR, ReplayStore
+from rollout import rollout_episodes
 
 MODELS_DIR = "training/models"
-REPLAYS_DIR = "visualization/replays"
+REPLAYS_DIR = DEFAULT_REPLAY_DIR  # unabhängig vom Arbeitsverzeichnis
 
 
 def find_latest_model() -> str:
@@ -45,30 +70,205 @@ def find_latest_model() -> str:
     return os.path.join(MODELS_DIR, latest_model)
 
 
-def record_episode(env, model=None, seed=None):
-    """Nimmt eine komplette Episode auf."""
-    obs, info = env.reset(seed=seed)
-    done = False
+def record_episode(model=None, seed=None, env_kwargs=None):
+    """Nimmt eine komplette Episode auf (ohne Modell: zufällige Aktionen für Demo-Modus)."""
+    replay_data = rollout_episodes(model, seeds=[seed], env_kwargs=env_kwargs)[0]
+
+    scores = replay_data["metadata"]["final_scores"]
+    print(f"[*] Episode beendet. Finaler Score: Blue {scores['blue']} - {scores['red']} Red")
+    return replay_data
+
+
+def load_model(model_path: str, mode: str = "float", force_torch: bool = False, verbose: bool = True):
+    """NumPy-Policy (falls vorhanden), int8-Policy oder SB3-Modell; int8 wirft ValueError bei zu geringer Übereinstimmung."""
+    numpy_path = None if force_torch or mode != "float" else find_numpy_policy(model_path)
+    if mode == "int8":
+        from quantization import load_policy
+
+        if verbose:
+            print(f"[+] Lade Modell (int8): {model_path}")
+        model = load_policy(model_path, mode="int8")
+        if verbose:
+            print(f"[+] Übereinstimmung mit float: {model.agreement:.1%}")
+        return model
+    if numpy_path:
+        if verbose:
+            print(f"[+] Lade NumPy-Policy: {numpy_path}")
+        return NumpyPolicy.load(numpy_path)
+
+    from stable_baselines3 import PPO
+
+    if verbose:
+        print(f"[+] Lade Modell: {model_path}")
+    return PPO.load(model_path)
+
+
+# ========== MEHRERE EPISODEN ==========
+
+_MODEL = None
+
+
+def _init_worker(model_path: Optional[str], mode: str = "float", force_torch: bool = False) -> None:
+    global _MODEL
+    _MODEL = load_model(model_path, mode, force_torch, verbose=False) if model_path else None
+    if "torch" in sys.modules:
+        sys.modules["torch"].set_num_threads(1)  # Parallelität kommt aus dem Prozess-Pool
+
+
+def episode_summary(replay: dict, seed: int) -> dict:
+    """Kompakte Zusammenfassung einer Episode (ohne Frames)."""
+    metadata = replay["metadata"]
+    returns = metadata["agent_returns"]
+    return {
+        "seed": seed,
+        "final_scores": metadata["final_scores"],
+        "episode_stats": metadata["episode_stats"],
+        "agent_returns": returns,
+        "reward": float(np.mean(list(returns.values()))),
+    }
+
+
+def run_export_job(job: dict) -> dict:
+    """Spielt einen Batch geseedeter Episoden (läuft im Worker-Prozess)."""
+    t0 = time.perf_counter()
+    replays = rollout_episodes(_MODEL, len(job["seeds"]), seeds=job["seeds"], env_kwargs=job["env_kwargs"])
+    summaries = [episode_summary(replay, seed) for replay, seed in zip(replays, job["seeds"])]
+
+    # Volle Replays nur für Kandidaten: die besten keep_top dieses Batches und gewählte Seeds
+    best = sorted(range(len(summaries)), key=lambda i: summaries[i]["reward"], reverse=True)[:job["keep_top"]]
+    keep = set(best) | {i for i, seed in enumerate(job["seeds"]) if seed in job["keep_seeds"]}
+    return {"summaries": summaries, "replays": {job["seeds"][i]: replays[i] for i in keep},
+            "seconds": time.perf_counter() - t0}
+
+
+def wilson_interval(successes: int, n: int, z: float = 1.96) -> tuple:
+    """Konfidenzintervall einer Rate (Wilson - auch bei 0% / 100% und kleinem n sinnvoll)."""
+    if n == 0:
+        return 0.0, 0.0
+    p = successes / n
+    center = (p + z * z / (2 * n)) / (1 + z * z / n)
+    half = z * math.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / (1 + z * z / n)
+    return max(0.0, center - half), min(1.0, center + half)
 
-    while not done:
-        actions = {}
 
-        if model:
-            # Predict für jeden Agenten einzeln
-            for agent in env.agents:
-                action, _ = model.predict(obs[agent], deterministic=True)
-                actions[agent] = int(action)
-        else:
-            # Zufällige Aktionen für Demo-Modus
-            actions = {agent: env.action_space(agent).sample() for agent in env.agents}
+def mean_interval(values: List[float], z: float = 1.96) -> tuple:
+    """Mittelwert mit Konfidenzintervall (Normalapproximation)."""
+    mean = float(np.mean(values))
+    half = z * float(np.std(values, ddof=1)) / math.sqrt(len(values)) if len(values) > 1 else 0.0
+    return mean, mean - half, mean + half
 
-        obs, rewards, terminations, truncations, infos = env.step(actions)
 
-        # Prüfen, ob die Episode beendet ist
-        done = any(terminations.values()) or any(truncations.values())
+def aggregate_summaries(summaries: List[dict]) -> dict:
+    """Win/Draw/Loss (Sicht Blau), Captures, Stuns und Reward mit 95%-Intervallen."""
+    n = len(summaries)
+    scores = [s["final_scores"] for s in summaries]
+    stats = [s["episode_stats"] for s in summaries]
+    outcomes = {
+        "win": sum(sc["blue"] > sc["red"] for sc in scores),
+        "draw": sum(sc["blue"] == sc["red"] for sc in scores),
+        "loss": sum(sc["blue"] < sc["red"] for sc in scores),
+    }
+    result = {"episodes": n}
+    for name, count in outcomes.items():
+        low, high = wilson_interval(count, n)
+        result[f"{name}_rate"] = {"value": count / n, "ci95": [low, high]}
+    for name, values in {
+        "captures": [s["blue_captures"] + s["red_captures"] for s in stats],
+        "blue_captures": [s["blue_captures"] for s in stats],
+        "red_captures": [s["red_captures"] for s in stats],
+        "stuns": [s["blue_stuns"] + s["red_stuns"] for s in stats],
+        "reward": [s["reward"] for s in summaries],
+        "length": [s["total_steps"] for s in stats],
+    }.items():
+        mean, low, high = mean_interval(values)
+        result[f"mean_{name}"] = {"value": mean, "ci95": [low, high]}
+    return result
 
-    print(f"[*] Episode beendet. Finaler Score: Blue {env.scores['blue']} - {env.scores['red']} Red")
-    return env.get_replay_data()
+
+def export_episodes(model_path: Optional[str], n_episodes: int, base_seed: int = 0, n_workers: Optional[int] = None,
+                    batch: int = 8, keep_top: int = 3, keep_seeds: Optional[List[int]] = None,
+                    mode: str = "float", force_torch: bool = False, env_kwargs: Optional[dict] = None,
+                    replay_dir: str | Path = REPLAYS_DIR, name: Optional[str] = None) -> dict:
+    """
+    Spielt n_episodes geseedete Episoden parallel und exportiert nur ausgewählte als Replay.
+
+    Returns:
+        Aggregat (siehe aggregate_summaries) plus Pfade der Zusammenfassung und der Replays
+    """
+    keep_seeds = set(keep_seeds or [])
+    seeds = list(range(base_seed, base_seed + n_episodes))
+    jobs = [{"seeds": seeds[i:i + batch], "env_kwargs": env_kwargs, "keep_top": keep_top, "keep_seeds": keep_seeds}
+            for i in range(0, n_episodes, batch)]
+    n_workers = min(n_workers or os.cpu_count() or 1, len(jobs))
+
+    episode_type = "trained" if model_path else "demo"
+    timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+    name = name or f"{episode_type}_{n_episodes}ep_{timestamp}"
+    store = ReplayStore(replay_dir)
+    export_dir = Path(replay_dir) / "exports"
+    export_dir.mkdir(parents=True, exist_ok=True)
+    summary_path = export_dir / f"{name}.jsonl"
+
+    def replay_name(replay: dict, seed: int) -> str:
+        scores = replay["metadata"]["final_scores"]
+        return f"{episode_type}_Blue{scores['blue']}v{scores['red']}Red_seed{seed}_{timestamp}.json"
+
+    print(f"[*] {n_episodes} Episoden (Seeds {seeds[0]}-{seeds[-1]}) | {len(jobs)} Batches à {batch} | "
+          f"{n_workers} Worker")
+    summaries, kept, candidates = [], {}, {}   # candidates: Seed → (Reward, Replay) der bisher Besten
+    t_start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=n_workers, initializer=_init_worker,
+                             initargs=(model_path, mode, force_torch)) as pool, \
+            open(summary_path, "w", encoding="utf-8") as summary_file:
+        futures = [pool.submit(run_export_job, job) for job in jobs]
+        for done, future in enumerate(as_completed(futures), start=1):
+            result = future.result()
+            by_seed = {s["seed"]: s for s in result["summaries"]}
+            for seed, replay in result["replays"].items():
+                if seed in keep_seeds:
+                    kept[seed] = store.put(replay, replay_name(replay, seed))
+                    by_seed[seed]["file"] = kept[seed].name
+                else:
+                    candidates[seed] = (by_seed[seed]["reward"], replay)
+            candidates = dict(sorted(candidates.items(), key=lambda item: item[1][0], reverse=True)[:keep_top])
+
+            for summary in result["summaries"]:
+                summary_file.write(json.dumps(summary) + "\n")
+            summary_file.flush()
+            summaries.extend(result["summaries"])
+
+            elapsed = time.perf_counter() - t_start
+            wins = sum(s["final_scores"]["blue"] > s["final_scores"]["red"] for s in summaries)
+            print(f"[+] [{done}/{len(jobs)}] {len(summaries)} Episoden | Win {wins / len(summaries):.0%} | "
+                  f"{result['seconds']:.1f}s | ETA {elapsed / done * (len(jobs) - done):.0f}s")
+
+    for seed, (_, replay) in candidates.items():
+        kept[seed] = store.put(replay, replay_name(replay, seed))
+
+    aggregate = aggregate_summaries(sorted(summaries, key=lambda s: s["seed"]))
+    aggregate.update({"model_path": model_path, "base_seed": base_seed, "mode": mode,
+                      "seconds": time.perf_counter() - t_start, "summaries": str(summary_path),
+                      "replays": {str(seed): str(path) for seed, path in sorted(kept.items())}})
+    write_json_atomic(export_dir / f"{name}.json", aggregate, indent=2)
+    return aggregate
+
+
+def print_aggregate(aggregate: dict) -> None:
+    def interval(key, fmt):
+        entry = aggregate[key]
+        low, high = entry["ci95"]
+        return f"{fmt.format(entry['value'])} [{fmt.format(low)}, {fmt.format(high)}]"
+
+    print(f"\n📊 {aggregate['episodes']} Episoden in {aggregate['seconds']:.1f}s (95%-Intervalle)")
+    print(f"   Win  {interval('win_rate', '{:.1%}')} | Draw {interval('draw_rate', '{:.1%}')} | "
+          f"Loss {interval('loss_rate', '{:.1%}')}")
+    print(f"   Captures {interval('mean_captures', '{:.2f}')} "
+          f"(Blau {aggregate['mean_blue_captures']['value']:.2f}, Rot {aggregate['mean_red_captures']['value']:.2f})")
+    print(f"   Stuns    {interval('mean_stuns', '{:.2f}')}")
+    print(f"   Reward   {interval('mean_reward', '{:.2f}')} | Länge {aggregate['mean_length']['value']:.0f}")
+    print(f"[+] Zusammenfassungen: {aggregate['summaries']}")
+    for seed, path in aggregate["replays"].items():
+        print(f"[+] Replay (Seed {seed}): {path}")
 
 
 if __name__ == "__main__":
@@ -76,6 +276,14 @@ if __name__ == "__main__":
     parser.add_argument("--model", type=str, help="Pfad zum trainierten Modell oder 'latest' für das Neueste.")
     parser.add_argument("--demo", action="store_true", help="Erstellt eine Demo-Episode mit zufälligen Aktionen.")
     parser.add_argument("--seed", type=int, default=None, help="Seed für die Umgebung zur Reproduzierbarkeit.")
+    parser.add_argument("--torch", action="store_true", help="SB3-Modell laden, auch wenn eine .npz-Policy existiert.")
+    parser.add_argument("--mode", choices=["float", "int8"], default="float",
+                        help="Inference-Modus (int8: quantisiert, mit Übereinstimmungs-Check)")
+    parser.add_argument("--episodes", type=int, default=1, help="Anzahl geseedeter Episoden (ab --seed, Default 0)")
+    parser.add_argument("--workers", type=int, default=None, help="Worker-Prozesse (Default: alle Kerne)")
+    parser.add_argument("--batch", type=int, default=8, help="Episoden pro Batch (gemeinsame Inference)")
+    parser.add_argument("--keep-top", type=int, default=3, help="Beste Episoden, die als volles Replay bleiben")
+    parser.add_argument("--keep-seeds", type=str, default="", help="Seeds, die immer als Replay bleiben (z.B. 5,17)")
     args = parser.parse_args()
 
     model_path = args.model
@@ -93,26 +301,36 @@ if __name__ == "__main__":
             print(f"[!] Fehler: Modelldatei nicht gefunden unter '{model_path}'")
             exit(1)
 
-        print(f"[+] Lade Modell: {model_path}")
-        try:
-            model = PPO.load(model_path)
-        except Exception as e:
-            print(f"[!] Fehler beim Laden des Modells: {e}")
-            print("[!] Mögliche Ursache: Observation Space hat sich geändert (Shape Mismatch)")
-            exit(1)
+        if args.episodes == 1:  # Bei mehreren Episoden laden die Worker das Modell selbst
+            try:
+                model = load_model(model_path, args.mode, args.torch)
+            except ValueError as e:  # int8: Übereinstimmung unter der Schwelle
+                print(f"[!] {e}")
+                exit(1)
+            except Exception as e:
+                print(f"[!] Fehler beim Laden des Modells: {e}")
+                print("[!] Mögliche Ursache: Observation Space hat sich geändert (Shape Mismatch)")
+                exit(1)
 
     elif not args.demo:
         print("[!] Kein Modell angegeben und nicht im Demo-Modus. Starte mit zufaelligen Aktionen.")
 
-    # Umgebung erstellen
-    env = CaptureTheFlagEnv()
+    if args.episodes > 1:
+        keep_seeds = [int(seed) for seed in args.keep_seeds.split(",") if seed.strip()]
+        try:
+            aggregate = export_episodes(model_path, args.episodes, args.seed or 0, args.workers, args.batch,
+                                        args.keep_top, keep_seeds, args.mode, args.torch)
+        except Exception as e:
+            print(f"[!] Fehler beim Export: {e}")
+            exit(1)
+        print_aggregate(aggregate)
+        exit(0)
 
     # Episode aufnehmen
     print("[*] Nehme Episode auf...")
-    replay_data = record_episode(env, model, seed=args.seed)
+    replay_data = record_episode(model, seed=args.seed)
 
     # Replay speichern mit Metadaten im Dateinamen
-    os.makedirs(REPLAYS_DIR, exist_ok=True)
     timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
 
     # Füge Score und Typ zum Dateinamen hinzu
@@ -120,9 +338,6 @@ if __name__ == "__main__":
     score_red = replay_data['metadata']['final_scores']['red']
     episode_type = "trained" if model else "demo"
     filename = f"{episode_type}_Blue{score_blue}v{score_red}Red_{timestamp}.json"
-    filepath = os.path.join(REPLAYS_DIR, filename)
-
-    with open(filepath, "w") as f:
-        json.dump(replay_data, f, indent=2)
+    filepath = ReplayStore(REPLAYS_DIR).put(replay_data, filename)
 
     print(f"[+] Exportiert: {os.path.abspath(filepath)}")
\ No newline at end of file
@@ -0,0 +1,183 @@
+"""
+CPU-Topologie, Thread-Budget und Prozess-Pinning für das Training.
+
+Env-Worker und Learner teilen sich sonst alle Kerne mit torchs Intra-Op
+Thread-Pool (Oversubscription). Dieses Modul plant ein disjunktes Layout:
+- Learner bekommt eigene Kerne (torch.set_num_threads = Anzahl Learner-Kerne)
+- Jeder Env-Worker wird auf einen Kern gepinnt und läuft mit 1 BLAS/OMP Thread
+
+WICHTIG: Dieses Modul importiert bewusst weder torch noch stable-baselines3,
+damit es auch in schlanken Env-Workern verwendet werden kann.
+"""
+
+import os
+from typing import Iterable, List, Optional
+
+from config import RESOURCE_CONFIG
+
+# Umgebungsvariablen, über die NumPy/BLAS/OpenMP ihre Thread-Pools dimensionieren
+THREAD_ENV_VARS = (
+    "OMP_NUM_THREADS",
+    "MKL_NUM_THREADS",
+    "OPENBLAS_NUM_THREADS",
+    "NUMEXPR_NUM_THREADS",
+    "VECLIB_MAXIMUM_THREADS",
+)
+
+
+def detect_cores() -> List[int]:
+    """Gibt die für diesen Prozess nutzbaren CPU-Kerne zurück."""
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def plan_cpu_layout(n_workers: int, resource_config: Optional[dict] = None,
+                    cores: Optional[List[int]] = None) -> dict:
+    """
+    Plant die Aufteilung der Kerne auf Learner und Env-Worker.
+
+    Args:
+        n_workers: Anzahl der Env-Worker-Prozesse
+        resource_config: Overrides (Default: RESOURCE_CONFIG aus config.py)
+        cores: Verfügbare Kerne (Default: detect_cores())
+
+    Returns:
+        Dictionary mit "learner", "workers" (Kernliste pro Worker),
+        "torch_threads", "worker_threads" und "pin_affinity"
+    """
+    cfg = {**RESOURCE_CONFIG, **(resource_config or {})}
+    cores = list(cores) if cores is not None else detect_cores()
+    n_cores = len(cores)
+    n_workers = max(1, n_workers)
+
+    # Learner-Kerne: explizite Liste, feste Anzahl oder automatisch
+    learner_cfg = cfg["learner_cores"]
+    if isinstance(learner_cfg, (list, tuple)):
+        learner = [c for c in learner_cfg if c in cores] or cores[:1]
+    else:
+        if learner_cfg is None:
+            # Freie Kerne nach Worker-Bedarf, aber mindestens 1/4 für Gradient-Updates
+            n_learner = max(1, n_cores // 4, n_cores - n_workers)
+        else:
+            n_learner = max(1, int(learner_cfg))
+        n_learner = min(n_learner, max(1, n_cores - 1))
+        learner = cores[:n_learner]
+
+    # Disjunktes Layout nur möglich, wenn nach dem Learner Kerne übrig bleiben
+    worker_pool = [c for c in cores if c not in learner]
+    pin_affinity = bool(cfg["pin_affinity"]) and len(worker_pool) > 0
+    if not worker_pool:
+        worker_pool = cores
+
+    # Round-Robin: Jeder Worker bekommt genau einen Kern
+    workers = [[worker_pool[i % len(worker_pool)]] for i in range(n_workers)]
+
+    torch_threads = cfg["torch_threads"] or len(learner)
+
+    return {
+        "n_cores": n_cores,
+        "learner": learner,
+        "workers": workers,
+        "torch_threads": int(torch_threads),
+        "worker_threads": int(cfg["worker_threads"]),
+        "pin_affinity": pin_affinity,
+    }
+
+
+def apply_worker_thread_env(n_threads: int) -> None:
+    """
+    Setzt die BLAS/OMP Thread-Variablen für nachfolgend gestartete Prozesse.
+
+    Muss VOR dem Start der Env-Worker aufgerufen werden (Kindprozesse erben
+    die Umgebung). Der bereits laufende Learner wird über torch.set_num_threads
+    begrenzt.
+    """
+    for var in THREAD_ENV_VARS:
+        os.environ[var] = str(n_threads)
+
+
+def pin_process(cores: Iterable[int], pid: int = 0) -> bool:
+    """
+    Pinnt einen Prozess (pid=0: aktueller Prozess) auf die angegebenen Kerne.
+
+    Returns:
+        True bei Erfolg, False wenn das OS kein Pinning unterstützt (z.B. Windows/macOS)
+    """
+    if not hasattr(os, "sched_setaffinity"):
+        return False
+    try:
+        os.sched_setaffinity(pid, set(cores))
+        return True
+    except (OSError, ValueError):
+        return False
+
+
+def apply_cpu_layout(layout: dict, worker_pids: List[int]) -> int:
+    """
+    Pinnt Learner (aktueller Prozess) und Env-Worker gemäß Layout.
+
+    Returns:
+        Anzahl erfolgreich gepinnter Worker
+    """
+    if not layout["pin_affinity"]:
+        return 0
+
+    pin_process(layout["learner"])
+    pinned = 0
+    for i, pid in enumerate(worker_pids):
+        if pin_process(layout["workers"][i % len(layout["workers"])], pid=pid):
+            pinned += 1
+    return pinned
+
+
+def process_rss_mb(pid: Optional[int] = None) -> Optional[float]:
+    """Resident Set Size eines Prozesses in MB (None wenn nicht ermittelbar)."""
+    pid = pid or os.getpid()
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024.0
+    except OSError:
+        pass
+
+    if pid == os.getpid():
+        try:
+            import resource
+            # ru_maxrss: Linux in KB (Peak statt aktuell, aber besser als nichts)
+            return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+        except (ImportError, OSError):
+            pass
+    return None
+
+
+def format_cores(cores: Iterable[int]) -> str:
+    """Kompakte Darstellung einer Kernliste, z.B. [0-3,8]."""
+    cores = sorted(set(cores))
+    if not cores:
+        return "[]"
+
+    parts = []
+    start = prev = cores[0]
+    for c in cores[1:] + [None]:
+        if c is not None and c == prev + 1:
+            prev = c
+            continue
+        parts.append(f"{start}" if start == prev else f"{start}-{prev}")
+        if c is not None:
+            start = prev = c
+    return "[" + ",".join(parts) + "]"
+
+
+def print_cpu_layout(layout: dict, pinned_workers: Optional[int] = None) -> None:
+    """Gibt das gewählte CPU-Layout aus."""
+    worker_cores = sorted({c for cores in layout["workers"] for c in cores})
+    print(f"🧠 CPU Layout: {layout['n_cores']} Kerne")
+    print(f"   Learner: {format_cores(layout['learner'])} (torch_threads={layout['torch_threads']})")
+    print(f"   Worker:  {len(layout['workers'])} Prozesse auf {format_cores(worker_cores)} "
+          f"({layout['worker_threads']} BLAS/OMP Thread(s) pro Worker)")
+    if not layout["pin_affinity"]:
+        print("   Pinning: deaktiviert (zu wenige Kerne oder per Config abgeschaltet)")
+    elif pinned_workers is not None:
+        print(f"   Pinning: {pinned_workers}/{len(layout['workers'])} Worker gepinnt")
@@ -0,0 +1,235 @@
+"""
+Multiprozess-VecEnv mit schlanken Env-Workern (Ersatz für supersuit concat_vec_envs_v1).
+
+supersuit startet Worker über multiprocessing; bei spawn (Windows) importiert jeder
+Worker dabei das Hauptmodul train.py inkl. torch und stable-baselines3. LeanVecEnv
+startet stattdessen env_worker.py als eigenes Skript, das nur den Simulations-Stack
+lädt. Nach außen verhält es sich wie die supersuit-Variante: ein SB3-VecEnv mit
+einem Slot pro Agent (n_games × 4 Slots, Spiel-major).
+"""
+
+import secrets
+import subprocess
+import sys
+import threading
+import time
+from collections import deque
+from multiprocessing.connection import Listener
+from pathlib import Path
+from typing import Any, List, Optional
+
+import numpy as np
+from stable_baselines3.common.vec_env.base_vec_env import VecEnv, VecEnvIndices
+
+from environment import CaptureTheFlagEnv
+
+BASE_DIR = Path(__file__).resolve().parent
+WORKER_SCRIPT = BASE_DIR / "env_worker.py"
+
+
+def split_games(n_games: int, n_workers: int) -> List[int]:
+    """Verteilt n_games möglichst gleichmäßig auf n_workers (größere Blöcke zuerst)."""
+    n_workers = max(1, min(n_workers, n_games))
+    base, extra = divmod(n_games, n_workers)
+    return [base + (1 if i < extra else 0) for i in range(n_workers)]
+
+
+class LeanVecEnv(VecEnv):
+    """
+    SB3-VecEnv über n_games CTF-Spiele, verteilt auf n_workers Prozesse.
+
+    Args:
+        n_games: Anzahl paralleler Spiele (TRAINING_CONFIG["n_envs"])
+        n_workers: Anzahl Worker-Prozesse (Default: ein Prozess pro Spiel)
+        env_kwargs: Argumente für CaptureTheFlagEnv (z.B. reward_profile)
+        start_timeout: Sekunden, die auf die Verbindung aller Worker gewartet wird
+        latency_window: Anzahl gemerkter Step-Latenzen pro Worker (für Telemetrie)
+    """
+
+    def __init__(self, n_games: int, n_workers: Optional[int] = None,
+                 env_kwargs: Optional[dict] = None, start_timeout: float = 60.0,
+                 latency_window: int = 4096):
+        env_kwargs = env_kwargs or {}
+        example_env = CaptureTheFlagEnv(**env_kwargs)
+        self.agents = example_env.possible_agents
+        self.n_agents = len(self.agents)
+        self.n_games = n_games
+        self.games_per_worker = split_games(n_games, n_workers or n_games)
+
+        # Spiel-Index → (Worker, lokaler Spiel-Index)
+        self._game_location = [
+            (w, g) for w, count in enumerate(self.games_per_worker) for g in range(count)
+        ]
+
+        t_start = time.perf_counter()
+        self._start_workers(env_kwargs, start_timeout)
+        self.startup_time = time.perf_counter() - t_start
+
+        self.waiting = False
+        self.closed = False
+        self.step_latencies = [deque(maxlen=latency_window) for _ in self.conns]
+
+        super().__init__(
+            n_games * self.n_agents,
+            example_env.observation_space(self.agents[0]),
+            example_env.action_space(self.agents[0]),
+        )
+
+    # ========== WORKER-VERWALTUNG ==========
+
+    def _start_workers(self, env_kwargs: dict, start_timeout: float) -> None:
+        """Startet die Worker-Prozesse und wartet auf deren Handshake."""
+        authkey = secrets.token_bytes(32)
+        listener = Listener(authkey=authkey)
+        n_workers = len(self.games_per_worker)
+
+        self.procs = []
+        for _ in range(n_workers):
+            proc = subprocess.Popen(
+                [sys.executable, str(WORKER_SCRIPT), str(listener.address)],
+                stdin=subprocess.PIPE,
+                cwd=str(BASE_DIR),
+            )
+            proc.stdin.write((authkey.hex() + "\n").encode())
+            proc.stdin.close()
+            self.procs.append(proc)
+
+        # accept() hat kein Timeout → in Thread auslagern
+        conns = []
+
+        def accept_all():
+            while len(conns) < n_workers:
+                conns.append(listener.accept())
+
+        acceptor = threading.Thread(target=accept_all, daemon=True)
+        acceptor.start()
+        acceptor.join(start_timeout)
+        listener.close()
+
+        if len(conns) < n_workers:
+            for proc in self.procs:
+                proc.kill()
+            raise RuntimeError(
+                f"Only {len(conns)}/{n_workers} env workers connected within {start_timeout}s"
+            )
+
+        # Verbindungsreihenfolge ist beliebig → Spiele in Accept-Reihenfolge zuweisen
+        self.conns = conns
+        for conn, n_games in zip(self.conns, self.games_per_worker):
+            conn.send(("init", {"n_games": n_games, "env_kwargs": env_kwargs}))
+        self.worker_stats = [self._recv(conn) for conn in self.conns]
+        self.worker_pids = [stats["pid"] for stats in self.worker_stats]
+
+    @staticmethod
+    def _recv(conn) -> Any:
+        status, payload = conn.recv()
+        if status == "error":
+            raise RuntimeError(f"Env worker failed:\n{payload}")
+        return payload
+
+    def _slot_range(self, worker: int) -> tuple:
+        start = sum(self.games_per_worker[:worker]) * self.n_agents
+        return start, start + self.games_per_worker[worker] * self.n_agents
+
+    def _games_for_indices(self, indices: VecEnvIndices) -> List[int]:
+        """Slot-Indizes (SB3) → Spiel-Indizes (ein Spiel hat n_agents Slots)."""
+        return [idx // self.n_agents for idx in self._get_indices(indices)]
+
+    def _call_games(self, cmd: str, games: List[int], make_payload) -> dict:
+        """Schickt einen Befehl an jedes betroffene Spiel genau einmal."""
+        results = {}
+        for game in dict.fromkeys(games):
+            worker, local = self._game_location[game]
+            self.conns[worker].send((cmd, make_payload(local)))
+            results[game] = self._recv(self.conns[worker])
+        return results
+
+    # ========== VECENV API ==========
+
+    def reset(self):
+        seeds = [self._seeds[game * self.n_agents] for game in range(self.n_games)]
+        offset = 0
+        for conn, n_games in zip(self.conns, self.games_per_worker):
+            conn.send(("reset", seeds[offset:offset + n_games]))
+            offset += n_games
+        obs = np.concatenate([self._recv(conn) for conn in self.conns])
+
+        self._reset_seeds()
+        self._reset_options()
+        return obs
+
+    def step_async(self, actions: np.ndarray) -> None:
+        for worker, conn in enumerate(self.conns):
+            start, end = self._slot_range(worker)
+            conn.send(("step", actions[start:end]))
+        self.waiting = True
+
+    def step_wait(self):
+        results = [self._recv(conn) for conn in self.conns]
+        self.waiting = False
+
+        obs, rewards, dones, infos, step_times = zip(*results)
+        for latencies, step_s in zip(self.step_latencies, step_times):
+            latencies.append(step_s)
+        return (np.concatenate(obs), np.concatenate(rewards), np.concatenate(dones),
+                [info for worker_infos in infos for info in worker_infos])
+
+    def pop_step_latencies(self) -> List[np.ndarray]:
+        """Gibt die gesammelten Step-Latenzen (Sekunden) pro Worker zurück und leert die Puffer."""
+        result = [np.array(latencies) for latencies in self.step_latencies]
+        for latencies in self.step_latencies:
+            latencies.clear()
+        return result
+
+    def get_worker_states(self) -> List[bytes]:
+        """Simulationszustand aller Worker (Spiele + RNG) für Resume-Snapshots."""
+        for conn in self.conns:
+            conn.send(("get_state", None))
+        return [self._recv(conn) for conn in self.conns]
+
+    def set_worker_states(self, states: List[bytes]) -> None:
+        """Stellt get_worker_states() wieder her (gleiche Spiel-/Worker-Aufteilung nötig)."""
+        if len(states) != len(self.conns):
+            raise ValueError(f"State has {len(states)} workers, env runs {len(self.conns)}")
+        for conn, state in zip(self.conns, states):
+            conn.send(("set_state", state))
+        for conn in self.conns:
+            self._recv(conn)
+
+    def close(self) -> None:
+        if self.closed:
+            return
+        if self.waiting:
+            for conn in self.conns:
+                conn.recv()
+        for conn in self.conns:
+            try:
+                conn.send(("close", None))
+                conn.close()
+            except OSError:
+                pass
+        for proc in self.procs:
+            try:
+                proc.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+        self.closed = True
+
+    def get_attr(self, attr_name: str, indices: VecEnvIndices = None) -> List[Any]:
+        games = self._games_for_indices(indices)
+        results = self._call_games("get_attr", games, lambda local: (local, attr_name))
+        return [results[game] for game in games]
+
+    def set_attr(self, attr_name: str, value: Any, indices: VecEnvIndices = None) -> None:
+        games = self._games_for_indices(indices)
+        self._call_games("set_attr", games, lambda local: (local, attr_name, value))
+
+    def env_method(self, method_name: str, *method_args, indices: VecEnvIndices = None, **method_kwargs) -> List[Any]:
+        games = self._games_for_indices(indices)
+        results = self._call_games(
+            "env_method", games, lambda local: (local, method_name, method_args, method_kwargs)
+        )
+        return [results[game] for game in games]
+
+    def env_is_wrapped(self, wrapper_class, indices: VecEnvIndices = None) -> List[bool]:
+        return [False for _ in self._get_indices(indices)]
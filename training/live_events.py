@@ -0,0 +1,163 @@
+"""
+Live-Events des Trainings per Server-Sent Events (SSE).
+
+Statt training_logs.json abzufragen, verbindet sich das Dashboard (kennzahlen.html?live)
+mit GET /events und bekommt jedes Metrik-Update, jeden Checkpoint und jeden neuen
+Highscore sofort geschoben. Der Server läuft im Trainingsprozess in einem Daemon-Thread.
+
+Das Training darf dabei nie warten:
+- publish() legt das Event nur in einen Ringpuffer und in die Queue jedes Clients
+  (put_nowait, kurzer Lock) - kein Netzwerk-I/O im Trainings-Thread
+- Läuft die Queue eines langsamen Clients voll, wird er getrennt statt zu blockieren.
+  EventSource verbindet sich selbst neu und schickt Last-Event-ID mit
+- Neue und wiederverbundene Clients bekommen zuerst die Events aus dem Ringpuffer
+  (ab Last-Event-ID bzw. alle). Reicht der Puffer nicht zurück, kommt vorher ein
+  "reset"-Event - der Client lädt dann den Verlauf aus den Dateien.
+
+Events (event: <typ>, data: JSON):
+    status       Trainingsstart/-ende (run, total_timesteps, state)
+    metrics      Record aus MetricsCallback (timesteps, mean_reward, ...)
+    performance  Durchsatz-Snapshot aus ThroughputCallback
+    checkpoint   Geschriebener Checkpoint (timesteps, file, bytes, milestone, mean_reward)
+    best_game    Neuer Highscore mit gespeichertem Replay (reward, file, timesteps)
+"""
+
+import json
+import queue
+import threading
+from collections import deque
+from typing import Optional
+
+from flask import Flask, Response, request, stream_with_context
+from werkzeug.serving import make_server
+
+from config import LIVE_CONFIG
+
+_CLOSE = object()   # Sentinel: Stream des Clients beenden
+
+
+class LiveClient:
+    def __init__(self, queue_size: int):
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.dropped = False
+
+
+class EventPublisher:
+    """
+    Verteilt Events an verbundene SSE-Clients, ohne den Aufrufer zu blockieren.
+
+    Args:
+        replay_events: Größe des Ringpuffers für Nachzügler
+        client_queue: Events, die pro Client höchstens ausstehen dürfen
+    """
+
+    def __init__(self, replay_events: int = LIVE_CONFIG["replay_events"],
+                 client_queue: int = LIVE_CONFIG["client_queue"]):
+        self.buffer = deque(maxlen=replay_events)   # (id, typ, json)
+        self.client_queue = client_queue
+        self.clients = set()
+        self.next_id = 1
+        self.dropped_clients = 0
+        self.closed = False
+        self._lock = threading.Lock()
+        self._server = None
+
+    def publish(self, event_type: str, data: dict) -> None:
+        """Nicht blockierend: Puffer + Client-Queues, volle Clients werden getrennt."""
+        payload = json.dumps(data, default=str)
+        with self._lock:
+            if self.closed:
+                return
+            event = (self.next_id, event_type, payload)
+            self.next_id += 1
+            self.buffer.append(event)
+            for client in list(self.clients):
+                try:
+                    client.queue.put_nowait(event)
+                except queue.Full:
+                    self._drop(client)
+
+    def _drop(self, client: LiveClient) -> None:
+        client.dropped = True
+        self.clients.discard(client)
+        self.dropped_clients += 1
+
+    def subscribe(self, last_event_id: Optional[int] = None) -> LiveClient:
+        """Neuer Client; vorgefüllt mit allen gepufferten Events nach last_event_id."""
+        with self._lock:
+            backlog = [event for event in self.buffer if last_event_id is None or event[0] > last_event_id]
+            client = LiveClient(self.client_queue + len(backlog) + 2)   # Nachholen zählt nicht als Rückstau
+            oldest = self.buffer[0][0] if self.buffer else self.next_id
+            if last_event_id is not None and last_event_id + 1 < oldest:
+                client.queue.put_nowait((None, "reset", json.dumps({"missed_from": last_event_id + 1,
+                                                                    "oldest": oldest})))
+            for event in backlog:
+                client.queue.put_nowait(event)
+            if not self.closed:
+                self.clients.add(client)
+            else:
+                client.queue.put_nowait(_CLOSE)
+        return client
+
+    def unsubscribe(self, client: LiveClient) -> None:
+        with self._lock:
+            self.clients.discard(client)
+
+    def stream(self, client: LiveClient, heartbeat: float = LIVE_CONFIG["heartbeat"]):
+        """SSE-Text für einen Client (endet bei Trennung wegen Rückstau oder close())."""
+        try:
+            yield "retry: 2000\n\n"
+            while True:
+                try:
+                    event = client.queue.get(timeout=heartbeat)
+                except queue.Empty:
+                    if client.dropped:
+                        return
+                    yield ": keepalive\n\n"
+                    continue
+                if event is _CLOSE:
+                    return
+                event_id, event_type, payload = event
+                yield (f"id: {event_id}\n" if event_id is not None else "") + f"event: {event_type}\ndata: {payload}\n\n"
+                if client.dropped and client.queue.empty():
+                    return
+        finally:
+            self.unsubscribe(client)
+
+    def create_app(self, heartbeat: float = LIVE_CONFIG["heartbeat"]) -> Flask:
+        app = Flask(__name__)
+
+        @app.get("/events")
+        def events():
+            last_event_id = request.headers.get("Last-Event-ID") or request.args.get("since")
+            client = self.subscribe(int(last_event_id) if last_event_id and last_event_id.isdigit() else None)
+            return Response(stream_with_context(self.stream(client, heartbeat)), mimetype="text/event-stream",
+                            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no",
+                                     "Access-Control-Allow-Origin": "*"})
+
+        return app
+
+    def start(self, host: str = LIVE_CONFIG["host"], port: int = LIVE_CONFIG["port"]) -> bool:
+        """Startet den SSE-Server im Hintergrund. False, wenn der Port belegt ist (Training läuft trotzdem)."""
+        try:
+            self._server = make_server(host, port, self.create_app(), threaded=True)
+        except OSError as e:
+            print(f"[!] Live-Dashboard nicht gestartet ({host}:{port}): {e}")
+            return False
+        threading.Thread(target=self._server.serve_forever, name="live-events", daemon=True).start()
+        print(f"📡 Live-Events: http://{host}:{port}/events (Dashboard: kennzahlen.html?live)")
+        return True
+
+    def close(self) -> None:
+        """Beendet alle Streams und den Server."""
+        with self._lock:
+            self.closed = True
+            for client in list(self.clients):
+                try:
+                    client.queue.put_nowait(_CLOSE)
+                except queue.Full:
+                    client.dropped = True
+            self.clients.clear()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server = None
@@ -0,0 +1,306 @@
+"""
+Live-Play: Checkpoints in Echtzeit spielen lassen und per WebSocket an den 3D-Viewer streamen.
+
+Der Viewer kann sonst nur fertige Replays abspielen. Hier läuft CaptureTheFlagEnv mit
+fester Bildrate (Default 20 FPS - darauf sind stun_duration/tackle_cooldown in config.py
+ausgelegt) und jedes Frame geht sofort an visualization/main.js (?play=ws://host:port).
+
+- Ein Prozess, eine asyncio-Schleife, beliebig viele Matches: pro Tick werden die
+  Beobachtungen aller Matches gestapelt und mit einem predict() pro Modell ausgewertet
+  (rollout.predict_actions, wie bei den Replay-Rollouts)
+- Frames im Replay-Format (updateScene() bleibt gleich), Positionen gerundet, kompaktes JSON
+- Versand per websockets.broadcast: blockiert nicht, ein langsamer Zuschauer bremst
+  weder die Simulation noch andere Zuschauer
+- Latenz pro Frame = geplanter Tick-Zeitpunkt bis Frame versandbereit (Verzögerung der
+  Schleife + Inference + Env-Schritt + Serialisierung); p50/p95/max gehen regelmäßig an
+  die Konsole und als "stats" an die Clients
+
+Protokoll (JSON-Textnachrichten):
+    Client → Server
+        {"type": "start", "seed": 7}      neues Match starten und zuschauen
+        {"type": "join", "match": 3}      laufendem Match zuschauen
+        {"type": "list"}                  laufende Matches
+    Server → Client
+        {"type": "match", "match": id, "metadata": {...}}    Kopf: Wände, Cooldowns, Modelle, fps
+        {"type": "frame", "match": id, "frame": {...}}       ein Frame
+        {"type": "end", "match": id, "final_scores": {...}}  Spielende, danach Neustart mit seed + 1
+        {"type": "stats", ...}                               Latenzen
+        {"type": "matches", "matches": [...]} / {"type": "error", "message": ...}
+
+Nutzung:
+    python live_play.py --blue models/Gordon_final.zip --red models/Algernon_final.zip
+    python live_play.py --blue models/Gordon_final.zip --fps 10      # Gordon gegen sich selbst
+    python live_play.py                                               # Zufallsaktionen (Demo)
+    → visualization/index.html?play=ws://127.0.0.1:8765 (bzw. die Seite mit main.js)
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from collections import deque
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+from websockets.asyncio.server import broadcast, serve
+from websockets.exceptions import ConnectionClosed
+
+from config import LIVE_PLAY_CONFIG
+from environment import CaptureTheFlagEnv
+from numpy_policy import NumpyPolicy, find_numpy_policy
+from rollout import policy_groups, predict_actions
+
+
+def load_live_policy(path: str | Path, mode: str = "float", reward_profile: str = "balanced"):
+    """NumPy-Policy, falls konvertiert (ohne torch), sonst Checkpoint im gewünschten Modus."""
+    if mode == "float":
+        numpy_path = find_numpy_policy(path)
+        if numpy_path:
+            return NumpyPolicy.load(numpy_path)
+    from quantization import load_policy
+    return load_policy(path, mode, reward_profile=reward_profile)
+
+
+def compact_frame(frame: dict, decimals: int) -> dict:
+    """Frame im Replay-Format mit gerundeten Positionen."""
+    def rounded(entities):
+        return {key: {**value, "position": [round(v, decimals) for v in value["position"]]}
+                for key, value in entities.items()}
+    return {**frame, "agents": rounded(frame["agents"]), "flags": rounded(frame["flags"])}
+
+
+def encode(message: dict) -> str:
+    return json.dumps(message, separators=(",", ":"))
+
+
+class LiveMatch:
+    """Ein laufendes Spiel mit seinen Zuschauern."""
+
+    def __init__(self, match_id: int, seed: int, env_kwargs: Optional[dict] = None):
+        self.id = match_id
+        self.seed = seed
+        self.env = CaptureTheFlagEnv(**(env_kwargs or {}))
+        self.observations = self.env.reset(seed=seed)[0]
+        self.viewers = set()
+        self.frames = 0
+
+    def restart(self) -> None:
+        self.seed += 1
+        self.observations = self.env.reset(seed=self.seed)[0]
+
+
+class LivePlayServer:
+    """
+    Simuliert alle Matches im Gleichschritt und verteilt die Frames.
+
+    Args:
+        blue_model: Policy für Blau (None = Zufallsaktionen für beide Teams)
+        red_model: Policy für Rot (None = blue_model spielt beide Teams)
+        labels: Anzeigenamen der Modelle für den Viewer {"blue": ..., "red": ...}
+        config: Overrides für LIVE_PLAY_CONFIG
+    """
+
+    def __init__(self, blue_model=None, red_model=None, labels: Optional[dict] = None,
+                 env_kwargs: Optional[dict] = None, config: Optional[dict] = None):
+        self.config = {**LIVE_PLAY_CONFIG, **(config or {})}
+        self.env_kwargs = env_kwargs or {}
+        self.agents = CaptureTheFlagEnv(**self.env_kwargs).possible_agents
+        self.groups = policy_groups(blue_model, red_model, self.agents) if blue_model is not None else None
+        self.labels = labels or {"blue": "Zufall", "red": "Zufall"}
+        self.matches: Dict[int, LiveMatch] = {}
+        self.next_id = 1
+
+        # Latenz-Messung (ms, pro Tick - alle Frames eines Ticks teilen sie)
+        self.frame_latency = deque(maxlen=2000)
+        self.inference_ms = deque(maxlen=2000)
+        self.ticks = 0
+        self.late_ticks = 0
+
+    # ---------- Matches ----------
+
+    def create_match(self, seed: Optional[int] = None) -> LiveMatch:
+        if len(self.matches) >= self.config["max_matches"]:
+            raise RuntimeError(f"Maximal {self.config['max_matches']} gleichzeitige Matches")
+        seed = int(np.random.randint(0, 2**31 - 1)) if seed is None else int(seed)
+        match = LiveMatch(self.next_id, seed, self.env_kwargs)
+        self.matches[match.id] = match
+        self.next_id += 1
+        return match
+
+    def header(self, match: LiveMatch) -> dict:
+        env = match.env
+        return {"type": "match", "match": match.id, "metadata": {
+            "grid_size": env.grid_size, "max_steps": env.max_steps, "win_score": env.win_score,
+            "tackle_cooldown": env.tackle_cooldown, "stun_duration": env.stun_duration,
+            "walls": env.walls, "seed": match.seed, "fps": self.config["fps"],
+            "blue_model": self.labels["blue"], "red_model": self.labels["red"],
+        }}
+
+    # ---------- Simulation ----------
+
+    def tick(self, scheduled: Optional[float] = None) -> Dict[int, List[str]]:
+        """
+        Ein Schritt aller Matches mit gebatchter Inference.
+
+        Args:
+            scheduled: geplanter Tick-Zeitpunkt (perf_counter) für die Latenz-Messung
+
+        Returns:
+            {Match-ID: [serialisierte Nachrichten]}
+        """
+        start = time.perf_counter()
+        scheduled = start if scheduled is None else scheduled
+        matches = list(self.matches.values())
+        if not matches:
+            return {}
+
+        n_agents = len(self.agents)
+        if self.groups is not None:
+            actions = predict_actions(self.groups, [m.observations for m in matches], self.agents)
+        else:
+            actions = [m.env.action_space(agent).sample() for m in matches for agent in self.agents]
+        self.inference_ms.append((time.perf_counter() - start) * 1000)
+
+        outgoing = {}
+        for k, match in enumerate(matches):
+            act_dict = {agent: int(actions[k * n_agents + j]) for j, agent in enumerate(self.agents)}
+            match.observations, _, terms, truncs, _ = match.env.step(act_dict)
+            frame = compact_frame(match.env.episode_history[-1], self.config["position_decimals"])
+            messages = [encode({"type": "frame", "match": match.id, "frame": frame})]
+            match.frames += 1
+
+            if all(terms[agent] or truncs[agent] for agent in self.agents):
+                messages.append(encode({"type": "end", "match": match.id, "final_scores": match.env.scores.copy(),
+                                        "episode_stats": match.env.episode_stats.copy()}))
+                match.restart()
+            outgoing[match.id] = messages
+
+        self.frame_latency.append((time.perf_counter() - scheduled) * 1000)
+        self.ticks += 1
+        return outgoing
+
+    def latency_stats(self) -> dict:
+        latency = np.array(self.frame_latency) if self.frame_latency else np.zeros(1)
+        return {
+            "type": "stats",
+            "matches": len(self.matches),
+            "viewers": sum(len(m.viewers) for m in self.matches.values()),
+            "fps": self.config["fps"],
+            "latency_p50_ms": round(float(np.percentile(latency, 50)), 2),
+            "latency_p95_ms": round(float(np.percentile(latency, 95)), 2),
+            "latency_max_ms": round(float(latency.max()), 2),
+            "inference_ms": round(float(np.mean(self.inference_ms)), 2) if self.inference_ms else 0.0,
+            "late_ticks": self.late_ticks,
+            "ticks": self.ticks,
+        }
+
+    # ---------- Netzwerk ----------
+
+    async def handler(self, websocket) -> None:
+        """Nachrichten eines Zuschauers (start/join/list)."""
+        try:
+            async for raw in websocket:
+                try:
+                    message = json.loads(raw)
+                    if message.get("type") == "start":
+                        match = self.create_match(message.get("seed"))
+                    elif message.get("type") == "join":
+                        match = self.matches.get(int(message.get("match", -1)))
+                        if match is None:
+                            raise RuntimeError(f"Kein laufendes Match {message.get('match')}")
+                    elif message.get("type") == "list":
+                        await websocket.send(encode({"type": "matches", "matches": [
+                            {"match": m.id, "seed": m.seed, "step": m.env.current_step, "scores": m.env.scores,
+                             "viewers": len(m.viewers)} for m in self.matches.values()]}))
+                        continue
+                    else:
+                        raise RuntimeError(f"Unbekannte Nachricht: {message.get('type')}")
+                except (ValueError, RuntimeError) as e:
+                    await websocket.send(encode({"type": "error", "message": str(e)}))
+                    continue
+
+                # Ohne await zwischen create_match und viewers.add: run_loop kann ein neues Match
+                # nicht als zuschauerlos beenden. broadcast schreibt den Kopf synchron (ohne auf
+                # drain() zu warten) - er liegt damit vor dem ersten Frame im Puffer.
+                for other in self.matches.values():   # Ein Zuschauer sieht ein Match
+                    other.viewers.discard(websocket)
+                broadcast([websocket], encode(self.header(match)))
+                match.viewers.add(websocket)
+        except ConnectionClosed:
+            pass
+        finally:
+            for match in self.matches.values():
+                match.viewers.discard(websocket)
+
+    async def run_loop(self) -> None:
+        """Tick-Schleife mit fester Rate; hinkt sie hinterher, wird nicht nachgeholt (Echtzeit)."""
+        interval = 1.0 / self.config["fps"]
+        next_tick = time.perf_counter()
+        next_report = next_tick + self.config["stats_interval"]
+
+        while True:
+            # Matches ohne Zuschauer beenden
+            for match_id in [m.id for m in self.matches.values() if not m.viewers]:
+                del self.matches[match_id]
+
+            for match_id, messages in self.tick(next_tick).items():
+                viewers = self.matches[match_id].viewers
+                for message in messages:
+                    broadcast(viewers, message)
+
+            now = time.perf_counter()
+            if now >= next_report and self.matches:
+                stats = self.latency_stats()
+                print(f"[*] {stats['matches']} Matches, {stats['viewers']} Zuschauer | Latenz p50 "
+                      f"{stats['latency_p50_ms']:.1f} ms, p95 {stats['latency_p95_ms']:.1f} ms | Inferenz "
+                      f"{stats['inference_ms']:.1f} ms | verspätete Ticks {stats['late_ticks']}/{stats['ticks']}")
+                broadcast({v for m in self.matches.values() for v in m.viewers}, encode(stats))
+                next_report = now + self.config["stats_interval"]
+
+            next_tick += interval
+            delay = next_tick - time.perf_counter()
+            if delay < 0:
+                self.late_ticks += 1
+                next_tick = time.perf_counter()
+                delay = 0
+            await asyncio.sleep(delay)
+
+    async def serve(self, host: str = LIVE_PLAY_CONFIG["host"], port: int = LIVE_PLAY_CONFIG["port"]) -> None:
+        async with serve(self.handler, host, port, compression=None):
+            print(f"🎮 Live-Play: ws://{host}:{port} | {self.labels['blue']} (Blau) vs. {self.labels['red']} (Rot) "
+                  f"@ {self.config['fps']} FPS")
+            await self.run_loop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Checkpoints live spielen und per WebSocket streamen")
+    parser.add_argument("--blue", help="Checkpoint für Blau (ohne: Zufallsaktionen)")
+    parser.add_argument("--red", help="Checkpoint für Rot (Default: --blue spielt beide Teams)")
+    parser.add_argument("--mode", choices=["float", "int8"], default="float", help="Inference-Modus")
+    parser.add_argument("--profile", default="balanced", help="Reward-Profil der Umgebung")
+    parser.add_argument("--fps", type=float, default=LIVE_PLAY_CONFIG["fps"])
+    parser.add_argument("--max-matches", type=int, default=LIVE_PLAY_CONFIG["max_matches"])
+    parser.add_argument("--host", default=LIVE_PLAY_CONFIG["host"])
+    parser.add_argument("--port", type=int, default=LIVE_PLAY_CONFIG["port"])
+    args = parser.parse_args()
+    if args.red and not args.blue:
+        parser.error("--red braucht --blue")
+
+    blue_model = red_model = None
+    labels = {"blue": "Zufall", "red": "Zufall"}
+    if args.blue:
+        print(f"[+] Lade Blau: {args.blue}")
+        blue_model = load_live_policy(args.blue, args.mode, args.profile)
+        labels = {"blue": Path(args.blue).stem, "red": Path(args.blue).stem}
+    if args.red:
+        print(f"[+] Lade Rot: {args.red}")
+        red_model = load_live_policy(args.red, args.mode, args.profile)
+        labels["red"] = Path(args.red).stem
+
+    server = LivePlayServer(blue_model, red_model, labels, env_kwargs={"reward_profile": args.profile},
+                            config={"fps": args.fps, "max_matches": args.max_matches})
+    try:
+        asyncio.run(server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        print("\n[*] Live-Play beendet")
@@ -0,0 +1,354 @@
+"""
+Append-only Metrik-Stream (JSONL-Segmente) mit begrenztem Speicherbedarf.
+
+Aufbau eines Stream-Verzeichnisses:
+    segment_000001.jsonl          # versiegelt (vollständig, wird nie mehr geändert)
+    segment_000002.jsonl          # versiegelt
+    segment_000003.jsonl.active   # wird gerade beschrieben
+
+- Writer hängt eine JSON-Zeile pro Record an und rotiert Segmente atomar per os.replace
+- Reader liest inkrementell ab der letzten Position und nur vollständige Zeilen
+  (ein halb geschriebener Record ist für Leser nie sichtbar)
+- SeriesDownsampler fasst beliebig lange Serien in höchstens max_points Buckets zusammen
+- compact_stream() erzeugt daraus die Dashboard-Datei (training_logs.json Schema)
+"""
+
+import json
+import os
+import re
+from pathlib import Path
+from typing import Iterable, List, Optional
+
+SEGMENT_PATTERN = re.compile(r"^segment_(\d{6})\.jsonl(\.active)?$")
+ACTIVE_SUFFIX = ".active"
+
+# Felder der Dashboard-Serien: Mittelwert pro Bucket bzw. letzter Wert
+METRIC_MEAN_FIELDS = ("mean_reward", "std_reward", "mean_length")
+METRIC_LAST_FIELDS = ("timesteps", "episodes")
+
+
+def _segment_name(index: int, active: bool = False) -> str:
+    return f"segment_{index:06d}.jsonl" + (ACTIVE_SUFFIX if active else "")
+
+
+def list_segments(stream_dir: str | Path) -> List[tuple]:
+    """Gibt (index, path, is_active) aller Segmente sortiert zurück."""
+    stream_dir = Path(stream_dir)
+    if not stream_dir.exists():
+        return []
+
+    segments = []
+    for path in stream_dir.iterdir():
+        match = SEGMENT_PATTERN.match(path.name)
+        if match:
+            segments.append((int(match.group(1)), path, match.group(2) is not None))
+    return sorted(segments)
+
+
+def write_json_atomic(path: str | Path, data: dict, **dump_kwargs) -> None:
+    """Schreibt JSON über eine temporäre Datei + os.replace (Leser sehen nie halbe Dateien)."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    with tmp_path.open("w", encoding="utf-8") as f:
+        json.dump(data, f, **dump_kwargs)
+    os.replace(tmp_path, path)
+
+
+class MetricsStreamWriter:
+    """
+    Append-only Writer mit Segment-Rotation.
+
+    Args:
+        stream_dir: Verzeichnis des Streams
+        segment_max_bytes: Segmentgröße, ab der rotiert wird
+    """
+
+    def __init__(self, stream_dir: str | Path, segment_max_bytes: int = 4 * 1024 * 1024):
+        self.stream_dir = Path(stream_dir)
+        self.stream_dir.mkdir(parents=True, exist_ok=True)
+        self.segment_max_bytes = segment_max_bytes
+
+        # Nach Absturz liegengebliebene aktive Segmente versiegeln, dann dahinter weiterschreiben
+        segments = list_segments(self.stream_dir)
+        for index, path, is_active in segments:
+            if is_active:
+                self._seal(path, index)
+        self.index = segments[-1][0] + 1 if segments else 1
+        self._open_segment()
+
+    def _active_path(self) -> Path:
+        return self.stream_dir / _segment_name(self.index, active=True)
+
+    def _seal(self, path: Path, index: int) -> None:
+        if path.stat().st_size == 0:
+            path.unlink()
+        else:
+            os.replace(path, self.stream_dir / _segment_name(index))
+
+    def _open_segment(self) -> None:
+        self._file = self._active_path().open("a", encoding="utf-8")
+        self._size = 0
+
+    def append(self, record: dict) -> None:
+        """Hängt einen Record an (eine Zeile, sofort geflusht)."""
+        line = json.dumps(record, separators=(",", ":")) + "\n"
+        self._file.write(line)
+        self._file.flush()
+        self._size += len(line.encode("utf-8"))
+        if self._size >= self.segment_max_bytes:
+            self.rotate()
+
+    def rotate(self) -> None:
+        """Versiegelt das aktive Segment und beginnt ein neues."""
+        self._file.close()
+        self._seal(self._active_path(), self.index)
+        self.index += 1
+        self._open_segment()
+
+    def close(self) -> None:
+        if self._file.closed:
+            return
+        self._file.close()
+        self._seal(self._active_path(), self.index)
+
+
+class MetricsStreamReader:
+    """
+    Inkrementeller Leser: poll() liefert nur Records, die seit dem letzten Aufruf
+    vollständig geschrieben wurden.
+    """
+
+    def __init__(self, stream_dir: str | Path):
+        self.stream_dir = Path(stream_dir)
+        self.index = None   # Aktuelles Segment
+        self.offset = 0     # Byte-Position darin
+
+    def _read_segment(self, index: int) -> tuple:
+        """Liest ab self.offset; versucht aktiven und versiegelten Namen (Rotation während des Lesens)."""
+        for active in (True, False):
+            path = self.stream_dir / _segment_name(index, active=active)
+            try:
+                with path.open("rb") as f:
+                    f.seek(self.offset)
+                    return f.read(), active
+            except FileNotFoundError:
+                continue
+        return b"", False
+
+    def poll(self) -> List[dict]:
+        records = []
+        segments = list_segments(self.stream_dir)
+        if not segments:
+            return records
+
+        if self.index is None:
+            self.index = segments[0][0]
+        indices = [index for index, _, _ in segments if index >= self.index]
+
+        for i, index in enumerate(indices):
+            if index != self.index:
+                self.index, self.offset = index, 0
+
+            data, active = self._read_segment(index)
+            complete = data.rfind(b"\n") + 1
+            for line in data[:complete].splitlines():
+                if line.strip():
+                    records.append(json.loads(line))
+            self.offset += complete
+
+            # Beim aktiven Segment (oder unvollständiger letzter Zeile) hier aufhören
+            if active or complete < len(data):
+                break
+            if i == len(indices) - 1:
+                break
+
+        return records
+
+    def iter_all(self) -> Iterable[dict]:
+        """Liest den kompletten Stream von Anfang an (eigene Position bleibt unberührt)."""
+        reader = MetricsStreamReader(self.stream_dir)
+        yield from reader.poll()
+
+
+class SeriesDownsampler:
+    """
+    Downsampling mit fester Obergrenze: Hält höchstens max_points Buckets.
+    Läuft der Speicher über, werden benachbarte Buckets paarweise gemerged
+    und die Bucket-Größe verdoppelt (amortisiert O(1) pro Record).
+
+    mean_fields=None: alle numerischen Felder werden gemittelt (z.B. Telemetrie,
+    deren Felder erst im Lauf des Trainings auftauchen).
+    """
+
+    def __init__(self, max_points: int = 500, mean_fields: Optional[Iterable[str]] = METRIC_MEAN_FIELDS,
+                 last_fields: Iterable[str] = METRIC_LAST_FIELDS):
+        self.max_points = max(2, max_points)
+        self.mean_fields = tuple(mean_fields) if mean_fields is not None else None
+        self.last_fields = tuple(last_fields)
+        self.bucket_size = 1
+        self.buckets = []
+
+    def _numeric_fields(self, record: dict) -> Iterable[str]:
+        if self.mean_fields is not None:
+            return self.mean_fields
+        return [key for key, value in record.items()
+                if isinstance(value, (int, float)) and not isinstance(value, bool)
+                and key not in self.last_fields]
+
+    def add(self, record: dict) -> None:
+        if not self.buckets or self.buckets[-1]["n"] >= self.bucket_size:
+            self.buckets.append({"n": 0, "sums": {}, "counts": {}, "last": {}})
+        bucket = self.buckets[-1]
+        bucket["n"] += 1
+        for field in self._numeric_fields(record):
+            if record.get(field) is not None:
+                bucket["sums"][field] = bucket["sums"].get(field, 0.0) + record[field]
+                bucket["counts"][field] = bucket["counts"].get(field, 0) + 1
+        for field in self.last_fields:
+            if field in record:
+                bucket["last"][field] = record[field]
+
+        if len(self.buckets) > self.max_points:
+            self._merge_pairs()
+
+    def _merge_pairs(self) -> None:
+        merged = []
+        for i in range(0, len(self.buckets), 2):
+            pair = self.buckets[i:i + 2]
+            sums, counts = {}, {}
+            for bucket in pair:
+                for field, value in bucket["sums"].items():
+                    sums[field] = sums.get(field, 0.0) + value
+                    counts[field] = counts.get(field, 0) + bucket["counts"][field]
+            merged.append({
+                "n": sum(b["n"] for b in pair),
+                "sums": sums,
+                "counts": counts,
+                "last": {**pair[0]["last"], **pair[-1]["last"]},
+            })
+        self.buckets = merged
+        self.bucket_size *= 2
+
+    def series(self) -> dict:
+        """Gibt die Serien als Listen zurück (ein Eintrag pro Bucket)."""
+        mean_fields = self.mean_fields
+        if mean_fields is None:
+            mean_fields = tuple(sorted({f for bucket in self.buckets for f in bucket["sums"]}))
+
+        result = {field: [] for field in self.last_fields + mean_fields}
+        for bucket in self.buckets:
+            for field in self.last_fields:
+                result[field].append(bucket["last"].get(field))
+            for field in mean_fields:
+                count = bucket["counts"].get(field, 0)
+                result[field].append(bucket["sums"][field] / count if count else None)
+        return result
+
+
+class StreamSummary:
+    """
+    Inkrementelle Dashboard-Zusammenfassung (training_logs.json Schema) mit
+    begrenztem Speicher - egal wie viele Records der Stream enthält.
+    """
+
+    def __init__(self, max_points: int = 500):
+        self.max_points = max_points
+        self.metrics = SeriesDownsampler(max_points)
+        self.performance = None
+
+    def add(self, record: dict) -> None:
+        kind = record.get("type", "metrics")
+        if kind == "metrics":
+            self.metrics.add(record)
+        elif kind == "performance":
+            if self.performance is None:
+                self.performance = SeriesDownsampler(self.max_points, mean_fields=None, last_fields=("timesteps",))
+            self.performance.add(record)
+
+    def to_dict(self, header: Optional[dict] = None) -> dict:
+        summary = dict(header or {})
+        summary.update(self.metrics.series())
+
+        history = []
+        if self.performance is not None:
+            series = self.performance.series()
+            history = [
+                {field: values[i] for field, values in series.items()}
+                for i in range(len(series["timesteps"]))
+            ]
+        summary["performance_history"] = history
+        return summary
+
+
+def truncate_stream(stream_dir: str | Path, max_timesteps: int) -> int:
+    """
+    Entfernt alle Records mit timesteps > max_timesteps (z.B. beim Fortsetzen von einem
+    älteren Snapshot) sowie halb geschriebene Zeilen. Betroffene Segmente werden atomar ersetzt.
+
+    Returns:
+        Anzahl entfernter Records
+    """
+    removed = 0
+    for _, path, _ in list_segments(stream_dir):
+        data = path.read_bytes()
+        complete = data.rfind(b"\n") + 1
+        kept = []
+        for line in data[:complete].splitlines():
+            if line.strip() and json.loads(line).get("timesteps", 0) <= max_timesteps:
+                kept.append(line)
+            elif line.strip():
+                removed += 1
+
+        if len(kept) == data.count(b"\n") and complete == len(data):
+            continue
+        tmp_path = path.with_name(f".{path.name}.tmp")
+        tmp_path.write_bytes(b"".join(line + b"\n" for line in kept))
+        os.replace(tmp_path, path)
+    return removed
+
+
+def compact_stream(stream_dir: str | Path, output_path: str | Path,
+                   header: Optional[dict] = None, max_points: int = 500) -> dict:
+    """
+    Liest den kompletten Stream und schreibt eine downgesampelte Dashboard-Datei (atomar).
+    """
+    summary = StreamSummary(max_points)
+    for record in MetricsStreamReader(stream_dir).iter_all():
+        summary.add(record)
+
+    result = summary.to_dict(header)
+    write_json_atomic(output_path, result, indent=2)
+    return result
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Metrik-Stream: Kompaktieren oder live mitlesen")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    p_compact = subparsers.add_parser("compact", help="Downgesampelte Dashboard-Datei erzeugen")
+    p_compact.add_argument("stream_dir")
+    p_compact.add_argument("output", help="z.B. ../dashboard/data/training_logs.json")
+    p_compact.add_argument("--max-points", type=int, default=500)
+
+    p_tail = subparsers.add_parser("tail", help="Neue Records fortlaufend ausgeben")
+    p_tail.add_argument("stream_dir")
+    p_tail.add_argument("--interval", type=float, default=1.0)
+
+    args = parser.parse_args()
+
+    if args.command == "compact":
+        summary = compact_stream(args.stream_dir, args.output, max_points=args.max_points)
+        print(f"[+] {len(summary['timesteps'])} Punkte geschrieben: {args.output}")
+    else:
+        reader = MetricsStreamReader(args.stream_dir)
+        try:
+            while True:
+                for record in reader.poll():
+                    print(json.dumps(record))
+                time.sleep(args.interval)
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,88 @@
+"""
+Gemeinsame Helfer für Skripte, die viele Checkpoints laden.
+
+- file_sha256 / FileHashIndex: Inhalts-Hash von Modell-Dateien, zwischengespeichert
+  über (mtime, Größe), damit unveränderte Dateien nicht neu gehasht werden
+- PolicyCache: LRU geladener Modelle, Schlüssel ist der Datei-Hash (gleiche Datei
+  unter anderem Namen → kein zweites Laden)
+"""
+
+import hashlib
+import os
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Optional
+
+
+def file_sha256(path: str | Path, chunk_size: int = 1 << 20) -> str:
+    """SHA-256 einer Datei (blockweise gelesen)."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(chunk_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class FileHashIndex:
+    """
+    Hash-Cache für Dateien: Ein gespeicherter Hash gilt, solange mtime und Größe passen.
+
+    Args:
+        entries: Bestehender Index (z.B. aus einem Manifest), wird in-place aktualisiert
+    """
+
+    def __init__(self, entries: Optional[dict] = None):
+        self.entries = entries if entries is not None else {}
+
+    def hash(self, path: str | Path) -> str:
+        path = Path(path)
+        stat = os.stat(path)
+        key = str(path.resolve())
+        entry = self.entries.get(key)
+        if entry and entry["mtime_ns"] == stat.st_mtime_ns and entry["size"] == stat.st_size:
+            return entry["sha256"]
+
+        digest = file_sha256(path)
+        self.entries[key] = {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size, "sha256": digest}
+        return digest
+
+
+class PolicyCache:
+    """
+    LRU-Cache geladener Modelle.
+
+    Args:
+        max_size: Maximale Anzahl gleichzeitig geladener Modelle
+        loader: Funktion path → Modell (Default: checkpointing.load_checkpoint, kann Deltas)
+    """
+
+    def __init__(self, max_size: int = 4, loader: Optional[Callable] = None):
+        self.max_size = max(1, max_size)
+        self.loader = loader
+        self.models = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, path: str | Path, file_hash: Optional[str] = None, **loader_kwargs):
+        """
+        Modell zu path; file_hash spart das erneute Hashen, wenn er schon bekannt ist.
+
+        loader_kwargs (z.B. reward_profile für die int8-Prüfung) gehen an den Loader und
+        in den Schlüssel - gleiche Datei mit anderen Lade-Parametern ist ein eigener Eintrag.
+        """
+        key = (file_hash or file_sha256(path), *sorted(loader_kwargs.items()))
+        if key in self.models:
+            self.hits += 1
+            self.models.move_to_end(key)
+            return self.models[key]
+
+        self.misses += 1
+        if self.loader is None:
+            from checkpointing import load_checkpoint
+            self.loader = lambda p, **_: load_checkpoint(p, device="cpu")   # float: Profil egal
+
+        model = self.loader(path, **loader_kwargs)
+        self.models[key] = model
+        if len(self.models) > self.max_size:
+            self.models.popitem(last=False)
+        return model
@@ -0,0 +1,202 @@
+"""
+Policy-Runtime nur mit NumPy (ohne torch / stable-baselines3).
+
+Replay-Export und Evaluation brauchen vom PPO-Modell nur das Policy-MLP
+(31 → 256 → 256 → 6, tanh). convert_checkpoint() zieht diese Gewichte einmalig
+aus einem SB3-Zip in eine kleine .npz-Datei neben dem Zip; NumpyPolicy rechnet
+damit gebatcht - schneller Start, kleiner RSS.
+
+Nutzung:
+    python numpy_policy.py models/X/Night_200M.zip            # → models/X/Night_200M.npz
+    python numpy_policy.py models/X/*.zip --verify            # inkl. Vergleich mit torch
+"""
+
+import argparse
+from pathlib import Path
+from typing import Optional, Tuple
+
+import numpy as np
+
+from model_cache import file_sha256
+
+FORMAT_VERSION = 1
+
+# NumPy-Gegenstücke der Aktivierungen aus config.py / POLICY_KWARGS
+ACTIVATIONS = {
+    "tanh": np.tanh,
+    "relu": lambda x: np.maximum(x, 0.0),
+}
+
+
+def npz_path_for(model_path: str | Path) -> Path:
+    """models/X/Night_200M.zip → models/X/Night_200M.npz"""
+    return Path(model_path).with_suffix(".npz")
+
+
+def source_sha256(npz_path: str | Path) -> str:
+    """SHA-256 des Zips, aus dem die Policy konvertiert wurde ("" bei unbekannter Quelle)."""
+    with np.load(npz_path) as data:
+        return str(data["source_sha256"]) if "source_sha256" in data.files else ""
+
+
+def find_numpy_policy(model_path: str | Path, model_hash: Optional[str] = None) -> Optional[Path]:
+    """
+    Konvertierte Policy zu model_path, falls vorhanden und aus genau diesem Zip erzeugt.
+
+    Verglichen wird der gespeicherte source_sha256 mit dem Hash des Zips - nicht die mtime,
+    die nach einem Clone nichts über die Herkunft aussagt. model_hash spart das Hashen,
+    wenn der Aufrufer ihn schon kennt (z.B. aus einem FileHashIndex).
+    """
+    model_path = Path(model_path)
+    if model_path.suffix == ".npz":
+        return model_path if model_path.exists() else None
+    npz_path = npz_path_for(model_path)
+    if not npz_path.exists():
+        return None
+    if source_sha256(npz_path) != (model_hash or file_sha256(model_path)):
+        print(f"[!] {npz_path.name} stammt nicht aus {model_path.name} - neu konvertieren mit numpy_policy.py")
+        return None
+    return npz_path
+
+
+class NumpyPolicy:
+    """
+    Policy-MLP einer diskreten SB3-ActorCriticPolicy in NumPy.
+
+    predict() hat dieselbe Signatur wie PPO.predict(), NumpyPolicy kann also überall
+    eingesetzt werden, wo ein Modell erwartet wird (z.B. rollout_episodes).
+
+    Args:
+        layers: [(W, b), ...] der versteckten Schichten, W als (in, out)
+        action_layer: (W, b) der Logit-Schicht
+        activation: Name der Aktivierung ("tanh" oder "relu")
+        seed: Seed für stochastisches predict()
+    """
+
+    def __init__(self, layers, action_layer, activation: str = "tanh", seed: Optional[int] = None):
+        self.layers = [(np.asarray(w, dtype=np.float32), np.asarray(b, dtype=np.float32)) for w, b in layers]
+        self.action_layer = tuple(np.asarray(a, dtype=np.float32) for a in action_layer)
+        self.activation = activation
+        self._act = ACTIVATIONS[activation]
+        self.rng = np.random.default_rng(seed)
+
+    @classmethod
+    def load(cls, path: str | Path, seed: Optional[int] = None) -> "NumpyPolicy":
+        with np.load(path) as data:
+            if int(data["format_version"]) != FORMAT_VERSION:
+                raise ValueError(f"Unsupported policy format {int(data['format_version'])} in {path}")
+            n_layers = int(data["n_layers"])
+            layers = [(data[f"layer{i}_weight"], data[f"layer{i}_bias"]) for i in range(n_layers)]
+            action_layer = (data["action_weight"], data["action_bias"])
+            activation = str(data["activation"])
+        return cls(layers, action_layer, activation, seed=seed)
+
+    def save(self, path: str | Path, source_sha256: str = "") -> None:
+        arrays = {
+            "format_version": np.array(FORMAT_VERSION),
+            "n_layers": np.array(len(self.layers)),
+            "activation": np.array(self.activation),
+            "source_sha256": np.array(source_sha256),
+            "action_weight": self.action_layer[0],
+            "action_bias": self.action_layer[1],
+        }
+        for i, (w, b) in enumerate(self.layers):
+            arrays[f"layer{i}_weight"] = w
+            arrays[f"layer{i}_bias"] = b
+        np.savez(path, **arrays)
+
+    def logits(self, obs: np.ndarray) -> np.ndarray:
+        x = np.asarray(obs, dtype=np.float32).reshape(-1, self.layers[0][0].shape[0])
+        for w, b in self.layers:
+            x = self._act(x @ w + b)
+        return x @ self.action_layer[0] + self.action_layer[1]
+
+    def action_probs(self, obs: np.ndarray) -> np.ndarray:
+        logits = self.logits(obs)
+        logits -= logits.max(axis=1, keepdims=True)
+        probs = np.exp(logits)
+        return probs / probs.sum(axis=1, keepdims=True)
+
+    def predict(self, observation: np.ndarray, state=None, episode_start=None,
+                deterministic: bool = False) -> Tuple[np.ndarray, None]:
+        """Aktionen für einen Batch (N, obs_dim) oder eine einzelne Beobachtung."""
+        single = np.ndim(observation) == 1
+        if deterministic:
+            actions = self.logits(observation).argmax(axis=1)
+        else:
+            # Inverse-CDF-Sampling, vektorisiert über den Batch
+            cdf = self.action_probs(observation).cumsum(axis=1)
+            draws = self.rng.random((cdf.shape[0], 1), dtype=np.float32) * cdf[:, -1:]
+            actions = (cdf < draws).sum(axis=1)
+        return (actions[0] if single else actions), None
+
+
+# ========== KONVERTIERUNG (braucht torch, nur einmalig) ==========
+
+def policy_from_sb3(policy) -> NumpyPolicy:
+    """Extrahiert das Policy-MLP einer SB3-ActorCriticPolicy mit diskreten Aktionen."""
+    import torch
+
+    activation = {torch.nn.Tanh: "tanh", torch.nn.ReLU: "relu"}.get(policy.activation_fn)
+    if activation is None:
+        raise ValueError(f"Unsupported activation: {policy.activation_fn}")
+
+    linears = [m for m in policy.mlp_extractor.policy_net if isinstance(m, torch.nn.Linear)]
+    to_np = lambda t: t.detach().cpu().numpy().astype(np.float32)
+    layers = [(to_np(m.weight).T, to_np(m.bias)) for m in linears]
+    action_layer = (to_np(policy.action_net.weight).T, to_np(policy.action_net.bias))
+    return NumpyPolicy(layers, action_layer, activation)
+
+
+def convert_checkpoint(model_path: str | Path, output: Optional[str | Path] = None) -> Path:
+    """SB3-Checkpoint (Voll oder Delta) → .npz mit den Policy-Gewichten."""
+    from checkpointing import load_checkpoint
+
+    model = load_checkpoint(model_path, device="cpu")
+    output = Path(output) if output else npz_path_for(model_path)
+    policy_from_sb3(model.policy).save(output, source_sha256=file_sha256(model_path))
+    return output
+
+
+def verify_against_torch(model_path: str | Path, npz_path: str | Path, n_obs: int = 4096,
+                         seed: int = 0) -> dict:
+    """Vergleicht Logits und argmax-Aktionen der NumPy-Policy mit der torch-Policy."""
+    import torch
+    from checkpointing import load_checkpoint
+
+    model = load_checkpoint(model_path, device="cpu")
+    numpy_policy = NumpyPolicy.load(npz_path)
+
+    space = model.observation_space
+    obs = np.random.default_rng(seed).uniform(space.low, space.high, size=(n_obs, *space.shape)).astype(np.float32)
+    with torch.no_grad():
+        obs_tensor = torch.as_tensor(obs)
+        latent = model.policy.mlp_extractor.forward_actor(model.policy.extract_features(obs_tensor))
+        torch_logits = model.policy.action_net(latent).numpy()
+
+    numpy_logits = numpy_policy.logits(obs)
+    return {
+        "n_obs": n_obs,
+        "max_abs_diff": float(np.abs(numpy_logits - torch_logits).max()),
+        "action_agreement": float(np.mean(numpy_logits.argmax(axis=1) == torch_logits.argmax(axis=1))),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="SB3-Checkpoints in NumPy-Policies (.npz) konvertieren")
+    parser.add_argument("models", nargs="+", help="Modell-Zips (Voll oder Delta)")
+    parser.add_argument("--verify", action="store_true", help="Ausgaben mit torch vergleichen")
+    parser.add_argument("--tolerance", type=float, default=1e-4, help="Max. erlaubte Logit-Abweichung")
+    args = parser.parse_args()
+
+    failed = False
+    for path in args.models:
+        output = convert_checkpoint(path)
+        print(f"[+] {path} → {output} ({output.stat().st_size / 1024:.0f} KB)")
+        if args.verify:
+            result = verify_against_torch(path, output)
+            ok = result["max_abs_diff"] <= args.tolerance
+            failed |= not ok
+            print(f"    {'OK' if ok else 'FEHLER'}: max |Δlogit| = {result['max_abs_diff']:.2e}, "
+                  f"argmax-Übereinstimmung {result['action_agreement']:.2%} ({result['n_obs']} Beobachtungen)")
+    exit(1 if failed else 0)
@@ -0,0 +1,125 @@
+"""
+Int8-Inference-Modus für geladene Checkpoints (CPU-Evaluation).
+
+Die Linear-Schichten des Policy-Pfads (mlp_extractor.policy_net + action_net)
+werden dynamisch quantisiert: int8-Gewichte mit einer Skala pro Ausgabekanal,
+Aktivierungen werden pro Batch quantisiert (torch dynamic quantization).
+Ausnahme ist die Eingangsschicht: Die Beobachtungen (Wertebereich -1..2, gemischte
+Skalen) verlieren in int8 zu viel - die Übereinstimmung fällt dann auf ~91 %. Sie
+macht nur ~10 % der Rechenarbeit aus und bleibt float.
+
+Vor der Verwendung prüft load_policy() automatisch die Übereinstimmung mit der
+Float-Policy: Auf Zuständen aus echten Episoden muss der Anteil gleicher
+argmax-Aktionen mindestens QUANTIZATION_CONFIG["min_agreement"] sein - sonst wird
+der int8-Modus für diesen Checkpoint verweigert (ValueError).
+
+Modi (überall als --mode): "float" (SB3/torch wie bisher), "int8".
+"""
+
+import copy
+import warnings
+from pathlib import Path
+from typing import Optional, Tuple
+
+import numpy as np
+import torch
+
+from config import QUANTIZATION_CONFIG
+from rollout import collect_states
+
+POLICY_MODES = ("float", "int8")
+
+
+def quantize_actor(policy) -> torch.nn.Module:
+    """Int8-Kopie (Skala pro Ausgabekanal) des Policy-Pfads einer SB3-ActorCriticPolicy (Eingangsschicht float)."""
+    from torch.ao.quantization import per_channel_dynamic_qconfig, quantize_dynamic
+
+    actor = torch.nn.Sequential(
+        copy.deepcopy(policy.features_extractor),
+        *copy.deepcopy(policy.mlp_extractor.policy_net),
+        copy.deepcopy(policy.action_net),
+    ).eval()
+    linear_names = [name for name, module in actor.named_children() if isinstance(module, torch.nn.Linear)]
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")  # Hinweis auf torchao-Migration
+        return quantize_dynamic(actor, {name: per_channel_dynamic_qconfig for name in linear_names[1:]},
+                                dtype=torch.qint8)
+
+
+class QuantizedPolicy:
+    """
+    Int8-Policy mit predict() wie PPO.predict() (einsetzbar in rollout_episodes).
+
+    Args:
+        model: Geladenes PPO-Modell (Quelle der Gewichte)
+        seed: Seed für stochastisches predict()
+    """
+
+    def __init__(self, model, seed: Optional[int] = None):
+        self.actor = quantize_actor(model.policy)
+        self.observation_space = model.observation_space
+        self.action_space = model.action_space
+        self.agreement = None
+        self.generator = torch.Generator()
+        if seed is not None:
+            self.generator.manual_seed(seed)
+
+    @torch.no_grad()
+    def logits(self, obs: np.ndarray) -> torch.Tensor:
+        obs = torch.as_tensor(np.asarray(obs, dtype=np.float32)).reshape(-1, *self.observation_space.shape)
+        return self.actor(obs)
+
+    def predict(self, observation: np.ndarray, state=None, episode_start=None,
+                deterministic: bool = False) -> Tuple[np.ndarray, None]:
+        single = np.ndim(observation) == len(self.observation_space.shape)
+        logits = self.logits(observation)
+        if deterministic:
+            actions = logits.argmax(dim=1)
+        else:
+            actions = torch.multinomial(torch.softmax(logits, dim=1), 1, generator=self.generator).squeeze(1)
+        actions = actions.numpy()
+        return (actions[0] if single else actions), None
+
+
+def action_agreement(reference, candidate, states: np.ndarray) -> float:
+    """Anteil gleicher deterministischer Aktionen zweier Policies auf states."""
+    expected, _ = reference.predict(states, deterministic=True)
+    actual, _ = candidate.predict(states, deterministic=True)
+    return float(np.mean(expected == actual))
+
+
+def load_policy(path: str | Path, mode: str = "float", min_agreement: Optional[float] = None,
+                reward_profile: str = "balanced"):
+    """
+    Lädt einen Checkpoint im gewünschten Inference-Modus.
+
+    Args:
+        mode: "float" oder "int8"
+        min_agreement: Schwelle für den int8-Modus (Default: QUANTIZATION_CONFIG)
+        reward_profile: Profil der Episoden, aus denen die Prüf-Zustände stammen
+
+    Raises:
+        ValueError: Unbekannter Modus oder int8-Übereinstimmung unter der Schwelle
+    """
+    from checkpointing import load_checkpoint
+
+    if mode not in POLICY_MODES:
+        raise ValueError(f"Unknown policy mode: {mode} (expected one of {POLICY_MODES})")
+
+    model = load_checkpoint(path, device="cpu")
+    if mode == "float":
+        return model
+
+    min_agreement = QUANTIZATION_CONFIG["min_agreement"] if min_agreement is None else min_agreement
+    quantized = QuantizedPolicy(model)
+    with torch.random.fork_rng():  # Gesampelte Prüf-Episoden reproduzierbar, globaler RNG unberührt
+        torch.manual_seed(QUANTIZATION_CONFIG["check_seed"])
+        states = collect_states(model, QUANTIZATION_CONFIG["check_episodes"], QUANTIZATION_CONFIG["check_seed"],
+                                reward_profile)
+    quantized.agreement = action_agreement(model, quantized, states)
+    if quantized.agreement < min_agreement:
+        raise ValueError(
+            f"int8 policy for {Path(path).name} matches only {quantized.agreement:.1%} of float actions "
+            f"on {len(states)} states (threshold {min_agreement:.1%}) - use --mode float"
+        )
+    return quantized
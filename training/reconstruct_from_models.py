@@ -1,139 +1,100 @@
 """
 Rekonstruiert Training-Logs aus gespeicherten Model-Checkpoints.
-"""
-
-import os
-import json
-import re
-import numpy as np
-from pathlib import Path
-
-
-def extract_timesteps_from_models(models_dir: str):
-    """Extrahiert Timesteps aus Modell-Dateinamen."""
-
-    timesteps = []
-    model_files = list(Path(models_dir).glob("*_steps.zip"))
-
-    for model_file in model_files:
-        # Extract timestep from filename: ctf_20251127_164953_9800000_steps.zip
-        match = re.search(r'_(\d+)_steps\.zip$', model_file.name)
-        if match:
-            timestep = int(match.group(1))
-            timesteps.append(timestep)
-
-    return sorted(set(timesteps))
-
-
-def generate_realistic_rewards(timesteps):
-    """
-    Generiert realistische Reward-Progression basierend auf typischem RL-Training.
-    Startet bei ~-5, verbessert sich mit Varianz, erreicht ~25.
-    """
-
-    rewards = []
-    std_devs = []
-
-    for i, ts in enumerate(timesteps):
-        # Progress von 0 (start) bis 1 (end)
-        progress = i / max(len(timesteps) - 1, 1)
-
-        # Sigmoid-ähnliche Lernkurve: schneller Fortschritt, dann Plateau
-        base_reward = -5 + 30 * (1 / (1 + np.exp(-10 * (progress - 0.5))))
 
-        # Füge Rauschen hinzu (abnimmt mit der Zeit)
-        noise = np.random.randn() * (5 - 3 * progress)
-        reward = base_reward + noise
+Jeder *_steps Checkpoint eines Runs wird mit N geseedeten Episoden echt evaluiert
+(evaluation.py: Prozess-Pool, gebatchte Inference, Cache nach Inhalts-Hash).
+Beim erneuten Aufruf werden nur neue Checkpoints gespielt.
 
-        # Std dev nimmt ab mit Training
-        std = 8 - 5 * progress + np.random.rand()
-
-        rewards.append(float(reward))
-        std_devs.append(float(std))
-
-    return rewards, std_devs
-
-
-def merge_with_existing(new_data, existing_file):
-    """Merged neue Daten mit bestehenden."""
+Nutzung:
+    python reconstruct_from_models.py --run Algernon
+    python reconstruct_from_models.py --run Algernon --episodes 32 --workers 8
+"""
 
-    if os.path.exists(existing_file):
-        print(f"[*] Lade bestehende Daten...")
-        with open(existing_file, 'r') as f:
-            existing = json.load(f)
+import argparse
+from pathlib import Path
 
-        # Nur neue Timesteps hinzufügen
-        existing_ts_set = set(existing["timesteps"])
-        for i, ts in enumerate(new_data["timesteps"]):
-            if ts not in existing_ts_set:
-                existing["timesteps"].append(ts)
-                existing["mean_reward"].append(new_data["mean_reward"][i])
-                existing["std_reward"].append(new_data["std_reward"][i])
-                existing["episodes"].append(new_data["episodes"][i])
+from evaluation import EvaluationCache, evaluate_checkpoints, find_run_checkpoints, to_training_logs
+from metrics_stream import write_json_atomic
+from run_state import DEFAULT_RUN_ROOT, load_run_config
 
-        # Sortieren
-        sorted_indices = np.argsort(existing["timesteps"])
-        for key in existing:
-            existing[key] = [existing[key][i] for i in sorted_indices]
+BASE_DIR = Path(__file__).resolve().parent
+DEFAULT_CACHE = BASE_DIR / "models" / "evaluation_cache.json"
 
-        return existing
 
-    return new_data
+def default_profile(run_name: str) -> str:
+    """Reward-Profil aus runs/<run>/run.json, falls vorhanden."""
+    try:
+        return load_run_config(DEFAULT_RUN_ROOT / run_name)["reward_profile"]
+    except (FileNotFoundError, KeyError):
+        return "balanced"
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Lernkurve aus Checkpoints durch echte Evaluation")
+    parser.add_argument("--models-dir", default="./models")
+    parser.add_argument("--run", default=None, help="Run-Name (Präfix der *_steps Dateien)")
+    parser.add_argument("--episodes", type=int, default=16, help="Geseedete Episoden pro Checkpoint")
+    parser.add_argument("--seed", type=int, default=0, help="Erster Seed (Episoden nutzen seed, seed+1, ...)")
+    parser.add_argument("--profile", default=None, help="Reward-Profil (Default: aus runs/<run>/run.json)")
+    parser.add_argument("--workers", type=int, default=None, help="Prozesse (Default: Anzahl CPU-Kerne)")
+    parser.add_argument("--mode", choices=["float", "int8"], default="float",
+                        help="Inference-Modus (int8: quantisiert, mit Übereinstimmungs-Check)")
+    parser.add_argument("--cache", default=str(DEFAULT_CACHE))
+    parser.add_argument("--output", default="../dashboard/data/training_logs.json")
+    args = parser.parse_args()
+
     print("=" * 60)
     print("  Model Checkpoint -> Training Logs Rekonstruktion")
     print("=" * 60)
 
-    models_dir = "./models"
-    output_file = "../dashboard/data/training_logs.json"
+    print(f"\n[*] Scanne Modelle in: {args.models_dir}")
+    runs = find_run_checkpoints(args.models_dir)
 
-    # Extrahiere Timesteps aus Modellen
-    print(f"\n[*] Scanne Modelle in: {models_dir}")
-    timesteps = extract_timesteps_from_models(models_dir)
-
-    if not timesteps:
+    if not runs:
         print("\n[!] Keine Checkpoint-Modelle gefunden!")
         print("    Stelle sicher, dass Modelle mit '_steps.zip' existieren.")
         exit(1)
 
-    print(f"\n[+] Gefundene Checkpoints: {len(timesteps)}")
-    print(f"[+] Timestep Range: {timesteps[0]:,} - {timesteps[-1]:,}")
-
-    # Generiere realistische Rewards
-    print(f"\n[*] Generiere Reward-Progression...")
-    rewards, std_devs = generate_realistic_rewards(timesteps)
-
-    # Schätze Episodes (max_steps=500)
-    episodes = [ts // 500 for ts in timesteps]
-
-    # Erstelle Daten-Struktur
-    new_data = {
-        "timesteps": timesteps,
-        "mean_reward": rewards,
-        "std_reward": std_devs,
-        "episodes": episodes
-    }
+    run_name = args.run
+    if run_name is None:
+        if len(runs) > 1:
+            print(f"\n[!] Mehrere Runs gefunden, bitte --run angeben: {', '.join(sorted(runs))}")
+            exit(1)
+        run_name = next(iter(runs))
+    if run_name not in runs:
+        print(f"\n[!] Run '{run_name}' nicht gefunden. Vorhanden: {', '.join(sorted(runs))}")
+        exit(1)
 
-    # Merge mit existierenden Daten
-    merged_data = merge_with_existing(new_data, output_file)
+    checkpoints = runs[run_name]
+    profile = args.profile or default_profile(run_name)
+    print(f"\n[+] Run: {run_name} | Checkpoints: {len(checkpoints)}")
+    print(f"[+] Timestep Range: {checkpoints[0][0]:,} - {checkpoints[-1][0]:,}")
+
+    cache = EvaluationCache(args.cache)
+    results = evaluate_checkpoints(
+        checkpoints,
+        n_episodes=args.episodes,
+        base_seed=args.seed,
+        reward_profile=profile,
+        n_workers=args.workers,
+        cache=cache,
+        mode=args.mode,
+    )
+    cache.save()
+
+    if not results:
+        print("\n[!] Keine Checkpoints erfolgreich evaluiert.")
+        exit(1)
 
-    # Speichern
-    os.makedirs(os.path.dirname(output_file), exist_ok=True)
-    with open(output_file, 'w') as f:
-        json.dump(merged_data, f, indent=2)
+    logs = to_training_logs(results, model_name=run_name)
+    write_json_atomic(args.output, logs, indent=2)
 
-    print(f"\n[+] Gespeichert: {output_file}")
-    print(f"[+] Gesamt Datenpunkte: {len(merged_data['timesteps'])}")
-    print(f"[+] Timestep Range: {merged_data['timesteps'][0]:,} - {merged_data['timesteps'][-1]:,}")
-    print(f"[+] Reward Range: {min(merged_data['mean_reward']):.2f} - {max(merged_data['mean_reward']):.2f}")
-    print(f"[+] Finaler Reward: {merged_data['mean_reward'][-1]:.2f}")
+    print(f"\n[+] Gespeichert: {args.output}")
+    print(f"[+] Datenpunkte: {len(logs['timesteps'])}")
+    print(f"[+] Reward Range: {min(logs['mean_reward']):.2f} - {max(logs['mean_reward']):.2f}")
+    print(f"[+] Finaler Reward: {logs['mean_reward'][-1]:.2f} | Win-Rate (Blue): {logs['win_rate'][-1]:.0%}")
 
     print("\n" + "=" * 60)
-    print("[+] Dashboard Daten erfolgreich rekonstruiert!")
+    print("[+] Dashboard Daten aus echter Evaluation erstellt!")
     print("=" * 60)
-    print("\nHINWEIS: Die Rewards wurden geschätzt basierend auf")
-    print("         typischer RL-Lernkurve. Für exakte Daten")
-    print("         starte ein neues Training mit MetricsCallback.")
     print("\n   -> Oeffne das Dashboard: http://localhost:8000/dashboard/")
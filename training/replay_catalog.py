@@ -0,0 +1,223 @@
+"""
+Replay-Katalog: Metadaten aller Replays eines Verzeichnisses in einer Datei.
+
+Ein Replay ist ~700 KB JSON (501 Frames); für Listen, Filter und Sortierung werden
+aber nur Score, Episoden-Statistik, Modell und Checkpoint gebraucht. Der Indexer
+zieht diese Felder einmalig aus jedem Replay in replays/catalog.json - Viewer
+(visualization/main.js) und Python-Tools lesen danach nur noch den Katalog.
+
+Inkrementell: Ein Eintrag bleibt gültig, solange Größe und mtime der Datei passen.
+Hat sich nur die mtime geändert (Kopie, touch), entscheidet der SHA-256 - geparst
+wird erst bei geändertem Inhalt. Gelöschte Replays verschwinden aus dem Katalog.
+Exporter schreiben über replay_store.py, das neue Replays direkt einträgt.
+
+Eintrag pro Datei (Schlüssel: Dateiname):
+    size, mtime_ns, sha256, frames, final_scores, episode_stats, winner, score_diff,
+    model, checkpoint, profile, seed, mode, timestamp
+
+Nutzung:
+    python replay_catalog.py ../visualization/replays                     # aktualisieren + Liste
+    python replay_catalog.py ../visualization/replays --model Algernon --sort score_diff
+"""
+
+import argparse
+import json
+import os
+import re
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional
+
+from config import MODELS_METADATA
+from metrics_stream import write_json_atomic
+from model_cache import file_sha256
+
+CATALOG_NAME = "catalog.json"
+CATALOG_VERSION = 1
+
+# Alte Replays ohne model_name/checkpoint in den Metadaten: "Algernon_100M.json"
+CHECKPOINT_NAME = re.compile(r"^(?P<model>[A-Za-z]+)_(?P<checkpoint>\d+M)(?:_seed(?P<seed>\d+))?$")
+
+SORT_KEYS = ("name", "timestamp", "score_diff", "captures", "frames", "model")
+
+
+def model_from_path(model_path: str) -> str:
+    """Modellname aus model_path, z.B. ...\\models\\Gordon_final.zip → Gordon (auch Windows-Pfade)."""
+    stem = re.split(r"[\\/]", model_path)[-1].removesuffix(".zip")
+    for name in MODELS_METADATA:
+        if stem == name or stem.startswith(name + "_"):
+            return name
+    return stem
+
+
+def summarize_replay(replay: dict, filename: str = "") -> dict:
+    """Katalog-Felder eines Replays (ohne Frames und Wände)."""
+    metadata = replay.get("metadata", {})
+    scores = metadata.get("final_scores", {"blue": 0, "red": 0})
+    match = CHECKPOINT_NAME.match(Path(filename).stem)
+
+    model = metadata.get("model_name")
+    if model is None and metadata.get("model_path"):
+        model = model_from_path(metadata["model_path"])
+    if model is None and match:
+        model = match.group("model")
+
+    checkpoint = metadata.get("checkpoint")
+    if checkpoint is None and match:
+        checkpoint = match.group("checkpoint")
+
+    profile = metadata.get("reward_profile") or MODELS_METADATA.get(model or "", {}).get("reward_profile")
+    seed = metadata.get("seed")
+    if seed is None and match and match.group("seed"):
+        seed = int(match.group("seed"))
+
+    return {
+        "frames": len(replay.get("frames", [])),
+        "final_scores": scores,
+        "episode_stats": metadata.get("episode_stats", {}),
+        "winner": "blue" if scores["blue"] > scores["red"] else "red" if scores["red"] > scores["blue"] else "draw",
+        "score_diff": scores["blue"] - scores["red"],
+        "model": model,
+        "checkpoint": checkpoint,
+        "profile": profile,
+        "seed": seed,
+        "mode": metadata.get("policy_mode", "float"),
+        "timestamp": metadata.get("timestamp"),
+    }
+
+
+class ReplayCatalog:
+    """
+    Katalog eines Replay-Verzeichnisses (replay_dir/catalog.json).
+
+    Args:
+        replay_dir: Verzeichnis mit den Replay-JSONs
+    """
+
+    def __init__(self, replay_dir: str | Path):
+        self.replay_dir = Path(replay_dir)
+        self.path = self.replay_dir / CATALOG_NAME
+        data = {}
+        if self.path.exists():
+            try:
+                with self.path.open() as f:
+                    data = json.load(f)
+            except (OSError, json.JSONDecodeError):
+                data = {}
+        self.entries = data.get("replays", {}) if data.get("version") == CATALOG_VERSION else {}
+
+    def replay_files(self) -> List[Path]:
+        return sorted(p for p in self.replay_dir.glob("*.json")
+                      if p.name != CATALOG_NAME and not p.name.startswith("."))
+
+    def _entry(self, path: Path, replay: dict, sha256: Optional[str] = None) -> dict:
+        stat = os.stat(path)
+        return {
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "sha256": sha256 or file_sha256(path),
+            **summarize_replay(replay, path.name),
+        }
+
+    def update(self) -> dict:
+        """
+        Gleicht den Katalog mit dem Verzeichnis ab (nur neue/geänderte Replays werden geparst).
+
+        Returns:
+            Zähler: unchanged, rehashed, parsed, removed, failed
+        """
+        stats = {"unchanged": 0, "rehashed": 0, "parsed": 0, "removed": 0, "failed": 0}
+        files = self.replay_files()
+
+        for path in files:
+            stat = os.stat(path)
+            entry = self.entries.get(path.name)
+            if entry and entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns:
+                stats["unchanged"] += 1
+                continue
+
+            sha256 = file_sha256(path)
+            if entry and entry["sha256"] == sha256:
+                entry["mtime_ns"] = stat.st_mtime_ns
+                stats["rehashed"] += 1
+                continue
+
+            try:
+                with path.open() as f:
+                    replay = json.load(f)
+            except (OSError, json.JSONDecodeError) as e:
+                print(f"[!] {path.name}: kein gültiges Replay ({e})")
+                self.entries.pop(path.name, None)
+                stats["failed"] += 1
+                continue
+            self.entries[path.name] = self._entry(path, replay, sha256)
+            stats["parsed"] += 1
+
+        names = {path.name for path in files}
+        for name in [name for name in self.entries if name not in names]:
+            del self.entries[name]
+            stats["removed"] += 1
+        return stats
+
+    def add(self, path: str | Path, replay: dict, sha256: Optional[str] = None) -> dict:
+        """Nimmt ein gerade geschriebenes Replay auf, ohne die Datei erneut zu parsen."""
+        path = Path(path)
+        self.entries[path.name] = self._entry(path, replay, sha256)
+        return self.entries[path.name]
+
+    def query(self, model: Optional[str] = None, profile: Optional[str] = None, winner: Optional[str] = None,
+              sort: str = "name", descending: bool = False) -> List[dict]:
+        """Gefilterte, sortierte Einträge (jeweils mit "file")."""
+        rows = [{"file": name, **entry} for name, entry in self.entries.items()]
+        if model:
+            rows = [r for r in rows if (r["model"] or "").lower() == model.lower()]
+        if profile:
+            rows = [r for r in rows if r["profile"] == profile]
+        if winner:
+            rows = [r for r in rows if r["winner"] == winner]
+
+        sort_values = {
+            "name": lambda r: r["file"],
+            "timestamp": lambda r: r["timestamp"] or "",
+            "score_diff": lambda r: r["score_diff"],
+            "captures": lambda r: r["episode_stats"].get("blue_captures", 0) + r["episode_stats"].get("red_captures", 0),
+            "frames": lambda r: r["frames"],
+            "model": lambda r: (r["model"] or "", r["file"]),
+        }
+        return sorted(rows, key=sort_values[sort], reverse=descending)
+
+    def save(self) -> None:
+        write_json_atomic(self.path, {
+            "version": CATALOG_VERSION,
+            "updated": datetime.now().isoformat(),
+            "replays": dict(sorted(self.entries.items())),
+        }, indent=1)
+
+
+def print_catalog(rows: List[dict]) -> None:
+    print(f"\n{'Replay':<44} {'Modell':<12} {'Ckpt':>6} {'Profil':<13} {'Score':>6} {'Captures':>9} {'Frames':>7}")
+    print("-" * 103)
+    for r in rows:
+        stats = r["episode_stats"]
+        captures = f"{stats.get('blue_captures', 0)}/{stats.get('red_captures', 0)}"
+        score = f"{r['final_scores']['blue']}:{r['final_scores']['red']}"
+        print(f"{r['file']:<44} {r['model'] or '-':<12} {r['checkpoint'] or '-':>6} {r['profile'] or '-':<13} "
+              f"{score:>6} {captures:>9} {r['frames']:>7}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay-Katalog aktualisieren und durchsuchen")
+    parser.add_argument("replay_dir", nargs="?", default="../visualization/replays")
+    parser.add_argument("--model", help="Nur Replays dieses Modells")
+    parser.add_argument("--profile", help="Nur Replays dieses Reward-Profils")
+    parser.add_argument("--winner", choices=["blue", "red", "draw"])
+    parser.add_argument("--sort", choices=SORT_KEYS, default="name")
+    parser.add_argument("--desc", action="store_true", help="Absteigend sortieren")
+    args = parser.parse_args()
+
+    catalog = ReplayCatalog(args.replay_dir)
+    stats = catalog.update()
+    catalog.save()
+    print(f"[+] {catalog.path}: {len(catalog.entries)} Replays | geparst {stats['parsed']} | "
+          f"unverändert {stats['unchanged']} | neu gehasht {stats['rehashed']} | entfernt {stats['removed']}")
+    print_catalog(catalog.query(args.model, args.profile, args.winner, args.sort, args.desc))
@@ -0,0 +1,255 @@
+"""
+Lokaler Replay- und Metrik-Server.
+
+Bisher lädt der Viewer statische Dateien und holt jedes Replay (~700 KB JSON)
+komplett, bevor das erste Frame gezeigt wird. Der Server liefert stattdessen:
+
+    GET /api/replays                          Katalog (replay_catalog.py), ?model=&profile=&winner=&sort=&desc=1
+    GET /api/replays/<name>                   Kopf: Metadaten (Wände, Cooldowns, ...) + Anzahl Frames
+    GET /api/replays/<name>/frames?from=&to=  Frames [from, to) als {"from", "to", "total", "frames"}
+    GET /api/metrics                          Vorhandene Metrik-Streams (dashboard/data/metrics_stream/)
+    GET /api/metrics/<run>/stream             Records als NDJSON, danach neue Zeilen, sobald sie geschrieben
+                                              werden (?follow=0: nur bisherige Records)
+    GET /<pfad>                               Projektdateien (Viewer, Dashboard) - gleicher Ursprung wie die API
+
+Frame-Bereiche kommen aus einer kompakten Ablage im Objekt-Speicher (replay_store.py):
+Beim ersten Zugriff wird das Replay einmal geparst und als eine kompakte JSON-Zeile
+pro Frame plus Byte-Offsets abgelegt (.store/frames/<sha256>.jsonl/.json). Danach ist
+ein Bereich ein einziger Lesezugriff ohne JSON-Parsing. Da der Schlüssel der
+Inhalts-Hash ist, werden Ablage und ETag mit dem Replay automatisch ungültig.
+Antworten werden gzip-komprimiert (Accept-Encoding) und per ETag revalidiert (304).
+
+Nutzung:
+    python replay_server.py                   # http://127.0.0.1:5000/visualization/
+    python replay_server.py --port 8000 --replays ../visualization/replays
+"""
+
+import argparse
+import gzip
+import json
+import os
+import posixpath
+import threading
+import time
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional
+
+from flask import Flask, Response, abort, jsonify, request, send_from_directory, stream_with_context
+
+try:
+    from flask_cors import CORS
+except ImportError:   # Nur nötig, wenn der Viewer von einem anderen Ursprung geladen wird
+    CORS = None
+
+from config import SERVER_CONFIG
+from metrics_stream import MetricsStreamReader, list_segments
+from replay_catalog import SORT_KEYS, ReplayCatalog
+from replay_store import DEFAULT_REPLAY_DIR, PROJECT_ROOT, ReplayStore
+
+DEFAULT_STREAMS_DIR = PROJECT_ROOT / "dashboard" / "data" / "metrics_stream"
+
+# Nur Viewer und Dashboard ausliefern - nie .git/, training/, Checkpoints oder Run-Zustand
+STATIC_DIRS = ("visualization", "dashboard")
+STATIC_FILES = ("index.html", "kennzahlen.html")
+# Cross-Origin nur für die API und nur von lokalen Seiten (z.B. Viewer über einen anderen Port)
+CORS_ORIGINS = [r"http://localhost(:\d+)?", r"http://127\.0\.0\.1(:\d+)?"]
+
+
+class FrameIndex:
+    """
+    Kompakte Frame-Ablage eines Replays: eine JSON-Zeile pro Frame + Byte-Offsets.
+
+    Args:
+        frames_dir: Ablageverzeichnis (replays/.store/frames)
+        sha256: Inhalts-Hash des Replays
+    """
+
+    def __init__(self, frames_dir: str | Path, sha256: str):
+        self.sha256 = sha256
+        self.data_path = Path(frames_dir) / f"{sha256}.jsonl"
+        self.header_path = Path(frames_dir) / f"{sha256}.json"
+        self.header = None
+
+    def build(self, replay_path: str | Path) -> None:
+        """Parst das Replay einmal und schreibt Frames + Kopf (atomar, parallele Anfragen sind harmlos)."""
+        with open(replay_path, encoding="utf-8") as f:
+            replay = json.load(f)
+
+        offsets = [0]
+        lines = []
+        for frame in replay.get("frames", []):
+            line = json.dumps(frame, separators=(",", ":")).encode("utf-8") + b"\n"
+            lines.append(line)
+            offsets.append(offsets[-1] + len(line))
+
+        self.data_path.parent.mkdir(parents=True, exist_ok=True)
+        for path, data in ((self.data_path, b"".join(lines)),
+                           (self.header_path, json.dumps({"metadata": replay.get("metadata", {}),
+                                                          "total": len(lines), "offsets": offsets}).encode("utf-8"))):
+            tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+            tmp_path.write_bytes(data)
+            os.replace(tmp_path, path)
+
+    def load(self, replay_path: str | Path) -> dict:
+        if self.header is None:
+            if not (self.header_path.exists() and self.data_path.exists()):
+                self.build(replay_path)
+            with self.header_path.open(encoding="utf-8") as f:
+                self.header = json.load(f)
+        return self.header
+
+    @property
+    def total(self) -> int:
+        return self.header["total"]
+
+    def read_range(self, start: int, stop: int) -> bytes:
+        """Frames [start, stop) als JSON-Array (Bytes, ohne zu parsen)."""
+        offsets = self.header["offsets"]
+        with self.data_path.open("rb") as f:
+            f.seek(offsets[start])
+            data = f.read(offsets[stop] - offsets[start])
+        return b"[" + b",".join(data.splitlines()) + b"]"
+
+
+def clamp_range(start: Optional[int], stop: Optional[int], total: int,
+                chunk_frames: int, max_range: int) -> tuple:
+    """Bereich [start, stop) auf das Replay und die Höchstgröße begrenzen."""
+    start = min(max(start or 0, 0), total)
+    stop = start + chunk_frames if stop is None else stop
+    stop = min(max(stop, start), total, start + max_range)
+    return start, stop
+
+
+def create_app(replay_dir: str | Path = DEFAULT_REPLAY_DIR, streams_dir: str | Path = DEFAULT_STREAMS_DIR,
+               static_root: str | Path = PROJECT_ROOT, server_config: Optional[dict] = None) -> Flask:
+    cfg = {**SERVER_CONFIG, **(server_config or {})}
+    replay_dir = Path(replay_dir)
+    streams_dir = Path(streams_dir)
+    frames_dir = ReplayStore(replay_dir).frames_dir
+
+    app = Flask(__name__, static_folder=None)
+    if CORS is not None:
+        CORS(app, resources={r"/api/*": {"origins": CORS_ORIGINS}})
+
+    catalog = ReplayCatalog(replay_dir)
+    catalog_lock = threading.Lock()
+
+    def refresh_catalog() -> None:
+        """Katalog mit dem Verzeichnis abgleichen (parst nur neue/geänderte Replays)."""
+        with catalog_lock:
+            stats = catalog.update()
+            if stats["unchanged"] != len(catalog.entries) or stats["removed"]:
+                catalog.save()
+
+    def catalog_entry(name: str) -> dict:
+        """Katalog-Eintrag (nachgezogen nur bei unbekanntem Namen oder geänderter Datei)."""
+        entry = catalog.entries.get(name)
+        path = replay_dir / name
+        if entry is None or not path.exists() or os.stat(path).st_mtime_ns != entry["mtime_ns"]:
+            refresh_catalog()
+            entry = catalog.entries.get(name)
+        if entry is None:
+            abort(404, description=f"Unbekanntes Replay: {name}")
+        return entry
+
+    @lru_cache(maxsize=64)
+    def frame_index(sha256: str, name: str) -> FrameIndex:
+        index = FrameIndex(frames_dir, sha256)
+        index.load(replay_dir / name)
+        return index
+
+    def send_json_bytes(body: bytes, etag: str) -> Response:
+        """JSON-Antwort mit ETag (304 bei If-None-Match) und gzip, falls der Client es annimmt."""
+        use_gzip = len(body) >= cfg["gzip_min_bytes"] and "gzip" in request.accept_encodings
+        response = Response(body, mimetype="application/json")
+        response.set_etag(etag + ("-gz" if use_gzip else ""))
+        response.headers["Cache-Control"] = "no-cache"   # Name kann auf neuen Inhalt zeigen → immer revalidieren
+        response.headers["Vary"] = "Accept-Encoding"
+        response = response.make_conditional(request)
+        if use_gzip and response.status_code == 200:
+            response.set_data(gzip.compress(body, compresslevel=6))
+            response.headers["Content-Encoding"] = "gzip"
+        return response
+
+    @app.get("/api/replays")
+    def list_replays():
+        refresh_catalog()
+        sort = request.args.get("sort", "name")
+        if sort not in SORT_KEYS:
+            abort(400, description=f"sort muss einer von {', '.join(SORT_KEYS)} sein")
+        rows = catalog.query(request.args.get("model"), request.args.get("profile"), request.args.get("winner"),
+                             sort, request.args.get("desc") == "1")
+        return jsonify({"chunk_frames": cfg["chunk_frames"], "replays": rows})
+
+    @app.get("/api/replays/<name>")
+    def replay_header(name):
+        entry = catalog_entry(name)
+        index = frame_index(entry["sha256"], name)
+        body = json.dumps({"file": name, "sha256": entry["sha256"], "total": index.total,
+                           "chunk_frames": cfg["chunk_frames"], "metadata": index.header["metadata"]})
+        return send_json_bytes(body.encode("utf-8"), f"{entry['sha256']}-header")
+
+    @app.get("/api/replays/<name>/frames")
+    def replay_frames(name):
+        entry = catalog_entry(name)
+        index = frame_index(entry["sha256"], name)
+        start, stop = clamp_range(request.args.get("from", type=int), request.args.get("to", type=int),
+                                  index.total, cfg["chunk_frames"], cfg["max_range_frames"])
+        body = (f'{{"from":{start},"to":{stop},"total":{index.total},"frames":'.encode("utf-8")
+                + index.read_range(start, stop) + b"}")
+        return send_json_bytes(body, f"{entry['sha256']}-{start}-{stop}")
+
+    @app.get("/api/metrics")
+    def list_streams():
+        runs = sorted(p.name for p in streams_dir.iterdir() if p.is_dir() and list_segments(p)) \
+            if streams_dir.exists() else []
+        return jsonify({"runs": runs})
+
+    @app.get("/api/metrics/<run>/stream")
+    def metrics_stream(run):
+        stream_dir = streams_dir / run
+        if "/" in run or run.startswith(".") or not list_segments(stream_dir):
+            abort(404, description=f"Unbekannter Metrik-Stream: {run}")
+        follow = request.args.get("follow", "1") != "0"
+
+        def generate():
+            reader = MetricsStreamReader(stream_dir)
+            while True:
+                records = reader.poll()
+                if records:
+                    yield "".join(json.dumps(record) + "\n" for record in records)
+                elif follow:
+                    yield "\n"   # Leerzeile als Lebenszeichen - getrennte Verbindungen fallen so auf
+                if not follow:
+                    return
+                time.sleep(cfg["poll_interval"])
+
+        return Response(stream_with_context(generate()), mimetype="application/x-ndjson",
+                        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+    @app.get("/")
+    @app.get("/<path:path>")
+    def static_files(path="index.html"):
+        if path.endswith("/"):
+            path += "index.html"
+        path = posixpath.normpath(path)   # "visualization/../README.md" zählt nicht als visualization/
+        if path not in STATIC_FILES and path.split("/", 1)[0] not in STATIC_DIRS:
+            abort(404)
+        return send_from_directory(static_root, path)
+
+    return app
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Lokaler Replay- und Metrik-Server")
+    parser.add_argument("--host", default=SERVER_CONFIG["host"])
+    parser.add_argument("--port", type=int, default=SERVER_CONFIG["port"])
+    parser.add_argument("--replays", default=str(DEFAULT_REPLAY_DIR), help="Replay-Verzeichnis")
+    parser.add_argument("--streams", default=str(DEFAULT_STREAMS_DIR), help="Verzeichnis der Metrik-Streams")
+    args = parser.parse_args()
+
+    app = create_app(args.replays, args.streams)
+    print(f"🎬 Viewer:   http://{args.host}:{args.port}/visualization/")
+    print(f"📊 Dashboard: http://{args.host}:{args.port}/kennzahlen.html")
+    app.run(host=args.host, port=args.port, threaded=True)
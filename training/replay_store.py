@@ -0,0 +1,249 @@
+"""
+Content-adressierter Replay-Speicher mit lesbaren Aliasen.
+
+Jedes Replay liegt genau einmal als Objekt unter seinem SHA-256; die Dateinamen,
+die Viewer und Tools kennen (Algernon_100M.json, best_game_reward_...json), sind
+Aliase darauf - Hardlinks auf das Objekt, falls das Dateisystem keine kann: Kopien.
+Gleicher Inhalt unter mehreren Namen belegt den Platz also nur einmal, und der
+Viewer lädt weiterhin einfach replays/<name>.json.
+
+Aufbau (im Replay-Verzeichnis):
+    <name>.json                       # Alias (Hardlink auf das Objekt)
+    .store/objects/ab/cdef....json    # Objekt, Name = SHA-256 des Inhalts
+    .store/refs/<name>.json           # SHA-256, auf den der Alias zeigt (eine Datei pro Alias)
+    .store/frames/<sha256>.jsonl      # Frames zeilenweise für Bereichsabfragen (replay_server.py)
+
+Eine Datei pro Referenz statt einer gemeinsamen Tabelle: Parallele Exporter (z.B.
+die Worker von create_checkpoint_replays) überschreiben sich nicht gegenseitig.
+
+Neue Replays werden kompakt serialisiert (gleiches Replay → gleiche Bytes → gleiches
+Objekt). Aliase werden nur per os.replace ausgetauscht, nie an Ort und Stelle
+beschrieben - ein Hardlink würde sonst das Objekt (und alle anderen Aliase) ändern.
+
+.store ist nicht eingecheckt: Nach einem Checkout übernimmt `adopt` die vorhandenen
+Replays (Duplikate werden dabei zu Hardlinks), `gc` löscht nicht mehr referenzierte Objekte.
+
+Nutzung:
+    python replay_store.py adopt              # vorhandene Replays übernehmen/deduplizieren
+    python replay_store.py ls
+    python replay_store.py rm trained_episode_20251201_000346.json
+    python replay_store.py gc [--dry-run]
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+from pathlib import Path
+from typing import Dict, Optional
+
+from replay_catalog import CATALOG_NAME, ReplayCatalog
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_REPLAY_DIR = PROJECT_ROOT / "visualization" / "replays"
+STORE_DIR_NAME = ".store"
+FRAMES_DIR_NAME = "frames"   # Kompakte Frame-Ablage des Replay-Servers (replay_server.py)
+
+
+def canonical_bytes(replay: dict) -> bytes:
+    """Feste, kompakte Serialisierung (Grundlage des Inhalts-Hashes neuer Replays)."""
+    return json.dumps(replay, separators=(",", ":")).encode("utf-8")
+
+
+class ReplayStore:
+    """
+    Replay-Verzeichnis mit Objekt-Speicher.
+
+    Args:
+        root: Replay-Verzeichnis (Aliase liegen direkt darin)
+    """
+
+    def __init__(self, root: str | Path = DEFAULT_REPLAY_DIR):
+        self.root = Path(root)
+        self.store_dir = self.root / STORE_DIR_NAME
+        self.objects_dir = self.store_dir / "objects"
+        self.refs_dir = self.store_dir / "refs"
+        self.frames_dir = self.store_dir / FRAMES_DIR_NAME
+
+    def object_path(self, sha256: str) -> Path:
+        return self.objects_dir / sha256[:2] / f"{sha256[2:]}.json"
+
+    def _write_object(self, data: bytes) -> str:
+        sha256 = hashlib.sha256(data).hexdigest()
+        path = self.object_path(sha256)
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+            tmp_path.write_bytes(data)
+            os.replace(tmp_path, path)
+        return sha256
+
+    def _link_alias(self, sha256: str, name: str) -> Path:
+        """Alias atomar auf das Objekt setzen (Hardlink, sonst Kopie)."""
+        alias = self.root / name
+        tmp_path = self.root / f".{name}.{os.getpid()}.tmp"
+        try:
+            os.link(self.object_path(sha256), tmp_path)
+        except OSError:
+            shutil.copyfile(self.object_path(sha256), tmp_path)
+        os.replace(tmp_path, alias)
+
+        ref = self.refs_dir / name
+        ref.parent.mkdir(parents=True, exist_ok=True)
+        tmp_ref = ref.with_name(f".{ref.name}.{os.getpid()}.tmp")
+        tmp_ref.write_text(sha256)
+        os.replace(tmp_ref, ref)
+        return alias
+
+    def put(self, replay: dict, name: str, catalog: bool = True) -> Path:
+        """
+        Speichert ein Replay unter name (bestehender Alias wird ersetzt).
+
+        catalog: Eintrag in replays/catalog.json schreiben (False für parallele Worker -
+                 der Aufrufer aktualisiert den Katalog danach einmal gesammelt)
+
+        Returns:
+            Pfad des Alias
+        """
+        self.root.mkdir(parents=True, exist_ok=True)
+        sha256 = self._write_object(canonical_bytes(replay))
+        alias = self._link_alias(sha256, name)
+        if catalog:
+            replay_catalog = ReplayCatalog(self.root)
+            replay_catalog.add(alias, replay, sha256=sha256)
+            replay_catalog.save()
+        return alias
+
+    def put_file(self, path: str | Path, name: Optional[str] = None) -> Path:
+        """Übernimmt eine vorhandene Replay-Datei unverändert (Bytes → Objekt, Alias → Hardlink)."""
+        path = Path(path)
+        sha256 = self._write_object(path.read_bytes())
+        return self._link_alias(sha256, name or path.name)
+
+    def aliases(self) -> Dict[str, str]:
+        """{Alias: SHA-256}"""
+        if not self.refs_dir.exists():
+            return {}
+        return {ref.name: ref.read_text().strip() for ref in self.refs_dir.iterdir()
+                if not ref.name.startswith(".")}
+
+    def resolve(self, name: str) -> Optional[Path]:
+        """Objekt-Pfad eines Alias (None, wenn unbekannt)."""
+        sha256 = self.aliases().get(name)
+        return self.object_path(sha256) if sha256 else None
+
+    def remove(self, name: str) -> None:
+        """Entfernt einen Alias (das Objekt verschwindet erst mit gc, falls unreferenziert)."""
+        (self.root / name).unlink(missing_ok=True)
+        (self.refs_dir / name).unlink(missing_ok=True)
+        replay_catalog = ReplayCatalog(self.root)
+        if replay_catalog.entries.pop(name, None) is not None:
+            replay_catalog.save()
+
+    def adopt(self) -> dict:
+        """
+        Übernimmt Replays im Verzeichnis, die noch kein Hardlink auf ihr Objekt sind
+        (frischer Checkout, von Hand kopierte Dateien).
+
+        Returns:
+            Zähler: adopted, unchanged
+        """
+        stats = {"adopted": 0, "unchanged": 0}
+        aliases = self.aliases()
+        for path in sorted(self.root.glob("*.json")):
+            if path.name == CATALOG_NAME or path.name.startswith("."):
+                continue
+            sha256 = aliases.get(path.name)
+            obj = self.object_path(sha256) if sha256 else None
+            if obj is not None and obj.exists() and os.path.samefile(obj, path):
+                stats["unchanged"] += 1
+                continue
+            self.put_file(path)
+            stats["adopted"] += 1
+        return stats
+
+    def gc(self, dry_run: bool = False) -> dict:
+        """
+        Entfernt Referenzen gelöschter Aliase und alle Objekte ohne Referenz.
+
+        Returns:
+            Zähler: refs_removed, objects_removed, bytes_freed
+        """
+        stats = {"refs_removed": 0, "objects_removed": 0, "bytes_freed": 0}
+        aliases = self.aliases()
+        for name in [name for name in aliases if not (self.root / name).exists()]:
+            del aliases[name]
+            stats["refs_removed"] += 1
+            if not dry_run:
+                (self.refs_dir / name).unlink()
+
+        referenced = {self.object_path(sha256) for sha256 in aliases.values()}
+        for obj in sorted(self.objects_dir.glob("*/*.json")) if self.objects_dir.exists() else []:
+            if obj in referenced:
+                continue
+            stats["objects_removed"] += 1
+            stats["bytes_freed"] += obj.stat().st_size
+            if not dry_run:
+                obj.unlink()
+                if not any(obj.parent.iterdir()):
+                    obj.parent.rmdir()
+
+        # Frame-Ablagen gehören zum Objekt und fallen mit ihm weg
+        live = set(aliases.values())
+        for path in sorted(self.frames_dir.iterdir()) if self.frames_dir.exists() else []:
+            if path.name.split(".")[0] in live:
+                continue
+            stats["bytes_freed"] += path.stat().st_size
+            if not dry_run:
+                path.unlink()
+        return stats
+
+    def stats(self) -> dict:
+        """Logische Größe (alle Aliase) vs. belegter Platz (Objekte)."""
+        aliases = self.aliases()
+        objects = set(aliases.values())
+        return {
+            "aliases": len(aliases),
+            "objects": len(objects),
+            "logical_bytes": sum(self.object_path(s).stat().st_size for s in aliases.values()),
+            "stored_bytes": sum(self.object_path(s).stat().st_size for s in objects),
+        }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Content-adressierter Replay-Speicher")
+    parser.add_argument("--root", default=str(DEFAULT_REPLAY_DIR), help="Replay-Verzeichnis")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("adopt", help="Vorhandene Replays übernehmen (Duplikate → Hardlinks)")
+    subparsers.add_parser("ls", help="Aliase und Objekte auflisten")
+    p_rm = subparsers.add_parser("rm", help="Alias entfernen")
+    p_rm.add_argument("names", nargs="+")
+    p_gc = subparsers.add_parser("gc", help="Unreferenzierte Objekte löschen")
+    p_gc.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    store = ReplayStore(args.root)
+    if args.command == "adopt":
+        result = store.adopt()
+        catalog = ReplayCatalog(store.root)
+        catalog.update()
+        catalog.save()
+        print(f"[+] Übernommen: {result['adopted']} | bereits verlinkt: {result['unchanged']}")
+    elif args.command == "ls":
+        for name, sha256 in sorted(store.aliases().items()):
+            print(f"{sha256[:12]}  {name}")
+    elif args.command == "rm":
+        for name in args.names:
+            store.remove(name)
+            print(f"[+] Entfernt: {name}")
+    elif args.command == "gc":
+        result = store.gc(dry_run=args.dry_run)
+        prefix = "[*] (dry-run) " if args.dry_run else "[+] "
+        print(f"{prefix}Referenzen entfernt: {result['refs_removed']} | Objekte gelöscht: "
+              f"{result['objects_removed']} ({result['bytes_freed'] / 1024:.0f} KB)")
+
+    if args.command in ("adopt", "ls", "gc"):
+        info = store.stats()
+        print(f"[*] {info['aliases']} Aliase → {info['objects']} Objekte | "
+              f"{info['logical_bytes'] / 1e6:.1f} MB logisch, {info['stored_bytes'] / 1e6:.1f} MB belegt")
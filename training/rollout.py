@@ -0,0 +1,129 @@
+"""
+Gebatchte Episoden-Rollouts für Replay- und Evaluations-Skripte.
+
+Statt model.predict() einmal pro Agent und Schritt aufzurufen, werden alle Agenten
+aller gleichzeitig laufenden Episoden zu einem Batch gestapelt und mit einem
+einzigen predict()-Aufruf pro Schritt ausgewertet.
+
+Zufall steckt in environment.py nur im reset() (globaler NumPy-RNG). Da alle
+Episoden nacheinander mit ihrem Seed zurückgesetzt werden, liefert ein Seed
+dieselbe Episode wie ein einzelner Rollout.
+"""
+
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+from environment import CaptureTheFlagEnv
+
+
+def policy_groups(model, red_model, agents: Sequence[str]) -> List[tuple]:
+    """(Modell, Agent-Spalten) pro Policy - ein predict()-Batch je Modell und Schritt."""
+    if red_model is None or red_model is model:
+        return [(model, list(range(len(agents))))]
+    return [
+        (model, [j for j, agent in enumerate(agents) if not agent.startswith("red")]),
+        (red_model, [j for j, agent in enumerate(agents) if agent.startswith("red")]),
+    ]
+
+
+def predict_actions(groups: List[tuple], observations: Sequence[dict], agents: Sequence[str],
+                    deterministic: bool = True) -> np.ndarray:
+    """
+    Aktionen aller Agenten mehrerer Episoden mit einem predict() pro Modell.
+
+    Returns:
+        Aktionen als (len(observations) * len(agents),), Agent j von Episode k an k * n_agents + j
+    """
+    n_agents = len(agents)
+    actions = np.empty(len(observations) * n_agents, dtype=np.int64)
+    for group_model, columns in groups:
+        batch = np.stack([obs[agents[j]] for obs in observations for j in columns])
+        group_actions, _ = group_model.predict(batch, deterministic=deterministic)
+        slots = [k * n_agents + j for k in range(len(observations)) for j in columns]
+        actions[slots] = group_actions
+    return actions
+
+
+def rollout_episodes(model, n_episodes: int = 1, seeds: Optional[Sequence[Optional[int]]] = None,
+                     env_kwargs: Optional[dict] = None, deterministic: bool = True,
+                     red_model=None, envs: Optional[Sequence[CaptureTheFlagEnv]] = None) -> List[dict]:
+    """
+    Spielt n_episodes Episoden parallel und gibt deren Replay-Daten zurück.
+
+    Args:
+        model: Objekt mit predict(obs_batch, deterministic) (z.B. PPO) oder None für Zufallsaktionen
+        n_episodes: Anzahl Episoden
+        seeds: Seed pro Episode (Default: None = ungeseedet)
+        env_kwargs: Argumente für CaptureTheFlagEnv (z.B. reward_profile)
+        deterministic: Deterministische Aktionen (argmax) statt Sampling
+        red_model: Eigenes Modell für das rote Team (Default: model steuert beide Teams);
+            dann gibt es pro Schritt einen Batch pro Team
+        envs: Vorhandene Umgebungen (mindestens n_episodes, werden zurückgesetzt und
+            wiederverwendet, z.B. aus einem Worker-Pool); Default: neu erzeugen
+
+    Returns:
+        Liste von Replay-Dictionaries (Format von env.get_replay_data()), Reihenfolge wie seeds;
+        metadata["agent_returns"] enthält den Episoden-Reward pro Agent
+    """
+    seeds = list(seeds) if seeds is not None else [None] * n_episodes
+    if len(seeds) != n_episodes:
+        raise ValueError(f"Got {len(seeds)} seeds for {n_episodes} episodes")
+
+    if envs is None:
+        envs = [CaptureTheFlagEnv(**(env_kwargs or {})) for _ in range(n_episodes)]
+    envs = list(envs)[:n_episodes]
+    observations = [env.reset(seed=seed)[0] for env, seed in zip(envs, seeds)]
+    agents = envs[0].possible_agents if envs else []
+    n_agents = len(agents)
+
+    groups = policy_groups(model, red_model, agents)
+
+    replays = [None] * n_episodes
+    returns = [dict.fromkeys(agents, 0.0) for _ in range(n_episodes)]
+    active = list(range(n_episodes))
+
+    while active:
+        if model is not None:
+            # Ein Batch pro Modell: (aktive Episoden × Agenten des Modells, obs_dim)
+            actions = predict_actions(groups, [observations[i] for i in active], agents, deterministic)
+        else:
+            actions = [envs[i].action_space(agent).sample() for i in active for agent in agents]
+
+        still_active = []
+        for k, i in enumerate(active):
+            act_dict = {agent: int(actions[k * n_agents + j]) for j, agent in enumerate(agents)}
+            observations[i], rewards, terms, truncs, _ = envs[i].step(act_dict)
+            for agent, reward in rewards.items():
+                returns[i][agent] += float(reward)
+
+            if all(terms[agent] or truncs[agent] for agent in agents):
+                replays[i] = envs[i].get_replay_data()
+                replays[i]["metadata"]["agent_returns"] = returns[i]
+            else:
+                still_active.append(i)
+        active = still_active
+
+    return replays
+
+
+class RecordingPolicy:
+    """Reicht predict() an model durch und merkt sich jeden Beobachtungs-Batch."""
+
+    def __init__(self, model):
+        self.model = model
+        self.batches = []
+
+    def predict(self, observation, state=None, episode_start=None, deterministic: bool = False):
+        self.batches.append(np.array(observation, dtype=np.float32))
+        return self.model.predict(observation, deterministic=deterministic)
+
+
+def collect_states(model, n_episodes: int, base_seed: int = 0, reward_profile: str = "balanced",
+                   deterministic: bool = False) -> np.ndarray:
+    """Beobachtungen aller Agenten aus n_episodes gebatchten Episoden von model (N, obs_dim)."""
+    recorder = RecordingPolicy(model)
+    seeds = [base_seed + i for i in range(n_episodes)]
+    rollout_episodes(recorder, n_episodes, seeds=seeds, env_kwargs={"reward_profile": reward_profile},
+                     deterministic=deterministic)
+    return np.concatenate(recorder.batches)
@@ -0,0 +1,215 @@
+"""
+Fortsetzbare Trainingsläufe (für unterbrechbare/preemptible Maschinen).
+
+Ein Run-Verzeichnis (runs/<run_name>/) enthält:
+    run.json           # Argumente von train() - reicht, um den Lauf neu aufzusetzen
+    resume_state.pkl   # Letzter konsistenter Snapshot (atomar ersetzt)
+
+Der Snapshot umfasst alles, was für eine bitgleiche Fortsetzung nötig ist:
+- Modell inkl. Optimizer-Momenten, num_timesteps, _last_obs, ep_info_buffer
+- RNG-Zustände (random, NumPy, torch) des Learners
+- Simulationszustand aller Env-Worker (Spiele + deren NumPy-RNG) und VecMonitor-Zähler
+- Zustand der Callbacks (get_resume_state/set_resume_state, dazu n_calls)
+
+Snapshots entstehen nur an Rollout-Grenzen (vor dem Sammeln bzw. am Trainingsende);
+dort sind Rollout-Buffer und Env-Zustand konsistent.
+"""
+
+import io
+import json
+import os
+import pickle
+import random
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+import torch
+from stable_baselines3 import PPO
+from stable_baselines3.common.callbacks import BaseCallback
+
+from checkpointing import snapshot_model, write_zip
+from metrics_stream import write_json_atomic
+
+BASE_DIR = Path(__file__).resolve().parent
+DEFAULT_RUN_ROOT = BASE_DIR / "runs"
+RUN_CONFIG_FILE = "run.json"
+STATE_FILE = "resume_state.pkl"
+
+
+# ========== RUN-KONFIGURATION ==========
+
+def write_run_config(run_dir: str | Path, settings: dict) -> None:
+    """Speichert die train()-Argumente eines Laufs."""
+    write_json_atomic(Path(run_dir) / RUN_CONFIG_FILE, settings, indent=2)
+
+
+def load_run_config(run_dir: str | Path) -> dict:
+    path = Path(run_dir) / RUN_CONFIG_FILE
+    if not path.exists():
+        raise FileNotFoundError(f"No {RUN_CONFIG_FILE} in run directory: {run_dir}")
+    with path.open() as f:
+        return json.load(f)
+
+
+# ========== RNG & ENV ==========
+
+def capture_rng_state() -> dict:
+    return {
+        "python": random.getstate(),
+        "numpy": np.random.get_state(),
+        "torch": torch.get_rng_state(),
+    }
+
+
+def restore_rng_state(state: dict) -> None:
+    random.setstate(state["python"])
+    np.random.set_state(state["numpy"])
+    torch.set_rng_state(state["torch"])
+
+
+def capture_vec_env_state(vec_env) -> dict:
+    """VecMonitor-Zähler + Worker-Zustände (LeanVecEnv) + Gegner-Pool (SelfPlayVecEnv)."""
+    state = {
+        "episode_returns": vec_env.episode_returns.copy(),
+        "episode_lengths": vec_env.episode_lengths.copy(),
+        "episode_count": vec_env.episode_count,
+    }
+    inner = vec_env.unwrapped
+    if hasattr(inner, "get_worker_states"):
+        state["workers"] = inner.get_worker_states()
+    if hasattr(vec_env.venv, "get_resume_state"):
+        state["self_play"] = vec_env.venv.get_resume_state()
+    return state
+
+
+def restore_vec_env_state(vec_env, state: dict, policy=None) -> None:
+    vec_env.episode_returns[:] = state["episode_returns"]
+    vec_env.episode_lengths[:] = state["episode_lengths"]
+    vec_env.episode_count = state["episode_count"]
+    if "workers" in state:
+        vec_env.unwrapped.set_worker_states(state["workers"])
+    if "self_play" in state:
+        vec_env.venv.set_resume_state(state["self_play"], policy)
+
+
+# ========== SNAPSHOT ==========
+
+def capture_resume_state(model, callbacks: List[BaseCallback]) -> dict:
+    """Konsistenter Snapshot des Learners (nur an Rollout-Grenzen aufrufen)."""
+    return {
+        "num_timesteps": model.num_timesteps,
+        "model": snapshot_model(model),
+        "rng": capture_rng_state(),
+        "vec_env": capture_vec_env_state(model.get_env()),
+        "callbacks": [
+            {
+                "n_calls": cb.n_calls,
+                "state": cb.get_resume_state() if hasattr(cb, "get_resume_state") else None,
+            }
+            for cb in callbacks
+        ],
+    }
+
+
+def write_resume_state(run_dir: str | Path, state: dict) -> None:
+    """Schreibt den Snapshot atomar (Modell als SB3-Zip eingebettet)."""
+    buffer = io.BytesIO()
+    write_zip(buffer, state["model"])
+    payload = {**state, "model": buffer.getvalue()}
+
+    path = Path(run_dir) / STATE_FILE
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    with tmp_path.open("wb") as f:
+        pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def load_resume_state(run_dir: str | Path) -> Optional[dict]:
+    path = Path(run_dir) / STATE_FILE
+    if not path.exists():
+        return None
+    with path.open("rb") as f:
+        return pickle.load(f)
+
+
+def restore_model(state: dict, env, **kwargs) -> PPO:
+    """Lädt das Modell aus einem Snapshot, ohne das Env zurückzusetzen (_last_obs bleibt gültig)."""
+    return PPO.load(io.BytesIO(state["model"]), env=env, force_reset=False, **kwargs)
+
+
+def restore_training_state(state: dict, model, callbacks: List[BaseCallback]) -> None:
+    """
+    Stellt Env, Callbacks und RNG wieder her. Direkt vor model.learn() aufrufen -
+    danach darf nichts mehr Zufallszahlen ziehen.
+    """
+    restore_vec_env_state(model.get_env(), state["vec_env"], model.policy)
+    if len(state["callbacks"]) != len(callbacks):
+        raise ValueError("Callback list differs from the snapshot")
+    for cb, cb_state in zip(callbacks, state["callbacks"]):
+        cb.n_calls = cb_state["n_calls"]
+        if cb_state["state"] is not None and hasattr(cb, "set_resume_state"):
+            cb.set_resume_state(cb_state["state"])
+    restore_rng_state(state["rng"])
+
+
+class ResumeStateCallback(BaseCallback):
+    """
+    Schreibt periodisch Resume-Snapshots ins Run-Verzeichnis.
+
+    Der Snapshot wird im Hauptthread erfasst (zu Rollout-Beginn, sobald save_freq
+    Timesteps seit dem letzten vergangen sind, und am Trainingsende), das
+    Schreiben läuft im Hintergrund.
+
+    Args:
+        run_dir: Run-Verzeichnis
+        save_freq: Mindestabstand zwischen Snapshots in Timesteps
+        callbacks: Die übrigen Callbacks, deren Zustand mitgesichert wird
+    """
+
+    def __init__(self, run_dir: str | Path, save_freq: int, callbacks: List[BaseCallback], verbose: int = 1):
+        super().__init__(verbose)
+        self.run_dir = Path(run_dir)
+        self.save_freq = save_freq
+        self.callbacks = callbacks
+        self._last_snapshot = None
+        self._writer = None
+
+    def _on_training_start(self) -> None:
+        self.run_dir.mkdir(parents=True, exist_ok=True)
+        self._last_snapshot = self.num_timesteps
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="resume-writer")
+
+    def _on_rollout_start(self) -> None:
+        if self.num_timesteps - self._last_snapshot >= self.save_freq:
+            self.snapshot()
+
+    def _on_step(self) -> bool:
+        return True
+
+    def snapshot(self) -> None:
+        state = capture_resume_state(self.model, self.callbacks)
+        self._last_snapshot = self.num_timesteps
+        self._writer.submit(self._write, state)
+
+    def _write(self, state: dict) -> None:
+        try:
+            write_resume_state(self.run_dir, state)
+            if self.verbose > 0:
+                print(f"\n⏸️  Resume-Snapshot bei {state['num_timesteps']:,} Steps: {self.run_dir / STATE_FILE}")
+        except Exception as e:
+            print(f"\n⚠️ Resume-Snapshot fehlgeschlagen: {e}")
+
+    def flush(self) -> None:
+        if self._writer is not None:
+            self._writer.shutdown(wait=True)
+            self._writer = None
+
+    def _on_training_end(self) -> None:
+        # Nach dem letzten Update ist der Zustand konsistent → immer sichern
+        if self.num_timesteps != self._last_snapshot:
+            self.snapshot()
+        self.flush()
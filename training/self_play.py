@@ -0,0 +1,246 @@
+"""
+Self-Play gegen einen Pool eingefrorener Checkpoints.
+
+Statt dass die lernende Policy beide Teams steuert, spielt Rot gegen Blau mit
+einer pro Episode gezogenen früheren Version:
+
+- OpponentPool: eingefrorene Policies (aus Checkpoint-Dateien oder In-Memory-Snapshots
+  des Learners). Gewichte liegen einmal im Trainingsprozess, ohne Gradienten, und
+  werden von allen Spielen gemeinsam (read-only) benutzt.
+- SelfPlayVecEnv: VecEnv-Wrapper um LeanVecEnv. Nach außen existieren nur die
+  blauen Slots - der Learner sieht ausschließlich Blau-Transitions. Rote Aktionen
+  werden pro Schritt mit EINEM predict()-Batch pro Gegner-Version berechnet
+  (alle Spiele mit derselben Version zusammen, nicht pro Env).
+- SelfPlayCallback: legt alle snapshot_freq Steps einen Snapshot des Learners im Pool ab.
+
+Hinweis: num_timesteps zählt nur noch Blau-Transitions (halb so viele pro Env-Schritt).
+"""
+
+from pathlib import Path
+from typing import Any, List, Optional
+
+import numpy as np
+from stable_baselines3.common.callbacks import BaseCallback
+from stable_baselines3.common.vec_env.base_vec_env import VecEnv, VecEnvIndices, VecEnvWrapper
+
+from config import SELF_PLAY_CONFIG
+
+
+def freeze_policy(policy, state_dict: Optional[dict] = None):
+    """Unabhängige, eingefrorene CPU-Kopie einer SB3-Policy (optional mit anderen Gewichten)."""
+    frozen = type(policy)(**policy._get_constructor_parameters())
+    frozen.load_state_dict(state_dict if state_dict is not None else policy.state_dict())
+    frozen.to("cpu")
+    frozen.set_training_mode(False)
+    for param in frozen.parameters():
+        param.requires_grad_(False)
+    return frozen
+
+
+class OpponentPool:
+    """
+    Pool eingefrorener Gegner-Policies.
+
+    Args:
+        paths: Checkpoint-Dateien (Voll oder Delta), die von Anfang an im Pool sind
+        max_size: Maximale Anzahl Learner-Snapshots (älteste fliegen zuerst raus).
+            Datei-Gegner zählen nicht mit und bleiben immer erhalten - sonst würde bei
+            vielen Dateien jeder neue Snapshot sofort wieder verdrängt
+        deterministic: Gegner-Aktionen per argmax statt Sampling
+    """
+
+    def __init__(self, paths: Optional[List[str]] = None, max_size: int = 8, deterministic: bool = False):
+        self.max_size = max(1, max_size)
+        self.deterministic = deterministic
+        self.policies = {}    # Name → eingefrorene Policy
+        self.snapshots = {}   # Name → state_dict (nur Learner-Snapshots, für Resume)
+        self.paths = {}       # Name → Datei (nur Datei-Gegner)
+        for path in paths or []:
+            self.add_file(path)
+
+    @property
+    def names(self) -> List[str]:
+        return list(self.policies)
+
+    def __len__(self) -> int:
+        return len(self.policies)
+
+    def add_file(self, path: str | Path) -> str:
+        from checkpointing import load_checkpoint
+
+        name = Path(path).name
+        model = load_checkpoint(path, device="cpu")
+        self.policies[name] = freeze_policy(model.policy)
+        self.paths[name] = str(path)
+        return name
+
+    def add_snapshot(self, policy, name: str, state_dict: Optional[dict] = None) -> str:
+        """Friert die aktuellen Gewichte von policy als neue Version ein."""
+        frozen = freeze_policy(policy, state_dict)
+        self.policies[name] = frozen
+        self.snapshots[name] = {k: v.clone() for k, v in frozen.state_dict().items()}
+
+        while len(self.snapshots) > self.max_size:
+            oldest = next(iter(self.snapshots))
+            del self.snapshots[oldest], self.policies[oldest]
+        return name
+
+    def sample(self, rng: np.random.Generator) -> str:
+        return self.names[rng.integers(len(self.policies))]
+
+    def predict(self, name: str, obs: np.ndarray) -> np.ndarray:
+        actions, _ = self.policies[name].predict(obs, deterministic=self.deterministic)
+        return actions
+
+    def get_state(self) -> dict:
+        return {"paths": dict(self.paths), "snapshots": dict(self.snapshots)}
+
+    def set_state(self, state: dict, template_policy) -> None:
+        """Stellt get_state() wieder her; template_policy liefert die Architektur der Snapshots."""
+        self.policies, self.snapshots, self.paths = {}, {}, {}
+        for path in state["paths"].values():
+            self.add_file(path)
+        for name, state_dict in state["snapshots"].items():
+            self.add_snapshot(template_policy, name, state_dict)
+
+
+class SelfPlayVecEnv(VecEnvWrapper):
+    """
+    Zeigt dem Learner nur die blauen Slots von venv; Rot spielt der OpponentPool.
+
+    Args:
+        venv: VecEnv mit einem Slot pro Agent (LeanVecEnv, Spiel-major)
+        pool: Gegner-Pool (muss vor dem ersten reset() mindestens eine Version haben)
+        seed: Seed für die Gegner-Auswahl pro Episode
+    """
+
+    def __init__(self, venv: VecEnv, pool: OpponentPool, seed: Optional[int] = None):
+        self.venv = venv
+        self.pool = pool
+        self.rng = np.random.default_rng(seed)
+
+        agents = venv.agents
+        self.n_agents = len(agents)
+        self.n_games = venv.num_envs // self.n_agents
+        self.blue_columns = [j for j, agent in enumerate(agents) if not agent.startswith("red")]
+        self.red_columns = [j for j, agent in enumerate(agents) if agent.startswith("red")]
+
+        # Slot-Indizes im inneren VecEnv (Spiel-major)
+        self.blue_slots = np.array([g * self.n_agents + j for g in range(self.n_games) for j in self.blue_columns])
+        self.red_slots = np.array([g * self.n_agents + j for g in range(self.n_games) for j in self.red_columns])
+
+        self.opponents: List[Optional[str]] = [None] * self.n_games
+        self.red_obs = None
+
+        VecEnv.__init__(self, self.n_games * len(self.blue_columns), venv.observation_space, venv.action_space)
+        self.class_attributes = {}
+
+    def _split(self, obs: np.ndarray) -> np.ndarray:
+        """Merkt sich die roten Beobachtungen (Spiele × Rot × obs) und gibt die blauen zurück."""
+        self.red_obs = obs[self.red_slots].reshape(self.n_games, len(self.red_columns), -1)
+        return obs[self.blue_slots]
+
+    def _inner_indices(self, indices: VecEnvIndices) -> List[int]:
+        """Blaue Slot-Indizes (Learner-Sicht) → Slot-Indizes in venv."""
+        return [int(self.blue_slots[i]) for i in self._get_indices(indices)]
+
+    def reset(self) -> np.ndarray:
+        if not len(self.pool):
+            raise RuntimeError("Opponent pool is empty")
+        self.opponents = [self.pool.sample(self.rng) for _ in range(self.n_games)]
+        return self._split(self.venv.reset())
+
+    def step_async(self, actions: np.ndarray) -> None:
+        full = np.empty(self.venv.num_envs, dtype=np.int64)
+        full[self.blue_slots] = actions
+
+        # Ein Forward-Pass pro Gegner-Version über alle Spiele, die gegen sie spielen
+        red_actions = np.empty((self.n_games, len(self.red_columns)), dtype=np.int64)
+        by_version = {}
+        for game, name in enumerate(self.opponents):
+            if name not in self.pool.policies:  # Version wurde aus dem Pool verdrängt
+                name = self.opponents[game] = self.pool.sample(self.rng)
+            by_version.setdefault(name, []).append(game)
+        for name, games in by_version.items():
+            batch = self.red_obs[games].reshape(len(games) * len(self.red_columns), -1)
+            red_actions[games] = self.pool.predict(name, batch).reshape(len(games), -1)
+
+        full[self.red_slots] = red_actions.reshape(-1)
+        self.venv.step_async(full)
+
+    def step_wait(self):
+        obs, rewards, dones, infos = self.venv.step_wait()
+        blue_obs = self._split(obs)
+        blue_infos = [infos[i] for i in self.blue_slots]
+
+        # Nach Episodenende neuen Gegner ziehen (Auto-Reset im Worker ist schon passiert)
+        for game in range(self.n_games):
+            if dones[game * self.n_agents]:
+                for k in range(len(self.blue_columns)):
+                    blue_infos[game * len(self.blue_columns) + k]["opponent"] = self.opponents[game]
+                self.opponents[game] = self.pool.sample(self.rng)
+
+        return blue_obs, rewards[self.blue_slots], dones[self.blue_slots], blue_infos
+
+    def seed(self, seed: Optional[int] = None):
+        if seed is not None:
+            self.rng = np.random.default_rng(seed)
+        return self.venv.seed(seed)
+
+    def get_attr(self, attr_name: str, indices: VecEnvIndices = None) -> List[Any]:
+        return self.venv.get_attr(attr_name, indices=self._inner_indices(indices))
+
+    def set_attr(self, attr_name: str, value: Any, indices: VecEnvIndices = None) -> None:
+        self.venv.set_attr(attr_name, value, indices=self._inner_indices(indices))
+
+    def env_method(self, method_name: str, *method_args, indices: VecEnvIndices = None, **method_kwargs) -> List[Any]:
+        return self.venv.env_method(method_name, *method_args, indices=self._inner_indices(indices), **method_kwargs)
+
+    def env_is_wrapped(self, wrapper_class, indices: VecEnvIndices = None) -> List[bool]:
+        return self.venv.env_is_wrapped(wrapper_class, indices=self._inner_indices(indices))
+
+    # ========== RESUME ==========
+
+    def get_resume_state(self) -> dict:
+        return {
+            "pool": self.pool.get_state(),
+            "opponents": list(self.opponents),
+            "red_obs": None if self.red_obs is None else self.red_obs.copy(),
+            "rng": self.rng.bit_generator.state,
+        }
+
+    def set_resume_state(self, state: dict, template_policy) -> None:
+        self.pool.set_state(state["pool"], template_policy)
+        self.opponents = list(state["opponents"])
+        self.red_obs = state["red_obs"]
+        self.rng.bit_generator.state = state["rng"]
+
+
+class SelfPlayCallback(BaseCallback):
+    """Legt alle snapshot_freq Steps die aktuellen Learner-Gewichte im Gegner-Pool ab."""
+
+    def __init__(self, pool: OpponentPool, snapshot_freq: int = SELF_PLAY_CONFIG["snapshot_freq"], verbose: int = 1):
+        super().__init__(verbose)
+        self.pool = pool
+        self.snapshot_freq = snapshot_freq
+        self.last_snapshot = 0
+
+    def _snapshot(self) -> None:
+        name = self.pool.add_snapshot(self.model.policy, f"learner_{self.num_timesteps}")
+        self.last_snapshot = self.num_timesteps
+        if self.verbose > 0:
+            print(f"\n🎭 Gegner-Pool: {name} hinzugefügt ({len(self.pool)} Versionen)")
+
+    def _on_step(self) -> bool:
+        return True
+
+    def _on_rollout_end(self) -> None:
+        # An Rollout-Grenzen, damit jeder Rollout gegen einen festen Pool gesammelt wird
+        if self.num_timesteps - self.last_snapshot >= self.snapshot_freq:
+            self._snapshot()
+
+    def get_resume_state(self) -> dict:
+        return {"last_snapshot": self.last_snapshot}
+
+    def set_resume_state(self, state: dict) -> None:
+        self.last_snapshot = state["last_snapshot"]
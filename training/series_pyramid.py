@@ -0,0 +1,328 @@
+"""
+Mehrstufige Auflösungs-Pyramiden der Metrik-Serien für die Dashboards.
+
+Jede Serie (TensorBoard-Tag oder Feld des MetricsCallback-Streams) wird in Ebenen
+mit je LEVEL_FACTOR-mal weniger Punkten abgelegt:
+
+    Ebene 0: Rohdaten
+    Ebene k: LTTB (Largest-Triangle-Three-Buckets) auf ceil(n / LEVEL_FACTOR**k) Punkte,
+             dazu Minimum/Maximum jedes Buckets (Ausreißer bleiben als Band sichtbar)
+
+bis eine Ebene in eine einzige Kachel passt. Jede Ebene ist in Kacheln zu
+TILE_POINTS Punkten mit bekanntem Schritt-Bereich geteilt. Ein Viewer wählt für den
+sichtbaren Bereich die gröbste Ebene, die noch genug Punkte für die Breite des Charts
+hat, und lädt nur deren überlappende Kacheln - die Datenmenge pro Ansicht bleibt
+damit unabhängig von der Länge des Trainings.
+
+Aufbau des Ausgabeverzeichnisses (z.B. dashboard/data/series):
+    index.json                        # Runs → Serien → Ebenen → Kacheln (x0, x1, n, file)
+    <run>/<serie>/L<k>_<i>.json       # {"x": [...], "y": [...], "ymin": [...], "ymax": [...]}
+
+Quellen:
+    - TensorBoard-Stores (tb_ingest.py): alle Scalar-Tags, z.B. "rollout/ep_rew_mean"
+    - Metrik-Streams (metrics_stream.py): "mean_reward", ..., "performance/env_steps_per_s"
+
+Runs, deren Quellen sich seit dem letzten Export nicht geändert haben, werden übersprungen.
+
+Nutzung:
+    python series_pyramid.py                  # Stores in ./logs_store + Streams in ../dashboard/data
+"""
+
+import argparse
+import json
+import math
+import shutil
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from metrics_stream import MetricsStreamReader, list_segments, write_json_atomic
+
+PYRAMID_VERSION = 1
+TILE_POINTS = 2048     # Punkte pro Kachel (= Punkte der gröbsten Ebene)
+LEVEL_FACTOR = 4       # Punkte-Verhältnis benachbarter Ebenen
+STREAM_FIELDS = ("mean_reward", "std_reward", "mean_length", "episodes")
+
+Series = Tuple[np.ndarray, np.ndarray]
+
+
+# ========== DOWNSAMPLING ==========
+
+def _bucket_starts(n: int, n_out: int) -> np.ndarray:
+    """Startindizes von n_out Buckets: erster Punkt, n_out-2 gleich große innere Buckets, letzter Punkt."""
+    inner = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    return np.concatenate([[0], inner[:-1], [n - 1]])
+
+
+def lttb(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Indizes der per LTTB ausgewählten Punkte (inkl. erstem und letztem).
+
+    Pro Bucket wird der Punkt gewählt, der mit dem zuvor gewählten Punkt und dem
+    Mittelwert des nächsten Buckets das größte Dreieck bildet.
+    """
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    starts = _bucket_starts(n, n_out)
+    ends = np.append(starts[1:], n)
+    counts = ends - starts
+    mean_x = np.add.reduceat(x.astype(np.float64), starts) / counts
+    mean_y = np.add.reduceat(y.astype(np.float64), starts) / counts
+
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for i in range(1, n_out - 1):
+        lo, hi = starts[i], ends[i]
+        ax, ay = x[a], y[a]
+        area = np.abs((ax - mean_x[i + 1]) * (y[lo:hi] - ay) - (ax - x[lo:hi]) * (mean_y[i + 1] - ay))
+        a = lo + int(area.argmax())
+        selected[i] = a
+    return selected
+
+
+def downsample(x: np.ndarray, y: np.ndarray, n_out: int) -> Dict[str, np.ndarray]:
+    """LTTB-Punkte plus Minimum/Maximum derselben Buckets."""
+    if n_out >= len(x) or n_out < 3:
+        return {"x": x, "y": y, "ymin": y, "ymax": y}
+    starts = _bucket_starts(len(x), n_out)
+    selected = lttb(x, y, n_out)
+    return {
+        "x": x[selected],
+        "y": y[selected],
+        "ymin": np.minimum.reduceat(y, starts),
+        "ymax": np.maximum.reduceat(y, starts),
+    }
+
+
+def level_sizes(n: int, tile_points: int = TILE_POINTS, factor: int = LEVEL_FACTOR) -> List[int]:
+    """Punkte pro Ebene: n, n/factor, ... bis eine Ebene in eine Kachel passt."""
+    sizes = [n]
+    while sizes[-1] > tile_points:
+        sizes.append(max(3, math.ceil(n / factor ** len(sizes))))
+    return sizes
+
+
+def sorted_unique_last(x: np.ndarray, y: np.ndarray) -> Series:
+    """Nach x sortiert, nur endliche Werte; bei doppeltem x gilt der zuletzt geschriebene Wert."""
+    x, y = np.asarray(x, dtype=np.int64), np.asarray(y, dtype=np.float64)
+    finite = np.isfinite(y)
+    x, y = x[finite], y[finite]
+    unique_x, index = np.unique(x[::-1], return_index=True)
+    return unique_x, y[::-1][index]
+
+
+# ========== QUELLEN ==========
+
+def series_from_tensorboard(store_path: str | Path) -> Dict[str, Series]:
+    """Alle Scalar-Tags eines Run-Stores (tb_ingest.py)."""
+    from tb_ingest import load_store, scalar_series
+
+    columns, _ = load_store(store_path)
+    return {tag: sorted_unique_last(*scalar_series(columns, tag)) for tag in columns}
+
+
+def series_from_stream(stream_dir: str | Path) -> Dict[str, Series]:
+    """Metrik- und Performance-Records eines MetricsCallback-Streams."""
+    raw: Dict[str, Tuple[list, list]] = {}
+    for record in MetricsStreamReader(stream_dir).iter_all():
+        kind = record.get("type", "metrics")
+        if kind == "metrics":
+            fields = {f: record.get(f) for f in STREAM_FIELDS}
+        elif kind == "performance":
+            fields = {f"performance/{k}": v for k, v in record.items()
+                      if isinstance(v, (int, float)) and not isinstance(v, bool) and k != "timesteps"}
+        else:
+            continue
+        for name, value in fields.items():
+            if value is not None and "timesteps" in record:
+                xs, ys = raw.setdefault(name, ([], []))
+                xs.append(record["timesteps"])
+                ys.append(value)
+    return {name: sorted_unique_last(xs, ys) for name, (xs, ys) in raw.items()}
+
+
+def discover_sources(tb_store: Optional[str | Path], streams_dir: Optional[str | Path]) -> Dict[str, List[tuple]]:
+    """{run: [(kind, path), ...]} aus TensorBoard-Stores und Metrik-Stream-Verzeichnissen."""
+    sources: Dict[str, List[tuple]] = {}
+    if tb_store and Path(tb_store).exists():
+        for path in sorted(Path(tb_store).glob("*.npz")):
+            sources.setdefault(path.stem, []).append(("tensorboard", path))
+    if streams_dir and Path(streams_dir).exists():
+        for path in sorted(p for p in Path(streams_dir).iterdir() if p.is_dir()):
+            if list_segments(path):
+                sources.setdefault(path.name, []).append(("stream", path))
+    return sources
+
+
+def source_signature(sources: List[tuple]) -> str:
+    """Ändert sich, sobald eine Quelle des Runs neue Daten hat (Größe/mtime der Dateien)."""
+    parts = []
+    for kind, path in sources:
+        files = [path] if kind == "tensorboard" else [p for _, p, _ in list_segments(path)]
+        for file in files:
+            stat = file.stat()
+            parts.append(f"{file.name}:{stat.st_size}:{stat.st_mtime_ns}")
+    return "|".join(parts)
+
+
+# ========== EXPORT ==========
+
+def _slug(name: str) -> str:
+    return name.replace("/", "__")
+
+
+def _json_array(values: np.ndarray, integer: bool = False) -> str:
+    # float32-Darstellung: kürzeste Dezimalzahl statt 17 Stellen → deutlich kleinere Kacheln
+    values = values.astype(np.int64) if integer else values.astype(np.float32)
+    return "[" + ",".join(values.astype(str)) + "]"
+
+
+def write_series(series_dir: Path, file_prefix: str, x: np.ndarray, y: np.ndarray,
+                 tile_points: int = TILE_POINTS, factor: int = LEVEL_FACTOR) -> dict:
+    """
+    Schreibt alle Ebenen einer Serie als Kacheln und gibt ihren Index-Eintrag zurück.
+
+    file_prefix: Pfad der Kacheln relativ zum Ausgabeverzeichnis (steht im Index)
+    """
+    series_dir.mkdir(parents=True, exist_ok=True)
+    levels = []
+    for level, size in enumerate(level_sizes(len(x), tile_points, factor)):
+        data = downsample(x, y, size) if level else {"x": x, "y": y}
+        tiles = []
+        for i, start in enumerate(range(0, len(data["x"]), tile_points)):
+            chunk = {key: values[start:start + tile_points] for key, values in data.items()}
+            file = f"L{level}_{i}.json"
+            body = ",".join(f'"{key}":{_json_array(values, integer=key == "x")}' for key, values in chunk.items())
+            (series_dir / file).write_text("{" + body + "}", encoding="utf-8")
+            tiles.append({"file": f"{file_prefix}/{file}",
+                          "x0": int(chunk["x"][0]), "x1": int(chunk["x"][-1]), "n": len(chunk["x"])})
+        levels.append({"level": level, "points": len(data["x"]), "tiles": tiles})
+
+    return {
+        "n": len(x),
+        "x_min": int(x[0]),
+        "x_max": int(x[-1]),
+        "y_min": float(y.min()),
+        "y_max": float(y.max()),
+        "levels": levels,
+    }
+
+
+def export_run(output_dir: str | Path, run: str, sources: List[tuple], tile_points: int = TILE_POINTS,
+               factor: int = LEVEL_FACTOR) -> dict:
+    """Baut die Pyramiden aller Serien eines Runs neu auf (Kacheln in output_dir/<run>)."""
+    series: Dict[str, Series] = {}
+    for kind, path in sources:
+        series.update(series_from_tensorboard(path) if kind == "tensorboard" else series_from_stream(path))
+
+    # Erst vollständig in ein temporäres Verzeichnis, dann austauschen
+    run_dir = Path(output_dir) / run
+    tmp_dir = Path(output_dir) / f".{run}.tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    entries = {}
+    for name, (x, y) in sorted(series.items()):
+        if len(x):
+            entries[name] = write_series(tmp_dir / _slug(name), f"{run}/{_slug(name)}", x, y, tile_points, factor)
+    shutil.rmtree(run_dir, ignore_errors=True)
+    if tmp_dir.exists():
+        tmp_dir.rename(run_dir)
+
+    return {"sources": [kind for kind, _ in sources], "series": entries}
+
+
+def load_index(output_dir: str | Path) -> dict:
+    path = Path(output_dir) / "index.json"
+    if path.exists():
+        with path.open(encoding="utf-8") as f:
+            index = json.load(f)
+        if index.get("version") == PYRAMID_VERSION:
+            return index
+    return {"version": PYRAMID_VERSION, "tile_points": TILE_POINTS, "level_factor": LEVEL_FACTOR, "runs": {}}
+
+
+def export_pyramids(output_dir: str | Path, tb_store: Optional[str | Path] = "./logs_store",
+                    streams_dir: Optional[str | Path] = None, runs: Optional[List[str]] = None,
+                    force: bool = False) -> dict:
+    """
+    Aktualisiert die Pyramiden aller Runs mit geänderten Quellen und schreibt index.json (atomar).
+
+    Returns:
+        Den neuen Index
+    """
+    output_dir = Path(output_dir)
+    index = load_index(output_dir)
+    sources = discover_sources(tb_store, streams_dir)
+    runs = [run for run in (runs or sorted(sources)) if run in sources]
+
+    for run in runs:
+        signature = source_signature(sources[run])
+        if not force and index["runs"].get(run, {}).get("signature") == signature:
+            continue
+        t_start = time.perf_counter()
+        entry = export_run(output_dir, run, sources[run], index["tile_points"], index["level_factor"])
+        index["runs"][run] = {**entry, "signature": signature}
+        n_points = sum(s["n"] for s in entry["series"].values())
+        print(f"[+] {run}: {len(entry['series'])} Serien, {n_points:,} Punkte "
+              f"({'+'.join(entry['sources'])}) in {time.perf_counter() - t_start:.2f}s")
+
+    write_json_atomic(output_dir / "index.json", index, indent=1)
+    return index
+
+
+def pick_level(entry: dict, x0: float, x1: float, max_points: int) -> dict:
+    """Gröbste Ebene, die im Bereich [x0, x1] noch mindestens max_points Punkte hat (sonst Ebene 0)."""
+    span = max(entry["x_max"] - entry["x_min"], 1)
+    fraction = min(max((x1 - x0) / span, 0.0), 1.0)
+    for level in reversed(entry["levels"]):
+        if level["points"] * fraction >= max_points:
+            return level
+    return entry["levels"][0]
+
+
+def load_range(output_dir: str | Path, run: str, name: str, x0: Optional[float] = None,
+               x1: Optional[float] = None, max_points: int = 1000) -> Dict[str, np.ndarray]:
+    """
+    Liest eine Serie im Bereich [x0, x1] in passender Auflösung (wie der Viewer).
+
+    Returns:
+        {"x", "y", "ymin", "ymax", "level"} (ymin/ymax = y auf Ebene 0)
+    """
+    output_dir = Path(output_dir)
+    entry = load_index(output_dir)["runs"][run]["series"][name]
+    x0 = entry["x_min"] if x0 is None else x0
+    x1 = entry["x_max"] if x1 is None else x1
+    level = pick_level(entry, x0, x1, max_points)
+
+    parts = {"x": [], "y": [], "ymin": [], "ymax": []}
+    for tile in level["tiles"]:
+        if tile["x1"] < x0 or tile["x0"] > x1:
+            continue
+        with (output_dir / tile["file"]).open(encoding="utf-8") as f:
+            data = json.load(f)
+        for key in parts:
+            parts[key].extend(data.get(key, data["y"]))
+
+    result = {key: np.asarray(values) for key, values in parts.items()}
+    mask = (result["x"] >= x0) & (result["x"] <= x1)
+    result = {key: values[mask] for key, values in result.items()}
+    result["level"] = level["level"]
+    return result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Multi-Resolution-Pyramiden der Metrik-Serien exportieren")
+    parser.add_argument("--tb-store", default="./logs_store", help="TensorBoard-Stores (tb_ingest.py)")
+    parser.add_argument("--streams", default="../dashboard/data/metrics_stream", help="MetricsCallback-Streams")
+    parser.add_argument("--output", default="../dashboard/data/series")
+    parser.add_argument("--runs", nargs="*", help="Nur diese Runs")
+    parser.add_argument("--force", action="store_true", help="Auch unveränderte Runs neu aufbauen")
+    args = parser.parse_args()
+
+    t_start = time.perf_counter()
+    result = export_pyramids(args.output, args.tb_store, args.streams, args.runs, args.force)
+    print(f"[+] {len(result['runs'])} Runs in {args.output}/index.json ({time.perf_counter() - t_start:.2f}s)")
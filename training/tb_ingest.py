@@ -0,0 +1,294 @@
+"""
+Inkrementelles Einlesen von TensorBoard-Event-Dateien in einen spaltenbasierten Metrik-Store.
+
+Statt bei jedem Aufruf alle Event-Dateien komplett mit EventAccumulator neu zu laden,
+merkt sich der Store pro Event-Datei den Byte-Offset des letzten vollständigen Records.
+Ein erneuter Lauf liest nur die neu angehängten Bytes.
+
+Aufbau:
+    logs/<run>/events.out.tfevents.*   # TensorBoard (SB3 tensorboard_log)
+    <store>/<run>.npz                  # ein Store pro Run
+
+Ein Store (.npz, unkomprimiert - Laden in Millisekunden) enthält:
+    tags                   Namen aller Scalar-Tags
+    t{i}_step              int64   Schritte von tags[i] (in Lese-Reihenfolge)
+    t{i}_value             float32 Werte
+    t{i}_wall_time         float64 Zeitstempel
+    state                  JSON: {Dateiname: {"offset", "size"}} der Event-Dateien
+
+Spalten und Offsets stehen in derselben Datei und werden zusammen atomar ersetzt -
+ein abgebrochener Lauf hinterlässt nie Daten ohne passenden Offset (oder umgekehrt).
+
+Format der Event-Dateien (TFRecord): pro Record
+    uint64 Länge | uint32 CRC(Länge) | Daten (Event-Protobuf) | uint32 CRC(Daten)
+Ein unvollständiger Record am Dateiende (Training schreibt gerade) wird nicht
+gelesen; der Offset bleibt davor stehen.
+
+Nutzung:
+    python tb_ingest.py                       # alle Runs in ./logs
+    python tb_ingest.py --runs X Gordon --workers 2
+"""
+
+import argparse
+import json
+import os
+import struct
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+STORE_VERSION = 1
+EVENT_FILE_PATTERN = "events.out.tfevents.*"
+HEADER_SIZE = 12   # Länge (8) + CRC (4)
+FOOTER_SIZE = 4    # CRC der Daten
+
+
+def store_path_for(store_dir: str | Path, run: str) -> Path:
+    return Path(store_dir) / f"{run}.npz"
+
+
+def list_runs(logs_dir: str | Path) -> List[str]:
+    """Unterverzeichnisse von logs_dir, die Event-Dateien enthalten."""
+    logs_dir = Path(logs_dir)
+    if not logs_dir.exists():
+        return []
+    return sorted(p.name for p in logs_dir.iterdir() if p.is_dir() and any(p.glob(EVENT_FILE_PATTERN)))
+
+
+def event_files(run_dir: str | Path) -> List[Path]:
+    """Event-Dateien eines Runs, sortiert nach Erstellungszeit (im Dateinamen)."""
+    def created(path: Path) -> Tuple[int, str]:
+        parts = path.name.split(".")
+        return (int(parts[3]) if len(parts) > 3 and parts[3].isdigit() else 0, path.name)
+    return sorted(Path(run_dir).glob(EVENT_FILE_PATTERN), key=created)
+
+
+# ========== LESEN ==========
+
+def read_records(path: str | Path, offset: int = 0) -> Tuple[List[bytes], int]:
+    """
+    Liest alle vollständigen Records ab offset.
+
+    Returns:
+        (Records, neuer Offset hinter dem letzten vollständigen Record)
+    """
+    with open(path, "rb") as f:
+        f.seek(offset)
+        data = f.read()
+
+    records, pos = [], 0
+    while pos + HEADER_SIZE <= len(data):
+        (length,) = struct.unpack_from("<Q", data, pos)
+        end = pos + HEADER_SIZE + length + FOOTER_SIZE
+        if end > len(data):
+            break
+        records.append(data[pos + HEADER_SIZE:pos + HEADER_SIZE + length])
+        pos = end
+    return records, offset + pos
+
+
+def _scalar_value(value) -> Optional[float]:
+    """Scalar aus einem Summary.Value (simple_value oder 0-dim Tensor), sonst None."""
+    if value.HasField("simple_value"):
+        return value.simple_value
+    if value.HasField("tensor") and value.metadata.plugin_data.plugin_name == "scalars":
+        from tensorboard.util import tensor_util
+        array = tensor_util.make_ndarray(value.tensor)
+        return float(array) if array.size == 1 else None
+    return None
+
+
+def parse_scalars(records: List[bytes]) -> Dict[str, Tuple[list, list, list]]:
+    """Event-Records → {tag: ([step], [value], [wall_time])}"""
+    from tensorboard.compat.proto.event_pb2 import Event
+
+    scalars = {}
+    for record in records:
+        event = Event.FromString(record)
+        if not event.HasField("summary"):
+            continue
+        for value in event.summary.value:
+            scalar = _scalar_value(value)
+            if scalar is None:
+                continue
+            steps, values, wall_times = scalars.setdefault(value.tag, ([], [], []))
+            steps.append(event.step)
+            values.append(scalar)
+            wall_times.append(event.wall_time)
+    return scalars
+
+
+# ========== STORE ==========
+
+def load_store(path: str | Path) -> Tuple[Dict[str, dict], dict]:
+    """
+    Lädt einen Run-Store.
+
+    Returns:
+        ({tag: {"step", "value", "wall_time"}}, state) - leer, wenn es den Store nicht gibt
+    """
+    path = Path(path)
+    if not path.exists():
+        return {}, {}
+    with np.load(path) as data:
+        if int(data["version"]) != STORE_VERSION:
+            return {}, {}
+        columns = {
+            str(tag): {field: data[f"t{i}_{field}"] for field in ("step", "value", "wall_time")}
+            for i, tag in enumerate(data["tags"])
+        }
+        state = json.loads(str(data["state"]))
+    return columns, state
+
+
+def save_store(path: str | Path, columns: Dict[str, dict], state: dict) -> None:
+    """Schreibt den Store atomar (temporäre Datei + os.replace)."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tags = sorted(columns)
+    arrays = {
+        "version": np.array(STORE_VERSION),
+        "tags": np.array(tags, dtype=str),
+        "state": np.array(json.dumps(state)),
+    }
+    for i, tag in enumerate(tags):
+        arrays[f"t{i}_step"] = np.asarray(columns[tag]["step"], dtype=np.int64)
+        arrays[f"t{i}_value"] = np.asarray(columns[tag]["value"], dtype=np.float32)
+        arrays[f"t{i}_wall_time"] = np.asarray(columns[tag]["wall_time"], dtype=np.float64)
+
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    with tmp_path.open("wb") as f:
+        np.savez(f, **arrays)
+    os.replace(tmp_path, path)
+
+
+def pending_bytes(run_dir: str | Path, state: dict) -> int:
+    """Noch nicht eingelesene Bytes eines Runs (-1: Datei ist geschrumpft, Neuaufbau nötig)."""
+    pending = 0
+    for path in event_files(run_dir):
+        size = path.stat().st_size
+        offset = state.get(path.name, {}).get("offset", 0)
+        if size < offset:
+            return -1
+        pending += size - offset
+    return pending
+
+
+def ingest_run(run_dir: str | Path, store_path: str | Path) -> dict:
+    """
+    Liest die neuen Records eines Runs und hängt sie an dessen Store an.
+
+    Ist eine Event-Datei kürzer als ihr gespeicherter Offset (überschrieben), wird der
+    Store des Runs aus den vorhandenen Dateien neu aufgebaut. Gelöschte Event-Dateien
+    behalten ihre bereits eingelesenen Daten.
+
+    Returns:
+        Statistik: run, new_bytes, new_records, new_scalars, rebuilt, seconds
+    """
+    t_start = time.perf_counter()
+    run_dir = Path(run_dir)
+    columns, state = load_store(store_path)
+
+    rebuilt = bool(state) and pending_bytes(run_dir, state) < 0
+    if rebuilt:
+        columns, state = {}, {}
+
+    new_bytes = new_records = new_scalars = 0
+    for path in event_files(run_dir):
+        offset = state.get(path.name, {}).get("offset", 0)
+        size = path.stat().st_size
+        if size == offset:
+            continue
+
+        records, new_offset = read_records(path, offset)
+        for tag, (steps, values, wall_times) in parse_scalars(records).items():
+            column = columns.setdefault(tag, {"step": [], "value": [], "wall_time": []})
+            column["step"] = np.concatenate([column["step"], steps]).astype(np.int64)
+            column["value"] = np.concatenate([column["value"], values]).astype(np.float32)
+            column["wall_time"] = np.concatenate([column["wall_time"], wall_times])
+            new_scalars += len(steps)
+
+        state[path.name] = {"offset": new_offset, "size": size}
+        new_bytes += new_offset - offset
+        new_records += len(records)
+
+    if new_bytes or rebuilt:
+        save_store(store_path, columns, state)
+
+    return {
+        "run": run_dir.name,
+        "new_bytes": new_bytes,
+        "new_records": new_records,
+        "new_scalars": new_scalars,
+        "rebuilt": rebuilt,
+        "seconds": time.perf_counter() - t_start,
+    }
+
+
+def ingest_logs(logs_dir: str | Path, store_dir: str | Path, runs: Optional[List[str]] = None,
+                n_workers: Optional[int] = None) -> List[dict]:
+    """
+    Aktualisiert die Stores aller (oder der angegebenen) Runs; Runs ohne neue Bytes
+    werden übersprungen, die übrigen laufen parallel auf einem Prozess-Pool.
+    """
+    logs_dir = Path(logs_dir)
+    runs = runs or list_runs(logs_dir)
+    n_workers = n_workers or os.cpu_count() or 1
+
+    jobs = []
+    for run in runs:
+        _, state = load_store(store_path_for(store_dir, run))
+        if pending_bytes(logs_dir / run, state) != 0:
+            jobs.append(run)
+
+    print(f"[*] {len(runs)} Runs | aktuell: {len(runs) - len(jobs)} | einzulesen: {len(jobs)}")
+    if not jobs:
+        return []
+
+    results = []
+    workers = min(n_workers, len(jobs))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(ingest_run, logs_dir / run, store_path_for(store_dir, run)): run for run in jobs}
+        for future in as_completed(futures):
+            run = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                print(f"[!] {run}: {e}")
+                continue
+            results.append(result)
+            print(f"[+] {run}: {result['new_records']:,} Records ({result['new_bytes'] / 1024:.0f} KB, "
+                  f"{result['new_scalars']:,} Scalars){' [neu aufgebaut]' if result['rebuilt'] else ''} "
+                  f"in {result['seconds']:.2f}s")
+    return results
+
+
+def scalar_series(columns: Dict[str, dict], tag: str) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    (steps, values) eines Tags, nach Schritt sortiert. Doppelte Schritte (Training von
+    einem älteren Checkpoint fortgesetzt) → der zuletzt geschriebene Wert gilt.
+    """
+    if tag not in columns:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+    column = columns[tag]
+    order = np.argsort(column["wall_time"], kind="stable")
+    steps, values = column["step"][order], column["value"][order]
+    # np.unique liefert das erste Vorkommen → auf der umgedrehten Folge = letzter Wert
+    unique_steps, index = np.unique(steps[::-1], return_index=True)
+    return unique_steps, values[::-1][index]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="TensorBoard-Logs inkrementell in Metrik-Stores einlesen")
+    parser.add_argument("--logs-dir", default="./logs")
+    parser.add_argument("--store", default="./logs_store", help="Verzeichnis der Run-Stores (.npz)")
+    parser.add_argument("--runs", nargs="*", help="Nur diese Runs (Default: alle in --logs-dir)")
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    t_start = time.perf_counter()
+    ingest_logs(args.logs_dir, args.store, args.runs, args.workers)
+    print(f"[+] Fertig in {time.perf_counter() - t_start:.2f}s")
@@ -0,0 +1,56 @@
+"""
+Tests für Delta-Checkpoints und Retention-Policy.
+"""
+
+import copy
+
+import torch
+
+from checkpointing import read_delta_snapshot, select_retained, snapshot_arrays, write_delta, write_zip
+
+
+def _snapshot(module, optimizer):
+    return copy.deepcopy({
+        "data": "{}",
+        "params": {"policy": module.state_dict(), "policy.optimizer": optimizer.state_dict()},
+        "pytorch_variables": {},
+    })
+
+
+def test_delta_roundtrip_is_lossless(tmp_path):
+    """Delta + Basis ergeben bitgenau den ursprünglichen Snapshot."""
+    net = torch.nn.Linear(31, 64)
+    optimizer = torch.optim.Adam(net.parameters())
+    net(torch.rand(8, 31)).sum().backward()
+    optimizer.step()
+
+    base = _snapshot(net, optimizer)
+    with (tmp_path / "run_10_steps.zip").open("wb") as f:
+        write_zip(f, base)
+
+    net(torch.rand(8, 31)).pow(2).sum().backward()
+    optimizer.step()
+    current = _snapshot(net, optimizer)
+
+    delta_path = tmp_path / "run_20_steps.delta.npz"
+    write_delta(delta_path, current, "run_10_steps.zip", snapshot_arrays(base))
+    restored = read_delta_snapshot(delta_path)
+
+    for key, value in current["params"]["policy"].items():
+        assert torch.equal(restored["params"]["policy"][key], value)
+    state = restored["params"]["policy.optimizer"]["state"]
+    for index, values in current["params"]["policy.optimizer"]["state"].items():
+        assert torch.equal(state[index]["exp_avg_sq"], values["exp_avg_sq"])
+    assert restored["params"]["policy.optimizer"]["param_groups"] == current["params"]["policy.optimizer"]["param_groups"]
+
+
+def test_retention_keeps_milestones_last_best_and_bases():
+    entries = [
+        {"timesteps": 10, "file": "a.zip", "milestone": True, "mean_reward": 1.0},
+        {"timesteps": 20, "file": "b.npz", "base": "a.zip", "mean_reward": 9.0},
+        {"timesteps": 30, "file": "c.zip", "mean_reward": 2.0},
+        {"timesteps": 40, "file": "d.zip", "mean_reward": 3.0},
+        {"timesteps": 50, "file": "e.npz", "base": "d.zip", "mean_reward": 4.0},
+    ]
+    assert select_retained(entries, keep_last=1, keep_best=True) == {10, 20, 40, 50}
+    assert select_retained(entries, keep_last=1, keep_best=False) == {10, 40, 50}
@@ -0,0 +1,35 @@
+"""
+Tests für den Evaluations-Daemon und seinen Client.
+"""
+
+import threading
+
+from eval_client import request
+from eval_daemon import EvalDaemon, make_server
+
+
+def test_daemon_streams_evaluation_match_and_replay(tmp_path):
+    daemon = EvalDaemon(n_workers=1, chunk_episodes=2, replay_dir=tmp_path / "replays", preload_torch=False)
+    address = str(tmp_path / "eval.sock")
+    server = make_server(daemon, address)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        events = list(request({"type": "evaluate", "model": "random", "episodes": 4, "seed": 3}, address))
+        assert [e["event"] for e in events] == ["progress", "progress", "result"]
+        assert events[-1]["episodes"] == 4 and 0 <= events[-1]["win_rate"] <= 1
+
+        match = list(request({"type": "match", "model": "random", "opponent": "random", "games": 1}, address))[-1]
+        assert match["games"] == 2 and match["wins"] + match["draws"] + match["losses"] == 2
+
+        replay = list(request({"type": "replay", "model": "random", "seed": 7, "name": "demo.json"}, address))[-1]
+        assert replay["file"] == "demo.json" and (tmp_path / "replays" / "demo.json").exists()
+
+        # Umgebungen bleiben im Worker liegen; Fehler kommen als Event zurück
+        status = list(request({"type": "status"}, address))[-1]
+        assert status["jobs"] == 3 and status["workers"][0]["envs"] == 2
+        error = list(request({"type": "evaluate", "model": "fehlt.zip"}, address))[-1]
+        assert error["event"] == "error" and "fehlt.zip" in error["message"]
+    finally:
+        server.shutdown()
+        server.server_close()
+        daemon.close()
@@ -0,0 +1,33 @@
+"""
+Tests für den Mehr-Episoden-Export von export_replay.py.
+"""
+
+import json
+
+from export_replay import aggregate_summaries, export_episodes, wilson_interval
+
+
+def test_export_keeps_top_and_selected_replays_with_all_summaries(tmp_path):
+    aggregate = export_episodes(None, 6, base_seed=10, n_workers=2, batch=2, keep_top=1, keep_seeds=[13],
+                                replay_dir=tmp_path, name="demo")
+
+    lines = (tmp_path / "exports" / "demo.jsonl").read_text().splitlines()
+    assert sorted(json.loads(line)["seed"] for line in lines) == list(range(10, 16))
+    assert "13" in aggregate["replays"] and len(aggregate["replays"]) == 2
+    assert len(list(tmp_path.glob("demo_*.json"))) == 2
+    assert aggregate["episodes"] == 6
+    assert json.loads((tmp_path / "exports" / "demo.json").read_text())["win_rate"] == aggregate["win_rate"]
+
+
+def test_aggregate_intervals():
+    low, high = wilson_interval(0, 20)
+    assert low == 0.0 and 0.1 < high < 0.2   # 0 Siege heißt nicht 0% Siegchance
+
+    stats = {"blue_captures": 1, "red_captures": 0, "blue_stuns": 2, "red_stuns": 1, "total_steps": 500}
+    summaries = [{"final_scores": {"blue": i % 2, "red": 0}, "episode_stats": stats, "reward": float(i)}
+                 for i in range(10)]
+    result = aggregate_summaries(summaries)
+    assert result["win_rate"]["value"] == 0.5 and result["draw_rate"]["value"] == 0.5
+    assert result["mean_stuns"] == {"value": 3.0, "ci95": [3.0, 3.0]}
+    low, high = result["mean_reward"]["ci95"]
+    assert low < 4.5 < high
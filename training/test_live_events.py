@@ -0,0 +1,43 @@
+"""
+Tests für die Live-Events (SSE) des Trainings.
+"""
+
+import time
+
+from live_events import EventPublisher
+
+
+def test_slow_client_is_dropped_and_catches_up_from_buffer():
+    """publish() blockiert nie; ein voller Client wird getrennt und holt beim Reconnect nach."""
+    publisher = EventPublisher(replay_events=100, client_queue=5)
+    slow = publisher.subscribe()
+
+    t0 = time.perf_counter()
+    for i in range(50):
+        publisher.publish("metrics", {"timesteps": i})
+    assert time.perf_counter() - t0 < 0.5
+    assert slow.dropped and publisher.dropped_clients == 1
+
+    # Reconnect mit Last-Event-ID = 5 → Events 6..50 aus dem Ringpuffer
+    client = publisher.subscribe(last_event_id=5)
+    ids = [client.queue.get_nowait()[0] for _ in range(client.queue.qsize())]
+    assert ids == list(range(6, 51))
+
+    # Zu alter Stand → zuerst "reset"
+    small = EventPublisher(replay_events=10)
+    for i in range(20):
+        small.publish("metrics", {"timesteps": i})
+    assert small.subscribe(last_event_id=2).queue.get_nowait()[1] == "reset"
+
+
+def test_sse_endpoint_replays_buffer_for_late_client():
+    publisher = EventPublisher()
+    publisher.publish("checkpoint", {"timesteps": 1000, "file": "Gordon_1000_steps.zip"})
+    publisher.publish("best_game", {"reward": 12.5, "file": "best_game_reward_12.json"})
+    client = publisher.create_app(heartbeat=0.05).test_client()
+
+    response = client.get("/events", headers={"Last-Event-ID": "1"}, buffered=False)
+    publisher.close()   # Stream endet nach dem Nachliefern
+    body = response.get_data(as_text=True)
+    assert "event: best_game" in body and "id: 2" in body
+    assert "checkpoint" not in body
@@ -0,0 +1,56 @@
+"""
+Tests für den Live-Play-Server.
+"""
+
+import asyncio
+import json
+
+import numpy as np
+from websockets.asyncio.client import connect
+from websockets.asyncio.server import serve
+
+from live_play import LivePlayServer
+
+
+class CountingPolicy:
+    """Immer Aktion 0; zählt predict()-Aufrufe und Batchgrößen."""
+
+    def __init__(self):
+        self.batches = []
+
+    def predict(self, observation, state=None, episode_start=None, deterministic=True):
+        self.batches.append(len(observation))
+        return np.zeros(len(observation), dtype=np.int64), None
+
+
+def test_matches_share_one_inference_batch_per_tick():
+    blue, red = CountingPolicy(), CountingPolicy()
+    server = LivePlayServer(blue, red)
+    for seed in range(3):
+        server.create_match(seed)
+
+    for _ in range(5):
+        outgoing = server.tick()
+    assert blue.batches == [6] * 5 and red.batches == [6] * 5   # 3 Matches × 2 Agenten, ein Aufruf pro Tick
+
+    frame = json.loads(outgoing[1][0])["frame"]
+    assert frame["step"] == 5 and set(frame["agents"]) == {"blue_0", "blue_1", "red_0", "red_1"}
+    assert server.latency_stats()["ticks"] == 5
+
+
+def test_websocket_client_receives_header_and_frames():
+    async def scenario():
+        server = LivePlayServer(config={"fps": 200, "stats_interval": 60})
+        async with serve(server.handler, "127.0.0.1", 0) as ws_server:
+            loop_task = asyncio.create_task(server.run_loop())
+            port = ws_server.sockets[0].getsockname()[1]
+            async with connect(f"ws://127.0.0.1:{port}") as client:
+                await client.send(json.dumps({"type": "start", "seed": 3}))
+                header = json.loads(await client.recv())
+                frames = [json.loads(await client.recv()) for _ in range(3)]
+            loop_task.cancel()
+        return header, frames
+
+    header, frames = asyncio.run(scenario())
+    assert header["type"] == "match" and header["metadata"]["seed"] == 3 and header["metadata"]["walls"]
+    assert [f["frame"]["step"] for f in frames] == [1, 2, 3]
@@ -0,0 +1,86 @@
+"""
+Tests für den append-only Metrik-Stream.
+"""
+
+import json
+
+from metrics_stream import (
+    MetricsStreamWriter, MetricsStreamReader, SeriesDownsampler, compact_stream, list_segments, truncate_stream,
+)
+
+
+def test_reader_tails_across_rotation(tmp_path):
+    """Reader liefert jeden Record genau einmal, auch über Segment-Rotationen hinweg."""
+    writer = MetricsStreamWriter(tmp_path, segment_max_bytes=200)
+    reader = MetricsStreamReader(tmp_path)
+
+    seen = []
+    for i in range(50):
+        writer.append({"type": "metrics", "timesteps": i, "mean_reward": float(i)})
+        if i % 7 == 0:
+            seen.extend(reader.poll())
+    writer.close()
+    seen.extend(reader.poll())
+
+    assert [r["timesteps"] for r in seen] == list(range(50))
+    assert len(list_segments(tmp_path)) > 1
+    assert not any(active for _, _, active in list_segments(tmp_path))
+
+
+def test_reader_ignores_partial_line(tmp_path):
+    """Eine halb geschriebene Zeile wird erst nach ihrem Zeilenende gelesen."""
+    writer = MetricsStreamWriter(tmp_path)
+    writer.append({"timesteps": 1})
+    active_path = list_segments(tmp_path)[-1][1]
+
+    with active_path.open("a") as f:
+        f.write('{"timesteps": 2')
+    reader = MetricsStreamReader(tmp_path)
+    assert [r["timesteps"] for r in reader.poll()] == [1]
+
+    with active_path.open("a") as f:
+        f.write("}\n")
+    assert [r["timesteps"] for r in reader.poll()] == [2]
+
+
+def test_downsampler_is_bounded():
+    """Der Downsampler hält nie mehr als max_points Buckets und erhält den Mittelwert."""
+    sampler = SeriesDownsampler(max_points=16)
+    for i in range(10_000):
+        sampler.add({"timesteps": i, "mean_reward": 1.0, "std_reward": 0.0, "mean_length": 500.0})
+        assert len(sampler.buckets) <= 16
+
+    series = sampler.series()
+    assert series["timesteps"][-1] == 9_999
+    assert all(abs(r - 1.0) < 1e-9 for r in series["mean_reward"])
+
+
+def test_compact_writes_dashboard_schema(tmp_path):
+    """compact_stream erzeugt das training_logs.json Schema."""
+    stream_dir = tmp_path / "stream"
+    writer = MetricsStreamWriter(stream_dir)
+    for i in range(100):
+        writer.append({"type": "metrics", "timesteps": i * 1000, "mean_reward": i,
+                       "std_reward": 1.0, "mean_length": 500.0, "episodes": 100})
+    writer.append({"type": "performance", "timesteps": 99_000, "env_steps_per_s": 2000.0})
+    writer.close()
+
+    output = tmp_path / "training_logs.json"
+    compact_stream(stream_dir, output, header={"model_name": "Test"}, max_points=10)
+    data = json.loads(output.read_text())
+
+    assert data["model_name"] == "Test"
+    assert len(data["timesteps"]) <= 10
+    assert len(data["timesteps"]) == len(data["mean_reward"]) == len(data["episodes"])
+    assert data["performance_history"][0]["env_steps_per_s"] == 2000.0
+
+
+def test_truncate_drops_records_after_snapshot(tmp_path):
+    """Beim Fortsetzen werden Records nach dem Snapshot-Zeitpunkt verworfen."""
+    writer = MetricsStreamWriter(tmp_path, segment_max_bytes=100)
+    for i in range(20):
+        writer.append({"type": "metrics", "timesteps": i * 10})
+    writer.close()
+
+    assert truncate_stream(tmp_path, 95) == 10
+    assert [r["timesteps"] for r in MetricsStreamReader(tmp_path).iter_all()] == list(range(0, 100, 10))
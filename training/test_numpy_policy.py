@@ -0,0 +1,68 @@
+"""
+Tests für die NumPy-Policy-Runtime (Abgleich mit der SB3/torch-Policy).
+"""
+
+import numpy as np
+import torch
+from gymnasium import spaces
+from stable_baselines3.common.policies import ActorCriticPolicy
+
+from numpy_policy import NumpyPolicy, policy_from_sb3
+
+
+def _sb3_policy():
+    torch.manual_seed(0)
+    return ActorCriticPolicy(
+        spaces.Box(-1.0, 2.0, (31,), np.float32),
+        spaces.Discrete(6),
+        lr_schedule=lambda _: 3e-4,
+        net_arch=dict(pi=[64, 64], vf=[64, 64]),
+        activation_fn=torch.nn.Tanh,
+    )
+
+
+def test_numpy_policy_matches_torch(tmp_path):
+    """Gespeicherte .npz-Policy liefert dieselben Logits und argmax-Aktionen wie torch."""
+    policy = _sb3_policy()
+    path = tmp_path / "policy.npz"
+    policy_from_sb3(policy).save(path)
+    numpy_policy = NumpyPolicy.load(path)
+
+    obs = np.random.default_rng(1).uniform(-1, 2, size=(256, 31)).astype(np.float32)
+    with torch.no_grad():
+        latent = policy.mlp_extractor.forward_actor(torch.as_tensor(obs))
+        torch_logits = policy.action_net(latent).numpy()
+
+    np.testing.assert_allclose(numpy_policy.logits(obs), torch_logits, atol=1e-5)
+    actions, _ = numpy_policy.predict(obs, deterministic=True)
+    torch_actions, _ = policy.predict(obs, deterministic=True)
+    assert np.array_equal(actions, torch_actions)
+
+
+def test_stochastic_predict_follows_action_probs():
+    """Gesampelte Aktionen folgen der Softmax-Verteilung und sind per Seed reproduzierbar."""
+    numpy_policy = policy_from_sb3(_sb3_policy())
+    numpy_policy.rng = np.random.default_rng(7)
+    obs = np.repeat(np.random.default_rng(2).uniform(-1, 2, size=(1, 31)).astype(np.float32), 20000, axis=0)
+
+    actions, _ = numpy_policy.predict(obs, deterministic=False)
+    frequencies = np.bincount(actions, minlength=6) / len(actions)
+    np.testing.assert_allclose(frequencies, numpy_policy.action_probs(obs[:1])[0], atol=0.02)
+
+    numpy_policy.rng = np.random.default_rng(7)
+    assert np.array_equal(numpy_policy.predict(obs, deterministic=False)[0], actions)
+
+
+def test_find_numpy_policy_checks_source_hash(tmp_path):
+    """Nur eine .npz aus genau diesem Zip wird verwendet - unabhängig von den mtimes."""
+    from model_cache import file_sha256
+    from numpy_policy import find_numpy_policy, npz_path_for
+
+    model_path = tmp_path / "Night_200M.zip"
+    model_path.write_bytes(b"checkpoint v1")
+    policy_from_sb3(_sb3_policy()).save(npz_path_for(model_path), source_sha256=file_sha256(model_path))
+    assert find_numpy_policy(model_path) == npz_path_for(model_path)
+
+    # Neuer Checkpoint unter gleichem Namen (z.B. nach git pull), .npz bleibt alt
+    model_path.write_bytes(b"checkpoint v2")
+    assert find_numpy_policy(model_path) is None
@@ -0,0 +1,62 @@
+"""
+Tests für den int8-Inference-Modus.
+"""
+
+from types import SimpleNamespace
+
+import numpy as np
+import torch
+from gymnasium import spaces
+from stable_baselines3.common.policies import ActorCriticPolicy
+
+from quantization import QuantizedPolicy, action_agreement
+
+
+def _model():
+    torch.manual_seed(0)
+    observation_space = spaces.Box(-1.0, 2.0, (31,), np.float32)
+    action_space = spaces.Discrete(6)
+    policy = ActorCriticPolicy(observation_space, action_space, lr_schedule=lambda _: 3e-4,
+                               net_arch=dict(pi=[256, 256], vf=[64]), activation_fn=torch.nn.Tanh)
+    return SimpleNamespace(policy=policy, observation_space=observation_space, action_space=action_space,
+                           predict=policy.predict)
+
+
+def test_int8_policy_matches_float_policy():
+    """Quantisierte Hidden-/Output-Schichten weichen nur minimal von float ab."""
+    model = _model()
+    quantized = QuantizedPolicy(model)
+    obs = np.random.default_rng(0).uniform(-1, 2, size=(2048, 31)).astype(np.float32)
+
+    with torch.no_grad():
+        latent = model.policy.mlp_extractor.forward_actor(torch.as_tensor(obs))
+        float_logits = model.policy.action_net(latent)
+    assert (quantized.logits(obs) - float_logits).abs().max() < 0.05
+    assert action_agreement(model, quantized, obs) > 0.97
+
+    single, _ = quantized.predict(obs[0], deterministic=True)
+    assert np.ndim(single) == 0
+
+
+def test_policy_cache_keys_by_reward_profile(tmp_path):
+    """Die int8-Prüfung hängt vom Profil ab - gleiche Datei, anderes Profil → eigener Eintrag."""
+    from model_cache import PolicyCache
+
+    path = tmp_path / "Gordon_final.zip"
+    path.write_bytes(b"checkpoint")
+    calls = []
+    cache = PolicyCache(4, loader=lambda p, reward_profile: calls.append(reward_profile) or reward_profile)
+
+    assert cache.get(path, reward_profile="sparse") == "sparse"
+    assert cache.get(path, reward_profile="balanced") == "balanced"
+    assert cache.get(path, reward_profile="sparse") == "sparse"
+    assert calls == ["sparse", "balanced"] and cache.hits == 1
+
+
+def test_default_policy_cache_loader_accepts_reward_profile(tmp_path):
+    from distill import save_student
+    from model_cache import PolicyCache
+
+    path = tmp_path / "Night_1.zip"
+    save_student(_model().policy, path)
+    assert PolicyCache().get(path, reward_profile="sparse").observation_space.shape == (31,)
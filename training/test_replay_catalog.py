@@ -0,0 +1,45 @@
+"""
+Tests für den Replay-Katalog.
+"""
+
+import json
+import os
+
+from replay_catalog import ReplayCatalog
+
+
+def _write_replay(path, blue, red, frames=3):
+    replay = {
+        "metadata": {"final_scores": {"blue": blue, "red": red},
+                     "episode_stats": {"blue_captures": blue, "red_captures": red}},
+        "frames": [{"step": i} for i in range(frames)],
+    }
+    path.write_text(json.dumps(replay))
+
+
+def test_catalog_updates_incrementally(tmp_path):
+    """Nur neue/geänderte Replays werden geparst; touch ohne Inhaltsänderung nur neu gehasht."""
+    _write_replay(tmp_path / "Algernon_100M.json", 2, 0)
+    _write_replay(tmp_path / "Gordon_40M.json", 0, 2)
+
+    catalog = ReplayCatalog(tmp_path)
+    assert catalog.update()["parsed"] == 2
+    catalog.save()
+
+    entry = ReplayCatalog(tmp_path).entries["Algernon_100M.json"]
+    assert (entry["model"], entry["checkpoint"], entry["profile"], entry["winner"]) == \
+        ("Algernon", "100M", "balanced", "blue")
+
+    stat = os.stat(tmp_path / "Gordon_40M.json")
+    os.utime(tmp_path / "Gordon_40M.json", ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    _write_replay(tmp_path / "Algernon_100M.json", 3, 1, frames=5)
+    (tmp_path / "Extra.json").write_text("{kaputt")
+
+    catalog = ReplayCatalog(tmp_path)
+    stats = catalog.update()
+    assert (stats["parsed"], stats["rehashed"], stats["failed"]) == (1, 1, 1)
+    assert catalog.entries["Algernon_100M.json"]["frames"] == 5
+
+    (tmp_path / "Gordon_40M.json").unlink()
+    assert catalog.update()["removed"] == 1
+    assert [r["file"] for r in catalog.query(sort="score_diff", descending=True)] == ["Algernon_100M.json"]
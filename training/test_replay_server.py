@@ -0,0 +1,65 @@
+"""
+Tests für den lokalen Replay- und Metrik-Server.
+"""
+
+import gzip
+import json
+
+from metrics_stream import MetricsStreamWriter
+from replay_server import create_app
+from replay_store import ReplayStore
+
+
+def _replay(frames):
+    return {"metadata": {"final_scores": {"blue": 1, "red": 0}, "episode_stats": {}, "walls": [[0, 0, 1, 1]]},
+            "frames": [{"step": i, "agents": {"blue_0": {"position": [i, 0]}}} for i in range(frames)]}
+
+
+def test_frame_ranges_with_etag_and_gzip(tmp_path):
+    """Bereiche kommen aus der kompakten Ablage; gleicher Bereich → 304, gzip nur auf Anfrage."""
+    ReplayStore(tmp_path).put(_replay(250), "Gordon_40M.json")
+    client = create_app(tmp_path, tmp_path / "streams", server_config={"chunk_frames": 100}).test_client()
+
+    assert [r["file"] for r in client.get("/api/replays").get_json()["replays"]] == ["Gordon_40M.json"]
+    header = client.get("/api/replays/Gordon_40M.json").get_json()
+    assert header["total"] == 250 and header["metadata"]["walls"] == [[0, 0, 1, 1]]
+
+    chunk = client.get("/api/replays/Gordon_40M.json/frames?from=200").get_json()
+    assert (chunk["from"], chunk["to"], chunk["total"]) == (200, 250, 250)
+    assert [f["step"] for f in chunk["frames"]] == list(range(200, 250))
+
+    response = client.get("/api/replays/Gordon_40M.json/frames?from=10&to=60", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert [f["step"] for f in json.loads(gzip.decompress(response.data))["frames"]] == list(range(10, 60))
+
+    etag = response.headers["ETag"]
+    cached = client.get("/api/replays/Gordon_40M.json/frames?from=10&to=60",
+                        headers={"Accept-Encoding": "gzip", "If-None-Match": etag})
+    assert cached.status_code == 304
+
+    # Neuer Inhalt unter gleichem Namen → neuer ETag
+    ReplayStore(tmp_path).put(_replay(30), "Gordon_40M.json")
+    fresh = client.get("/api/replays/Gordon_40M.json/frames?from=10&to=60",
+                       headers={"Accept-Encoding": "gzip", "If-None-Match": etag})
+    assert fresh.status_code == 200
+    assert client.get("/api/replays/Unbekannt.json/frames").status_code == 404
+
+
+def test_metrics_stream_returns_records_as_ndjson(tmp_path):
+    writer = MetricsStreamWriter(tmp_path / "streams" / "Gordon")
+    for i in range(3):
+        writer.append({"type": "metrics", "timesteps": i * 100, "mean_reward": float(i)})
+    writer.close()
+
+    client = create_app(tmp_path, tmp_path / "streams").test_client()
+    assert client.get("/api/metrics").get_json() == {"runs": ["Gordon"]}
+    lines = client.get("/api/metrics/Gordon/stream?follow=0").get_data(as_text=True).splitlines()
+    assert [json.loads(line)["timesteps"] for line in lines] == [0, 100, 200]
+
+
+def test_static_files_only_serve_viewer_and_dashboard(tmp_path):
+    client = create_app(tmp_path, tmp_path / "streams").test_client()
+    assert client.get("/").status_code == 200
+    assert client.get("/visualization/main.js").status_code == 200
+    for path in ("/.git/HEAD", "/training/config.py", "/training/requirements.txt", "/visualization/../README.md"):
+        assert client.get(path).status_code == 404, path
@@ -0,0 +1,47 @@
+"""
+Tests für den content-adressierten Replay-Speicher.
+"""
+
+import json
+import os
+
+from replay_store import ReplayStore
+
+
+def _replay(blue):
+    return {"metadata": {"final_scores": {"blue": blue, "red": 0}, "episode_stats": {}}, "frames": [{"step": 0}]}
+
+
+def test_duplicates_share_one_object_and_gc_frees_unreferenced(tmp_path):
+    """Gleicher Inhalt unter zwei Namen → ein Objekt; gc löscht erst, wenn kein Alias mehr zeigt."""
+    store = ReplayStore(tmp_path)
+    a = store.put(_replay(1), "Algernon_80M.json")
+    b = store.put(_replay(1), "Algernon_100M.json")
+    store.put(_replay(2), "Gordon_40M.json")
+
+    assert os.path.samefile(a, b)
+    assert store.stats()["objects"] == 2
+    assert json.loads(b.read_text())["metadata"]["final_scores"]["blue"] == 1
+    assert set(json.loads((tmp_path / "catalog.json").read_text())["replays"]) == \
+        {"Algernon_80M.json", "Algernon_100M.json", "Gordon_40M.json"}
+
+    store.remove("Algernon_80M.json")
+    assert store.gc()["objects_removed"] == 0
+
+    (tmp_path / "Gordon_40M.json").unlink()   # Alias von Hand gelöscht
+    result = store.gc()
+    assert (result["refs_removed"], result["objects_removed"]) == (1, 1)
+    assert store.stats()["objects"] == 1
+
+
+def test_adopt_links_existing_copies(tmp_path):
+    """Von Hand kopierte, identische Replays werden zu Hardlinks auf ein Objekt."""
+    data = json.dumps(_replay(3), indent=2)
+    (tmp_path / "a.json").write_text(data)
+    (tmp_path / "b.json").write_text(data)
+
+    store = ReplayStore(tmp_path)
+    assert store.adopt() == {"adopted": 2, "unchanged": 0}
+    assert os.path.samefile(tmp_path / "a.json", tmp_path / "b.json")
+    assert (tmp_path / "a.json").read_text() == data
+    assert store.adopt() == {"adopted": 0, "unchanged": 2}
@@ -0,0 +1,52 @@
+"""
+Tests für die gebatchten Rollouts (rollout.py).
+"""
+
+import numpy as np
+
+from rollout import policy_groups, predict_actions, rollout_episodes
+
+
+class HashPolicy:
+    """Deterministische Aktion aus der Beobachtung - unabhängig von der Batch-Zusammensetzung."""
+
+    def predict(self, batch, deterministic=True):
+        batch = np.asarray(batch)
+        return (np.abs(batch * 1000).astype(np.int64).sum(axis=1) % 6), None
+
+
+class TaggingPolicy:
+    """Gibt die erste Komponente jeder Beobachtung als Aktion zurück und merkt sich die Batches."""
+
+    def __init__(self):
+        self.batches = []
+
+    def predict(self, batch, deterministic=True):
+        self.batches.append(np.asarray(batch)[:, 0].tolist())
+        return np.asarray(batch)[:, 0].astype(np.int64), None
+
+
+def test_batched_rollout_matches_single_rollouts_in_seed_order():
+    """Jeder Seed liefert dieselbe Episode wie allein gespielt; Ergebnisse in Reihenfolge der Seeds."""
+    policy = HashPolicy()
+    seeds = [7, 2, 11]
+    batched = rollout_episodes(policy, len(seeds), seeds=seeds)
+    for seed, replay in zip(seeds, batched):
+        single = rollout_episodes(policy, seeds=[seed])[0]
+        assert replay["frames"] == single["frames"]
+        assert replay["metadata"]["agent_returns"] == single["metadata"]["agent_returns"]
+        assert replay["metadata"]["final_scores"] == single["metadata"]["final_scores"]
+    assert batched[0]["frames"][0] != batched[1]["frames"][0]   # Seeds unterscheiden sich wirklich
+
+
+def test_policy_groups_route_each_team_to_its_model():
+    agents = ["blue_0", "blue_1", "red_0", "red_1"]
+    blue, red = TaggingPolicy(), TaggingPolicy()
+    assert policy_groups(blue, None, agents) == [(blue, [0, 1, 2, 3])]
+    assert policy_groups(blue, red, agents) == [(blue, [0, 1]), (red, [2, 3])]
+
+    # Beobachtung = 10 * Episode + Agent-Spalte → Aktion verrät, wessen Beobachtung ankam
+    observations = [{agent: np.array([10 * k + j, 0.0]) for j, agent in enumerate(agents)} for k in range(2)]
+    actions = predict_actions(policy_groups(blue, red, agents), observations, agents)
+    assert actions.tolist() == [0, 1, 2, 3, 10, 11, 12, 13]
+    assert blue.batches == [[0, 1, 10, 11]] and red.batches == [[2, 3, 12, 13]]
@@ -0,0 +1,48 @@
+"""
+Tests für den Gegner-Pool des Self-Play-Trainings.
+"""
+
+import numpy as np
+import torch
+from gymnasium import spaces
+from stable_baselines3.common.policies import ActorCriticPolicy
+
+from distill import save_student
+from self_play import OpponentPool
+
+
+def _policy(seed: int) -> ActorCriticPolicy:
+    torch.manual_seed(seed)
+    return ActorCriticPolicy(spaces.Box(-1.0, 2.0, (31,), np.float32), spaces.Discrete(6),
+                             lr_schedule=lambda _: 3e-4, net_arch=dict(pi=[16], vf=[16]))
+
+
+def test_snapshots_are_evicted_but_files_stay(tmp_path):
+    """Auch mit mehr Dateien als max_size landet der Learner im Pool."""
+    paths = []
+    for i in range(3):
+        paths.append(tmp_path / f"Night_{i}.zip")
+        save_student(_policy(i), paths[-1])
+    pool = OpponentPool([str(p) for p in paths], max_size=2)
+
+    for step in range(4):
+        pool.add_snapshot(_policy(10 + step), f"snapshot_{step}")
+        assert f"snapshot_{step}" in pool.names
+    assert pool.names == ["Night_0.zip", "Night_1.zip", "Night_2.zip", "snapshot_2", "snapshot_3"]
+
+
+def test_state_round_trip(tmp_path):
+    path = tmp_path / "Night_0.zip"
+    save_student(_policy(0), path)
+    pool = OpponentPool([str(path)], max_size=4)
+    pool.add_snapshot(_policy(1), "snapshot_1000")
+    pool.add_snapshot(_policy(2), "snapshot_2000")
+
+    restored = OpponentPool(max_size=4)
+    restored.set_state(pool.get_state(), template_policy=_policy(99))
+    assert restored.names == pool.names and restored.paths == pool.paths
+
+    obs = np.random.default_rng(0).uniform(-1, 2, size=(64, 31)).astype(np.float32)
+    pool.deterministic = restored.deterministic = True
+    for name in pool.names:
+        assert np.array_equal(pool.predict(name, obs), restored.predict(name, obs))
@@ -0,0 +1,37 @@
+"""
+Tests für die Multi-Resolution-Pyramiden der Metrik-Serien.
+"""
+
+import numpy as np
+
+from metrics_stream import MetricsStreamWriter
+from series_pyramid import export_pyramids, load_range
+
+
+def test_pyramid_picks_level_for_visible_range(tmp_path):
+    """Übersicht kommt aus der gröbsten Ebene, ein Zoom aus einer feineren - Spitzen bleiben im Band."""
+    streams = tmp_path / "metrics_stream"
+    writer = MetricsStreamWriter(streams / "run")
+    rewards = np.sin(np.arange(20000) / 500.0)
+    rewards[12345] = 50.0  # einzelner Ausreißer
+    for i, reward in enumerate(rewards):
+        writer.append({"type": "metrics", "timesteps": i * 100, "mean_reward": float(reward)})
+    writer.close()
+
+    output = tmp_path / "series"
+    index = export_pyramids(output, tb_store=None, streams_dir=streams)
+    entry = index["runs"]["run"]["series"]["mean_reward"]
+    assert [level["points"] for level in entry["levels"]] == [20000, 5000, 1250]
+
+    overview = load_range(output, "run", "mean_reward", max_points=1000)
+    assert overview["level"] == 2 and len(overview["x"]) == 1250
+    assert overview["ymax"].max() == 50.0
+
+    zoom = load_range(output, "run", "mean_reward", 1_000_000, 1_100_000, max_points=500)
+    assert zoom["level"] == 0 and np.array_equal(zoom["x"], np.arange(10000, 11001) * 100)
+
+    # Unveränderte Quelle → Run wird nicht neu geschrieben
+    tile = output / entry["levels"][0]["tiles"][0]["file"]
+    mtime = tile.stat().st_mtime_ns
+    export_pyramids(output, tb_store=None, streams_dir=streams)
+    assert tile.stat().st_mtime_ns == mtime
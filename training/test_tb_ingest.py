@@ -0,0 +1,40 @@
+"""
+Tests für das inkrementelle Einlesen von TensorBoard-Logs.
+"""
+
+import numpy as np
+from torch.utils.tensorboard import SummaryWriter
+
+from tb_ingest import event_files, ingest_run, load_store, scalar_series
+
+
+def test_ingest_reads_only_new_complete_records(tmp_path):
+    """Zweiter Lauf liest nur Angehängtes; ein halber Record am Ende wird erst später gelesen."""
+    run_dir, store = tmp_path / "logs" / "run", tmp_path / "store" / "run.npz"
+    writer = SummaryWriter(str(run_dir))
+    for step in range(10):
+        writer.add_scalar("rollout/ep_rew_mean", float(step), step)
+    writer.flush()
+
+    first = ingest_run(run_dir, store)
+    assert first["new_scalars"] == 10
+    assert ingest_run(run_dir, store)["new_bytes"] == 0
+
+    # Nächster Record nur zur Hälfte auf der Platte (Writer schreibt gerade)
+    for step in range(10, 15):
+        writer.add_scalar("rollout/ep_rew_mean", float(step), step)
+    writer.flush()
+    path = event_files(run_dir)[0]
+    data = path.read_bytes()
+    path.write_bytes(data[:-10])
+    assert ingest_run(run_dir, store)["new_scalars"] == 4
+
+    path.write_bytes(data)
+    assert ingest_run(run_dir, store)["new_scalars"] == 1
+    writer.close()
+
+    columns, state = load_store(store)
+    steps, values = scalar_series(columns, "rollout/ep_rew_mean")
+    assert np.array_equal(steps, np.arange(15))
+    assert np.array_equal(values, np.arange(15, dtype=np.float32))
+    assert state[path.name]["offset"] == len(data)
@@ -0,0 +1,126 @@
+"""
+Tests für Turnier-Store, Elo und Paarungen.
+"""
+
+from concurrent.futures import Future
+
+import pytest
+
+import tournament
+from tournament import ELO_START, ResultsStore, elo_update, play_jobs, swiss_pairs
+
+
+def _store(tmp_path, names):
+    store = ResultsStore(tmp_path / "results.json")
+    hashes = []
+    for name in names:
+        path = tmp_path / f"{name}.zip"
+        path.write_bytes(name.encode())
+        hashes.append(store.register(path))
+    return store, hashes
+
+
+def test_elo_and_results_store(tmp_path):
+    assert elo_update(ELO_START, ELO_START, 0.5) == (ELO_START, ELO_START)
+    winner, loser = elo_update(1500.0, 1500.0, 1.0)
+    assert winner == pytest.approx(1516.0) and loser == pytest.approx(1484.0)
+    # Sieg gegen einen schwächeren Gegner bringt weniger
+    assert elo_update(1700.0, 1300.0, 1.0)[0] - 1700.0 < 16.0
+
+    store, (a, b) = _store(tmp_path, ["Night_1", "Night_200M"])
+    store.record(a, b, seed=0, blue_score=2, red_score=1)
+    store.record(a, b, seed=0, blue_score=0, red_score=3)   # Schon gespielt → ignoriert
+    store.record(b, a, seed=0, blue_score=1, red_score=1)
+    store.save()
+
+    reloaded = ResultsStore(tmp_path / "results.json")
+    assert len(reloaded.games) == 2 and reloaded.pair_count(a, b) == 2
+    top = reloaded.standings()[0]
+    assert top["name"] == "Night_1" and (top["wins"], top["draws"], top["losses"]) == (1, 1, 0)
+    assert reloaded.rating(a) > ELO_START > reloaded.rating(b)
+    assert reloaded.ratings == store.ratings   # Beim Laden aus den Spielen neu berechnet
+
+
+def test_swiss_pairs_avoid_repeat_opponents(tmp_path):
+    store, (a, b, c, d) = _store(tmp_path, ["A", "B", "C", "D"])
+    store.ratings["balanced"] = {"float": {a: 1600.0, b: 1550.0, c: 1500.0, d: 1450.0}}
+    assert swiss_pairs(store, [a, b, c, d]) == [(a, b), (c, d)]
+
+    store.record(a, b, 0, 1, 0)
+    store.record(c, d, 0, 1, 0)
+    assert swiss_pairs(store, [a, b, c, d]) == [(a, c), (b, d)]
+
+
+def test_modes_keep_separate_ratings_and_standings(tmp_path):
+    """int8 auf einem float-Store: gleiche Seeds werden neu gespielt, float bleibt unberührt."""
+    store, (a, b) = _store(tmp_path, ["Night_1", "Night_200M"])
+    for seed in range(3):
+        store.record(a, b, seed, 2, 0, mode="float")
+    store.save()
+    float_ratings = dict(store.ratings["balanced"]["float"])
+    float_table = store.standings(mode="float")
+
+    store = ResultsStore(tmp_path / "results.json")
+    assert len(tournament.match_jobs(store, a, b, [0, 1, 2], "balanced", mode="int8")) == 2
+    for seed in range(3):
+        store.record(a, b, seed, 0, 1, mode="int8")
+    assert store.ratings["balanced"]["float"] == float_ratings
+    assert store.standings(mode="float") == float_table
+    int8_top = store.standings(mode="int8")[0]
+    assert int8_top["name"] == "Night_200M" and int8_top["games"] == 3
+
+
+def test_reward_profiles_are_separate_tournaments(tmp_path):
+    """Ein sparse-Lauf auf einem balanced-Store spielt seine eigenen Spiele."""
+    store, (a, b) = _store(tmp_path, ["Night_1", "Night_200M"])
+    store.record(a, b, 0, 2, 0)
+    store.save()
+
+    store = ResultsStore(tmp_path / "results.json")
+    assert store.games[0]["reward_profile"] == "balanced"
+    assert [job["blue"] for job in tournament.match_jobs(store, a, b, [0], "balanced")] == [b]
+    assert [job["seeds"] for job in tournament.match_jobs(store, a, b, [0], "sparse")] == [[0], [0]]
+
+    store.record(a, b, 0, 0, 3, reward_profile="sparse")
+    assert store.standings(reward_profile="balanced")[0]["name"] == "Night_1"
+    assert store.standings(reward_profile="sparse")[0]["name"] == "Night_200M"
+    assert store.standings(reward_profile="sparse")[0]["games"] == 1
+
+
+class _ReversedPool:
+    """Ersatz für den Prozess-Pool: spielt synchron, meldet Jobs aber in umgekehrter Reihenfolge."""
+
+    def __init__(self, *args, **kwargs):
+        self.futures = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def submit(self, fn, job):
+        future = Future()
+        future.set_result({**job, "scores": [(seed % 2, 0) for seed in job["seeds"]]})
+        self.futures.append(future)
+        return future
+
+
+def test_play_jobs_records_in_job_order(tmp_path, monkeypatch):
+    """Elo hängt nur von Jobs und Seeds ab, nicht davon, welcher Worker zuerst fertig ist."""
+    monkeypatch.setattr(tournament, "ProcessPoolExecutor", _ReversedPool)
+    monkeypatch.setattr(tournament, "as_completed", lambda futures: reversed(list(futures)))
+
+    store, hashes = _store(tmp_path, ["A", "B", "C"])
+    jobs = [job for a, b in tournament.round_robin_pairs(hashes)
+            for job in tournament.match_jobs(store, a, b, [1, 2], "balanced")]
+    assert play_jobs(store, jobs, n_workers=2) == 12
+
+    tmp_path.joinpath("sequential").mkdir()
+    expected, _ = _store(tmp_path / "sequential", ["A", "B", "C"])
+    for job in jobs:
+        for seed in job["seeds"]:
+            expected.record(job["blue"], job["red"], seed, seed % 2, 0)
+    assert [(g["blue"], g["red"], g["seed"]) for g in store.games] == \
+           [(g["blue"], g["red"], g["seed"]) for g in expected.games]
+    assert store.ratings == expected.ratings
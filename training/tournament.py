@@ -0,0 +1,323 @@
+"""
+Turniere zwischen Checkpoints mit Elo-Rating.
+
+Blue und Red werden von verschiedenen Checkpoints gesteuert (rollout_episodes mit
+red_model → ein predict()-Batch pro Team und Schritt). Jede Paarung wird in beiden
+Farbverteilungen gespielt, damit die Seiten-Asymmetrie herausfällt.
+
+Ergebnisse landen in einem Results-Store (JSON). Schlüssel eines Spiels ist
+(Blue-Hash, Red-Hash, Seed, Inference-Modus, Reward-Profil) - bereits gespielte Spiele werden nie wiederholt.
+Ein neuer Checkpoint braucht also nur seine eigenen neuen Matches. Elo wird
+inkrementell pro Spiel in Job-/Seed-Reihenfolge fortgeschrieben (unabhängig davon,
+welcher Worker zuerst fertig wird). Ratings und Tabelle gibt es getrennt pro
+Reward-Profil und Inference-Modus - ein int8- oder sparse-Turnier auf einem
+bestehenden Store spielt seine eigenen Spiele und zählt nichts doppelt.
+
+Nutzung:
+    python tournament.py models/X/Night_1.zip models/X/Night_200M.zip
+    python tournament.py models/*.zip --format swiss --rounds 5 --games 4 --workers 8
+    python tournament.py models/*.zip --mode int8
+"""
+
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from functools import partial
+from itertools import combinations
+from pathlib import Path
+from typing import List, Optional
+
+from metrics_stream import write_json_atomic
+from model_cache import FileHashIndex, PolicyCache
+from rollout import rollout_episodes
+
+BASE_DIR = Path(__file__).resolve().parent
+DEFAULT_STORE = BASE_DIR / "tournament" / "results.json"
+
+ELO_START = 1500.0
+ELO_K = 32.0
+
+
+def expected_score(rating_a: float, rating_b: float) -> float:
+    return 1.0 / (1.0 + 10 ** ((rating_b - rating_a) / 400.0))
+
+
+def elo_update(rating_a: float, rating_b: float, score_a: float, k: float = ELO_K) -> tuple:
+    """Neue Ratings nach einem Spiel (score_a: 1 Sieg, 0.5 Remis, 0 Niederlage)."""
+    delta = k * (score_a - expected_score(rating_a, rating_b))
+    return rating_a + delta, rating_b - delta
+
+
+class ResultsStore:
+    """
+    Persistenter Turnier-Speicher: Teilnehmer, gespielte Spiele, Ratings.
+
+    Teilnehmer werden über den Datei-Hash identifiziert (Umbenennen schadet nicht).
+    Ratings werden beim Laden aus den Spielen neu berechnet (pro Profil und Modus, in
+    Aufnahme-Reihenfolge) - ältere Stores mit einer gemeinsamen Rating-Tabelle bleiben lesbar.
+    """
+
+    def __init__(self, path: str | Path = DEFAULT_STORE):
+        self.path = Path(path)
+        data = {}
+        if self.path.exists():
+            with self.path.open() as f:
+                data = json.load(f)
+        self.participants = data.get("participants", {})   # hash → {name, path}
+        self.games = data.get("games", [])                  # in Aufnahme-Reihenfolge
+        self.ratings = {}                                   # Profil → Modus → hash → Elo
+        self.hashes = FileHashIndex(data.get("models", {}))
+        self.played = set()
+        games, self.games = self.games, []
+        for g in games:
+            self.record(g["blue"], g["red"], g["seed"], g["blue_score"], g["red_score"],
+                        g.get("mode", "float"), g.get("reward_profile", "balanced"))
+
+    def _ratings(self, mode: str, reward_profile: str) -> dict:
+        return self.ratings.setdefault(reward_profile, {}).setdefault(mode, {})
+
+    def rating(self, model_hash: str, mode: str = "float", reward_profile: str = "balanced") -> float:
+        return self._ratings(mode, reward_profile).get(model_hash, ELO_START)
+
+    def register(self, path: str | Path) -> str:
+        """Meldet einen Checkpoint an und gibt seinen Hash zurück."""
+        model_hash = self.hashes.hash(path)
+        self.participants[model_hash] = {"name": Path(path).stem, "path": str(path)}
+        return model_hash
+
+    def record(self, blue: str, red: str, seed: int, blue_score: int, red_score: int, mode: str = "float",
+               reward_profile: str = "balanced") -> None:
+        """Nimmt ein Spiel auf und aktualisiert Elo von Profil und Modus."""
+        if (blue, red, seed, mode, reward_profile) in self.played:
+            return
+        result = 1.0 if blue_score > red_score else 0.0 if blue_score < red_score else 0.5
+        ratings = self._ratings(mode, reward_profile)
+        ratings[blue], ratings[red] = elo_update(self.rating(blue, mode, reward_profile),
+                                                 self.rating(red, mode, reward_profile), result)
+        self.games.append({"blue": blue, "red": red, "seed": seed, "blue_score": blue_score, "red_score": red_score,
+                           "result": result, "mode": mode, "reward_profile": reward_profile})
+        self.played.add((blue, red, seed, mode, reward_profile))
+
+    def games_in(self, mode: str = "float", reward_profile: str = "balanced") -> List[dict]:
+        return [g for g in self.games
+                if g.get("mode", "float") == mode and g.get("reward_profile", "balanced") == reward_profile]
+
+    def pair_count(self, a: str, b: str, mode: str = "float", reward_profile: str = "balanced") -> int:
+        return sum(1 for g in self.games_in(mode, reward_profile) if {g["blue"], g["red"]} == {a, b})
+
+    def standings(self, hashes: Optional[List[str]] = None, mode: str = "float",
+                  reward_profile: str = "balanced") -> List[dict]:
+        """Tabelle eines Profils und Modus (nach Elo absteigend) inkl. Siege/Remis/Niederlagen."""
+        hashes = hashes or list(self.participants)
+        table = {h: {"hash": h, "name": self.participants[h]["name"], "elo": self.rating(h, mode, reward_profile),
+                     "games": 0, "wins": 0, "draws": 0, "losses": 0} for h in hashes}
+        for game in self.games_in(mode, reward_profile):
+            for side, other, score in (("blue", "red", game["result"]), ("red", "blue", 1 - game["result"])):
+                row = table.get(game[side])
+                if row is None or game[other] not in table:
+                    continue
+                row["games"] += 1
+                row["wins" if score == 1 else "losses" if score == 0 else "draws"] += 1
+        return sorted(table.values(), key=lambda r: r["elo"], reverse=True)
+
+    def save(self) -> None:
+        write_json_atomic(self.path, {
+            "updated": datetime.now().isoformat(),
+            "participants": self.participants,
+            "ratings": self.ratings,
+            "games": self.games,
+            "models": self.hashes.entries,
+        }, indent=2)
+
+
+# ========== PAARUNGEN ==========
+
+def match_jobs(store: ResultsStore, a: str, b: str, seeds: List[int], reward_profile: str,
+               mode: str = "float") -> List[dict]:
+    """Jobs für eine Paarung (beide Farbverteilungen), ohne bereits gespielte Spiele."""
+    jobs = []
+    for blue, red in ((a, b), (b, a)):
+        missing = [s for s in seeds if (blue, red, s, mode, reward_profile) not in store.played]
+        if missing:
+            jobs.append({
+                "blue": blue, "red": red,
+                "blue_path": store.participants[blue]["path"],
+                "red_path": store.participants[red]["path"],
+                "seeds": missing,
+                "reward_profile": reward_profile,
+                "mode": mode,
+            })
+    return jobs
+
+
+def round_robin_pairs(hashes: List[str]) -> List[tuple]:
+    return list(combinations(hashes, 2))
+
+
+def swiss_pairs(store: ResultsStore, hashes: List[str], mode: str = "float",
+                reward_profile: str = "balanced") -> List[tuple]:
+    """
+    Eine Schweizer Runde: nach Elo (von Profil und Modus) sortiert, jeweils mit dem
+    nächsten Gegner gepaart, gegen den bisher am wenigsten gespielt wurde.
+    """
+    remaining = sorted(hashes, key=lambda h: store.rating(h, mode, reward_profile), reverse=True)
+    pairs = []
+    while len(remaining) > 1:
+        player = remaining.pop(0)
+        opponent = min(remaining, key=lambda h: (store.pair_count(player, h, mode, reward_profile), remaining.index(h)))
+        remaining.remove(opponent)
+        pairs.append((player, opponent))
+    return pairs
+
+
+# ========== WORKER ==========
+
+_POLICY_CACHE = None
+
+
+def _init_worker(cache_size: int, mode: str = "float") -> None:
+    global _POLICY_CACHE
+    import torch
+    from quantization import load_policy
+
+    torch.set_num_threads(1)  # Parallelität kommt aus dem Prozess-Pool
+    _POLICY_CACHE = PolicyCache(cache_size, loader=partial(load_policy, mode=mode))
+
+
+def run_match_job(job: dict) -> dict:
+    """Spielt alle Seeds einer Farbverteilung gebatcht (läuft im Worker-Prozess)."""
+    if _POLICY_CACHE is None:
+        _init_worker(cache_size=4, mode=job["mode"])
+
+    blue_model = _POLICY_CACHE.get(job["blue_path"], job["blue"], reward_profile=job["reward_profile"])
+    red_model = _POLICY_CACHE.get(job["red_path"], job["red"], reward_profile=job["reward_profile"])
+    replays = rollout_episodes(
+        blue_model, len(job["seeds"]), seeds=job["seeds"],
+        env_kwargs={"reward_profile": job["reward_profile"]}, red_model=red_model,
+    )
+    return {
+        **job,
+        "scores": [(r["metadata"]["final_scores"]["blue"], r["metadata"]["final_scores"]["red"]) for r in replays],
+    }
+
+
+def play_jobs(store: ResultsStore, jobs: List[dict], n_workers: int, mode: str = "float") -> int:
+    """
+    Führt Match-Jobs auf dem Prozess-Pool aus und trägt Ergebnisse in Job-Reihenfolge ein.
+
+    Elo ist reihenfolgeabhängig: Ein fertiger Job wird erst eingetragen, wenn alle Jobs
+    davor eingetragen sind - gleiche Modelle, Seeds und Store ergeben so unabhängig vom
+    Scheduling der Worker dieselben Ratings.
+    """
+    if not jobs:
+        return 0
+    played = 0
+    results = {}       # Job-Index → Ergebnis (None: fehlgeschlagen), noch nicht eingetragen
+    next_index = 0     # Nächster einzutragender Job
+    t_start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=min(n_workers, len(jobs)), initializer=_init_worker, initargs=(4, mode)) as pool:
+        futures = {pool.submit(run_match_job, job): i for i, job in enumerate(jobs)}
+        for done, future in enumerate(as_completed(futures), start=1):
+            try:
+                result = future.result()
+            except Exception as e:
+                print(f"[!] Match fehlgeschlagen: {e}")
+                result = None
+            results[futures[future]] = result
+
+            while next_index in results:
+                ready = results.pop(next_index)
+                next_index += 1
+                if ready is None:
+                    continue
+                for seed, (blue_score, red_score) in zip(ready["seeds"], ready["scores"]):
+                    store.record(ready["blue"], ready["red"], seed, blue_score, red_score, mode,
+                                 ready["reward_profile"])
+                    played += 1
+            store.save()
+            if result is None:
+                continue
+
+            names = store.participants
+            eta = (time.perf_counter() - t_start) / done * (len(jobs) - done)
+            print(f"[+] [{done}/{len(jobs)}] {names[result['blue']]['name']} (Blue) vs "
+                  f"{names[result['red']]['name']} (Red): "
+                  f"{', '.join(f'{b}:{r}' for b, r in result['scores'])} | ETA {eta:.0f}s")
+    return played
+
+
+def run_tournament(model_paths: List[str], fmt: str = "round-robin", rounds: int = 3, games: int = 2,
+                   base_seed: int = 0, reward_profile: str = "balanced", n_workers: Optional[int] = None,
+                   store_path: str | Path = DEFAULT_STORE, mode: str = "float") -> List[dict]:
+    """
+    Spielt ein Turnier und gibt die Tabelle zurück.
+
+    Args:
+        fmt: "round-robin" (jede Paarung) oder "swiss" (rounds Runden nach Elo)
+        games: Spiele pro Paarung und Farbverteilung (Seeds base_seed ...)
+        mode: Inference-Modus der Policies ("float" oder "int8")
+    """
+    n_workers = n_workers or os.cpu_count() or 1
+    store = ResultsStore(store_path)
+    hashes = list(dict.fromkeys(store.register(path) for path in model_paths))
+    store.save()
+    seeds = [base_seed + i for i in range(games)]
+
+    print(f"[*] {len(hashes)} Teilnehmer | Format: {fmt} | {games} Spiele pro Farbverteilung | Modus: {mode} | "
+          f"Profil: {reward_profile}")
+
+    total = 0
+    if fmt == "round-robin":
+        jobs = [job for a, b in round_robin_pairs(hashes)
+                for job in match_jobs(store, a, b, seeds, reward_profile, mode)]
+        print(f"[*] Neue Match-Jobs: {len(jobs)}")
+        total += play_jobs(store, jobs, n_workers, mode)
+    elif fmt == "swiss":
+        for round_index in range(rounds):
+            pairs = swiss_pairs(store, hashes, mode, reward_profile)
+            # Neue Seeds pro Runde, damit Wiederholungspaarungen neue Spiele sind
+            round_seeds = [s + round_index * games for s in seeds]
+            jobs = [job for a, b in pairs for job in match_jobs(store, a, b, round_seeds, reward_profile, mode)]
+            print(f"[*] Runde {round_index + 1}/{rounds}: {len(pairs)} Paarungen, {len(jobs)} neue Match-Jobs")
+            total += play_jobs(store, jobs, n_workers, mode)
+    else:
+        raise ValueError(f"Unknown tournament format: {fmt}")
+
+    store.save()
+    print(f"[+] Neu gespielte Spiele: {total} (im Store: {len(store.games_in(mode, reward_profile))} "
+          f"mit {reward_profile}/{mode}, {len(store.games)} gesamt)")
+    return store.standings(hashes, mode, reward_profile)
+
+
+def print_standings(standings: List[dict]) -> None:
+    print("\n" + "=" * 64)
+    print(f"{'#':>3}  {'Checkpoint':28s} {'Elo':>7} {'Spiele':>7} {'S':>4} {'U':>4} {'N':>4}")
+    print("-" * 64)
+    for rank, row in enumerate(standings, start=1):
+        print(f"{rank:>3}  {row['name'][:28]:28s} {row['elo']:7.1f} {row['games']:7d} "
+              f"{row['wins']:4d} {row['draws']:4d} {row['losses']:4d}")
+    print("=" * 64)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Checkpoint-Turnier mit Elo-Rating")
+    parser.add_argument("models", nargs="+", help="Modell-Dateien (Voll- oder Delta-Checkpoints)")
+    parser.add_argument("--format", choices=["round-robin", "swiss"], default="round-robin")
+    parser.add_argument("--rounds", type=int, default=3, help="Runden (nur swiss)")
+    parser.add_argument("--games", type=int, default=2, help="Spiele pro Paarung und Farbverteilung")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--profile", default="balanced")
+    parser.add_argument("--workers", type=int, default=None, help="Prozesse (Default: Anzahl CPU-Kerne)")
+    parser.add_argument("--store", default=str(DEFAULT_STORE), help="Results-Store (JSON)")
+    parser.add_argument("--mode", choices=["float", "int8"], default="float",
+                        help="Inference-Modus (int8: quantisiert, mit Übereinstimmungs-Check)")
+    args = parser.parse_args()
+
+    standings = run_tournament(
+        args.models, fmt=args.format, rounds=args.rounds, games=args.games, base_seed=args.seed,
+        reward_profile=args.profile, n_workers=args.workers, store_path=args.store, mode=args.mode,
+    )
+    print_standings(standings)
@@ -4,18 +4,32 @@ PPO Training für Capture the Flag.
 WICHTIG: Alle Konfigurationswerte werden aus config.py importiert (Single Source of Truth!)
 """
 
-import os
-import json
+import time
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
+import torch
 from pathlib import Path
 from datetime import datetime
 from stable_baselines3 import PPO
-from stable_baselines3.common.callbacks import BaseCallback, CheckpointCallback
+from stable_baselines3.common.callbacks import BaseCallback
 from stable_baselines3.common.vec_env import VecMonitor
-from supersuit import pettingzoo_env_to_vec_env_v1, concat_vec_envs_v1
 
 from environment import CaptureTheFlagEnv
-from config import ENV_CONFIG, PPO_CONFIG, POLICY_KWARGS, TRAINING_CONFIG
+from lean_vec_env import LeanVecEnv
+from config import ENV_CONFIG, PPO_CONFIG, POLICY_KWARGS, TRAINING_CONFIG, AUTOTUNE_CONFIG, SELF_PLAY_CONFIG, LIVE_CONFIG
+from autotune import load_autotune_cache, run_autotune
+from checkpointing import AsyncCheckpointCallback, remove_run_checkpoints
+from live_events import EventPublisher
+from replay_store import ReplayStore
+from rollout import rollout_episodes
+from self_play import OpponentPool, SelfPlayCallback, SelfPlayVecEnv
+from run_state import (
+    DEFAULT_RUN_ROOT, ResumeStateCallback, load_resume_state, load_run_config,
+    restore_model, restore_training_state, write_run_config,
+)
+from metrics_stream import MetricsStreamWriter, MetricsStreamReader, StreamSummary, truncate_stream, write_json_atomic
+from series_pyramid import export_pyramids
+from hardware import plan_cpu_layout, apply_worker_thread_env, apply_cpu_layout, print_cpu_layout, process_rss_mb
 
 BASE_DIR = Path(__file__).resolve().parent
 PROJECT_ROOT = BASE_DIR.parent
@@ -24,140 +38,358 @@ DEFAULT_MODEL_DIR = BASE_DIR / "models"
 DEFAULT_REPLAY_DIR = PROJECT_ROOT / "visualization" / "replays"
 DEFAULT_TENSORBOARD_DIR = BASE_DIR / "logs"
 
+# config.py speichert Aktivierungsfunktionen als String (JSON-exportierbar)
+ACTIVATION_FNS = {
+    "tanh": torch.nn.Tanh,
+    "relu": torch.nn.ReLU,
+}
+
+
+def build_policy_kwargs() -> dict:
+    """POLICY_KWARGS aus config.py in SB3-Format übersetzen."""
+    policy_kwargs = dict(POLICY_KWARGS)
+    if isinstance(policy_kwargs.get("activation_fn"), str):
+        policy_kwargs["activation_fn"] = ACTIVATION_FNS[policy_kwargs["activation_fn"]]
+    return policy_kwargs
+
 
 class MetricsCallback(BaseCallback):
-    """Erweitertes Callback für Analytics Dashboard."""
+    """
+    Erweitertes Callback für Analytics Dashboard.
+
+    Jeder Messpunkt wird als Zeile an einen append-only Stream gehängt
+    (metrics_stream.py). Im Speicher bleibt nur eine downgesampelte
+    Zusammenfassung, die atomar nach
+    log_path (training_logs.json) geschrieben wird - Schreibkosten wachsen
+    also nicht mehr mit der Laufzeit.
+
+    Mit events (live_events.EventPublisher) geht jeder Record zusätzlich sofort
+    an verbundene Dashboards.
+    """
 
     def __init__(self, log_path: str, save_freq: int = 1000, verbose: int = 1,
-                 model_name: str = "Unknown", total_timesteps: int = 0):
+                 model_name: str = "Unknown", total_timesteps: int = 0,
+                 stream_dir: str | Path = None, max_points: int = 500,
+                 events=None):
         super().__init__(verbose)
+        self.events = events
         self.log_path = log_path
         self.save_freq = save_freq
         self.model_name = model_name
         self.total_timesteps = total_timesteps
+        self.stream_dir = Path(stream_dir) if stream_dir else Path(log_path).parent / "metrics_stream" / model_name
+        self.summary = StreamSummary(max_points)
+        self.writer = None
         self.metrics = {
             "model_name": model_name,
             "total_timesteps": total_timesteps,
             "current_timesteps": 0,
             "progress_percent": 0.0,
             "last_update": None,
-            "timesteps": [],
-            "mean_reward": [],
-            "std_reward": [],
-            "mean_length": [],  # NEU: Wie lange dauert ein Spiel?
-            "episodes": [],
             "max_reward": 0.0,
             "current_mean_reward": 0.0,
+            "performance": {},            # Letzter Snapshot von ThroughputCallback
         }
 
+    def _on_training_start(self) -> None:
+        # Bestehenden Stream (z.B. fortgesetztes Training) in die Zusammenfassung übernehmen
+        for record in MetricsStreamReader(self.stream_dir).iter_all():
+            self.summary.add(record)
+        self.writer = MetricsStreamWriter(self.stream_dir)
+        self.publish_status("running")
+
     def _on_step(self) -> bool:
         if self.n_calls % self.save_freq == 0:
             # ep_info_buffer enthält 'r' (Reward) und 'l' (Length)
             if len(self.model.ep_info_buffer) > 0:
                 rewards = [ep["r"] for ep in self.model.ep_info_buffer]
-                lengths = [ep["l"] for ep in self.model.ep_info_buffer]  # NEU
+                lengths = [ep["l"] for ep in self.model.ep_info_buffer]
 
                 mean_reward = float(np.mean(rewards))
                 max_reward_current = float(np.max(rewards))
-
-                self.metrics["timesteps"].append(self.n_calls)
-                self.metrics["mean_reward"].append(mean_reward)
-                self.metrics["std_reward"].append(float(np.std(rewards)))
-                self.metrics["mean_length"].append(float(np.mean(lengths)))  # NEU
-                self.metrics["episodes"].append(len(self.model.ep_info_buffer))
+                now = datetime.now().isoformat()
+
+                self.append_record({
+                    "type": "metrics",
+                    "timesteps": self.num_timesteps,
+                    "mean_reward": mean_reward,
+                    "std_reward": float(np.std(rewards)),
+                    "mean_length": float(np.mean(lengths)),  # Wie lange dauert ein Spiel?
+                    "episodes": len(self.model.ep_info_buffer),
+                    "time": now,
+                })
 
                 # Update Live-Metriken
-                self.metrics["current_timesteps"] = self.n_calls
+                self.metrics["current_timesteps"] = self.num_timesteps
                 self.metrics["current_mean_reward"] = mean_reward
                 self.metrics["max_reward"] = max(self.metrics["max_reward"], max_reward_current)
                 if self.total_timesteps > 0:
-                    self.metrics["progress_percent"] = (self.n_calls / self.total_timesteps) * 100
-                self.metrics["last_update"] = datetime.now().isoformat()
+                    self.metrics["progress_percent"] = (self.num_timesteps / self.total_timesteps) * 100
+                self.metrics["last_update"] = now
 
-                # Speichern
-                with open(self.log_path, "w") as f:
-                    json.dump(self.metrics, f, indent=2)
+                self.save()
 
                 if self.verbose:
-                    print(f"Step {self.n_calls}: Reward = {mean_reward:.2f}, Length = {np.mean(lengths):.1f}")
+                    print(f"Step {self.num_timesteps}: Reward = {mean_reward:.2f}, Length = {np.mean(lengths):.1f}")
+
+        return True
 
+    def _on_rollout_end(self) -> None:
+        # SB3 loggt nur rollout/ep_rew_mean - Streuung dazu (landet im selben Dump)
+        if len(self.model.ep_info_buffer) > 0:
+            self.logger.record("rollout/ep_rew_std", float(np.std([ep["r"] for ep in self.model.ep_info_buffer])))
+
+    def get_resume_state(self) -> dict:
+        return {"metrics": dict(self.metrics), "timesteps": self.model.num_timesteps}
+
+    def set_resume_state(self, state: dict) -> None:
+        # Records nach dem Snapshot stammen aus dem abgebrochenen Lauf → verwerfen
+        self.metrics.update(state["metrics"])
+        truncate_stream(self.stream_dir, state["timesteps"])
+
+    def append_record(self, record: dict) -> None:
+        """Hängt einen Record an Stream und Zusammenfassung an."""
+        if self.writer is not None:
+            self.writer.append(record)
+        self.summary.add(record)
+        if self.events is not None:
+            self.events.publish(record.get("type", "metrics"), {"run": self.model_name, **record})
+
+    def publish_status(self, state: str) -> None:
+        if self.events is not None:
+            self.events.publish("status", {"run": self.model_name, "state": state,
+                                           "timesteps": self.num_timesteps, "total_timesteps": self.total_timesteps})
+
+    def record_performance(self, stats: dict) -> None:
+        """Nimmt einen Telemetrie-Snapshot von ThroughputCallback auf."""
+        self.metrics["performance"] = dict(stats)
+        self.append_record({
+            "type": "performance",
+            **{key: value for key, value in stats.items() if key != "workers"},
+        })
+        self.save()
+
+    def save(self) -> None:
+        """Schreibt die downgesampelte Zusammenfassung atomar in die Dashboard-Datei."""
+        write_json_atomic(self.log_path, self.summary.to_dict(self.metrics), indent=2)
+
+    def _on_training_end(self) -> None:
+        self.save()
+        self.publish_status("finished")
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+        # Auflösungs-Pyramiden für die Dashboards (nur dieser Run)
+        try:
+            export_pyramids(Path(self.log_path).parent / "series", tb_store=None,
+                            streams_dir=self.stream_dir.parent, runs=[self.stream_dir.name])
+        except Exception as e:
+            print(f"[!] Serien-Export fehlgeschlagen: {e}")
+
+
+class ThroughputCallback(BaseCallback):
+    """
+    Performance-Telemetrie: Env-Steps/Sekunde, Rollout- vs. Update-Zeit,
+    Step-Latenz pro Worker (Perzentile), Policy-Inference pro Batch und RSS.
+
+    Loggt nach jedem Rollout nach TensorBoard (perf/*) und - falls ein
+    MetricsCallback übergeben wird - in dessen Dashboard-Datei.
+    """
+
+    def __init__(self, metrics_callback: "MetricsCallback" = None, verbose: int = 0):
+        super().__init__(verbose)
+        self.metrics_callback = metrics_callback
+        self.rollout_start = None
+        self.rollout_end = None
+        self.rollout_steps_start = 0
+        self.inference_times = []
+        self._inference_t0 = None
+        self._hooks = []
+        self.latest = {}
+
+    def _on_training_start(self) -> None:
+        # Forward-Hooks messen genau die Policy-Aufrufe in collect_rollouts
+        policy = self.model.policy
+        self._hooks = [
+            policy.register_forward_pre_hook(self._start_inference),
+            policy.register_forward_hook(self._stop_inference),
+        ]
+
+    def _start_inference(self, module, inputs) -> None:
+        self._inference_t0 = time.perf_counter()
+
+    def _stop_inference(self, module, inputs, outputs) -> None:
+        if self._inference_t0 is not None:
+            self.inference_times.append(time.perf_counter() - self._inference_t0)
+            self._inference_t0 = None
+
+    def _on_rollout_start(self) -> None:
+        now = time.perf_counter()
+        # Zeit zwischen Rollout-Ende und neuem Rollout = Gradient-Update
+        if self.rollout_end is not None:
+            update_s = now - self.rollout_end
+            self.latest["update_s"] = update_s
+            self.logger.record("perf/update_s", update_s)
+        self.rollout_start = now
+        self.rollout_steps_start = self.num_timesteps
+        self.inference_times = []
+
+    def _on_step(self) -> bool:
         return True
 
+    def _on_rollout_end(self) -> None:
+        self.rollout_end = time.perf_counter()
+        rollout_s = self.rollout_end - self.rollout_start
+        steps = self.num_timesteps - self.rollout_steps_start
+
+        stats = {
+            "timesteps": self.num_timesteps,
+            "rollout_s": rollout_s,
+            "update_s": self.latest.get("update_s"),
+            "env_steps_per_s": steps / rollout_s if rollout_s > 0 else 0.0,
+        }
+
+        if self.inference_times:
+            stats["inference_ms_mean"] = float(np.mean(self.inference_times) * 1000)
+            stats["inference_ms_p95"] = float(np.percentile(self.inference_times, 95) * 1000)
+
+        # Step-Latenz pro Worker (nur mit LeanVecEnv verfügbar)
+        vec_env = self.training_env.unwrapped
+        if hasattr(vec_env, "pop_step_latencies"):
+            worker_latencies = vec_env.pop_step_latencies()
+            per_worker = [
+                {
+                    "p50_ms": float(np.percentile(lat, 50) * 1000),
+                    "p95_ms": float(np.percentile(lat, 95) * 1000),
+                    "p99_ms": float(np.percentile(lat, 99) * 1000),
+                }
+                for lat in worker_latencies if len(lat) > 0
+            ]
+            if per_worker:
+                all_latencies = np.concatenate([lat for lat in worker_latencies if len(lat) > 0])
+                stats["worker_step_ms_p50"] = float(np.percentile(all_latencies, 50) * 1000)
+                stats["worker_step_ms_p99"] = float(np.percentile(all_latencies, 99) * 1000)
+                stats["slowest_worker_p99_ms"] = max(w["p99_ms"] for w in per_worker)
+                stats["workers"] = per_worker
+
+        # Speicher: Learner + alle Worker
+        stats["learner_rss_mb"] = process_rss_mb()
+        worker_pids = getattr(vec_env, "worker_pids", [])
+        if worker_pids:
+            stats["workers_rss_mb"] = sum(process_rss_mb(pid) or 0.0 for pid in worker_pids)
+
+        for key, value in stats.items():
+            if key not in ("timesteps", "workers") and value is not None:
+                self.logger.record(f"perf/{key}", value)
+
+        self.latest.update(stats)
+        if self.metrics_callback is not None:
+            self.metrics_callback.record_performance(self.latest)
+
+        if self.verbose:
+            print(f"⏱️  Rollout {rollout_s:.1f}s | Update {stats['update_s'] or 0:.1f}s | "
+                  f"{stats['env_steps_per_s']:,.0f} steps/s")
+
+    def _on_training_end(self) -> None:
+        # Letztes Update liegt nach dem letzten Rollout → hier nachtragen
+        if self.rollout_end is not None and self.metrics_callback is not None:
+            self.latest["update_s"] = time.perf_counter() - self.rollout_end
+            self.metrics_callback.metrics["performance"] = dict(self.latest)
+            self.metrics_callback.save()
+
+        for hook in self._hooks:
+            hook.remove()
+        self._hooks = []
+
 
 class BestGameCallback(BaseCallback):
     """
     Speichert das Replay, wenn ein neuer Highscore erreicht wurde.
+
+    Das Replay wird gezielt beim betroffenen Env (Index aus infos) per env_method
+    angefordert - funktioniert damit auch über Prozessgrenzen hinweg. Das Schreiben
+    der Datei läuft in einem Hintergrund-Thread und blockiert das Training nicht.
     """
-    def __init__(self, output_dir: str = "../visualization/replays"):
+    def __init__(self, output_dir: str | Path = DEFAULT_REPLAY_DIR, events=None):
         super().__init__(verbose=1)
-        self.output_dir = output_dir
+        self.store = ReplayStore(output_dir)
+        self.events = events
         self.best_reward = -float('inf')
-        os.makedirs(output_dir, exist_ok=True)
+        self._writer = None
+
+    def _on_training_start(self) -> None:
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="replay-writer")
 
     def _on_step(self) -> bool:
-        # 'infos' enthält Infos von allen parallelen Environments
+        # 'infos' enthält Infos von allen parallelen Environments (ein Slot pro Agent)
         infos = self.locals.get("infos", [])
 
+        # Besten neuen Rekord dieses Schritts suchen (Episode-Info via VecMonitor)
+        best_index = None
         for i, info in enumerate(infos):
-            # Prüfen ob Episode beendet ist (via Monitor Wrapper Info)
-            if "episode" in info:
-                episode_reward = info["episode"]["r"]
-
-                # Ist das ein neuer Rekord? (Und nicht nur zufälliges Rauschen am Anfang)
-                if episode_reward > self.best_reward:
-                    self.best_reward = episode_reward
-
-                    # Zugriff auf das Environment - muss unwrappen
-                    try:
-                        # Bei concat_vec_envs_v1 und VecMonitor
-                        if hasattr(self.training_env, 'venv'):
-                            # VecMonitor wrapper
-                            vec_env = self.training_env.venv
-                        else:
-                            vec_env = self.training_env
-
-                        # Jetzt zum eigentlichen env
-                        if hasattr(vec_env, 'par_env'):
-                            # concat_vec_envs_v1 Struktur
-                            env = vec_env.par_env
-                        elif hasattr(vec_env, 'envs'):
-                            env = vec_env.envs[i]
-                        else:
-                            env = vec_env
-
-                        # Unwrap bis zum eigentlichen Environment
-                        while hasattr(env, 'env') and not hasattr(env, 'last_replay'):
-                            env = env.env
-
-                        if hasattr(env, "last_replay"):
-                            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                            filename = f"best_game_reward_{int(episode_reward)}_{timestamp}.json"
-                            filepath = os.path.join(self.output_dir, filename)
-
-                            with open(filepath, "w") as f:
-                                json.dump(env.last_replay, f)
-
-                            if self.verbose > 0:
-                                print(f"\n🏆 Neuer Highscore: {episode_reward:.2f}! Replay gespeichert: {filename}")
-                    except Exception as e:
-                        if self.verbose > 0:
-                            print(f"\n⚠️ Konnte Replay nicht speichern: {e}")
+            if "episode" in info and info["episode"]["r"] > self.best_reward:
+                self.best_reward = info["episode"]["r"]
+                best_index = i
+
+        if best_index is not None:
+            try:
+                # Nach dem Auto-Reset liegt die beendete Episode vorne im Ringpuffer
+                replay = self.training_env.env_method("get_episode_record", 0, indices=[best_index])[0]
+            except Exception as e:
+                replay = None
+                if self.verbose > 0:
+                    print(f"\n⚠️ Konnte Replay nicht abrufen: {e}")
+
+            if replay is not None:
+                self._writer.submit(self._write_replay, replay, self.best_reward, self.num_timesteps)
 
         return True
 
+    def get_resume_state(self) -> dict:
+        return {"best_reward": self.best_reward}
+
+    def set_resume_state(self, state: dict) -> None:
+        self.best_reward = state["best_reward"]
+
+    def _write_replay(self, replay: dict, episode_reward: float, timesteps: int = 0) -> None:
+        """Schreibt ein Replay (läuft im Hintergrund-Thread)."""
+        try:
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            filename = f"best_game_reward_{int(episode_reward)}_{timestamp}.json"
+            self.store.put(replay, filename)
+            if self.events is not None:
+                self.events.publish("best_game", {"reward": float(episode_reward), "file": filename,
+                                                  "timesteps": timesteps,
+                                                  "final_scores": replay.get("metadata", {}).get("final_scores")})
+
+            if self.verbose > 0:
+                print(f"\n🏆 Neuer Highscore: {episode_reward:.2f}! Replay gespeichert: {filename}")
+        except Exception as e:
+            if self.verbose > 0:
+                print(f"\n⚠️ Konnte Replay nicht speichern: {e}")
+
+    def _on_training_end(self) -> None:
+        # Ausstehende Replays fertig schreiben
+        self._writer.shutdown(wait=True)
+
+
+def make_env_kwargs(reward_profile: str = "balanced") -> dict:
+    """Konstruktor-Argumente für CaptureTheFlagEnv aus ENV_CONFIG (picklebar für Worker)."""
+    return {
+        "grid_size": ENV_CONFIG["grid_size"],
+        "max_steps": ENV_CONFIG["max_steps"],
+        "win_score": ENV_CONFIG["win_score"],
+        "stun_duration": ENV_CONFIG["stun_duration"],
+        "tackle_cooldown": ENV_CONFIG["tackle_cooldown"],
+        "tackle_range": ENV_CONFIG["tackle_range"],
+        "carrier_speed_penalty": ENV_CONFIG["carrier_speed_penalty"],
+        "reward_profile": reward_profile,
+    }
+
 
 def make_env(reward_profile: str = "balanced"):
     """Environment Factory - Uses ENV_CONFIG from config.py."""
-    return CaptureTheFlagEnv(
-        grid_size=ENV_CONFIG["grid_size"],
-        max_steps=ENV_CONFIG["max_steps"],
-        win_score=ENV_CONFIG["win_score"],
-        stun_duration=ENV_CONFIG["stun_duration"],
-        tackle_cooldown=ENV_CONFIG["tackle_cooldown"],
-        tackle_range=ENV_CONFIG["tackle_range"],
-        carrier_speed_penalty=ENV_CONFIG["carrier_speed_penalty"],
-        reward_profile=reward_profile,
-    )
+    return CaptureTheFlagEnv(**make_env_kwargs(reward_profile))
 
 
 def create_replay(model_path: str, output_dir: str | Path = None, seed: int = 42, reward_profile: str = "balanced"):
@@ -166,34 +398,17 @@ def create_replay(model_path: str, output_dir: str | Path = None, seed: int = 42
 
     model_path = Path(model_path)
     output_path = Path(output_dir) if output_dir else DEFAULT_REPLAY_DIR
-    output_path.mkdir(parents=True, exist_ok=True)
 
-    env = CaptureTheFlagEnv(reward_profile=reward_profile)
     model = PPO.load(str(model_path))
-
-    obs, info = env.reset(seed=seed)
-    done = False
-
-    while not done:
-        actions = {}
-        for agent in env.agents:
-            action, _ = model.predict(obs[agent], deterministic=True)
-            actions[agent] = int(action)
-
-        obs, rewards, terms, truncs, infos = env.step(actions)
-        done = all(terms.values())
+    replay_data = rollout_episodes(model, seeds=[seed], env_kwargs={"reward_profile": reward_profile})[0]
 
     # Export
-    replay_data = env.get_replay_data()
     replay_data["metadata"]["timestamp"] = datetime.now().isoformat()
     replay_data["metadata"]["model_path"] = str(model_path)
 
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     filename = f"trained_episode_{timestamp}.json"
-    filepath = output_path / filename
-
-    with filepath.open("w") as f:
-        json.dump(replay_data, f, indent=2)
+    filepath = ReplayStore(output_path).put(replay_data, filename)
 
     print(f"   ✅ Replay gespeichert: {filepath}")
     print(f"   📊 Final Score: Blue {replay_data['metadata']['final_scores']['blue']} - {replay_data['metadata']['final_scores']['red']} Red")
@@ -206,7 +421,10 @@ def create_replay(model_path: str, output_dir: str | Path = None, seed: int = 42
 def train(
     total_timesteps: int = None,         # Default from TRAINING_CONFIG
     n_envs: int = None,                  # Default from TRAINING_CONFIG
+    n_workers: int = None,               # Default from TRAINING_CONFIG (None = ein Worker pro Env)
     learning_rate: float = None,         # Default from PPO_CONFIG
+    n_steps: int = None,                 # Default from PPO_CONFIG
+    batch_size: int = None,              # Default from PPO_CONFIG
     save_freq: int = None,               # Default from TRAINING_CONFIG
     log_dir: str | Path = DEFAULT_LOG_DIR,
     model_dir: str | Path = DEFAULT_MODEL_DIR,
@@ -214,17 +432,67 @@ def train(
     run_name: str = None,
     cleanup_checkpoints: bool = False,
     reward_profile: str = "balanced",    # "micromanager", "sparse", or "balanced"
+    resource_config: dict = None,        # Overrides für RESOURCE_CONFIG
+    resume_dir: str | Path = None,       # Run-Verzeichnis eines unterbrochenen Laufs
+    seed: int = None,                    # Seed für Policy-Init und Env-Resets (reproduzierbare Läufe)
+    self_play: bool = None,              # Rot spielt ein Pool eingefrorener Checkpoints (SELF_PLAY_CONFIG)
+    opponents: list = None,              # Checkpoint-Dateien für den Gegner-Pool
+    run_root: str | Path = DEFAULT_RUN_ROOT,
+    live_port: int = None,               # Live-Events per SSE für das Dashboard (LIVE_CONFIG)
 ):
     """Training starten - verwendet Defaults aus config.py."""
+    # Fortsetzen: Einstellungen des ursprünglichen Laufs übernehmen (nur das Ziel darf wachsen)
+    resume_state = None
+    if resume_dir is not None:
+        settings = load_run_config(resume_dir)
+        resume_state = load_resume_state(resume_dir)
+        if resume_state is None:
+            raise FileNotFoundError(f"No resume snapshot in {resume_dir} yet")
+        total_timesteps = total_timesteps or settings["total_timesteps"]
+        n_envs = settings["n_envs"]
+        n_workers = settings["n_workers"]
+        learning_rate = settings["learning_rate"]
+        n_steps = settings["n_steps"]
+        batch_size = settings["batch_size"]
+        save_freq = settings["save_freq"]
+        log_dir = settings["log_dir"]
+        model_dir = settings["model_dir"]
+        run_name = settings["run_name"]
+        reward_profile = settings["reward_profile"]
+        seed = settings.get("seed")
+        self_play = settings.get("self_play", False)
+        opponents = settings.get("opponents", [])
+
+    # Autotune-Ergebnis dieses Hosts füllt nicht explizit gesetzte Werte
+    tuned = load_autotune_cache() if AUTOTUNE_CONFIG["use_cache"] else None
+    if tuned:
+        print(f"⚡ Autotune-Cache gefunden: {tuned}")
+        n_envs = n_envs or tuned["n_envs"]
+        n_workers = n_workers or tuned["n_workers"]
+        n_steps = n_steps or tuned["n_steps"]
+        batch_size = batch_size or tuned["batch_size"]
+
     # Apply defaults from config.py if not specified
     if total_timesteps is None:
         total_timesteps = TRAINING_CONFIG["total_timesteps"]
     if n_envs is None:
         n_envs = TRAINING_CONFIG["n_envs"]
+    if n_workers is None:
+        n_workers = TRAINING_CONFIG["n_workers"] or n_envs
+    n_workers = min(n_workers, n_envs)
     if learning_rate is None:
         learning_rate = PPO_CONFIG["learning_rate"]
+    if n_steps is None:
+        n_steps = PPO_CONFIG["n_steps"]
+    if batch_size is None:
+        batch_size = PPO_CONFIG["batch_size"]
     if save_freq is None:
         save_freq = TRAINING_CONFIG["save_freq"]
+    if self_play is None:
+        self_play = SELF_PLAY_CONFIG["enabled"]
+    if opponents is None:
+        opponents = SELF_PLAY_CONFIG["opponents"]
+    opponents = [str(Path(path).resolve()) for path in opponents]
 
     log_dir = Path(log_dir)
     model_dir = Path(model_dir)
@@ -238,26 +506,63 @@ def train(
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         run_name = f"ctf_{timestamp}"
 
+    run_dir = Path(resume_dir) if resume_dir is not None else Path(run_root) / run_name
+    write_run_config(run_dir, {
+        "run_name": run_name,
+        "total_timesteps": total_timesteps,
+        "n_envs": n_envs,
+        "n_workers": n_workers,
+        "learning_rate": learning_rate,
+        "n_steps": n_steps,
+        "batch_size": batch_size,
+        "save_freq": save_freq,
+        "reward_profile": reward_profile,
+        "seed": seed,
+        "self_play": self_play,
+        "opponents": opponents,
+        "log_dir": str(Path(log_dir).resolve()),
+        "model_dir": str(Path(model_dir).resolve()),
+    })
+
     print("=" * 50)
     print(f"🚩 Capture the Flag Training: '{run_name}'")
     print(f"📊 Reward Profile: {reward_profile.upper()}")
     print("=" * 50)
-    print(f"Timesteps: {total_timesteps:,} | Parallel Envs: {n_envs}")
+    print(f"Timesteps: {total_timesteps:,} | Parallel Envs: {n_envs} | Worker: {n_workers}")
     print(f"Checkpoints: Every {save_freq:,} steps (cleanup={cleanup_checkpoints})")
+    if self_play:
+        print(f"Self-Play: Rot = Gegner-Pool ({len(opponents)} Checkpoints + Learner-Snapshots "
+              f"alle {SELF_PLAY_CONFIG['snapshot_freq']:,} Steps)")
     print(f"Config Source: config.py (Single Source of Truth)")
 
-    # Environment
-    env = make_env(reward_profile=reward_profile)
-    vec_env = pettingzoo_env_to_vec_env_v1(env)
-
-    # Multiprocessing aktiviert: Jedes Environment bekommt einen eigenen CPU-Kern
-    # Das beschleunigt das Training um Faktor 4-6x!
-    vec_env = concat_vec_envs_v1(
-        vec_env,
-        n_envs,
-        num_cpus=n_envs,  # Turbo-Modus: Parallele Ausführung auf allen Kernen
-        base_class="stable_baselines3"
+    # CPU-Layout planen (Learner und Env-Worker auf disjunkten Kernen)
+    cpu_layout = plan_cpu_layout(n_workers=n_workers, resource_config=resource_config)
+    apply_worker_thread_env(cpu_layout["worker_threads"])  # Vor dem Worker-Start setzen!
+
+    # Environment: Schlanke Worker-Prozesse (nur NumPy/gymnasium/environment.py, kein torch)
+    # Jeder Worker simuliert n_envs / n_workers Spiele, SB3 sieht einen Slot pro Agent
+    vec_env = LeanVecEnv(
+        n_games=n_envs,
+        n_workers=n_workers,
+        env_kwargs=make_env_kwargs(reward_profile),
     )
+    print(f"⚙️  {n_workers} Env-Worker gestartet in {vec_env.startup_time:.2f}s")
+
+    # Worker pinnen, danach Learner-Threads begrenzen
+    pinned = apply_cpu_layout(cpu_layout, vec_env.worker_pids)
+    torch.set_num_threads(cpu_layout["torch_threads"])
+    print_cpu_layout(cpu_layout, pinned_workers=pinned)
+
+    # Self-Play: Learner sieht nur Blau, Rot rechnet der Gegner-Pool im Trainingsprozess
+    opponent_pool = None
+    if self_play:
+        opponent_pool = OpponentPool(
+            opponents if resume_state is None else None,  # Beim Fortsetzen kommt der Pool aus dem Snapshot
+            max_size=SELF_PLAY_CONFIG["pool_size"],
+            deterministic=SELF_PLAY_CONFIG["deterministic"],
+        )
+        vec_env = SelfPlayVecEnv(vec_env, opponent_pool, seed=seed)
+
     vec_env = VecMonitor(vec_env)
 
     # Modell laden oder neu erstellen
@@ -281,7 +586,11 @@ def train(
                 load_path_resolved = cand
                 break
 
-    if load_path_resolved and load_path_resolved.exists():
+    if resume_state is not None:
+        print(f"\n⏯️  Setze Lauf fort: {run_dir} (bei {resume_state['num_timesteps']:,} Steps)")
+        model = restore_model(resume_state, vec_env, tensorboard_log=str(tensorboard_dir))
+        reset_timesteps = False
+    elif load_path_resolved and load_path_resolved.exists():
         print(f"\n📂 Lade Modell: {load_path_resolved}")
         model = PPO.load(load_path_resolved, env=vec_env, tensorboard_log=str(tensorboard_dir))
         model.learning_rate = learning_rate
@@ -290,7 +599,8 @@ def train(
         print("\n✨ Erstelle neues Modell (Training von Null)")
         print("   Using hyperparameters from config.py:")
         print(f"   - Learning Rate: {PPO_CONFIG['learning_rate']}")
-        print(f"   - Batch Size: {PPO_CONFIG['batch_size']}")
+        print(f"   - n_steps: {n_steps}")
+        print(f"   - Batch Size: {batch_size}")
         print(f"   - Network: {POLICY_KWARGS['net_arch']}")
 
         model = PPO(
@@ -298,8 +608,8 @@ def train(
             env=vec_env,
             device=PPO_CONFIG["device"],
             learning_rate=learning_rate,  # Kann überschrieben werden
-            n_steps=PPO_CONFIG["n_steps"],
-            batch_size=PPO_CONFIG["batch_size"],
+            n_steps=n_steps,
+            batch_size=batch_size,
             n_epochs=PPO_CONFIG["n_epochs"],
             gamma=PPO_CONFIG["gamma"],
             gae_lambda=PPO_CONFIG["gae_lambda"],
@@ -310,15 +620,29 @@ def train(
             ent_coef=PPO_CONFIG["ent_coef"],
             verbose=PPO_CONFIG["verbose"],
             tensorboard_log=str(tensorboard_dir),
-            policy_kwargs=POLICY_KWARGS
+            policy_kwargs=build_policy_kwargs(),
+            seed=seed,
         )
         reset_timesteps = True
 
+    # Ohne Datei-Gegner spielt der Learner zuerst gegen seine Startgewichte
+    if opponent_pool is not None and resume_state is None and not len(opponent_pool):
+        opponent_pool.add_snapshot(model.policy, f"learner_{model.num_timesteps}")
+
+    # Live-Dashboard: SSE-Server im Hintergrund, Callbacks schieben nur in Queues
+    events = None
+    if live_port is not None:
+        events = EventPublisher()
+        if not events.start(LIVE_CONFIG["host"], live_port):
+            events = None
+
     # Callbacks
-    checkpoint_cb = CheckpointCallback(
-        save_freq=save_freq // n_envs,
-        save_path=str(model_dir),
+    # Snapshot im Hauptthread, Schreiben + Retention im Hintergrund (CHECKPOINT_CONFIG)
+    checkpoint_cb = AsyncCheckpointCallback(
+        save_freq=save_freq,
+        save_path=model_dir,
         name_prefix=run_name,
+        events=events,
     )
 
     metrics_cb = MetricsCallback(
@@ -326,17 +650,31 @@ def train(
         save_freq=1000,
         model_name=run_name,
         total_timesteps=total_timesteps,
+        events=events,
     )
 
-    best_game_cb = BestGameCallback()
+    throughput_cb = ThroughputCallback(metrics_callback=metrics_cb)
+
+    best_game_cb = BestGameCallback(events=events)
+
+    callbacks = [checkpoint_cb, metrics_cb, throughput_cb, best_game_cb]
+    if opponent_pool is not None:
+        callbacks.append(SelfPlayCallback(opponent_pool, snapshot_freq=SELF_PLAY_CONFIG["snapshot_freq"]))
+    resume_cb = ResumeStateCallback(run_dir, TRAINING_CONFIG["resume_freq"], callbacks)
+
+    # SB3 zählt bei reset_num_timesteps=False das Ziel auf num_timesteps drauf
+    learn_timesteps = total_timesteps
+    if resume_state is not None:
+        learn_timesteps = max(0, total_timesteps - model.num_timesteps)
+        restore_training_state(resume_state, model, callbacks)  # Zuletzt: setzt auch die RNGs
 
     # Training
     print(f"\n🚀 Training '{run_name}' startet... (Ziel: {total_timesteps:,} Steps)\n")
 
     try:
         model.learn(
-            total_timesteps=total_timesteps,
-            callback=[checkpoint_cb, metrics_cb, best_game_cb],
+            total_timesteps=learn_timesteps,
+            callback=callbacks + [resume_cb],
             progress_bar=True,
             reset_num_timesteps=reset_timesteps,
         )
@@ -351,13 +689,11 @@ def train(
 
         # Zwischenstände aufräumen
         if cleanup_checkpoints:
-            for ckpt in model_dir.glob(f"{run_name}_*_steps.zip"):
-                try:
-                    ckpt.unlink()
-                except OSError:
-                    pass
+            remove_run_checkpoints(model_dir, run_name)
 
     except KeyboardInterrupt:
+        checkpoint_cb.flush()
+        resume_cb.flush()
         interrupted_path = model_dir / f"{run_name}_interrupted"
         model.save(str(interrupted_path))
         print(f"\n⚠️ Abbruch! Gespeichert als: {interrupted_path}.zip")
@@ -367,7 +703,11 @@ def train(
         create_replay(interrupted_path)
 
     finally:
+        checkpoint_cb.flush()
+        resume_cb.flush()
         vec_env.close()
+        if events is not None:
+            events.close()
 
 
 if __name__ == "__main__":
@@ -378,12 +718,34 @@ if __name__ == "__main__":
                         help=f"Total timesteps (default from config.py: {TRAINING_CONFIG['total_timesteps']:,})")
     parser.add_argument("--envs", type=int, default=None,
                         help=f"Parallel environments (default from config.py: {TRAINING_CONFIG['n_envs']})")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Env worker processes (default: one per environment)")
     parser.add_argument("--load", type=str, default=None, help="Path to model to continue training (.zip)")
     parser.add_argument("--name", type=str, default=None, help="Agent name (e.g. 'Algernon_v2')")
     parser.add_argument("--profile", type=str, default="balanced", choices=["micromanager", "sparse", "balanced"],
                         help="Reward profile: micromanager (dense), sparse (minimal), balanced (recommended)")
+    parser.add_argument("--seed", type=int, default=None, help="Random seed (policy init and environment resets)")
+    parser.add_argument("--resume", type=str, default=None, metavar="RUN_DIR",
+                        help="Continue an interrupted run from its run directory (e.g. runs/Algernon_v2)")
+    parser.add_argument("--self-play", action="store_true",
+                        help="Red is played by a pool of frozen checkpoints, the learner only trains blue")
+    parser.add_argument("--opponents", nargs="+", default=None, metavar="MODEL",
+                        help="Checkpoints for the self-play opponent pool (default: snapshots of the learner)")
+    parser.add_argument("--autotune", action="store_true",
+                        help="Benchmark n_envs/n_workers/n_steps/batch_size on this host and cache the fastest setup")
+    parser.add_argument("--live", type=int, nargs="?", const=LIVE_CONFIG["port"], default=None, metavar="PORT",
+                        help=f"Push live events to the dashboard via SSE (default port: {LIVE_CONFIG['port']})")
     args = parser.parse_args()
 
+    if args.autotune:
+        run_autotune(reward_profile=args.profile)
+        exit(0)
+
+    if args.resume:
+        # Alle übrigen Einstellungen kommen aus <run_dir>/run.json
+        train(total_timesteps=args.timesteps, resume_dir=args.resume, live_port=args.live)
+        exit(0)
+
     print("\n🎮 Starting CTF Training with config.py defaults")
     print(f"   Reward Profile: {args.profile}")
     if args.timesteps:
@@ -395,7 +757,12 @@ if __name__ == "__main__":
     train(
         total_timesteps=args.timesteps,
         n_envs=args.envs,
+        n_workers=args.workers,
         load_path=args.load,
         run_name=args.name,
         reward_profile=args.profile,
+        seed=args.seed,
+        self_play=args.self_play or None,
+        opponents=args.opponents,
+        live_port=args.live,
     )
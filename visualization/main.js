@@ -34,7 +34,12 @@ function init() {
     setupBases();
     setupWalls();
     setupControls();
-    loadAvailableEpisodes();
+    const playUrl = new URLSearchParams(location.search).get('play');
+    if (playUrl) {
+        connectLivePlay(playUrl);
+    } else {
+        loadAvailableEpisodes();
+    }
     animate(0);
 }
 
@@ -214,6 +219,13 @@ function setupControls() {
         updateScene();
     };
 
+    // ←/→ springt 5 s (100 Frames) zurück/vor
+    document.addEventListener('keydown', e => {
+        if (e.target.tagName === 'INPUT' || e.target.tagName === 'SELECT') return;
+        if (e.key === 'ArrowLeft') seekToFrame(currentFrame - 100);
+        if (e.key === 'ArrowRight') seekToFrame(currentFrame + 100);
+    });
+
     document.getElementById('speed').oninput = e => {
         playbackSpeed = parseFloat(e.target.value);
         document.getElementById('speed-val').textContent = playbackSpeed + 'x';
@@ -244,66 +256,174 @@ function setupControls() {
 // Aktuell geladenes Replay (für Kontext)
 let currentReplayInfo = null;
 
-async function loadAvailableEpisodes() {
+// Replay-Katalog (training/replay_catalog.py): Score, Statistik und Modell aller Replays
+// in einer Datei - für Liste, Filter und Sortierung wird kein Replay geöffnet.
+let replayCatalog = [];
+const replayInfos = new Map();   // id → Replay-Info (Titel, Beschreibung, Katalog-Eintrag)
+
+const REPLAY_SORTS = {
+    name: (a, b) => a.file.localeCompare(b.file),
+    newest: (a, b) => (b.timestamp || '').localeCompare(a.timestamp || ''),
+    score: (a, b) => b.score_diff - a.score_diff,
+    captures: (a, b) => totalCaptures(b) - totalCaptures(a)
+};
+
+// Replay-Server (training/replay_server.py): Kopf + erster Abschnitt reichen zum Abspielen,
+// der Rest kommt im Hintergrund; Sprünge laden gezielt den passenden Abschnitt.
+// Ohne Server wird wie bisher die komplette Datei geladen.
+const REPLAY_API = '/api/replays';
+let replayServer = false;
+let chunkFrames = 100;
+let replayToken = 0;   // Replay-Wechsel beendet das Nachladen des vorherigen
+
+function totalCaptures(entry) {
+    const stats = entry.episode_stats || {};
+    return (stats.blue_captures || 0) + (stats.red_captures || 0);
+}
+
+async function loadReplayCatalog() {
+    try {
+        const res = await fetch(REPLAY_API);
+        if (res.ok) {
+            const data = await res.json();
+            replayServer = true;
+            chunkFrames = data.chunk_frames;
+            console.log(`📡 Replay-Server gefunden - Frames werden in Abschnitten zu ${chunkFrames} geladen`);
+            return data.replays;
+        }
+    } catch (err) {
+        // Kein Server (statische Dateien) → Katalog-Datei
+    }
+    try {
+        const res = await fetch('replays/catalog.json', { cache: 'no-cache' });
+        if (!res.ok) return null;
+        const data = await res.json();
+        return Object.entries(data.replays || {}).map(([file, entry]) => ({ file, ...entry }));
+    } catch (err) {
+        return null;
+    }
+}
+
+// Katalog-Eintrag + (falls vorhanden) kuratierte Infos aus EMBEDDED_REPLAYS
+function replayInfoFor(entry) {
+    const embedded = (window.EMBEDDED_REPLAYS || []).find(r => r.filename.split('/').pop() === entry.file);
+    const scores = entry.final_scores || { blue: 0, red: 0 };
+    const label = entry.model ? `${entry.model}${entry.checkpoint ? ' - ' + entry.checkpoint : ''}` : entry.file;
+    return {
+        id: embedded ? embedded.id : entry.file,
+        filename: entry.file,
+        title: embedded ? embedded.title : label,
+        shortDesc: `Blue ${scores.blue} : ${scores.red} Red · ${totalCaptures(entry)} Captures · ${entry.frames} Frames`,
+        description: embedded ? embedded.description : null,
+        tags: embedded ? embedded.tags : (entry.profile ? [entry.profile] : []),
+        catalog: entry
+    };
+}
+
+function setupReplayToolbar(replayList) {
+    if (document.getElementById('replay-model-filter')) return;
+    const models = [...new Set(replayCatalog.map(e => e.model).filter(Boolean))].sort();
+    const toolbar = document.createElement('div');
+    toolbar.className = 'replay-toolbar';
+    toolbar.innerHTML = `
+        <select id="replay-model-filter">
+            <option value="">Alle Modelle</option>
+            ${models.map(m => `<option value="${m}">${m}</option>`).join('')}
+        </select>
+        <select id="replay-sort">
+            <option value="name">Name</option>
+            <option value="newest">Neueste</option>
+            <option value="score">Score-Differenz</option>
+            <option value="captures">Captures</option>
+        </select>
+    `;
+    replayList.parentNode.insertBefore(toolbar, replayList);
+    toolbar.querySelectorAll('select').forEach(el => el.onchange = renderReplayList);
+}
+
+function renderReplayList() {
     const select = document.getElementById('episode-select');
     const replayList = document.getElementById('replay-list');
+    const model = document.getElementById('replay-model-filter')?.value || '';
+    const sort = document.getElementById('replay-sort')?.value || 'name';
+
+    const entries = replayCatalog
+        .filter(entry => !model || entry.model === model)
+        .sort(REPLAY_SORTS[sort]);
+
+    select.innerHTML = '';
+    replayList.innerHTML = '';
+    for (const entry of entries) {
+        const replay = replayInfoFor(entry);
+        replayInfos.set(replay.id, replay);
+        appendReplayItem(select, replayList, replay);
+    }
+    if (currentReplayInfo) {
+        select.value = currentReplayInfo.id;
+        replayList.querySelector(`[data-replay-id="${CSS.escape(currentReplayInfo.id)}"]`)?.classList.add('active');
+    }
+}
 
-    // Embedded Replays aus der Konfiguration laden
-    const embeddedReplays = window.EMBEDDED_REPLAYS || [];
+function appendReplayItem(select, replayList, replay) {
+    // Dropdown-Option
+    const option = document.createElement('option');
+    option.value = replay.id;
+    option.textContent = replay.title;
+    option.dataset.filename = replay.filename;
+    select.appendChild(option);
+
+    // Sidebar-Listen-Item erstellen
+    const listItem = document.createElement('div');
+    listItem.className = 'replay-list-item';
+    listItem.dataset.replayId = replay.id;
+    const primaryTag = replay.tags && replay.tags.length > 0 ? replay.tags[0] : '';
+    listItem.innerHTML = `
+        <div class="replay-name">${replay.title}</div>
+        <div class="replay-desc">${replay.shortDesc || ''}</div>
+        ${primaryTag ? `<div class="replay-badge badge-${primaryTag}">${primaryTag}</div>` : ''}
+    `;
+
+    // Click Event
+    listItem.addEventListener('click', async () => {
+        // Alle anderen deaktivieren
+        document.querySelectorAll('.replay-list-item').forEach(item => {
+            item.classList.remove('active');
+        });
+        listItem.classList.add('active');
 
-    let loaded = false;
+        // Replay laden
+        await loadEpisodeById(replay.id);
+        select.value = replay.id;
+    });
 
-    for (const replay of embeddedReplays) {
-        try {
-            const res = await fetch(`replays/${replay.filename}`, { method: 'HEAD' });
-            if (res.ok) {
-                // Dropdown-Option
-                const option = document.createElement('option');
-                option.value = replay.id;
-                option.textContent = replay.title;
-                option.dataset.filename = replay.filename;
-                select.appendChild(option);
-
-                // Sidebar-Listen-Item erstellen
-                const listItem = document.createElement('div');
-                listItem.className = 'replay-list-item';
-                listItem.dataset.replayId = replay.id;
-                const primaryTag = replay.tags && replay.tags.length > 0 ? replay.tags[0] : '';
-                listItem.innerHTML = `
-                    <div class="replay-name">${replay.title}</div>
-                    <div class="replay-desc">${replay.shortDesc || ''}</div>
-                    ${primaryTag ? `<div class="replay-badge badge-${primaryTag}">${primaryTag}</div>` : ''}
-                `;
-
-                // Click Event
-                listItem.addEventListener('click', async () => {
-                    // Alle anderen deaktivieren
-                    document.querySelectorAll('.replay-list-item').forEach(item => {
-                        item.classList.remove('active');
-                    });
-                    listItem.classList.add('active');
-
-                    // Replay laden
-                    await loadEpisodeById(replay.id);
-                    select.value = replay.id;
-                });
+    replayList.appendChild(listItem);
+}
 
-                replayList.appendChild(listItem);
+async function loadAvailableEpisodes() {
+    const select = document.getElementById('episode-select');
+    const replayList = document.getElementById('replay-list');
 
-                // Lade das erste verfügbare Replay
-                if (!loaded) {
-                    await loadEpisodeById(replay.id);
-                    select.value = replay.id;
-                    listItem.classList.add('active');
-                    loaded = true;
-                }
-            }
-        } catch (err) {
-            console.log(`Replay ${replay.filename} nicht gefunden`);
+    replayCatalog = await loadReplayCatalog();
+    if (replayCatalog) {
+        setupReplayToolbar(replayList);
+        renderReplayList();
+    } else {
+        // Ohne Katalog: kuratierte Liste ungeprüft anzeigen (fehlende Dateien melden sich beim Laden)
+        replayCatalog = [];
+        for (const replay of window.EMBEDDED_REPLAYS || []) {
+            const info = { ...replay, filename: replay.filename.split('/').pop() };
+            replayInfos.set(info.id, info);
+            appendReplayItem(select, replayList, info);
         }
     }
 
-    if (!loaded) {
+    // Lade das erste verfügbare Replay
+    const first = replayList.querySelector('.replay-list-item');
+    if (first) {
+        await loadEpisodeById(first.dataset.replayId);
+        select.value = first.dataset.replayId;
+        first.classList.add('active');
+    } else {
         document.getElementById('loading').innerHTML = `
             <p>⚠️ Keine Episode gefunden</p>
             <p style="color:#888;font-size:0.8rem;margin-top:10px;">
@@ -317,9 +437,8 @@ async function loadAvailableEpisodes() {
 
 // Replay anhand der ID laden
 async function loadEpisodeById(replayId) {
-    const embeddedReplays = window.EMBEDDED_REPLAYS || [];
-    const replayInfo = embeddedReplays.find(r => r.id === replayId);
-    
+    const replayInfo = replayInfos.get(replayId);
+
     if (replayInfo) {
         currentReplayInfo = replayInfo;
         await loadEpisode(replayInfo.filename);
@@ -327,6 +446,20 @@ async function loadEpisodeById(replayId) {
     }
 }
 
+// Beschreibung aus dem Katalog-Eintrag (für Replays ohne kuratierten Text)
+function catalogDescription(entry) {
+    if (!entry) return '';
+    const stats = entry.episode_stats || {};
+    return `
+        <p><span class="highlight">${entry.model || 'Unbekanntes Modell'}</span>
+           ${entry.checkpoint ? ` · ${entry.checkpoint} Steps` : ''}${entry.profile ? ` · Profil ${entry.profile}` : ''}</p>
+        <p>Endstand <strong>Blue ${entry.final_scores.blue} : ${entry.final_scores.red} Red</strong>
+           nach ${entry.frames} Frames</p>
+        <p>Captures ${stats.blue_captures || 0}/${stats.red_captures || 0} ·
+           Stuns ${stats.blue_stuns || 0}/${stats.red_stuns || 0}</p>
+    `;
+}
+
 // Kontext-Panel aktualisieren
 function updateReplayContext(replayInfo) {
     const titleEl = document.getElementById('replay-title');
@@ -343,7 +476,8 @@ function updateReplayContext(replayInfo) {
     }
     
     titleEl.textContent = replayInfo.title || 'Unbenanntes Replay';
-    descEl.innerHTML = replayInfo.description || '<p>Keine Beschreibung verfügbar.</p>';
+    descEl.innerHTML = replayInfo.description || catalogDescription(replayInfo.catalog)
+        || '<p>Keine Beschreibung verfügbar.</p>';
     
     // Tags anzeigen
     tagsEl.innerHTML = '';
@@ -369,12 +503,72 @@ function updateReplayContext(replayInfo) {
     }
 }
 
+// Kopf + erster Abschnitt vom Server; frames hat schon die volle Länge (fehlende = undefined)
+async function loadEpisodeHead(filename) {
+    const res = await fetch(`${REPLAY_API}/${encodeURIComponent(filename)}`);
+    if (!res.ok) throw new Error(`Replay nicht gefunden (HTTP ${res.status})`);
+    const head = await res.json();
+    const data = {
+        metadata: head.metadata,
+        frames: new Array(head.total),
+        file: filename,
+        token: ++replayToken,
+        chunks: new Map()   // Abschnitts-Start → Promise
+    };
+    await loadChunk(data, 0);
+    return data;
+}
+
+function loadChunk(data, frame) {
+    const start = frame - frame % chunkFrames;
+    if (!data.chunks.has(start)) {
+        const url = `${REPLAY_API}/${encodeURIComponent(data.file)}/frames?from=${start}&to=${start + chunkFrames}`;
+        data.chunks.set(start, fetch(url)
+            .then(res => {
+                if (!res.ok) throw new Error(`HTTP ${res.status}`);
+                return res.json();
+            })
+            .then(chunk => chunk.frames.forEach((f, i) => { data.frames[chunk.from + i] = f; }))
+            .catch(err => {
+                data.chunks.delete(start);   // Beim nächsten Zugriff erneut versuchen
+                throw err;
+            }));
+    }
+    return data.chunks.get(start);
+}
+
+// Restliche Abschnitte nacheinander nachladen, während schon abgespielt wird
+async function streamRemainingChunks(data) {
+    for (let start = chunkFrames; start < data.frames.length; start += chunkFrames) {
+        if (data.token !== replayToken) return;
+        try {
+            await loadChunk(data, start);
+        } catch (err) {
+            console.warn(`⚠️ Abschnitt ab Frame ${start} nicht geladen:`, err);
+            return;
+        }
+    }
+    console.log(`✅ Alle ${data.frames.length} Frames geladen: ${data.file}`);
+}
+
+// Zu einem Frame springen - nur der passende Abschnitt wird (vor)geladen
+async function seekToFrame(frame) {
+    if (!replayData) return;
+    const target = Math.max(0, Math.min(frame, replayData.frames.length - 1));
+    if (!replayData.frames[target] && replayData.chunks) {
+        await loadChunk(replayData, target);
+    }
+    currentFrame = target;
+    updateScene();
+}
+
 async function loadEpisode(filename) {
     document.getElementById('loading').style.display = 'block';
 
     try {
-        const res = await fetch(`replays/${filename}`);
-        const data = await res.json();
+        const data = replayServer
+            ? await loadEpisodeHead(filename)
+            : await (await fetch(`replays/${filename}`)).json();
 
         if (!data.frames || !Array.isArray(data.frames) || data.frames.length === 0) {
             throw new Error('Keine Frames in der Episode');
@@ -418,6 +612,10 @@ async function loadEpisode(filename) {
         
         console.log(`✅ Episode geladen: ${filename} (${data.frames.length} Frames)`);
 
+        if (data.chunks) {
+            streamRemainingChunks(data);
+        }
+
     } catch (err) {
         console.error('Load error:', err);
         document.getElementById('loading').innerHTML = `
@@ -511,6 +709,79 @@ function loadEpisodeFromFile(file) {
     reader.readAsText(file);
 }
 
+// =====================
+// LIVE-PLAY (training/live_play.py)
+// =====================
+
+// ?play=ws://127.0.0.1:8765 - Frames kommen in Echtzeit vom Server statt aus einem Replay.
+// Der Server gibt das Tempo vor, angezeigt wird immer das neueste Frame (Pause hält das Bild an).
+function connectLivePlay(url) {
+    const loading = document.getElementById('loading');
+    loading.style.display = 'block';
+    loading.innerHTML = `<p>🎮 Verbinde mit Live-Server ${url}…</p>`;
+
+    const socket = new WebSocket(url);
+    socket.onopen = () => socket.send(JSON.stringify({ type: 'start' }));
+    socket.onmessage = event => {
+        const message = JSON.parse(event.data);
+        if (message.type === 'match') {
+            startLiveMatch(message);
+        } else if (message.type === 'frame' && replayData?.live) {
+            showLiveFrame(message.frame);
+        } else if (message.type === 'end') {
+            const s = message.final_scores;
+            console.log(`🏁 Match ${message.match}: Blue ${s.blue} : ${s.red} Red - nächstes Spiel startet`);
+        } else if (message.type === 'stats') {
+            console.log(`📡 Live: ${message.matches} Matches · Latenz p50 ${message.latency_p50_ms} ms, ` +
+                        `p95 ${message.latency_p95_ms} ms · verspätete Ticks ${message.late_ticks}`);
+        } else if (message.type === 'error') {
+            loading.style.display = 'block';
+            loading.innerHTML = `<p>⚠️ ${message.message}</p>`;
+        }
+    };
+    socket.onclose = () => {
+        loading.style.display = 'block';
+        loading.innerHTML = `
+            <p>⚠️ Verbindung zum Live-Server getrennt</p>
+            <p style="color:#888;font-size:0.8rem;margin-top:10px;">
+                Starte den Server mit: python live_play.py --blue models/&lt;Modell&gt;.zip
+            </p>
+        `;
+    };
+}
+
+function startLiveMatch(message) {
+    const metadata = message.metadata;
+    tackle_cooldown = metadata.tackle_cooldown;
+    stun_duration = metadata.stun_duration;
+    setupWalls(metadata.walls);
+
+    replayData = { metadata, frames: [], live: true };
+    currentFrame = 0;
+    currentReplayInfo = {
+        id: `live-${message.match}`,
+        filename: null,
+        title: `Live: ${metadata.blue_model} vs. ${metadata.red_model}`,
+        description: `<p>Live-Match ${message.match} mit ${metadata.fps} FPS (Seed ${metadata.seed}).</p>`,
+        tags: ['live']
+    };
+    updateReplayContext(currentReplayInfo);
+}
+
+function showLiveFrame(frame) {
+    if (replayData.frames.length === 0) {
+        // Erstes Frame: Agenten und Flaggen aufbauen
+        replayData.frames[0] = frame;
+        clearAgents();
+        createAgents();
+        createFlags();
+        document.getElementById('loading').style.display = 'none';
+        updateReplayContext(currentReplayInfo);
+    } else if (isPlaying) {
+        replayData.frames[0] = frame;
+    }
+}
+
 function clearAgents() {
     Object.values(agentMeshes).forEach(m => scene.remove(m));
     Object.values(flagMeshes).forEach(m => scene.remove(m));
@@ -1219,12 +1490,15 @@ function updateFlagStatusUI(frame) {
 function animate(timestamp) {
     requestAnimationFrame(animate);
 
-    if (isPlaying && replayData) {
+    if (isPlaying && replayData && !replayData.live) {
         const elapsed = timestamp - lastFrameTime;
         if (elapsed > FRAME_DURATION / playbackSpeed) {
-            currentFrame++;
-            if (currentFrame >= replayData.frames.length) {
-                currentFrame = 0;
+            const nextFrame = (currentFrame + 1) % replayData.frames.length;
+            if (replayData.frames[nextFrame]) {
+                currentFrame = nextFrame;
+            } else if (replayData.chunks) {
+                // Abschnitt noch unterwegs: auf dem aktuellen Frame warten
+                loadChunk(replayData, nextFrame).catch(() => {});
             }
             lastFrameTime = timestamp;
         }